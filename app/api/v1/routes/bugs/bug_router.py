@@ -11,8 +11,11 @@ from app.models.schemas.bug import (
 from app.services.bug_service import (
     create_bug, get_bug, update_bug, delete_bug,
     create_bug_relation,
-    search_bugs
+    search_bugs,
+    export_bugs, BUG_EXPORT_COLUMNS
 )
+from app.services.export_service import export_response
+from app.services.rbac import get_accessible_project_ids
 from app.api.v1.routes.emails.email_routes import send_bug_assignment_email
 
 # Import sub-routers 
@@ -119,6 +122,19 @@ async def search_bugs_post_endpoint(
             detail=str(e)
         )
 
+@router.get("/export")
+async def export_bugs_endpoint(
+    tracker_id: Optional[str] = Query(None),
+    format: str = Query("ndjson", description="ndjson or csv"),
+    current_user: dict = Depends(verify_token),
+    search_params: BugSearchParams = Depends()
+):
+    """Stream every bug matching the search filters as NDJSON or CSV (sorting/paging params are ignored)."""
+    # Only the caller's projects are read, never the whole table
+    project_ids = await get_accessible_project_ids(current_user["id"])
+    chunks = export_bugs(tracker_id, search_params, project_ids=project_ids)
+    return export_response(chunks, format, f"bugs-{tracker_id}" if tracker_id else "bugs", BUG_EXPORT_COLUMNS)
+
 @router.get("/{bug_id}", response_model=BugWithRelations)
 async def get_bug_by_id(
     bug_id: str = Path(..., description="The ID of the bug to retrieve"),
@@ -1,31 +1,27 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
 from typing import List, Optional
+from app.config.settings import LIST_PAGE_SIZE_MAX
 from app.services.auth_handler import verify_token
-from app.services.bug_service import get_bug_activity_logs, get_activity_detail
+from app.services.bug_service import get_bug_activity_logs, get_activity_detail as fetch_activity_detail
 from app.models.schemas.bug import BugActivityLogInDB
+from app.utils.pagination import clamp_limit, paginate, set_next_cursor
 
 router = APIRouter(prefix="/history", tags=["bug_history"])
 
 @router.get("", response_model=List[BugActivityLogInDB])
 async def get_bug_history(
     bug_id: str,
-    limit: int = Query(100000, ge=1, description="Number of history items to return"),
-    offset: int = Query(0, ge=0, description="Number of items to skip"),
+    response: Response,
+    limit: int = Query(100, ge=1, description=f"Page size (at most {LIST_PAGE_SIZE_MAX})"),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor of the previous page"),
     current_user: dict = Depends(verify_token)
 ):
-    """Get activity history for a bug."""
-    try:
-        result = await get_bug_activity_logs(
-            bug_id=bug_id,
-            limit=limit,
-            offset=offset
-        )
-        return result.data if result.data else []
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=str(e)
-        )
+    """Activity history of a bug, newest first; further pages via the X-Next-Cursor response header."""
+    limit = clamp_limit(limit)
+    rows = await get_bug_activity_logs(bug_id=bug_id, limit=limit + 1, cursor=cursor)
+    rows, next_cursor = paginate(rows, limit, "created_at", "id", True)
+    set_next_cursor(response, next_cursor)
+    return rows
 
 @router.get("/{activity_id}", response_model=BugActivityLogInDB)
 async def get_activity_detail(
@@ -34,14 +30,13 @@ async def get_activity_detail(
     current_user: dict = Depends(verify_token)
 ):
     """Get details of a specific activity log entry."""
-    try:
-        result = await get_activity_detail(
-            bug_id=bug_id,
-            activity_id=activity_id
-        )
-        return result.data if result.data else None
-    except Exception as e:
+    activity = await fetch_activity_detail(
+        bug_id=bug_id,
+        activity_id=activity_id
+    )
+    if not activity:
         raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=str(e)
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Activity not found"
         )
+    return activity
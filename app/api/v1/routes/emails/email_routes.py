@@ -1,3 +1,7 @@
+import asyncio
+import html
+from urllib.parse import quote
+
 from fastapi import APIRouter, HTTPException
 # from pydantic import BaseModel, EmailStr, ValidationError
 
@@ -31,6 +35,9 @@ from_email: Email = Email(default_sender, 'TasksMate Team')
 
 default_web_link:str = os.getenv("DEFAULT_WEB_LINK","https://tasksmate.indrasol.com")
 
+# Bug fields whose values are too long for a watcher email
+BUG_EMAIL_NAME_ONLY_FIELDS = {"description", "environment", "steps_to_reproduce", "expected_result", "actual_result"}
+
 # class EmailValidator(BaseModel):
 #     email: EmailStr
 
@@ -133,6 +140,46 @@ async def send_task_assignment_email(task_data: TaskInDB):
         logger.error(f"Error sending task assignment email: {str(e)}")
         raise HTTPException(status_code=500, detail="Failed to send task assignment email.")
 
+async def send_task_assignments_email(assignee: str, tasks: list, assigned_by: str):
+    """
+    Sends one email listing every task just assigned to a user (batch task creation).
+    """
+    try:
+        if not assignee or assignee == assigned_by:
+            return {"success": False, "message": "Self assignment - no mail sent."}
+
+        user = await get_user_details_by_username(assignee)
+        email = user.get("email")
+
+        items = ""
+        for task in tasks:
+            link = f"{default_web_link}/tasks/{quote(str(task.get('task_id')), safe='')}"
+            if task.get("org_id"):
+                link += f"?org_id={quote(str(task.get('org_id')), safe='')}"
+            items += f'<li><a href="{link}">{_email_text(task.get("title") or task.get("task_id"))}</a></li>'
+
+        subject = f"TasksMate - You've been assigned {len(tasks)} tasks" if len(tasks) > 1 else "TasksMate - You've been assigned a task"
+
+        greeting = f"<p>Hi <strong>{_email_text(assignee, 40)}</strong>,</p>"
+        body = (
+            f"<strong>{_email_text(assigned_by, 40)}</strong> just assigned you {len(tasks)} task(s) on <strong>TasksMate</strong>:<br>"
+            f"<ul>{items}</ul>"
+            f"You can track their progress, collaborate, and mark them complete directly from your workspace."
+        )
+
+        html_content = generate_email_html(
+            title="Tasks Assigned",
+            greeting=greeting,
+            body=body,
+            cta_text="View Tasks",
+            cta_link=f"{default_web_link}/tasks",
+        )
+
+        return await send_mail_to_user(email, subject, html_content)
+
+    except Exception as e:
+        logger.error(f"Error sending task assignments email: {str(e)}")
+
 @router.post("/send-task-comment-email")
 async def send_task_comment_email(task_data: TaskCommentInDB):
     """
@@ -320,6 +367,52 @@ async def send_bug_comment_email(bug_comment_data: BugCommentInDB):
 
     return {"success": True, "message": "Bug comment email sent successfully"}
 
+def _email_text(value, limit: int = 80) -> str:
+    """User-supplied text for an email body: one line, at most ``limit`` characters, HTML-escaped."""
+    text = " ".join(str(value).split()) if value is not None else ""
+    if len(text) > limit:
+        text = text[:limit - 1].rstrip() + "\u2026"
+    return html.escape(text)
+
+async def send_bug_watcher_email(watcher: str, email: str, bugs: list):
+    """
+    Sends one email summarizing the recent changes to the bugs a user is watching.
+    """
+    items = ""
+    for bug in bugs:
+        link = f"{default_web_link}/tester-zone/bugs/{quote(str(bug.get('bug_id')), safe='')}"
+        changes = ", ".join(
+            # Long text (description, steps) is only named, not quoted
+            _email_text(field) if field in BUG_EMAIL_NAME_ONLY_FIELDS
+            else f"{_email_text(field)}: {_email_text(change.get('old') or '-', 40)} &rarr; {_email_text(change.get('new') or '-', 40)}"
+            for field, change in bug.get("changes", {}).items()
+        )
+        comments = len(bug.get("comments") or [])
+        details = "; ".join(filter(None, [changes, f"{comments} new comment(s)" if comments else ""]))
+        actors = ", ".join(_email_text(actor, 40) for actor in bug.get("actors") or [])
+        items += (
+            f'<li><a href="{link}">{_email_text(bug.get("title") or bug.get("bug_id"))}</a>'
+            f' by {actors}{": " + details if details else ""}</li>'
+        )
+
+    subject = f"TasksMate - {len(bugs)} bugs you watch changed" if len(bugs) > 1 else "TasksMate - A bug you watch changed"
+
+    greeting = f"<p>Hi <strong>{_email_text(watcher, 40)}</strong>,</p>"
+    body = (
+        f"There are updates on bugs you are watching on <strong>TasksMate</strong>:<br>"
+        f"<ul>{items}</ul>"
+    )
+
+    html_content = generate_email_html(
+        title="Watched Bugs Updated",
+        greeting=greeting,
+        body=body,
+        cta_text="View Bugs",
+        cta_link=f"{default_web_link}/tester-zone",
+    )
+
+    return await send_mail_to_user(email, subject, html_content)
+
 def generate_email_html(title: str, greeting: str, body: str, cta_text: str, cta_link: str) -> str:
     year = datetime.now().year
     return f'''
@@ -419,7 +512,8 @@ async def send_mail_to_user(email: str, subject: str, html_content: str):
             html_content=Content('text/html', html_content)
         )
 
-        response = sg.send(message)
+        # The SendGrid client blocks on its HTTP call: keep it off the event loop
+        response = await asyncio.to_thread(sg.send, message)
         logger.info(f"SendGrid Status: {response.status_code}")
         logger.debug(f"SendGrid Response Body: {response.body}")
         logger.debug(f"SendGrid Response Headers: {response.headers}")
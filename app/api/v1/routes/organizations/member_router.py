@@ -1,10 +1,12 @@
 from typing import List, Optional
-from fastapi import APIRouter, Depends, Query, HTTPException
+from fastapi import APIRouter, Depends, Query, HTTPException, Response
 from app.api.v1.routes.organizations.org_rbac import org_rbac
 from app.models.schemas.organization_member import OrganizationMemberCreate, OrganizationMemberUpdate, OrganizationMemberInDB
 from app.services.organization_member_service import create_organization_member, get_organization_member, update_organization_member, delete_organization_member, get_members_for_org
 from app.services.auth_handler import verify_token
 from app.services.rbac import get_org_role
+from app.config.settings import LIST_PAGE_SIZE_MAX
+from app.utils.pagination import check_sort, clamp_limit, paginate, set_next_cursor
 
 router = APIRouter()
 
@@ -21,12 +23,16 @@ async def create_member(member: OrganizationMemberCreate, user=Depends(verify_to
     result = await create_organization_member({**member.dict(), "created_by": user["username"]})
     return result.data[0]
 
+MEMBER_SORT_KEYS = ("updated_at", "invited_at", "email", "username", "role", "user_id")
+
 @router.get("/{org_id}", response_model=List[OrganizationMemberInDB])
 async def list_org_members(
     org_id: str,
+    response: Response,
     search: Optional[str] = Query(None),
-    limit: int = Query(100000, ge=1),
+    limit: int = Query(LIST_PAGE_SIZE_MAX, ge=1),
     offset: int = Query(0, ge=0),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor of the previous page"),
     sort_by: str = Query("updated_at"),
     sort_order: str = Query("asc"),
     role: Optional[str] = Query(None),
@@ -37,7 +43,12 @@ async def list_org_members(
     role_check = await get_org_role(user["id"], org_id)
     if not role_check:
         raise HTTPException(status_code=403, detail="Not a member of this organization")
-    return await get_members_for_org(org_id, search=search, limit=limit, offset=offset, sort_by=sort_by, sort_order=sort_order, role=role, is_active=is_active)
+    check_sort(sort_by, MEMBER_SORT_KEYS)
+    limit = clamp_limit(limit)
+    rows = await get_members_for_org(org_id, search=search, limit=limit + 1, offset=offset, sort_by=sort_by, sort_order=sort_order, role=role, is_active=is_active, cursor=cursor)
+    members, next_cursor = paginate(rows, limit, sort_by, "user_id", sort_order == "desc")
+    set_next_cursor(response, next_cursor)
+    return members
 
 @router.get("/{user_id}/{org_id}", response_model=OrganizationMemberInDB)
 async def read_member(user_id: str, org_id: str, user=Depends(verify_token), role=Depends(org_rbac)):
@@ -1,32 +1,18 @@
+from fastapi import Depends, HTTPException
+from app.services.auth_handler import RequestContext, get_request_context
 
-from fastapi import Request, Depends, HTTPException
-from typing import Optional
-from app.services.auth_handler import verify_token
-from app.services.rbac import get_org_role
+async def org_rbac(ctx: RequestContext = Depends(get_request_context)) -> str:
+    # Authenticate first so a missing token is a 401, not a 400
+    await ctx.user()
 
-async def org_rbac(request: Request, user=Depends(verify_token)) -> str:
-    org_id: Optional[str] = None
-
-    # 1. Query parameters
-    org_id = request.query_params.get("org_id")
-
-    # 2. Path parameters
-    if not org_id:
-        org_id = request.path_params.get("org_id")
-
-    # 3. Body (only for methods that support a body)
-    if not org_id and request.method in {"POST", "PUT", "PATCH", "DELETE"}:
-        try:
-            body = await request.json()
-            org_id = body.get("org_id")
-        except Exception:
-            pass  # Ignore malformed or missing JSON
+    # Query parameters, then path parameters, then the JSON body (parsed once per request)
+    org_id = await ctx.param("org_id")
 
     if not org_id:
         raise HTTPException(status_code=400, detail="org_id is required for RBAC")
 
-    # 4. Check user's role in the org
-    role = await get_org_role(user["id"], org_id)
+    # Check user's role in the org
+    role = await ctx.org_role(org_id)
     if not role:
         raise HTTPException(status_code=403, detail="Access denied")
     # else:
@@ -1,31 +1,18 @@
-from fastapi import Request, Depends, HTTPException
-from typing import Optional
-from app.services.auth_handler import verify_token
-from app.services.rbac import get_project_role
+from fastapi import Depends, HTTPException
+from app.services.auth_handler import RequestContext, get_request_context
 
-async def project_rbac(request: Request, user=Depends(verify_token)) -> str:
-    project_id: Optional[str] = None
+async def project_rbac(ctx: RequestContext = Depends(get_request_context)) -> str:
+    # Authenticate first so a missing token is a 401, not a 400
+    await ctx.user()
 
-    # 1. Query parameters
-    project_id = request.query_params.get("project_id")
-
-    # 2. Path parameters
-    if not project_id:
-        project_id = request.path_params.get("project_id")
-
-    # 3. Body (only for methods that support a body)
-    if not project_id and request.method in {"POST", "PUT", "PATCH", "DELETE"}:
-        try:
-            body = await request.json()
-            project_id = body.get("project_id")
-        except Exception:
-            pass  # Ignore malformed or missing JSON
+    # Query parameters, then path parameters, then the JSON body (parsed once per request)
+    project_id = await ctx.param("project_id")
 
     if not project_id:
         raise HTTPException(status_code=400, detail="project_id is required for RBAC")
 
-    # 4. Check user's role in the org
-    role = await get_project_role(user["id"], project_id)
+    # Check user's role in the project
+    role = await ctx.project_role(project_id)
     if not role:
         raise HTTPException(status_code=403, detail="Access denied")
     # else:
@@ -1,11 +1,12 @@
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
 from app.api.v1.routes.organizations.org_rbac import org_rbac
 from app.api.v1.routes.projects.proj_rbac import project_rbac
 from app.models.enums import DesignationEnum, RoleEnum
 from app.models.schemas.project import ProjectCard, ProjectCreate, ProjectUpdate, ProjectInDB
 from app.services.project_service import create_project, get_project, update_project, delete_project, get_projects_for_user, get_project_card, get_all_org_projects
 from app.services.auth_handler import verify_token
+from app.services.dependency_graph import dependency_graphs
 from app.services.project_member_service import create_project_member, update_project_member
 from app.services.role_service import get_role_by_name
 from app.services.utils import inject_audit_fields
@@ -183,6 +184,21 @@ async def read_project(project_id: str, user=Depends(verify_token), proj_role=De
         raise HTTPException(status_code=404, detail="Not found")
     return result.data
 
+@router.get("/{project_id}/dependency-graph")
+async def read_dependency_graph(
+    project_id: str,
+    task_id: Optional[str] = Query(None, description="Also list this task's direct and transitive blockers"),
+    user=Depends(verify_token),
+    proj_role=Depends(project_rbac),
+):
+    """Task dependency graph of a project: nodes in topological order, the critical path and (optionally) one task's blockers."""
+    if not proj_role:
+        raise HTTPException(status_code=403, detail="Not authorized")
+    graph = await dependency_graphs.get(project_id)
+    if task_id is not None and task_id not in graph:
+        raise HTTPException(status_code=404, detail="Task not found in this project")
+    return graph.to_dict(task_id)
+
 @router.put("/{project_id}", response_model=ProjectInDB)
 async def update_project_route(project_id: str, project: ProjectUpdate, user=Depends(verify_token), proj_role=Depends(project_rbac)):
     if proj_role not in ["owner", "admin"]:
@@ -2,13 +2,13 @@ from typing import List, Optional
 from fastapi import APIRouter, Depends, File, Form, HTTPException, Query, UploadFile, status
 from app.models.schemas.project_resource import ProjectResourceCreate, ProjectResourceUpdate, ProjectResourceInDB
 from app.services.project_resource_service import create_project_resource, get_project_resource, update_project_resource, delete_project_resource, get_resources_for_project, upload_and_create_project_resource
-from app.services.auth_handler import verify_token
+from app.services.auth_handler import RequestContext, get_request_context, verify_token
 from app.services.rbac import get_project_role
 
 router = APIRouter()
 
-async def project_rbac(project_id: str, user=Depends(verify_token)):
-    role = await get_project_role(user["id"], project_id)
+async def project_rbac(project_id: str, ctx: RequestContext = Depends(get_request_context)):
+    role = await ctx.project_role(project_id)
     if not role:
         raise HTTPException(status_code=403, detail="Not a member of this project")
     return role
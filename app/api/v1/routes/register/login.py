@@ -1,10 +1,11 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, BackgroundTasks, HTTPException
 # from datetime import timedelta
-from app.utils.logger import log_info
+from app.utils.logger import log_info, log_error
 from fastapi import Depends, HTTPException
 # from fastapi.security import OAuth2PasswordRequestForm
 from app.core.db.supabase_db import get_supabase_client, safe_supabase_operation
 from app.services.auth_handler import verify_token, verify_api_key
+from app.services.rbac import preload_user_roles
 
 
 router = APIRouter()
@@ -31,8 +32,16 @@ async def get_email(request_data: dict, api_key: str = Depends(verify_api_key)):
     
 
 
+async def _preload_roles(user_id: str):
+    try:
+        await preload_user_roles(user_id)
+    except Exception as e:
+        # Only a cache warm-up; roles are still resolved on demand
+        log_error(f"Role preload failed for {user_id}: {e}")
+
+
 @router.post("/login")
-async def login(identifier: dict, current_user: dict = Depends(verify_token)):
+async def login(identifier: dict, background_tasks: BackgroundTasks, current_user: dict = Depends(verify_token)):
     
     try:
         # supabase = get_supabase_client()
@@ -55,6 +64,8 @@ async def login(identifier: dict, current_user: dict = Depends(verify_token)):
         #     "email": user_data["email"]
         # }
 
+        # Warm the role cache after the response is sent
+        background_tasks.add_task(_preload_roles, current_user["id"])
         return current_user
 
     except Exception as e:
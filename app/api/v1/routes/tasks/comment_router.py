@@ -1,9 +1,11 @@
 from typing import List, Optional
-from fastapi import APIRouter, Depends, Query, HTTPException, status
+from fastapi import APIRouter, Depends, Query, HTTPException, Response, status
 from pydantic import BaseModel
 from app.models.schemas.task_comment import TaskCommentCreate, TaskCommentUpdate, TaskCommentInDB
 from app.services.task_comment_service import create_task_comment, get_task_comment, update_task_comment, delete_task_comment, get_comments_for_task
 from app.services.auth_handler import verify_token
+from app.config.settings import LIST_PAGE_SIZE_MAX
+from app.utils.pagination import check_sort, clamp_limit, paginate, set_next_cursor
 # from app.api.v1.routes.projects.proj_rbac import project_rbac
 from app.api.v1.routes.emails.email_routes import send_task_comment_email
 
@@ -92,12 +94,16 @@ async def reply_to_comment(reply: ReplyCreate, user=Depends(verify_token), role=
             detail=str(e)
         )
 
+COMMENT_SORT_KEYS = ("created_at", "updated_at", "comment_id")
+
 @router.get("", response_model=List[TaskCommentInDB])
 async def list_task_comments(
+    response: Response,
     task_id: str = Query(..., description="ID of the task to get comments for"),
     search: Optional[str] = Query(None, description="Search term to filter comments"),
-    limit: int = Query(100000, ge=1, description="Number of comments to return"),
+    limit: int = Query(LIST_PAGE_SIZE_MAX, ge=1, description="Number of comments to return"),
     offset: int = Query(0, ge=0, description="Number of comments to skip"),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor of the previous page"),
     sort_by: str = Query("created_at", description="Field to sort by"),
     sort_order: str = Query("asc", description="Sort order (asc or desc)"),
     user=Depends(verify_token)
@@ -106,19 +112,27 @@ async def list_task_comments(
     Get all comments for a task, including nested replies.
     
     Returns a tree structure where each comment may have a 'replies' array
-    containing its direct replies.
+    containing its direct replies. Pages cover root comments; the next page's
+    cursor is returned in the X-Next-Cursor header.
     """
+    check_sort(sort_by, COMMENT_SORT_KEYS)
+    limit = clamp_limit(limit)
     try:
         # Note: The service layer now handles the tree structure
-        comments = await get_comments_for_task(
+        rows = await get_comments_for_task(
             task_id,
             search=search,
-            limit=limit,
+            limit=limit + 1,
             offset=offset,
             sort_by=sort_by,
-            sort_order=sort_order
+            sort_order=sort_order,
+            cursor=cursor
         )
+        comments, next_cursor = paginate(rows, limit, sort_by, "comment_id", sort_order == "desc")
+        set_next_cursor(response, next_cursor)
         return comments
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
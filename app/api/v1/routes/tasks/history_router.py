@@ -1,7 +1,10 @@
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, Query
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from fastapi.responses import JSONResponse
+from app.config.settings import LIST_PAGE_SIZE_MAX
 from app.models.schemas.task_history import TaskHistoryInDB
-from app.services.task_history_service import  get_task_history
+from app.services.task_history_service import get_latest_task_history, get_task_history
+from app.utils.pagination import clamp_limit, paginate, set_next_cursor
 from app.services.auth_handler import verify_token
 # from app.services.rbac import get_project_role
 # from app.services.task_history_service import create_task_history
@@ -12,11 +15,28 @@ router = APIRouter()
 # Align with POST path (no trailing slash) so GET /task-history works
 @router.get("", response_model=List[TaskHistoryInDB], status_code=200)
 async def read_history(
+    response: Response,
     task_id: str = Query(..., description="ID of the task to get history for"),
     title: str | None = Query(None, description="Optional task title to disambiguate sequential reuse of task_id"),
+    limit: int = Query(100, ge=1, description=f"Page size (at most {LIST_PAGE_SIZE_MAX})"),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor of the previous page"),
     user=Depends(verify_token)
 ):
-    return await get_task_history(task_id, title)
+    """Newest first; further pages via the X-Next-Cursor response header."""
+    limit = clamp_limit(limit)
+    rows = await get_task_history(task_id, title, limit=limit + 1, cursor=cursor)
+    rows, next_cursor = paginate(rows, limit, "created_at", "history_id", True)
+    set_next_cursor(response, next_cursor)
+    return rows
+
+@router.get("/latest", status_code=200)
+async def read_latest_history(
+    task_id: str = Query(..., description="ID of the task to get history for"),
+    n: int = Query(10, ge=1, le=100, description="Number of events"),
+    user=Depends(verify_token)
+):
+    """The n newest events, returned as stored (no per-row model validation)."""
+    return JSONResponse(await get_latest_task_history(task_id, n))
 
 async def project_rbac(project_id: str, user=Depends(verify_token)):
     # role = await get_project_role(user["id"], project_id)
@@ -1,11 +1,15 @@
-from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, Query, Body
+from typing import Any, Dict, List, Optional
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Body, Response
+from pydantic import ValidationError
 # from app.api.v1.routes.projects.proj_rbac import project_rbac
-from app.models.schemas.task import TaskCreate, TaskUpdate, TaskInDB, TaskCardView
-from app.services.task_service import create_task, get_task, update_task, delete_task, get_all_tasks, get_tasks_for_project, add_subtask, remove_subtask, add_dependency, remove_dependency
+from app.models.schemas.task import TaskCreate, TaskUpdate, TaskInDB, TaskCardView, TaskLinkChange
+from app.services.task_service import TASK_EXPORT_COLUMNS, create_task, create_tasks_bulk, export_tasks, get_task, get_task_row, get_task_tree, update_task, delete_task, get_all_tasks, get_tasks_for_project, add_subtask, remove_subtask, add_dependency, remove_dependency, apply_task_links
 from app.services.auth_handler import verify_token
-from app.services.rbac import get_project_role
-from app.api.v1.routes.emails.email_routes import send_task_assignment_email
+from app.services.export_service import export_response
+from app.services.rbac import get_accessible_project_ids, get_project_role, get_project_roles
+from app.api.v1.routes.emails.email_routes import send_task_assignment_email, send_task_assignments_email
+from app.config.settings import LIST_PAGE_SIZE_MAX, TASK_BATCH_MAX_ITEMS
+from app.utils.pagination import check_sort, clamp_limit, paginate, set_next_cursor
 
 router = APIRouter()
 
@@ -24,24 +28,117 @@ async def create_task_route(task: TaskCreate, user=Depends(verify_token)):
     await send_task_assignment_email(result.data[0])
     return result.data[0]
 
+@router.post("/batch")
+async def create_tasks_batch_route(
+    background_tasks: BackgroundTasks,
+    tasks: List[Dict[str, Any]] = Body(...),
+    user=Depends(verify_token),
+):
+    """Create up to TASK_BATCH_MAX_ITEMS tasks in one request.
+
+    Each item is validated as a TaskCreate; valid items the caller may create
+    (member of the target project) are inserted together. The response lists
+    one result per item, in request order. Assignees get one email each for
+    all the tasks assigned to them.
+    """
+    if len(tasks) > TASK_BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=f"At most {TASK_BATCH_MAX_ITEMS} tasks per batch")
+
+    results: List[Optional[Dict[str, Any]]] = [None] * len(tasks)
+    valid = []
+    for index, item in enumerate(tasks):
+        try:
+            valid.append((index, TaskCreate(**item)))
+        except ValidationError as exc:
+            errors = [{"loc": list(err["loc"]), "msg": err["msg"]} for err in exc.errors()]
+            results[index] = {"index": index, "ok": False, "error": errors}
+
+    roles = await get_project_roles((user["id"], task.project_id) for _, task in valid)
+    allowed = []
+    for index, task in valid:
+        if roles.get((str(user["id"]), task.project_id)):
+            allowed.append((index, task))
+        else:
+            results[index] = {"index": index, "ok": False, "error": "Not a member of this project"}
+
+    created = await create_tasks_bulk([{**task.model_dump(), "created_by": user["username"]} for _, task in allowed]) if allowed else []
+    by_assignee: Dict[str, List[dict]] = {}
+    for (index, _), result in zip(allowed, created):
+        results[index] = {"index": index, **result}
+        if result["ok"] and result["task"].get("assignee"):
+            by_assignee.setdefault(result["task"]["assignee"], []).append(result["task"])
+
+    for assignee, assigned in by_assignee.items():
+        background_tasks.add_task(send_task_assignments_email, assignee, assigned, user["username"])
+
+    created_count = sum(1 for result in results if result["ok"])
+    return {"created": created_count, "failed": len(results) - created_count, "results": results}
+
+@router.post("/links")
+async def apply_task_links_route(changes: List[TaskLinkChange], user=Depends(verify_token)):
+    """Attach/detach subtasks and dependencies of many tasks at once, all or nothing."""
+    if len(changes) > TASK_BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=f"At most {TASK_BATCH_MAX_ITEMS} changes per request")
+    tasks = await apply_task_links([change.model_dump() for change in changes], user["id"], user["username"])
+    return {"updated": len(tasks), "tasks": tasks}
+
+TASK_SORT_KEYS = ("title", "created_at", "updated_at", "due_date", "status", "priority", "task_id")
+
 @router.get("", response_model=List[TaskCardView])
 async def list_all_tasks(
+    response: Response,
     user=Depends(verify_token),
     org_id: Optional[str] = Query(None),
     project_id: Optional[str] = Query(None),
     search: Optional[str] = Query(None),
-    limit: int = Query(100000, ge=1),
+    limit: int = Query(LIST_PAGE_SIZE_MAX, ge=1),
     offset: int = Query(0, ge=0),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor of the previous page"),
     sort_by: str = Query("title"),
     sort_order: str = Query("asc"),
     status: Optional[str] = Query(None)
 ):
+    check_sort(sort_by, TASK_SORT_KEYS)
+    limit = clamp_limit(limit)
+    desc = sort_order.lower() == "desc"
     if project_id:
         role = await get_project_role(user["id"], project_id)
         if not role:
             raise HTTPException(status_code=403, detail="Not a member of this project")
-        return await get_tasks_for_project(project_id, search=search, limit=limit, offset=offset, sort_by=sort_by, sort_order=sort_order, status=status, org_id=org_id)
-    return await get_all_tasks(search=search, limit=limit, offset=offset, sort_by=sort_by, sort_order=sort_order, status=status, org_id=org_id)
+        rows = await get_tasks_for_project(project_id, search=search, limit=limit + 1, offset=offset, sort_by=sort_by, sort_order=sort_order, status=status, org_id=org_id, cursor=cursor)
+        tasks, next_cursor = paginate(rows, limit, sort_by, "task_id", desc)
+        set_next_cursor(response, next_cursor)
+        return tasks
+    # Only the caller's projects are queried (one cached bulk role lookup), so
+    # every page is full and nobody else's rows are read
+    project_ids = await get_accessible_project_ids(user["id"], org_id)
+    if not project_ids:
+        return []
+    rows = await get_all_tasks(search=search, limit=limit + 1, offset=offset, sort_by=sort_by, sort_order=sort_order, status=status, org_id=org_id, cursor=cursor, project_ids=project_ids)
+    tasks, next_cursor = paginate(rows, limit, sort_by, "task_id", desc)
+    set_next_cursor(response, next_cursor)
+    return tasks
+
+@router.get("/export")
+async def export_tasks_route(
+    user=Depends(verify_token),
+    project_id: Optional[str] = Query(None),
+    org_id: Optional[str] = Query(None),
+    status: Optional[str] = Query(None),
+    search: Optional[str] = Query(None),
+    format: str = Query("ndjson", description="ndjson or csv"),
+):
+    """Stream every matching task (subtasks included) as NDJSON or CSV."""
+    project_ids = None
+    if project_id:
+        role = await get_project_role(user["id"], project_id)
+        if not role:
+            raise HTTPException(status_code=403, detail="Not a member of this project")
+    else:
+        # Only the caller's projects are read, never the whole table
+        project_ids = await get_accessible_project_ids(user["id"], org_id)
+    chunks = export_tasks(project_id=project_id, org_id=org_id, status=status, search=search, project_ids=project_ids)
+    return export_response(chunks, format, "tasks", TASK_EXPORT_COLUMNS)
 
 @router.get("/{task_id}", response_model=TaskInDB)
 async def read_task(task_id: str, user=Depends(verify_token)):
@@ -50,6 +147,23 @@ async def read_task(task_id: str, user=Depends(verify_token)):
         raise HTTPException(status_code=404, detail="Not found")
     return result.data
 
+@router.get("/{task_id}/tree")
+async def read_task_tree(
+    task_id: str,
+    depth: int = Query(3, ge=0, le=10, description="Subtask levels below the task"),
+    include_dependencies: bool = Query(True),
+    user=Depends(verify_token),
+):
+    """A task with its subtasks (and their dependencies) nested down to ``depth`` levels."""
+    # Check access on the root row before fanning out over the subtree
+    root = await get_task_row(task_id)
+    if not root:
+        raise HTTPException(status_code=404, detail="Not found")
+    project_id = root.get("project_id")
+    if project_id and not await get_project_role(user["id"], project_id):
+        raise HTTPException(status_code=403, detail="Not a member of this project")
+    return await get_task_tree(task_id, depth=depth, include_dependencies=include_dependencies, root=root, user_id=user["id"])
+
 @router.put("/{task_id}", response_model=TaskInDB)
 async def update_task_route(task_id: str, task: TaskUpdate, user=Depends(verify_token)):
     # if role not in ["owner", "admin"]:
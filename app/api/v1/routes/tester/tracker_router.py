@@ -1,5 +1,5 @@
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from app.api.v1.routes.organizations.org_rbac import org_rbac
 # from app.api.v1.routes.projects.proj_rbac import project_rbac
 from app.models.schemas.tracker import TrackerCreate, TrackerStatsView, TrackerUpdate, TrackerInDB, TrackerCardView
@@ -13,7 +13,9 @@ from app.services.tracker_service import (
     get_trackers_for_org
 )
 from app.services.auth_handler import verify_token
-from app.services.rbac import get_org_role, get_project_role
+from app.services.rbac import get_accessible_project_ids, get_org_role, get_project_role
+from app.config.settings import LIST_PAGE_SIZE_MAX
+from app.utils.pagination import check_sort, clamp_limit, paginate, set_next_cursor
 
 router = APIRouter()
 
@@ -40,14 +42,18 @@ async def create_tracker_route(tracker: TrackerCreate, user=Depends(verify_token
     
     return result.data[0]
 
+TRACKER_SORT_KEYS = ("created_at", "name", "status", "priority", "tracker_id")
+
 @router.get("/{org_id}", response_model=List[TrackerCardView])
 async def list_trackers(
     org_id: str,
+    response: Response,
     user=Depends(verify_token),
     org_role=Depends(org_rbac),
     search: Optional[str] = Query(None),
-    limit: int = Query(100000, ge=1),
+    limit: int = Query(LIST_PAGE_SIZE_MAX, ge=1),
     offset: int = Query(0, ge=0),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor of the previous page"),
     sort_by: str = Query("created_at"),
     sort_order: str = Query("desc"),
     status: Optional[str] = Query(None),
@@ -58,21 +64,34 @@ async def list_trackers(
     """Get all test trackers for an organization with optional filtering."""
     if not org_role:
         raise HTTPException(status_code=403, detail="Not authorized to access this organization")
+    check_sort(sort_by, TRACKER_SORT_KEYS)
+    limit = clamp_limit(limit)
+    # Members only see trackers of projects they can access: the query is
+    # limited to those up front (one cached bulk role lookup), so pages stay full
+    project_ids = None
+    if org_role not in ["owner", "admin"]:
+        project_ids = await get_accessible_project_ids(user["id"], org_id)
+        if not project_ids:
+            return []
     
     result = await get_trackers_for_org(
         org_id=org_id,
         search=search,
-        limit=limit,
+        limit=limit + 1,
         offset=offset,
         sort_by=sort_by,
         sort_order=sort_order,
         status=status,
         project_id=project_id,
         creator_id=creator_id,
-        priority=priority
+        priority=priority,
+        cursor=cursor,
+        project_ids=project_ids
     )
-    
-    return result.data
+
+    trackers, next_cursor = paginate(result.data or [], limit, sort_by, "tracker_id", sort_order.lower() == "desc")
+    set_next_cursor(response, next_cursor)
+    return trackers
 
 @router.get("/detail/{tracker_id}", response_model=TrackerStatsView)
 async def get_tracker_route(tracker_id: str, user=Depends(verify_token)):
@@ -65,4 +65,111 @@ BUG_ATTACHMENTS_BUCKET_TM = os.getenv("BUG_ATTACHMENTS_BUCKET_TM")
 # Email test mode
 EMAIL_TEST_MODE = os.getenv("EMAIL_TEST_MODE", "false").lower() == "true"
 EMAIL_TEST_REDIRECT = os.getenv("EMAIL_TEST_REDIRECT", "").strip()  # Optional: redirect all emails here
-EMAIL_TEST_SUBJECT_PREFIX = os.getenv("EMAIL_TEST_SUBJECT_PREFIX", "[TEST] ")
\ No newline at end of file
+EMAIL_TEST_SUBJECT_PREFIX = os.getenv("EMAIL_TEST_SUBJECT_PREFIX", "[TEST] ")
+
+# Async Supabase HTTP pool (shared by PostgREST and Storage on the async path)
+SUPABASE_HTTP2 = os.getenv("SUPABASE_HTTP2", "true").lower() == "true"
+SUPABASE_HTTP_MAX_CONNECTIONS = int(os.getenv("SUPABASE_HTTP_MAX_CONNECTIONS", "100"))
+SUPABASE_HTTP_MAX_KEEPALIVE = int(os.getenv("SUPABASE_HTTP_MAX_KEEPALIVE", "20"))
+SUPABASE_HTTP_KEEPALIVE_EXPIRY = float(os.getenv("SUPABASE_HTTP_KEEPALIVE_EXPIRY", "30"))
+SUPABASE_HTTP_TIMEOUT = float(os.getenv("SUPABASE_HTTP_TIMEOUT", "30"))
+
+# DB executor (thread pool behind run_supabase_async)
+DB_EXECUTOR_MAX_WORKERS = int(os.getenv("DB_EXECUTOR_MAX_WORKERS", str(min(32, (os.cpu_count() or 1) + 4))))
+DB_EXECUTOR_MAX_QUEUE = int(os.getenv("DB_EXECUTOR_MAX_QUEUE", "256"))
+DB_OPERATION_TIMEOUT = float(os.getenv("DB_OPERATION_TIMEOUT", "30"))
+
+# Single-flight coalescing of identical concurrent read queries
+DB_SINGLE_FLIGHT_ENABLED = os.getenv("DB_SINGLE_FLIGHT_ENABLED", "true").lower() == "true"
+
+# Retry policy and circuit breaker for safe_supabase_operation
+DB_RETRY_MAX_ATTEMPTS = int(os.getenv("DB_RETRY_MAX_ATTEMPTS", "3"))
+DB_RETRY_BASE_DELAY = float(os.getenv("DB_RETRY_BASE_DELAY", "0.1"))
+DB_RETRY_MAX_DELAY = float(os.getenv("DB_RETRY_MAX_DELAY", "2.0"))
+DB_RETRY_BUDGET_RATIO = float(os.getenv("DB_RETRY_BUDGET_RATIO", "0.2"))
+DB_RETRY_BUDGET_MIN_PER_SECOND = float(os.getenv("DB_RETRY_BUDGET_MIN_PER_SECOND", "5"))
+DB_BREAKER_FAILURE_THRESHOLD = int(os.getenv("DB_BREAKER_FAILURE_THRESHOLD", "5"))
+DB_BREAKER_RESET_TIMEOUT = float(os.getenv("DB_BREAKER_RESET_TIMEOUT", "30"))
+DB_BREAKER_HALF_OPEN_MAX_CALLS = int(os.getenv("DB_BREAKER_HALF_OPEN_MAX_CALLS", "1"))
+
+# Direct asyncpg engine for hot reads (optional, see app/core/db/pg_engine.py)
+DATABASE_URL = os.getenv("DATABASE_URL")
+PG_DIRECT_FUNCTIONS = {f.strip() for f in os.getenv("PG_DIRECT_FUNCTIONS", "").split(",") if f.strip()}
+PG_POOL_MIN_SIZE = int(os.getenv("PG_POOL_MIN_SIZE", "1"))
+PG_POOL_MAX_SIZE = int(os.getenv("PG_POOL_MAX_SIZE", "10"))
+PG_STATEMENT_CACHE_SIZE = int(os.getenv("PG_STATEMENT_CACHE_SIZE", "100"))
+
+# In-memory Supabase stand-in for offline load tests (see app/core/db/memory_supabase.py)
+SUPABASE_BACKEND = os.getenv("SUPABASE_BACKEND", "supabase").lower()
+SUPABASE_MEMORY_LATENCY_MS = float(os.getenv("SUPABASE_MEMORY_LATENCY_MS", "0"))
+SUPABASE_MEMORY_LATENCY_JITTER_MS = float(os.getenv("SUPABASE_MEMORY_LATENCY_JITTER_MS", "0"))
+SUPABASE_MEMORY_SEED = os.getenv("SUPABASE_MEMORY_SEED")
+
+# Event loop stall watchdog (see app/core/loop_monitor.py)
+LOOP_MONITOR_ENABLED = os.getenv("LOOP_MONITOR_ENABLED", "true").lower() == "true"
+LOOP_MONITOR_INTERVAL_MS = float(os.getenv("LOOP_MONITOR_INTERVAL_MS", "50"))
+LOOP_STALL_THRESHOLD_MS = float(os.getenv("LOOP_STALL_THRESHOLD_MS", "100"))
+LOOP_MONITOR_STRICT = os.getenv("LOOP_MONITOR_STRICT", "false").lower() == "true"
+
+# verify_token claim cache (entries also expire with the token's exp)
+AUTH_TOKEN_CACHE_SIZE = int(os.getenv("AUTH_TOKEN_CACHE_SIZE", "1024"))
+AUTH_TOKEN_CACHE_TTL = float(os.getenv("AUTH_TOKEN_CACHE_TTL", "300"))
+
+# Membership role cache for get_org_role / get_project_role (seconds; 0 entries disables)
+ROLE_CACHE_TTL = float(os.getenv("ROLE_CACHE_TTL", "30"))
+ROLE_CACHE_NEGATIVE_TTL = float(os.getenv("ROLE_CACHE_NEGATIVE_TTL", "10"))
+ROLE_CACHE_MAX_ENTRIES = int(os.getenv("ROLE_CACHE_MAX_ENTRIES", "10000"))
+# How often (seconds) a worker re-reads role_cache_generation
+# (supabase/migrations/20251023_role_cache_generation.sql) and drops its role
+# cache when another worker changed a membership; 0 checks on every lookup.
+# This is what makes a revoked role stop working in every uvicorn worker, so
+# it is on by default. Until the migration is applied each read fails and
+# clears the cache (safe, it just caches less). Negative turns it off and leaves
+# ROLE_CACHE_TTL as the only bound, which is only safe with a single worker
+ROLE_CACHE_SYNC_INTERVAL = float(os.getenv("ROLE_CACHE_SYNC_INTERVAL", "2"))
+# Resolve project roles with the get_effective_project_role(s) / get_user_roles
+# database functions (supabase/migrations/20251016_effective_roles.sql). Off by
+# default: turn it on once the migration is applied, the RPCs fail without it
+RBAC_DB_FUNCTIONS = os.getenv("RBAC_DB_FUNCTIONS", "false").lower() == "true"
+# Lease on the node id each worker embeds in generated record IDs
+# (app/core/id_allocator.py, supabase/migrations/20251026_id_allocator_nodes.sql),
+# renewed every third of it
+ID_NODE_LEASE_SECONDS = int(os.getenv("ID_NODE_LEASE_SECONDS", "600"))
+# Maximum number of tasks accepted by one POST /tasks/batch request
+TASK_BATCH_MAX_ITEMS = int(os.getenv("TASK_BATCH_MAX_ITEMS", "500"))
+# Largest page the list endpoints return; longer lists continue via X-Next-Cursor
+LIST_PAGE_SIZE_MAX = int(os.getenv("LIST_PAGE_SIZE_MAX", "500"))
+# Rows fetched per round trip by the streaming /tasks/export and /bugs/export
+EXPORT_CHUNK_SIZE = int(os.getenv("EXPORT_CHUNK_SIZE", "1000"))
+# Per-process cache of project dependency graphs (app/services/dependency_graph.py)
+DEPENDENCY_GRAPH_TTL = float(os.getenv("DEPENDENCY_GRAPH_TTL", "60"))
+DEPENDENCY_GRAPH_MAX_PROJECTS = int(os.getenv("DEPENDENCY_GRAPH_MAX_PROJECTS", "256"))
+# Most tasks GET /tasks/{id}/tree returns before it stops expanding and marks the tree truncated
+TASK_TREE_MAX_NODES = int(os.getenv("TASK_TREE_MAX_NODES", "500"))
+# Cached totals of bug searches (count=cached), per tracker and filter set; dropped
+# when a bug of the tracker is created, updated or deleted in this worker
+BUG_COUNT_CACHE_TTL = float(os.getenv("BUG_COUNT_CACHE_TTL", "60"))
+BUG_COUNT_CACHE_MAX_ENTRIES = int(os.getenv("BUG_COUNT_CACHE_MAX_ENTRIES", "5000"))
+# Write-behind journal for task history (app/core/db/write_behind.py): rows per
+# bulk upsert, longest wait before a partial flush, queue bound (writers wait
+# when it is full) and how long shutdown waits to write what is left
+HISTORY_FLUSH_SIZE = int(os.getenv("HISTORY_FLUSH_SIZE", "200"))
+HISTORY_FLUSH_INTERVAL_MS = float(os.getenv("HISTORY_FLUSH_INTERVAL_MS", "500"))
+HISTORY_QUEUE_MAX = int(os.getenv("HISTORY_QUEUE_MAX", "10000"))
+HISTORY_DRAIN_TIMEOUT = float(os.getenv("HISTORY_DRAIN_TIMEOUT", "10"))
+# Bug activity log (bug_activity_logs): written through its own write-behind
+# journal with the same knobs, and old/new values whose JSON is larger than
+# BUG_ACTIVITY_COMPRESS_BYTES are stored zlib-compressed (0 disables)
+BUG_ACTIVITY_FLUSH_SIZE = int(os.getenv("BUG_ACTIVITY_FLUSH_SIZE", "200"))
+BUG_ACTIVITY_FLUSH_INTERVAL_MS = float(os.getenv("BUG_ACTIVITY_FLUSH_INTERVAL_MS", "500"))
+BUG_ACTIVITY_QUEUE_MAX = int(os.getenv("BUG_ACTIVITY_QUEUE_MAX", "10000"))
+BUG_ACTIVITY_COMPRESS_BYTES = int(os.getenv("BUG_ACTIVITY_COMPRESS_BYTES", "2048"))
+# Watcher notifications for bug changes (app/core/fanout.py): events arriving within
+# BUG_NOTIFY_WINDOW_MS are coalesced into one notification per watcher, at most
+# BUG_NOTIFY_CONCURRENCY are sent at once and events beyond BUG_NOTIFY_QUEUE_MAX are
+# dropped. Watcher lists are cached per bug and dropped when a watcher is added/removed
+BUG_NOTIFY_WINDOW_MS = float(os.getenv("BUG_NOTIFY_WINDOW_MS", "2000"))
+BUG_NOTIFY_CONCURRENCY = int(os.getenv("BUG_NOTIFY_CONCURRENCY", "10"))
+BUG_NOTIFY_QUEUE_MAX = int(os.getenv("BUG_NOTIFY_QUEUE_MAX", "10000"))
+BUG_WATCHER_CACHE_TTL = float(os.getenv("BUG_WATCHER_CACHE_TTL", "300"))
+BUG_WATCHER_CACHE_MAX_ENTRIES = int(os.getenv("BUG_WATCHER_CACHE_MAX_ENTRIES", "10000"))
@@ -0,0 +1,137 @@
+from typing import Optional
+import httpx
+from postgrest import AsyncPostgrestClient
+from storage3 import AsyncStorageClient
+from app.config.settings import (
+    SUPABASE_PROJECT_URL,
+    SUPABASE_API_KEY,
+    SUPABASE_SERVICE_KEY,
+    SUPABASE_HTTP2,
+    SUPABASE_HTTP_MAX_CONNECTIONS,
+    SUPABASE_HTTP_MAX_KEEPALIVE,
+    SUPABASE_HTTP_KEEPALIVE_EXPIRY,
+    SUPABASE_HTTP_TIMEOUT,
+    SUPABASE_BACKEND,
+)
+from app.utils.logger import log_info
+from app.core.db.telemetry import instrument_session
+from app.core.db import memory_supabase
+
+
+# One connection pool per worker process. The PostgREST client and the
+# Storage client are thin httpx clients layered over the same transport, so
+# they share keep-alive connections (and a single HTTP/2 connection) to the
+# Supabase host instead of each opening their own.
+_transport: Optional[httpx.AsyncHTTPTransport] = None
+_client: Optional["AsyncSupabaseClient"] = None
+
+
+def _auth_headers() -> dict:
+    key_to_use = SUPABASE_SERVICE_KEY or SUPABASE_API_KEY
+    if SUPABASE_BACKEND == "memory":
+        key_to_use = memory_supabase.MEMORY_SUPABASE_KEY
+    return {
+        "apikey": key_to_use,
+        "Authorization": f"Bearer {key_to_use}",
+    }
+
+
+def _get_transport() -> httpx.AsyncHTTPTransport:
+    global _transport
+    if _transport is None and SUPABASE_BACKEND == "memory":
+        _transport = memory_supabase.get_memory_transport()
+    if _transport is None:
+        _transport = httpx.AsyncHTTPTransport(
+            http2=SUPABASE_HTTP2,
+            limits=httpx.Limits(
+                max_connections=SUPABASE_HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=SUPABASE_HTTP_MAX_KEEPALIVE,
+                keepalive_expiry=SUPABASE_HTTP_KEEPALIVE_EXPIRY,
+            ),
+        )
+    return _transport
+
+
+def _make_session(base_url: str, headers: dict) -> httpx.AsyncClient:
+    return instrument_session(httpx.AsyncClient(
+        base_url=base_url,
+        headers=headers,
+        timeout=SUPABASE_HTTP_TIMEOUT,
+        transport=_get_transport(),
+        follow_redirects=True,
+    ))
+
+
+class _PooledPostgrestClient(AsyncPostgrestClient):
+    """AsyncPostgrestClient that reuses the shared pool instead of opening its own."""
+
+    def create_session(self, base_url, headers, timeout, verify=True, proxy=None):
+        return _make_session(base_url, headers)
+
+
+class _PooledStorageClient(AsyncStorageClient):
+    """AsyncStorageClient that reuses the shared pool instead of opening its own."""
+
+    def _create_session(self, base_url, headers, timeout, verify=True, proxy=None):
+        return _make_session(base_url, headers)
+
+
+class AsyncSupabaseClient:
+    """Async counterpart of the supabase-py ``Client`` surface used by the services.
+
+    Query builders are the regular postgrest/storage3 async builders, so an
+    operation reads exactly like the sync version with ``await`` on
+    ``execute()``::
+
+        supabase = get_async_supabase_client()
+        async def op():
+            return await supabase.from_("tasks").select("*").eq("task_id", task_id).execute()
+        result = await safe_supabase_operation(op, "Failed to fetch task")
+    """
+
+    def __init__(self, supabase_url: str):
+        headers = _auth_headers()
+        self.postgrest = _PooledPostgrestClient(f"{supabase_url}/rest/v1", headers={
+            "Accept": "application/json",
+            "Content-Type": "application/json",
+            **headers,
+        })
+        self._storage = _PooledStorageClient(f"{supabase_url}/storage/v1", headers=headers)
+
+    @property
+    def storage(self):
+        return self._storage
+
+    def from_(self, table: str):
+        return self.postgrest.from_(table)
+
+    def table(self, table: str):
+        return self.from_(table)
+
+    def rpc(self, fn: str, params: Optional[dict] = None, **kwargs):
+        return self.postgrest.rpc(fn, params or {}, **kwargs)
+
+    async def aclose(self):
+        await self.postgrest.aclose()
+        await self._storage.aclose()
+
+
+def get_async_supabase_client() -> AsyncSupabaseClient:
+    """Return the process-wide async client, creating it on first use."""
+    global _client
+    if _client is None:
+        url = memory_supabase.MEMORY_SUPABASE_URL if SUPABASE_BACKEND == "memory" else SUPABASE_PROJECT_URL
+        _client = AsyncSupabaseClient(url)
+        log_info(f"Async Supabase client ready (http2={SUPABASE_HTTP2}, max_connections={SUPABASE_HTTP_MAX_CONNECTIONS})")
+    return _client
+
+
+async def close_async_supabase_client():
+    """Close the shared pool; called from the FastAPI lifespan on shutdown."""
+    global _client, _transport
+    if _client is not None:
+        await _client.aclose()
+    if _transport is not None:
+        await _transport.aclose()
+    _client = None
+    _transport = None
@@ -0,0 +1,158 @@
+import asyncio
+import contextvars
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+
+class DbExecutorSaturated(Exception):
+    """Raised when the DB executor queue is full and the call is rejected up front."""
+
+
+class DbOperationTimeout(Exception):
+    """Raised when a DB call misses its deadline."""
+
+
+class DbExecutor:
+    """Bounded thread pool for blocking supabase-py calls.
+
+    - ``max_workers`` threads run operations; each thread talks to Supabase
+      through its own client (see ``get_supabase_client``).
+    - At most ``max_queue`` calls may wait for a free thread. Anything beyond
+      that fails fast with ``DbExecutorSaturated`` instead of piling up.
+    - Every call has a deadline. A call that is still queued when its deadline
+      passes, or whose awaiting request is cancelled, is dropped before it
+      reaches a thread. A call that is already running cannot be interrupted;
+      it is abandoned and shows up in ``stats()['abandoned']``.
+    """
+
+    def __init__(self, max_workers: int, max_queue: int, default_timeout: Optional[float]):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.default_timeout = default_timeout
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="supabase-db")
+        self._lock = threading.Lock()
+        self._active = 0
+        self._queued = 0
+        self._async_active = 0
+        self._submitted = 0
+        self._completed = 0
+        self._failed = 0
+        self._rejected = 0
+        self._timed_out = 0
+        self._cancelled = 0
+        self._abandoned = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._wait_samples = 0
+
+    async def run(self, func: Callable[[], Any], timeout: Optional[float] = None) -> Any:
+        timeout = self.default_timeout if timeout is None else timeout
+        with self._lock:
+            if self._active + self._queued >= self.max_workers + self.max_queue:
+                self._rejected += 1
+                raise DbExecutorSaturated(
+                    f"DB executor saturated ({self._active} active, {self._queued} queued)"
+                )
+            self._queued += 1
+            self._submitted += 1
+        enqueued_at = time.monotonic()
+
+        def task():
+            started_at = time.monotonic()
+            with self._lock:
+                self._queued -= 1
+                self._active += 1
+                waited = started_at - enqueued_at
+                self._wait_total += waited
+                self._wait_samples += 1
+                if waited > self._wait_max:
+                    self._wait_max = waited
+            try:
+                return func()
+            finally:
+                with self._lock:
+                    self._active -= 1
+
+        # Run in a copy of the caller's context so per-call context vars reach the worker
+        cf = self._pool.submit(contextvars.copy_context().run, task)
+        cf.add_done_callback(self._on_done)
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(cf), timeout)
+        except asyncio.TimeoutError:
+            self._drop(cf)
+            with self._lock:
+                self._timed_out += 1
+            raise DbOperationTimeout(f"DB operation exceeded {timeout}s deadline")
+        except asyncio.CancelledError:
+            # The awaiting request went away; don't let its query occupy a thread
+            self._drop(cf)
+            raise
+
+    def _drop(self, cf):
+        if not cf.cancel() and not cf.done():
+            with self._lock:
+                self._abandoned += 1
+
+    def _on_done(self, cf):
+        with self._lock:
+            if cf.cancelled():
+                # Never reached a worker thread, so it is still counted as queued
+                self._queued -= 1
+                self._cancelled += 1
+            elif cf.exception() is not None:
+                self._failed += 1
+            else:
+                self._completed += 1
+
+    async def run_async(self, coro_func: Callable[[], Any], timeout: Optional[float] = None) -> Any:
+        """Run a native async operation with the same deadline and accounting."""
+        timeout = self.default_timeout if timeout is None else timeout
+        with self._lock:
+            self._async_active += 1
+            self._submitted += 1
+        try:
+            result = await asyncio.wait_for(coro_func(), timeout)
+        except asyncio.TimeoutError:
+            with self._lock:
+                self._timed_out += 1
+            raise DbOperationTimeout(f"DB operation exceeded {timeout}s deadline")
+        except asyncio.CancelledError:
+            with self._lock:
+                self._cancelled += 1
+            raise
+        except Exception:
+            with self._lock:
+                self._failed += 1
+            raise
+        else:
+            with self._lock:
+                self._completed += 1
+            return result
+        finally:
+            with self._lock:
+                self._async_active -= 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "max_workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "default_timeout": self.default_timeout,
+                "active": self._active,
+                "queued": self._queued,
+                "async_active": self._async_active,
+                "submitted": self._submitted,
+                "completed": self._completed,
+                "failed": self._failed,
+                "rejected": self._rejected,
+                "timed_out": self._timed_out,
+                "cancelled": self._cancelled,
+                "abandoned": self._abandoned,
+                "avg_wait_ms": round(1000 * self._wait_total / self._wait_samples, 3) if self._wait_samples else 0.0,
+                "max_wait_ms": round(1000 * self._wait_max, 3),
+            }
+
+    def shutdown(self, wait: bool = False):
+        self._pool.shutdown(wait=wait, cancel_futures=True)
@@ -0,0 +1,1245 @@
+"""
+In-process stand-in for Supabase (PostgREST, Storage and the auth admin API).
+
+The fake sits at the HTTP layer: the regular supabase-py / postgrest / storage3
+clients are used unchanged and only their httpx transport is swapped for
+``MemorySupabaseTransport``. Every builder the services use (``select``,
+``eq``, ``in_``, ``ilike``, ``or_``, ``order``, ``range``, ``single``,
+``insert``, ``update``, ``upsert``, ``delete``, ``rpc``, storage
+``upload/list/get_public_url/remove``) therefore behaves exactly as against a
+real project, including request encoding and JSON decoding, which is what
+benchmarks need to measure.
+
+Tables and their primary keys, unique constraints, foreign keys and indexes
+are loaded from ``supabase_schema_tables_public.txt`` and the SQL migrations.
+Rows live in dicts with hash indexes on key / foreign-key / indexed columns,
+so ``eq`` / ``in_`` lookups don't scan the table. The card/stats views the
+services read are computed from their base tables; any other view behaves as
+an empty table that tests can seed.
+
+Enable it with ``SUPABASE_BACKEND=memory``. ``SUPABASE_MEMORY_LATENCY_MS``
+(plus ``SUPABASE_MEMORY_LATENCY_JITTER_MS``) adds a delay to every request to
+mimic the network round trip; ``SUPABASE_MEMORY_SEED`` may point at a JSON
+file of ``{"table": [rows...]}`` loaded at start-up.
+"""
+import asyncio
+import copy
+import datetime
+import email.parser
+import html
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import unquote
+
+import httpx
+
+
+MEMORY_SUPABASE_URL = "http://memory.supabase"
+# supabase-py only checks that the key looks like a JWT
+MEMORY_SUPABASE_KEY = "memory.supabase.key"
+
+_REPO_ROOT = Path(__file__).resolve().parents[3]
+SCHEMA_FILE = _REPO_ROOT / "supabase_schema_tables_public.txt"
+MIGRATIONS_DIR = _REPO_ROOT / "supabase" / "migrations"
+
+
+class MemoryApiError(Exception):
+    """Error answered with a PostgREST-style JSON body."""
+
+    def __init__(self, status: int, code: str, message: str, details: Optional[str] = None, hint: Optional[str] = None):
+        super().__init__(message)
+        self.status = status
+        self.body = {"code": code, "message": message, "details": details, "hint": hint}
+
+
+def _now() -> str:
+    return datetime.datetime.now(datetime.timezone.utc).isoformat()
+
+
+# ---------------------------------------------------------------------------
+# Schema
+# ---------------------------------------------------------------------------
+
+class TableSchema:
+    def __init__(self, name: str):
+        self.name = name
+        self.columns: Dict[str, Optional[str]] = {}  # column -> DEFAULT expression
+        self.primary_key: Tuple[str, ...] = ()
+        self.unique: List[Tuple[str, ...]] = []
+        self.foreign_keys: Dict[str, Tuple[str, str]] = {}  # column -> (table, column)
+        self.indexed: set = set()
+
+
+_CREATE_TABLE = re.compile(r'create table (?:if not exists )?(?:"?public"?\.)?"?(\w+)"?\s*\(', re.I)
+_COLUMN = re.compile(r'^"?(\w+)"?\s+(.+?)\s*,?$')
+_DEFAULT = re.compile(r"\bDEFAULT\s+(.+?)(?:\s+NOT NULL|\s+UNIQUE|\s+PRIMARY KEY|\s+CHECK.*)?$", re.I)
+_PK = re.compile(r"PRIMARY KEY\s*\(([^)]+)\)", re.I)
+_UNIQUE = re.compile(r"UNIQUE\s*\(([^)]+)\)", re.I)
+_FK = re.compile(r"FOREIGN KEY\s*\((\w+)\)\s*REFERENCES\s+(?:\"?public\"?\.)?\"?(\w+)\"?\s*\((\w+)\)", re.I)
+_INDEX = re.compile(r'CREATE (UNIQUE )?INDEX (?:IF NOT EXISTS )?"?(\w+)"? ON (?:"?public"?\.)?"?(\w+)"?(?: USING \w+)? \(([^)]+)\)', re.I)
+_ADD_PK = re.compile(r'alter table "?public"?\."?(\w+)"? add constraint "?\w+"? PRIMARY KEY using index "?(\w+)"?', re.I)
+_ADD_FK = re.compile(r'alter table "?public"?\."?(\w+)"? add constraint "?\w+"? FOREIGN KEY \((\w+)\) REFERENCES (?:"?public"?\.)?"?(\w+)"?\s*\((\w+)\)', re.I)
+_ADD_COLUMN = re.compile(r'alter table "?public"?\."?(\w+)"? add column (?:if not exists )?"?(\w+)"?\s+([^;]+);', re.I)
+
+
+def _cols(text: str) -> Tuple[str, ...]:
+    return tuple(c.strip().strip('"') for c in text.split(","))
+
+
+def _parse_create_tables(sql: str, schema: Dict[str, TableSchema], overwrite: bool):
+    for match in _CREATE_TABLE.finditer(sql):
+        name = match.group(1)
+        if name in schema and not overwrite:
+            continue
+        table = TableSchema(name)
+        depth, i = 1, match.end()
+        while i < len(sql) and depth:
+            depth += {"(": 1, ")": -1}.get(sql[i], 0)
+            i += 1
+        for raw in sql[match.end():i - 1].splitlines():
+            line = raw.strip().rstrip(",")
+            if not line or line.startswith("--"):
+                continue
+            upper = line.upper()
+            if upper.startswith("CONSTRAINT") or upper.startswith("PRIMARY KEY") or upper.startswith("UNIQUE") or upper.startswith("FOREIGN KEY"):
+                if (m := _PK.search(line)):
+                    table.primary_key = _cols(m.group(1))
+                elif (m := _FK.search(line)):
+                    table.foreign_keys[m.group(1)] = (m.group(2), m.group(3))
+                elif (m := _UNIQUE.search(line)):
+                    table.unique.append(_cols(m.group(1)))
+                continue
+            m = _COLUMN.match(line)
+            if not m:
+                continue
+            column, rest = m.group(1), m.group(2)
+            default = _DEFAULT.search(rest)
+            table.columns[column] = default.group(1).strip() if default else None
+            if re.search(r"\bPRIMARY KEY\b", rest, re.I):
+                table.primary_key = (column,)
+            elif re.search(r"\bUNIQUE\b", rest, re.I):
+                table.unique.append((column,))
+            if (ref := re.search(r"REFERENCES\s+(?:\"?public\"?\.)?\"?(\w+)\"?\s*\((\w+)\)", rest, re.I)):
+                table.foreign_keys[column] = (ref.group(1), ref.group(2))
+        schema[name] = table
+
+
+def load_schema(schema_file: Path = SCHEMA_FILE, migrations_dir: Path = MIGRATIONS_DIR) -> Dict[str, TableSchema]:
+    """Tables from the schema dump, completed with anything only the migrations know about."""
+    schema: Dict[str, TableSchema] = {}
+    if schema_file.exists():
+        _parse_create_tables(schema_file.read_text(), schema, overwrite=True)
+    migrations = [p.read_text() for p in sorted(migrations_dir.glob("*.sql"))] if migrations_dir.exists() else []
+    dump_tables = set(schema)
+    for sql in migrations:
+        _parse_create_tables(sql, schema, overwrite=False)
+    indexes: Dict[str, Tuple[str, Tuple[str, ...], bool]] = {}
+    for sql in migrations:
+        for m in _INDEX.finditer(sql):
+            indexes[m.group(2)] = (m.group(3), _cols(m.group(4)), bool(m.group(1)))
+        for m in _ADD_PK.finditer(sql):
+            if m.group(2) in indexes and not schema.get(m.group(1), TableSchema("")).primary_key:
+                schema[m.group(1)].primary_key = indexes[m.group(2)][1]
+        for m in _ADD_FK.finditer(sql):
+            if m.group(1) in schema:
+                schema[m.group(1)].foreign_keys.setdefault(m.group(2), (m.group(3), m.group(4)))
+        for m in _ADD_COLUMN.finditer(sql):
+            if m.group(1) in schema and m.group(1) not in dump_tables:
+                default = _DEFAULT.search(m.group(3))
+                schema[m.group(1)].columns.setdefault(m.group(2), default.group(1).strip() if default else None)
+    for table_name, cols, unique in indexes.values():
+        table = schema.get(table_name)
+        if table is None:
+            continue
+        if len(cols) == 1 and cols[0] in table.columns:
+            table.indexed.add(cols[0])
+        if unique and cols != table.primary_key and cols not in table.unique and all(c in table.columns for c in cols):
+            table.unique.append(cols)
+    return schema
+
+
+def _eval_default(expr: Optional[str], counters: Dict[str, int], key: str) -> Any:
+    if expr is None:
+        return None
+    low = expr.lower()
+    if low.startswith("now()") or low.startswith("current_timestamp") or "timezone('utc'" in low:
+        return _now()
+    if low.startswith("current_date"):
+        return datetime.date.today().isoformat()
+    if "gen_random_uuid" in low or "uuid_generate" in low:
+        return str(uuid.uuid4())
+    if low.startswith("nextval"):
+        counters[key] = counters.get(key, 0) + 1
+        return counters[key]
+    if low in ("true", "false"):
+        return low == "true"
+    if (m := re.match(r"^'(.*)'::([\w\s\[\]]+)$", expr, re.S)):
+        value, cast = m.group(1), m.group(2).strip()
+        if cast.endswith("[]"):
+            return [] if value == "{}" else [v.strip('"') for v in value.strip("{}").split(",")]
+        if cast in ("jsonb", "json"):
+            return json.loads(value)
+        return value
+    if re.match(r"^-?\d+$", expr):
+        return int(expr)
+    if re.match(r"^-?\d+\.\d+$", expr):
+        return float(expr)
+    return None
+
+
+# ---------------------------------------------------------------------------
+# Tables
+# ---------------------------------------------------------------------------
+
+def _hashable(value: Any) -> bool:
+    return isinstance(value, (str, int, float, bool)) or value is None
+
+
+class MemoryTable:
+    """Rows keyed by an internal row id, with hash indexes kept in sync on every write."""
+
+    def __init__(self, schema: TableSchema, counters: Dict[str, int]):
+        self.schema = schema
+        self._counters = counters
+        self.rows: Dict[int, dict] = {}
+        self._next_id = 0
+        self._keys: List[Tuple[str, ...]] = ([schema.primary_key] if schema.primary_key else []) + list(schema.unique)
+        self._unique: Dict[Tuple[str, ...], Dict[tuple, int]] = {cols: {} for cols in self._keys}
+        indexed = set(schema.indexed) | set(schema.foreign_keys) | {cols[0] for cols in self._keys}
+        self._indexes: Dict[str, Dict[Any, set]] = {col: defaultdict(set) for col in indexed}
+
+    @property
+    def name(self) -> str:
+        return self.schema.name
+
+    def _key(self, cols: Tuple[str, ...], row: dict) -> Optional[tuple]:
+        values = tuple(row.get(c) for c in cols)
+        if any(v is None for v in values) or not all(_hashable(v) for v in values):
+            return None
+        return values
+
+    def _index(self, rowid: int, row: dict):
+        for cols, idx in self._unique.items():
+            key = self._key(cols, row)
+            if key is not None:
+                idx[key] = rowid
+        for col, idx in self._indexes.items():
+            value = row.get(col)
+            if _hashable(value):
+                idx[value].add(rowid)
+
+    def _unindex(self, rowid: int, row: dict):
+        for cols, idx in self._unique.items():
+            key = self._key(cols, row)
+            if key is not None and idx.get(key) == rowid:
+                del idx[key]
+        for col, idx in self._indexes.items():
+            value = row.get(col)
+            if _hashable(value):
+                bucket = idx.get(value)
+                if bucket is not None:
+                    bucket.discard(rowid)
+                    if not bucket:
+                        del idx[value]
+
+    def _check_columns(self, values: dict):
+        if not self.schema.columns:
+            return
+        for col in values:
+            if col not in self.schema.columns:
+                raise MemoryApiError(400, "PGRST204", f"Could not find the '{col}' column of '{self.name}' in the schema cache")
+
+    def _conflict(self, row: dict, ignore_rowid: Optional[int] = None) -> Optional[Tuple[Tuple[str, ...], int]]:
+        for cols, idx in self._unique.items():
+            key = self._key(cols, row)
+            if key is not None and key in idx and idx[key] != ignore_rowid:
+                return cols, idx[key]
+        return None
+
+    def find(self, cols: Tuple[str, ...], row: dict) -> Optional[int]:
+        if cols in self._unique:
+            key = self._key(cols, row)
+            return self._unique[cols].get(key) if key is not None else None
+        for rowid, existing in self.rows.items():
+            if all(existing.get(c) == row.get(c) for c in cols):
+                return rowid
+        return None
+
+    def insert(self, values: dict) -> dict:
+        self._check_columns(values)
+        row = {}
+        for col, default in self.schema.columns.items():
+            row[col] = copy.deepcopy(values[col]) if col in values else _eval_default(default, self._counters, f"{self.name}.{col}")
+        for col, value in values.items():
+            row.setdefault(col, copy.deepcopy(value))
+        if (clash := self._conflict(row)) is not None:
+            cols = clash[0]
+            raise MemoryApiError(
+                409, "23505",
+                f'duplicate key value violates unique constraint "{self.name}_{"_".join(cols)}_key"',
+                f"Key ({', '.join(cols)})=({', '.join(str(row.get(c)) for c in cols)}) already exists.",
+            )
+        rowid = self._next_id
+        self._next_id += 1
+        self.rows[rowid] = row
+        self._index(rowid, row)
+        return row
+
+    def update(self, rowid: int, changes: dict) -> dict:
+        self._check_columns(changes)
+        old = self.rows[rowid]
+        new = {**old, **copy.deepcopy(changes)}
+        if "updated_at" in new and "updated_at" not in changes:
+            new["updated_at"] = _now()  # what the set_updated_at triggers do
+        if (clash := self._conflict(new, ignore_rowid=rowid)) is not None:
+            raise MemoryApiError(409, "23505", f"duplicate key value violates unique constraint on ({', '.join(clash[0])})")
+        self._unindex(rowid, old)
+        self.rows[rowid] = new
+        self._index(rowid, new)
+        return new
+
+    def delete(self, rowid: int) -> dict:
+        row = self.rows.pop(rowid)
+        self._unindex(rowid, row)
+        return row
+
+    def checkpoint(self) -> tuple:
+        return dict(self.rows), self._next_id
+
+    def rollback(self, checkpoint: tuple):
+        """Restore a checkpoint() so a failed multi-row write leaves no trace, as in Postgres."""
+        self.rows, self._next_id = dict(checkpoint[0]), checkpoint[1]
+        for idx in self._unique.values():
+            idx.clear()
+        for idx in self._indexes.values():
+            idx.clear()
+        for rowid, row in self.rows.items():
+            self._index(rowid, row)
+
+    def candidates(self, filters: List["_Filter"]) -> Iterable[int]:
+        """Row ids that can match, narrowed through the hash indexes where possible."""
+        best: Optional[set] = None
+        for f in filters:
+            if f.negate or f.column not in self._indexes or f.op not in ("eq", "in"):
+                continue
+            idx = self._indexes[f.column]
+            values = f.value if f.op == "in" else [f.value]
+            hits = set()
+            for raw in values:
+                for key in _index_keys(raw):
+                    hits |= idx.get(key, set())
+            if best is None or len(hits) < len(best):
+                best = hits
+            if not best:
+                return []
+        return sorted(best) if best is not None else list(self.rows)
+
+
+def _index_keys(raw: str) -> List[Any]:
+    """Values a query-string literal may be stored as."""
+    keys: List[Any] = [raw]
+    if raw in ("true", "false"):
+        keys.append(raw == "true")
+    try:
+        keys.append(int(raw))
+    except ValueError:
+        try:
+            keys.append(float(raw))
+        except ValueError:
+            pass
+    return keys
+
+
+# ---------------------------------------------------------------------------
+# PostgREST query language
+# ---------------------------------------------------------------------------
+
+_RESERVED_PARAMS = {"select", "order", "limit", "offset", "on_conflict", "columns", "or", "and"}
+
+
+class _Filter:
+    __slots__ = ("column", "op", "value", "negate")
+
+    def __init__(self, column: str, op: str, value: Any, negate: bool = False):
+        self.column = column
+        self.op = op
+        self.value = value
+        self.negate = negate
+
+
+class _Group:
+    """Nested ``and(...)`` / ``or(...)`` inside a logical filter."""
+    __slots__ = ("any", "items")
+
+    def __init__(self, any_: bool, items: List[Any]):
+        self.any = any_
+        self.items = items
+
+
+def _split_top(text: str, sep: str = ",") -> List[str]:
+    """Split on ``sep`` outside parentheses, braces and double quotes."""
+    parts, depth, quoted, escaped, buf = [], 0, False, False, []
+    for ch in text:
+        if escaped:
+            escaped = False
+        elif quoted and ch == "\\":
+            escaped = True
+        elif ch == '"':
+            quoted = not quoted
+        elif not quoted and ch in "({":
+            depth += 1
+        elif not quoted and ch in ")}":
+            depth -= 1
+        if ch == sep and depth == 0 and not quoted:
+            parts.append("".join(buf))
+            buf = []
+        else:
+            buf.append(ch)
+    parts.append("".join(buf))
+    return [p for p in parts if p != ""]
+
+
+def _parse_list(text: str) -> List[str]:
+    return [v.strip().strip('"') for v in _split_top(text.strip()[1:-1])]
+
+
+def _parse_filter(column: str, expr: str) -> _Filter:
+    negate = False
+    if expr.startswith("not."):
+        negate, expr = True, expr[4:]
+    op, _, value = expr.partition(".")
+    if op == "in":
+        return _Filter(column, op, _parse_list(value), negate)
+    if op in ("cs", "cd", "ov"):
+        if value.startswith("{"):
+            return _Filter(column, op, _parse_list(value), negate)
+        return _Filter(column, op, json.loads(value), negate)
+    if len(value) >= 2 and value[0] == value[-1] == '"':
+        value = re.sub(r'\\(.)', r"\1", value[1:-1])
+    return _Filter(column, op, value, negate)
+
+
+def _parse_or(expr: str) -> List[Any]:
+    inner = expr.strip()
+    if inner.startswith("(") and inner.endswith(")"):
+        inner = inner[1:-1]
+    filters = []
+    for part in _split_top(inner):
+        for kind in ("and", "or"):
+            if part.startswith(f"{kind}(") and part.endswith(")"):
+                filters.append(_Group(kind == "or", _parse_or(part[len(kind):])))
+                break
+        else:
+            column, _, rest = part.partition(".")
+            filters.append(_parse_filter(column, rest))
+    return filters
+
+
+def _coerce(raw: str, sample: Any) -> Any:
+    if isinstance(sample, bool):
+        return raw.lower() == "true"
+    if isinstance(sample, (int, float)):
+        try:
+            return type(sample)(raw) if isinstance(sample, int) and raw.lstrip("-").isdigit() else float(raw)
+        except ValueError:
+            return raw
+    return raw
+
+
+def _like(pattern: str, value: Any, flags: int = 0) -> bool:
+    if value is None:
+        return False
+    regex = "".join(".*" if ch in "%*" else "." if ch == "_" else re.escape(ch) for ch in pattern)
+    return re.fullmatch(regex, str(value), flags | re.S) is not None
+
+
+def _compare(op: str, value: Any, raw: str) -> bool:
+    if value is None:
+        return False
+    target = _coerce(raw, value)
+    try:
+        return {
+            "gt": value > target,
+            "gte": value >= target,
+            "lt": value < target,
+            "lte": value <= target,
+        }[op]
+    except TypeError:
+        return {"gt": str(value) > raw, "gte": str(value) >= raw, "lt": str(value) < raw, "lte": str(value) <= raw}[op]
+
+
+def _matches(row: dict, f: _Filter) -> bool:
+    if isinstance(f, _Group):
+        return (any if f.any else all)(_matches(row, item) for item in f.items)
+    value = row.get(f.column)
+    op = f.op
+    if op == "eq":
+        result = value is not None and (value == _coerce(f.value, value) or str(value) == f.value)
+    elif op == "neq":
+        result = value is not None and not (value == _coerce(f.value, value) or str(value) == f.value)
+    elif op in ("gt", "gte", "lt", "lte"):
+        result = _compare(op, value, f.value)
+    elif op == "like":
+        result = _like(f.value, value)
+    elif op == "ilike":
+        result = _like(f.value, value, re.I)
+    elif op == "is":
+        lit = f.value.lower()
+        result = value is None if lit == "null" else value is (lit == "true")
+    elif op == "in":
+        result = value is not None and any(value == _coerce(v, value) or str(value) == v for v in f.value)
+    elif op == "cs":
+        if isinstance(value, dict):
+            result = all(value.get(k) == v for k, v in f.value.items())
+        else:
+            result = value is not None and all(v in [str(x) for x in value] for v in f.value)
+    elif op == "cd":
+        result = value is not None and all(str(x) in f.value for x in value)
+    elif op == "ov":
+        result = value is not None and any(str(x) in f.value for x in value)
+    else:
+        raise MemoryApiError(400, "PGRST100", f"operator '{op}' is not supported by the in-memory backend")
+    return not result if f.negate else result
+
+
+def _sort(rows: List[dict], order: str) -> List[dict]:
+    for term in reversed(_split_top(order)):
+        parts = term.split(".")
+        column, desc = parts[0], "desc" in parts[1:]
+        nulls_first = "nullsfirst" in parts[1:] or (desc and "nullslast" not in parts[1:])
+        present = [r for r in rows if r.get(column) is not None]
+        missing = [r for r in rows if r.get(column) is None]
+        try:
+            present.sort(key=lambda r: r[column], reverse=desc)
+        except TypeError:
+            present.sort(key=lambda r: str(r[column]), reverse=desc)
+        rows = missing + present if nulls_first else present + missing
+    return rows
+
+
+# ---------------------------------------------------------------------------
+# Database
+# ---------------------------------------------------------------------------
+
+class MemoryDatabase:
+    """Tables, computed views, RPC functions, storage buckets and auth users for one process."""
+
+    def __init__(self, schema: Optional[Dict[str, TableSchema]] = None):
+        self.schema = schema if schema is not None else load_schema()
+        self.lock = threading.RLock()
+        self.reset()
+        self.views: Dict[str, Tuple[str, Callable[["MemoryDatabase", dict], dict]]] = {
+            "task_card_view": ("tasks", _task_card_row),
+            "project_card_view": ("projects", _project_card_row),
+            "project_stats_view": ("projects", _project_stats_row),
+            "test_tracker_card_view": ("test_trackers", _tracker_card_row),
+        }
+        self.functions: Dict[str, Callable[["MemoryDatabase", dict], Any]] = {
+            "get_auth_user": _rpc_get_auth_user,
+            "get_effective_project_role": _rpc_get_effective_project_role,
+            "get_effective_project_roles": _rpc_get_effective_project_roles,
+            "get_user_roles": _rpc_get_user_roles,
+            "apply_task_links": _rpc_apply_task_links,
+            "search_bugs_ranked": _rpc_search_bugs_ranked,
+            "lease_id_allocator_node": _rpc_lease_id_allocator_node,
+        }
+
+    def reset(self):
+        """Drop every row, object and user (keeps the schema)."""
+        with self.lock:
+            self._counters: Dict[str, int] = {}
+            self.tables: Dict[str, MemoryTable] = {
+                name: MemoryTable(s, self._counters) for name, s in self.schema.items()
+            }
+            self.buckets: Dict[str, Dict[str, dict]] = defaultdict(dict)
+            self.auth_users: Dict[str, dict] = {}
+
+    def table(self, name: str) -> MemoryTable:
+        table = self.tables.get(name)
+        if table is None:
+            # Unknown relations (views without a computed definition, tables added
+            # after the dump) start empty and schemaless so tests can seed them
+            table = MemoryTable(TableSchema(name), self._counters)
+            self.tables[name] = table
+        return table
+
+    def seed(self, table: str, rows: Iterable[dict]):
+        with self.lock:
+            target = self.table(table)
+            for row in rows:
+                target.insert(row)
+
+    def seed_from_file(self, path: str):
+        data = json.loads(Path(path).read_text())
+        for table, rows in data.items():
+            if table == "auth.users":
+                for user in rows:
+                    self.add_auth_user(**user)
+            else:
+                self.seed(table, rows)
+
+    def register_function(self, name: str, fn: Callable[["MemoryDatabase", dict], Any]):
+        """Add an RPC implementation: ``fn(db, params)`` returns rows or a scalar."""
+        self.functions[name] = fn
+
+    def add_auth_user(self, id: Optional[str] = None, email: Optional[str] = None, user_metadata: Optional[dict] = None, **extra) -> dict:
+        user = {
+            "id": id or str(uuid.uuid4()),
+            "email": email,
+            "aud": "authenticated",
+            "role": "authenticated",
+            "app_metadata": {},
+            "user_metadata": user_metadata or {},
+            "created_at": _now(),
+            **extra,
+        }
+        with self.lock:
+            self.auth_users[user["id"]] = user
+        return user
+
+    # -- reads ---------------------------------------------------------------
+
+    def rows_for(self, relation: str, filters: List[_Filter]) -> List[dict]:
+        if relation in self.views:
+            base_name, build = self.views[relation]
+            base = self.table(base_name)
+            base_filters = [f for f in filters if f.column in base.schema.columns]
+            return [build(self, base.rows[rid]) for rid in base.candidates(base_filters)]
+        table = self.table(relation)
+        return [table.rows[rid] for rid in table.candidates(filters)]
+
+    def lookup(self, relation: str, column: str, value: Any) -> List[dict]:
+        if value is None:
+            return []
+        return self.rows_for(relation, [_Filter(column, "eq", str(value) if not isinstance(value, str) else value)])
+
+
+def _count_rows(db: MemoryDatabase, table: str, column: str, value: Any, where: Callable[[dict], bool] = lambda r: True) -> int:
+    return sum(1 for r in db.lookup(table, column, value) if where(r))
+
+
+def _task_card_row(db: MemoryDatabase, task: dict) -> dict:
+    row = {k: task.get(k) for k in (
+        "task_id", "org_id", "project_id", "sub_tasks", "dependencies", "title", "description",
+        "start_date", "due_date", "metadata", "status", "priority", "tags", "created_by",
+        "assignee", "is_subtask", "updated_by", "created_at", "updated_at",
+    )}
+    row["comments"] = _count_rows(db, "task_comments", "task_id", task.get("task_id"))
+    return row
+
+
+def _tracker_card_row(db: MemoryDatabase, tracker: dict) -> dict:
+    row = {k: tracker.get(k) for k in (
+        "tracker_id", "name", "description", "org_id", "project_id", "project_name", "creator_id",
+        "creator_name", "status", "priority", "created_at", "deleted_at",
+    )}
+    row["total_bugs"] = _count_rows(db, "bugs", "tracker_id", tracker.get("tracker_id"))
+    row["total_tasks"] = _count_rows(db, "test_tracker_tasks", "tracker_id", tracker.get("tracker_id"))
+    return row
+
+
+def _project_card_row(db: MemoryDatabase, project: dict) -> dict:
+    row = {k: project.get(k) for k in (
+        "project_id", "org_id", "name", "description", "start_date", "end_date", "metadata",
+        "status", "priority", "created_by", "project_owner", "updated_by", "is_active",
+        "delete_reason", "team_members", "created_at",
+    )}
+    tasks = [t for t in db.lookup("tasks", "project_id", project.get("project_id")) if not t.get("is_subtask")]
+    completed = sum(1 for t in tasks if t.get("status") == "completed")
+    row["tasks_total"] = len(tasks)
+    row["tasks_completed"] = completed
+    row["progress_percent"] = round(100.0 * completed / len(tasks), 1) if tasks else 0
+    return row
+
+
+def _project_stats_row(db: MemoryDatabase, project: dict) -> dict:
+    tasks = db.lookup("tasks", "project_id", project.get("project_id"))
+    completed = sum(1 for t in tasks if t.get("status") == "completed")
+    members = {m.get("user_id") for m in db.lookup("project_members", "project_id", project.get("project_id"))}
+    days_left = duration = None
+    try:
+        end = datetime.date.fromisoformat(str(project.get("end_date"))[:10]) if project.get("end_date") else None
+        start = datetime.date.fromisoformat(str(project.get("start_date"))[:10]) if project.get("start_date") else None
+        if end:
+            days_left = max(0, (end - datetime.date.today()).days)
+        if end and start:
+            duration = (end - start).days
+    except ValueError:
+        pass
+    return {
+        "project_id": project.get("project_id"),
+        "tasks_completed": completed,
+        "tasks_total": len(tasks),
+        "progress_percent": round(100 * completed / len(tasks)) if tasks else 0,
+        "team_members": len(members),
+        "days_left": days_left,
+        "duration_days": duration,
+    }
+
+
+def _rpc_get_auth_user(db: MemoryDatabase, params: dict) -> List[dict]:
+    for user in db.auth_users.values():
+        username = (user.get("user_metadata") or {}).get("username")
+        if (params.get("p_user_id") and user["id"] == params["p_user_id"]) or (
+            params.get("p_username") and username == params["p_username"]
+        ):
+            return [{"id": user["id"], "email": user.get("email"), "username": username}]
+    return []
+
+
+def _effective_project_role(db: MemoryDatabase, user_id: str, project_id: str) -> Optional[str]:
+    for member in db.lookup("project_members", "project_id", project_id):
+        if str(member.get("user_id")) == user_id:
+            return member.get("role")
+    for project in db.lookup("projects", "project_id", project_id):
+        for member in db.lookup("organization_members", "org_id", project.get("org_id")):
+            if str(member.get("user_id")) == user_id and member.get("role") in ("owner", "admin"):
+                return member.get("role")
+    return None
+
+
+def _rpc_get_effective_project_role(db: MemoryDatabase, params: dict) -> Optional[str]:
+    return _effective_project_role(db, str(params.get("p_user_id")), params.get("p_project_id"))
+
+
+def _rpc_get_effective_project_roles(db: MemoryDatabase, params: dict) -> List[dict]:
+    rows = []
+    for user_id, project_id in zip(params.get("p_user_ids") or [], params.get("p_project_ids") or []):
+        role = _effective_project_role(db, str(user_id), project_id)
+        if role is not None:
+            rows.append({"user_id": user_id, "project_id": project_id, "role": role})
+    return rows
+
+
+def _rpc_get_user_roles(db: MemoryDatabase, params: dict) -> List[dict]:
+    user_id = str(params.get("p_user_id"))
+    rows = []
+    for member in db.lookup("organization_members", "user_id", user_id):
+        rows.append({"scope": "org", "scope_id": member["org_id"], "org_id": member["org_id"], "role": member.get("role")})
+    direct = set()
+    for member in db.lookup("project_members", "user_id", user_id):
+        for project in db.lookup("projects", "project_id", member.get("project_id")):
+            direct.add(project["project_id"])
+            rows.append({"scope": "project", "scope_id": project["project_id"], "org_id": project.get("org_id"), "role": member.get("role")})
+    for org_row in [r for r in rows if r["scope"] == "org" and r["role"] in ("owner", "admin")]:
+        for project in db.lookup("projects", "org_id", org_row["org_id"]):
+            if project["project_id"] not in direct:
+                rows.append({"scope": "project", "scope_id": project["project_id"], "org_id": project.get("org_id"), "role": org_row["role"]})
+    return rows
+
+
+def _rpc_apply_task_links(db: MemoryDatabase, params: dict) -> List[dict]:
+    """supabase/migrations/20251018_task_links.sql: all-or-nothing like the plpgsql version."""
+    tasks, history = db.table("tasks"), db.table("tasks_history")
+    saved = (tasks.checkpoint(), history.checkpoint())
+    try:
+        parents, children = [], []
+        for op in params.get("p_ops") or []:
+            rowid = tasks.find(("task_id",), op)
+            if rowid is None:
+                continue
+            row = tasks.rows[rowid]
+            changes = {}
+            for column, add, remove in (("sub_tasks", "add_subtasks", "remove_subtasks"),
+                                        ("dependencies", "add_dependencies", "remove_dependencies")):
+                current = [x for x in (row.get(column) or []) if x not in (op.get(remove) or [])]
+                changes[column] = current + [x for x in (op.get(add) or []) if x not in (row.get(column) or [])]
+            tasks.update(rowid, changes)
+            parents.append(op["task_id"])
+            children += list(op.get("add_subtasks") or []) + list(op.get("remove_subtasks") or [])
+        for child in dict.fromkeys(children):
+            rowid = tasks.find(("task_id",), {"task_id": child})
+            if rowid is not None:
+                listed = any(child in (r.get("sub_tasks") or []) for r in tasks.rows.values())
+                tasks.update(rowid, {"is_subtask": listed})
+        for row in params.get("p_history") or []:
+            if history.find(("hash_id",), row) is None:
+                history.insert(row)
+    except Exception:
+        tasks.rollback(saved[0])
+        history.rollback(saved[1])
+        raise
+    wanted = set(parents) | set(children)
+    return [dict(r) for r in tasks.rows.values() if r.get("task_id") in wanted]
+
+
+def _rpc_lease_id_allocator_node(db: MemoryDatabase, params: dict) -> int:
+    """supabase/migrations/20251026_id_allocator_nodes.sql: renew the holder's node or claim a free/expired one."""
+    nodes = db.table("id_allocator_nodes")
+    now = datetime.datetime.now(datetime.timezone.utc)
+    until = (now + datetime.timedelta(seconds=params.get("p_ttl_seconds") or 600)).isoformat()
+    holder, current = params["p_holder"], params.get("p_node")
+    if current is not None:
+        rowid = nodes.find(("node",), {"node": current})
+        if rowid is not None and nodes.rows[rowid]["holder"] == holder:
+            nodes.update(rowid, {"leased_until": until})
+            return current
+    for _ in range(8192):
+        db._counters["id_allocator_node_seq"] = db._counters.get("id_allocator_node_seq", 0) + 1
+        node = db._counters["id_allocator_node_seq"] % 8192
+        rowid = nodes.find(("node",), {"node": node})
+        if rowid is None:
+            nodes.insert({"node": node, "holder": holder, "leased_until": until})
+            return node
+        if datetime.datetime.fromisoformat(str(nodes.rows[rowid]["leased_until"])) < now:
+            nodes.update(rowid, {"holder": holder, "leased_until": until})
+            return node
+    raise MemoryApiError(400, "P0001", "all id allocator nodes are leased")
+
+
+def _rpc_search_bugs_ranked(db: MemoryDatabase, params: dict) -> List[dict]:
+    """supabase/migrations/20251024_bug_search_escaped_highlights.sql, minus stemming and stop words.
+
+    A bug matches when every search word prefixes a word of its title or
+    description, or when the raw query occurs in either; title hits rank
+    above description hits.
+    """
+    query = params.get("p_query") or ""
+    needle = query.lower()
+    words = [w for w in re.split(r"[^0-9a-z]+", needle) if w]
+    marker = re.compile(r"\b(?:%s)\w*" % "|".join(map(re.escape, words)), re.I) if words else None
+    filters = [
+        ("tracker_id", params.get("p_tracker_id"), lambda v, f: v == f),
+        ("project_id", params.get("p_project_id"), lambda v, f: v == f),
+        ("status", params.get("p_status"), lambda v, f: v in f),
+        ("priority", params.get("p_priority"), lambda v, f: v in f),
+        ("type", params.get("p_type"), lambda v, f: v in f),
+        ("assignee", params.get("p_assignee"), lambda v, f: v in f),
+        ("reporter", params.get("p_reporter"), lambda v, f: v in f),
+        ("tags", params.get("p_tags"), lambda v, f: all(t in (v or []) for t in f)),
+    ]
+    matched = []
+    for bug in db.rows_for("bugs", []):
+        if any(wanted is not None and not test(bug.get(column), wanted) for column, wanted, test in filters):
+            continue
+        title, description = bug.get("title") or "", bug.get("description") or ""
+        title_words = re.findall(r"[0-9a-z]+", title.lower())
+        description_words = re.findall(r"[0-9a-z]+", description.lower())
+        prefixed = bool(words) and all(any(t.startswith(w) for t in title_words + description_words) for w in words)
+        if not (prefixed or needle in title.lower() or needle in description.lower()):
+            continue
+        rank = sum(1.0 for w in words for t in title_words if t.startswith(w))
+        rank += sum(0.4 for w in words for t in description_words if t.startswith(w))
+        matched.append({**bug, "rank": rank})
+
+    sort_by = params.get("p_sort_by") or "relevance"
+    if sort_by == "relevance":
+        ordered = _sort(matched, "rank.desc,updated_at.desc.nullslast,id")
+    else:
+        ordered = _sort(matched, f"{sort_by}.{'desc.nullslast' if params.get('p_sort_desc', True) else 'asc.nullsfirst'},id")
+    offset = int(params.get("p_offset") or 0)
+    page = ordered[offset:offset + int(params.get("p_limit") or 20)]
+
+    def highlight(text: str) -> str:
+        # Escaped text with <mark> around the hits, like bug_search_headline
+        parts, last = [], 0
+        for m in marker.finditer(text) if marker else ():
+            parts.append(html.escape(text[last:m.start()]))
+            parts.append(f"<mark>{html.escape(m.group(0))}</mark>")
+            last = m.end()
+        parts.append(html.escape(text[last:]))
+        return "".join(parts)
+
+    return [
+        {
+            "bug": {k: v for k, v in row.items() if k != "rank"},
+            "rank": row["rank"],
+            "title_highlight": highlight(row.get("title") or ""),
+            "description_snippet": highlight(row.get("description") or ""),
+            "total": len(matched),
+        }
+        for row in page
+    ]
+
+
+# ---------------------------------------------------------------------------
+# HTTP handlers
+# ---------------------------------------------------------------------------
+
+def _json_response(status: int, body: Any, headers: Optional[dict] = None) -> httpx.Response:
+    content = json.dumps(body, default=str).encode() if body is not None else b""
+    return httpx.Response(status, content=content, headers={"content-type": "application/json", **(headers or {})})
+
+
+def _prefer(request: httpx.Request) -> Dict[str, str]:
+    prefs = {}
+    for part in request.headers.get("prefer", "").split(","):
+        key, _, value = part.strip().partition("=")
+        if key:
+            prefs[key] = value
+    return prefs
+
+
+def _project(db: MemoryDatabase, relation: str, row: dict, select: str) -> dict:
+    items = _split_top(select.replace(" ", "")) if select else ["*"]
+    out: Dict[str, Any] = {}
+    schema = db.table(relation).schema if relation not in db.views else db.table(db.views[relation][0]).schema
+    for item in items:
+        if "(" in item:
+            head, inner = item.split("(", 1)
+            inner = inner[:-1]
+            alias, _, target = head.rpartition(":")
+            target = target.split("!")[0]
+            alias = alias or target
+            out[alias] = _embed(db, relation, schema, row, target, inner)
+        elif item == "*":
+            out.update(row)
+        else:
+            alias, _, column = item.rpartition(":")
+            column = column.split("::")[0]
+            out[alias or column] = row.get(column)
+    return out
+
+
+def _embed(db: MemoryDatabase, relation: str, schema: TableSchema, row: dict, target: str, select: str):
+    if target in schema.foreign_keys:  # alias:fk_column(...)
+        ref_table, ref_col = schema.foreign_keys[target]
+        found = db.lookup(ref_table, ref_col, row.get(target))
+        return _project(db, ref_table, found[0], select) if found else None
+    for column, (ref_table, ref_col) in schema.foreign_keys.items():  # to-one by table name
+        if ref_table == target:
+            found = db.lookup(ref_table, ref_col, row.get(column))
+            return _project(db, ref_table, found[0], select) if found else None
+    other = db.table(target).schema
+    for column, (ref_table, ref_col) in other.foreign_keys.items():  # to-many
+        if ref_table == relation:
+            return [_project(db, target, r, select) for r in db.lookup(target, column, row.get(ref_col))]
+    raise MemoryApiError(400, "PGRST200", f"Could not find a relationship between '{relation}' and '{target}'")
+
+
+def _query_filters(params: httpx.QueryParams) -> Tuple[List[_Filter], List[List[_Filter]]]:
+    filters, any_of = [], []
+    for key, value in params.multi_items():
+        if key == "or":
+            any_of.append(_parse_or(value))
+        elif key not in _RESERVED_PARAMS:
+            filters.append(_parse_filter(key, value))
+    return filters, any_of
+
+
+def _select_rows(db: MemoryDatabase, relation: str, rows: List[dict], params: httpx.QueryParams) -> List[dict]:
+    filters, any_of = _query_filters(params)
+    out = [
+        r for r in rows
+        if all(_matches(r, f) for f in filters) and all(any(_matches(r, f) for f in group) for group in any_of)
+    ]
+    if "order" in params:
+        out = _sort(out, params["order"])
+    return out
+
+
+def _page(rows: List[dict], params: httpx.QueryParams) -> Tuple[List[dict], int]:
+    offset = int(params.get("offset", 0) or 0)
+    limit = params.get("limit")
+    end = offset + int(limit) if limit not in (None, "") else None
+    return rows[offset:end], offset
+
+
+def _respond_rows(db: MemoryDatabase, relation: str, request: httpx.Request, matched: List[dict], status: int = 200, total: Optional[int] = None) -> httpx.Response:
+    params = request.url.params
+    prefs = _prefer(request)
+    page, offset = _page(matched, params) if request.method in ("GET", "HEAD") else (matched, 0)
+    select = params.get("select", "*")
+    body = [_project(db, relation, r, select) for r in page]
+    headers = {}
+    if prefs.get("count"):
+        total = len(matched) if total is None else total
+        headers["content-range"] = f"{offset}-{offset + len(page) - 1}/{total}" if page else f"*/{total}"
+    elif page:
+        headers["content-range"] = f"{offset}-{offset + len(page) - 1}/*"
+    if request.method != "GET" and prefs.get("return") == "minimal":
+        return _json_response(status if status != 200 else 204, None, headers)
+    if "application/vnd.pgrst.object" in request.headers.get("accept", ""):
+        if len(body) != 1:
+            raise MemoryApiError(
+                406, "PGRST116", "JSON object requested, multiple (or no) rows returned",
+                f"The result contains {len(body)} rows",
+            )
+        return _json_response(status, body[0], headers)
+    if request.method == "HEAD":
+        return _json_response(status, None, headers)
+    return _json_response(status, body, headers)
+
+
+def _handle_rest(db: MemoryDatabase, request: httpx.Request, path: str) -> httpx.Response:
+    params = request.url.params
+    if path.startswith("rpc/"):
+        name = path[4:]
+        fn = db.functions.get(name)
+        if fn is None:
+            raise MemoryApiError(404, "PGRST202", f"Could not find the function public.{name} in the schema cache")
+        args = json.loads(request.content or b"{}") if request.method == "POST" else dict(params)
+        result = fn(db, args)
+        if isinstance(result, list) and all(isinstance(r, dict) for r in result):
+            matched = _select_rows(db, name, result, params)
+            page, _ = _page(matched, params)
+            return _json_response(200, page)
+        return _json_response(200, result)
+
+    relation = path
+    if request.method in ("GET", "HEAD"):
+        filters, _ = _query_filters(params)
+        matched = _select_rows(db, relation, db.rows_for(relation, filters), params)
+        return _respond_rows(db, relation, request, matched)
+
+    if relation in db.views:
+        raise MemoryApiError(405, "PGRST116", f"cannot write to view {relation}")
+    table = db.table(relation)
+    prefs = _prefer(request)
+
+    if request.method == "POST":
+        payload = json.loads(request.content or b"[]")
+        rows = payload if isinstance(payload, list) else [payload]
+        resolution = prefs.get("resolution")
+        conflict_cols = _cols(params["on_conflict"]) if params.get("on_conflict") else table.schema.primary_key
+        written = []
+        checkpoint = table.checkpoint() if len(rows) > 1 else None
+        try:
+            for values in rows:
+                existing = table.find(conflict_cols, values) if resolution and conflict_cols else None
+                if existing is None:
+                    written.append(table.insert(values))
+                elif resolution == "merge-duplicates":
+                    written.append(table.update(existing, values))
+        except MemoryApiError:
+            if checkpoint is not None:
+                table.rollback(checkpoint)
+            raise
+        return _respond_rows(db, relation, request, written, status=201)
+
+    filters, any_of = _query_filters(params)
+    targets = [
+        rid for rid in table.candidates(filters)
+        if all(_matches(table.rows[rid], f) for f in filters)
+        and all(any(_matches(table.rows[rid], f) for f in group) for group in any_of)
+    ]
+    if request.method == "PATCH":
+        changes = json.loads(request.content or b"{}")
+        changed = [table.update(rid, changes) for rid in targets]
+        return _respond_rows(db, relation, request, changed)
+    if request.method == "DELETE":
+        removed = [table.delete(rid) for rid in targets]
+        return _respond_rows(db, relation, request, removed)
+    raise MemoryApiError(405, "PGRST117", f"Unsupported HTTP method {request.method}")
+
+
+def _storage_error(status: int, error: str, message: str) -> httpx.Response:
+    return _json_response(status, {"statusCode": str(status), "error": error, "message": message})
+
+
+def _parse_upload(request: httpx.Request) -> Tuple[bytes, str]:
+    content_type = request.headers.get("content-type", "")
+    if not content_type.startswith("multipart/"):
+        return request.content, content_type or "application/octet-stream"
+    message = email.parser.BytesParser().parsebytes(
+        f"Content-Type: {content_type}\r\n\r\n".encode() + request.content
+    )
+    for part in message.get_payload():
+        if part.get_param("name", header="content-disposition") == "file":
+            return part.get_payload(decode=True) or b"", part.get_content_type()
+    return b"", "application/octet-stream"
+
+
+def _handle_storage(db: MemoryDatabase, request: httpx.Request, path: str) -> httpx.Response:
+    parts = path.split("/")
+    if parts[:2] == ["object", "list"] and request.method == "POST":
+        bucket = db.buckets[parts[2]]
+        body = json.loads(request.content or b"{}")
+        prefix = (body.get("prefix") or "").strip("/")
+        search = body.get("search") or ""
+        entries: Dict[str, dict] = {}
+        for key, obj in bucket.items():
+            if prefix and not key.startswith(prefix + "/"):
+                continue
+            rest = key[len(prefix) + 1:] if prefix else key
+            name, _, below = rest.partition("/")
+            if search and search not in name:
+                continue
+            if below:
+                entries.setdefault(name, {"name": name, "id": None, "updated_at": None, "created_at": None, "last_accessed_at": None, "metadata": None})
+            else:
+                entries[name] = {
+                    "name": name, "id": obj["id"], "updated_at": obj["updated_at"], "created_at": obj["created_at"],
+                    "last_accessed_at": obj["updated_at"],
+                    "metadata": {"size": len(obj["data"]), "mimetype": obj["content_type"], "cacheControl": obj["cache_control"]},
+                }
+        listed = sorted(entries.values(), key=lambda e: e["name"])
+        offset, limit = int(body.get("offset", 0)), int(body.get("limit", 100))
+        return _json_response(200, listed[offset:offset + limit])
+
+    if parts[0] != "object" or len(parts) < 2:
+        return _storage_error(404, "not_found", f"Unknown storage route {path}")
+
+    if parts[1] == "public":
+        bucket_name, key = parts[2], "/".join(parts[3:])
+    else:
+        bucket_name, key = parts[1], "/".join(parts[2:])
+    bucket = db.buckets[bucket_name]
+
+    if request.method == "DELETE" and not key:
+        prefixes = json.loads(request.content or b"{}").get("prefixes", [])
+        removed = []
+        for p in prefixes:
+            obj = bucket.pop(p, None)
+            if obj is not None:
+                removed.append({"name": p, "bucket_id": bucket_name, "id": obj["id"], "metadata": {"size": len(obj["data"])}})
+        return _json_response(200, removed)
+
+    if request.method in ("POST", "PUT"):
+        if request.method == "POST" and key in bucket and request.headers.get("x-upsert", "false") != "true":
+            return _storage_error(400, "Duplicate", "The resource already exists")
+        if request.method == "PUT" and key not in bucket:
+            return _storage_error(404, "not_found", "Object not found")
+        data, content_type = _parse_upload(request)
+        now = _now()
+        bucket[key] = {
+            "id": bucket.get(key, {}).get("id") or str(uuid.uuid4()),
+            "data": data,
+            "content_type": content_type,
+            "cache_control": request.headers.get("cache-control"),
+            "created_at": bucket.get(key, {}).get("created_at") or now,
+            "updated_at": now,
+        }
+        return _json_response(200, {"Key": f"{bucket_name}/{key}", "Id": bucket[key]["id"]})
+
+    if request.method == "GET":
+        obj = bucket.get(key)
+        if obj is None:
+            return _storage_error(404, "not_found", "Object not found")
+        return httpx.Response(200, content=obj["data"], headers={"content-type": obj["content_type"]})
+
+    return _storage_error(405, "method_not_allowed", f"Unsupported storage request {request.method} {path}")
+
+
+def _handle_auth(db: MemoryDatabase, request: httpx.Request, path: str) -> httpx.Response:
+    parts = path.split("/")
+    if parts[:2] != ["admin", "users"]:
+        return _json_response(404, {"code": 404, "msg": f"Unknown auth route {path}"})
+    if len(parts) == 2:
+        if request.method == "POST":
+            body = json.loads(request.content or b"{}")
+            user = db.add_auth_user(email=body.get("email"), user_metadata=body.get("user_metadata"))
+            return _json_response(200, user)
+        return _json_response(200, {"users": list(db.auth_users.values()), "aud": "authenticated"})
+    user_id = parts[2]
+    user = db.auth_users.get(user_id)
+    if user is None:
+        return _json_response(404, {"code": 404, "error_code": "user_not_found", "msg": "User not found"})
+    if request.method == "GET":
+        return _json_response(200, user)
+    if request.method == "PUT":
+        body = json.loads(request.content or b"{}")
+        if "user_metadata" in body:
+            user["user_metadata"] = {**user.get("user_metadata", {}), **(body["user_metadata"] or {})}
+        for field in ("email", "app_metadata"):
+            if field in body:
+                user[field] = body[field]
+        user["updated_at"] = _now()
+        return _json_response(200, user)
+    if request.method == "DELETE":
+        del db.auth_users[user_id]
+        return _json_response(200, {})
+    return _json_response(405, {"code": 405, "msg": "Method not allowed"})
+
+
+def handle_request(db: MemoryDatabase, request: httpx.Request) -> httpx.Response:
+    path = unquote(request.url.path).lstrip("/")
+    service, _, rest = path.partition("/v1/")
+    try:
+        with db.lock:
+            if service == "rest":
+                return _handle_rest(db, request, rest)
+            if service == "storage":
+                return _handle_storage(db, request, rest)
+            if service == "auth":
+                return _handle_auth(db, request, rest)
+    except MemoryApiError as e:
+        return _json_response(e.status, e.body)
+    return _json_response(404, {"message": f"Unknown route {path}"})
+
+
+# ---------------------------------------------------------------------------
+# Transport
+# ---------------------------------------------------------------------------
+
+class MemorySupabaseTransport(httpx.BaseTransport, httpx.AsyncBaseTransport):
+    """httpx transport answering Supabase API calls from a ``MemoryDatabase``.
+
+    ``latency`` / ``jitter`` (seconds) are added to every request: the sync
+    path sleeps the calling thread like a blocking socket read would, the
+    async path awaits ``asyncio.sleep``.
+    """
+
+    def __init__(self, db: MemoryDatabase, latency: float = 0.0, jitter: float = 0.0):
+        self.db = db
+        self.latency = latency
+        self.jitter = jitter
+        self.requests = 0
+
+    def _delay(self) -> float:
+        return self.latency + (random.uniform(0, self.jitter) if self.jitter else 0.0)
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        request.read()
+        self.requests += 1
+        delay = self._delay()
+        if delay:
+            time.sleep(delay)
+        return handle_request(self.db, request)
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        await request.aread()
+        self.requests += 1
+        delay = self._delay()
+        if delay:
+            await asyncio.sleep(delay)
+        return handle_request(self.db, request)
+
+    def close(self):
+        pass
+
+    async def aclose(self):
+        pass
+
+
+_database: Optional[MemoryDatabase] = None
+_transport: Optional[MemorySupabaseTransport] = None
+_init_lock = threading.Lock()
+
+
+def get_memory_database() -> MemoryDatabase:
+    get_memory_transport()
+    return _database
+
+
+def get_memory_transport() -> MemorySupabaseTransport:
+    """Process-wide fake shared by the sync and async clients."""
+    global _database, _transport
+    with _init_lock:
+        if _transport is None:
+            from app.config.settings import (
+                SUPABASE_MEMORY_LATENCY_MS, SUPABASE_MEMORY_LATENCY_JITTER_MS, SUPABASE_MEMORY_SEED,
+            )
+            _database = MemoryDatabase()
+            if SUPABASE_MEMORY_SEED:
+                _database.seed_from_file(SUPABASE_MEMORY_SEED)
+            _transport = MemorySupabaseTransport(
+                _database,
+                latency=SUPABASE_MEMORY_LATENCY_MS / 1000,
+                jitter=SUPABASE_MEMORY_LATENCY_JITTER_MS / 1000,
+            )
+    return _transport
+
+
+def attach_memory_backend(client) -> None:
+    """Point a supabase-py ``Client``'s PostgREST, Storage and auth sessions at the fake."""
+    transport = get_memory_transport()
+    for session in (client.postgrest.session, client.storage.session, client.auth._http_client):
+        session._transport = transport
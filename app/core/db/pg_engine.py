@@ -0,0 +1,188 @@
+import asyncio
+import datetime
+import decimal
+import json
+import re
+import uuid
+from typing import Any, Dict, List, Optional, Sequence
+
+from app.config.settings import (
+    DATABASE_URL,
+    PG_DIRECT_FUNCTIONS,
+    PG_POOL_MIN_SIZE,
+    PG_POOL_MAX_SIZE,
+    PG_STATEMENT_CACHE_SIZE,
+)
+from app.core.db.resilience import current_call, record_target
+from app.utils.logger import log_info
+
+try:
+    import asyncpg
+except ImportError:  # the direct engine is optional; PostgREST stays the default
+    asyncpg = None
+
+
+# Direct Postgres path for the hottest reads. PostgREST stays the default for
+# everything; a repository function only takes this path when its name is
+# listed in PG_DIRECT_FUNCTIONS (or "*") and DATABASE_URL is configured.
+# asyncpg talks the binary protocol and keeps a per-connection LRU of
+# prepared statements, so repeated lookups skip parse/plan entirely. Set
+# PG_STATEMENT_CACHE_SIZE=0 when DATABASE_URL points at a transaction-mode
+# pooler (Supavisor/PgBouncer on :6543), which cannot hold prepared statements.
+_pool: Optional["asyncpg.Pool"] = None
+# Concurrent first requests must not each open a pool (all but one would leak)
+_pool_lock = asyncio.Lock()
+
+
+class PgResult:
+    """Minimal stand-in for postgrest's APIResponse: ``.data`` and ``.count``."""
+
+    def __init__(self, data: Any, count: Optional[int] = None):
+        self.data = data
+        self.count = count
+
+
+def pg_enabled(function_name: str) -> bool:
+    """True if ``function_name`` should read straight from Postgres."""
+    if asyncpg is None or not DATABASE_URL:
+        return False
+    return "*" in PG_DIRECT_FUNCTIONS or function_name in PG_DIRECT_FUNCTIONS
+
+
+async def _init_connection(conn):
+    for typename in ("json", "jsonb"):
+        await conn.set_type_codec(typename, encoder=json.dumps, decoder=json.loads, schema="pg_catalog")
+
+
+async def get_pg_pool():
+    global _pool
+    if _pool is not None:
+        return _pool
+    async with _pool_lock:
+        if _pool is None:
+            _pool = await asyncpg.create_pool(
+                DATABASE_URL,
+                min_size=PG_POOL_MIN_SIZE,
+                max_size=PG_POOL_MAX_SIZE,
+                statement_cache_size=PG_STATEMENT_CACHE_SIZE,
+                init=_init_connection,
+            )
+            log_info(f"asyncpg pool ready (min={PG_POOL_MIN_SIZE}, max={PG_POOL_MAX_SIZE}) for: {', '.join(sorted(PG_DIRECT_FUNCTIONS))}")
+    return _pool
+
+
+async def close_pg_pool():
+    """Close the pool; called from the FastAPI lifespan on shutdown."""
+    global _pool
+    if _pool is not None:
+        await _pool.close()
+    _pool = None
+
+
+# ---------------------------------------------------------------------------
+# Row decoding: same JSON shapes PostgREST would have produced
+# ---------------------------------------------------------------------------
+
+def _interval_text(value: datetime.timedelta) -> str:
+    """Render a timedelta the way Postgres prints an interval (IntervalStyle=postgres)."""
+    days = value.days
+    seconds = value.seconds
+    hours, rem = divmod(seconds, 3600)
+    minutes, secs = divmod(rem, 60)
+    clock = f"{hours:02d}:{minutes:02d}:{secs:02d}"
+    if value.microseconds:
+        clock += f".{value.microseconds:06d}".rstrip("0")
+    if days and not seconds and not value.microseconds:
+        return f"{days} day{'s' if abs(days) != 1 else ''}"
+    if days:
+        return f"{days} day{'s' if abs(days) != 1 else ''} {clock}"
+    return clock
+
+
+def to_json_value(value: Any) -> Any:
+    if value is None or isinstance(value, (str, bool, int, float)):
+        return value
+    if isinstance(value, (datetime.datetime, datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, datetime.timedelta):
+        return _interval_text(value)
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    if isinstance(value, decimal.Decimal):
+        return int(value) if value == value.to_integral_value() else float(value)
+    if isinstance(value, (list, tuple)):
+        return [to_json_value(v) for v in value]
+    if isinstance(value, dict):
+        return {k: to_json_value(v) for k, v in value.items()}
+    return str(value)
+
+
+def record_to_dict(record) -> Dict[str, Any]:
+    return {key: to_json_value(value) for key, value in record.items()}
+
+
+# ---------------------------------------------------------------------------
+# Query helpers
+# ---------------------------------------------------------------------------
+
+_IDENTIFIER = re.compile(r"^[a-z_][a-z0-9_]*$")
+
+
+def quote_ident(name: str) -> str:
+    """Quote a column name taken from request input (sort keys)."""
+    if not _IDENTIFIER.match(name or ""):
+        raise ValueError(f"invalid column name: {name!r}")
+    return f'"{name}"'
+
+
+def _note(target: str):
+    record_target(target)
+    call = current_call.get()
+    if call is not None:
+        call.setdefault("operation", "select")
+
+
+async def fetch(target: str, sql: str, *args) -> List[Dict[str, Any]]:
+    _note(target)
+    pool = await get_pg_pool()
+    async with pool.acquire() as conn:
+        rows = await conn.fetch(sql, *args)
+    return [record_to_dict(r) for r in rows]
+
+
+async def fetchrow(target: str, sql: str, *args) -> Optional[Dict[str, Any]]:
+    _note(target)
+    pool = await get_pg_pool()
+    async with pool.acquire() as conn:
+        row = await conn.fetchrow(sql, *args)
+    return record_to_dict(row) if row is not None else None
+
+
+async def fetchval(target: str, sql: str, *args) -> Any:
+    _note(target)
+    pool = await get_pg_pool()
+    async with pool.acquire() as conn:
+        value = await conn.fetchval(sql, *args)
+    return to_json_value(value)
+
+
+async def fetch_page(target: str, sql: str, rows_sql: str, args: Sequence, count_args: Sequence,
+                     count: Optional[str] = "exact", exact_below: int = 1000) -> PgResult:
+    """Page of rows plus a total over ``rows_sql`` (the unpaged query), read from one connection.
+
+    ``count`` follows PostgREST's Prefer: count=... options: "exact" runs
+    count(*), "planned" takes the planner's row estimate, "estimated" uses
+    the estimate only when it is at least ``exact_below`` rows and counts
+    exactly otherwise, and None skips the total (``count`` is then None).
+    """
+    _note(target)
+    pool = await get_pg_pool()
+    async with pool.acquire() as conn:
+        rows = await conn.fetch(sql, *args)
+        total = None
+        if count in ("planned", "estimated"):
+            plan = await conn.fetchval(f"EXPLAIN (FORMAT JSON) {rows_sql}", *count_args)
+            total = int(plan[0]["Plan"]["Plan Rows"])
+        if count == "exact" or (count == "estimated" and total < exact_below):
+            total = await conn.fetchval(f"SELECT count(*) FROM ({rows_sql}) AS q", *count_args)
+    return PgResult([record_to_dict(r) for r in rows], total)
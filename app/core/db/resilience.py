@@ -0,0 +1,300 @@
+import random
+import threading
+import time
+from contextvars import ContextVar
+from typing import Dict, Optional
+
+import httpx
+from postgrest.exceptions import APIError
+from storage3.exceptions import StorageApiError
+
+try:
+    from h2.exceptions import ProtocolError as H2ProtocolError
+except ImportError:  # h2 is only present when HTTP/2 is enabled
+    H2ProtocolError = None
+
+
+# ---------------------------------------------------------------------------
+# Error classification
+# ---------------------------------------------------------------------------
+
+# PostgREST / Postgres error codes that mean "try again", not "your request is wrong"
+_RETRYABLE_PG_CODES = {
+    "PGRST000",  # PostgREST could not connect to the database
+    "PGRST001",  # PostgREST lost its database connection
+    "PGRST002",  # schema cache not ready (database restarting)
+    "PGRST003",  # timed out waiting for a pooled connection
+    "53300",     # too_many_connections
+    "57P01",     # admin_shutdown
+    "57P03",     # cannot_connect_now
+    "08000", "08003", "08006",  # connection exceptions
+    "40001",     # serialization_failure
+    "40P01",     # deadlock_detected
+}
+# Server-side trouble that should trip the breaker but must not be retried
+# (retrying a statement timeout during an incident only adds load)
+_FAILURE_ONLY_PG_CODES = {"57014"}  # query_canceled / statement_timeout
+
+_RETRYABLE_HTTP_STATUS = {502, 503, 504}
+
+
+class ErrorKind:
+    TRANSIENT = "transient"   # infrastructure failure, safe to retry, counts against the breaker
+    FAILURE = "failure"       # server-side failure, not retried, counts against the breaker
+    PERMANENT = "permanent"   # the request itself was rejected; the backend is healthy
+
+
+def _status_of(value) -> Optional[int]:
+    try:
+        status = int(value)
+    except (TypeError, ValueError):
+        return None
+    # Postgres SQLSTATEs like "23505" are numeric too; only HTTP statuses count
+    return status if 100 <= status < 600 else None
+
+
+def classify_error(exc: BaseException) -> str:
+    """Map an exception raised by a Supabase call to an ``ErrorKind``."""
+    if isinstance(exc, (httpx.TransportError, ConnectionError)):
+        return ErrorKind.TRANSIENT
+    if H2ProtocolError is not None and isinstance(exc, H2ProtocolError):
+        return ErrorKind.TRANSIENT
+    sqlstate = getattr(exc, "sqlstate", None)  # asyncpg errors on the direct Postgres path
+    if sqlstate:
+        if sqlstate in _RETRYABLE_PG_CODES:
+            return ErrorKind.TRANSIENT
+        if sqlstate in _FAILURE_ONLY_PG_CODES:
+            return ErrorKind.FAILURE
+        return ErrorKind.PERMANENT
+    if isinstance(exc, APIError):
+        code = str(exc.code) if exc.code is not None else ""
+        if code in _RETRYABLE_PG_CODES:
+            return ErrorKind.TRANSIENT
+        if code in _FAILURE_ONLY_PG_CODES:
+            return ErrorKind.FAILURE
+        # Non-JSON error bodies (gateway pages) carry the HTTP status as the code
+        status = _status_of(exc.code)
+        if status in _RETRYABLE_HTTP_STATUS:
+            return ErrorKind.TRANSIENT
+        if status is not None and status >= 500:
+            return ErrorKind.FAILURE
+        return ErrorKind.PERMANENT
+    if isinstance(exc, StorageApiError):
+        status = _status_of(exc.status)
+        if status in _RETRYABLE_HTTP_STATUS:
+            return ErrorKind.TRANSIENT
+        if status is not None and status >= 500:
+            return ErrorKind.FAILURE
+        return ErrorKind.PERMANENT
+    return ErrorKind.PERMANENT
+
+
+def backoff_delay(attempt: int, base: float, cap: float) -> float:
+    """Exponential backoff with full jitter: uniform(0, min(cap, base * 2**attempt))."""
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+# ---------------------------------------------------------------------------
+# Retry budget
+# ---------------------------------------------------------------------------
+
+class RetryBudget:
+    """Token bucket that caps retries to a fraction of regular traffic.
+
+    Every first attempt deposits ``ratio`` tokens and every retry withdraws
+    one, so retries can add at most ``ratio`` extra load. ``min_per_second``
+    keeps a small trickle of retries available when traffic is low. When
+    Supabase is down the bucket drains quickly and callers fail fast instead
+    of multiplying the load.
+    """
+
+    def __init__(self, ratio: float, min_per_second: float, capacity: Optional[float] = None):
+        self.ratio = ratio
+        self.min_per_second = min_per_second
+        self.capacity = capacity if capacity is not None else max(10.0, min_per_second * 10)
+        self._tokens = self.capacity
+        self._last_refill = time.monotonic()
+        self.granted = 0
+        self.denied = 0
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._last_refill) * self.min_per_second)
+        self._last_refill = now
+
+    def deposit(self):
+        self._refill()
+        self._tokens = min(self.capacity, self._tokens + self.ratio)
+
+    def try_withdraw(self) -> bool:
+        self._refill()
+        if self._tokens >= 1:
+            self._tokens -= 1
+            self.granted += 1
+            return True
+        self.denied += 1
+        return False
+
+    def stats(self) -> dict:
+        self._refill()
+        return {"tokens": round(self._tokens, 2), "granted": self.granted, "denied": self.denied}
+
+
+# ---------------------------------------------------------------------------
+# Circuit breaker
+# ---------------------------------------------------------------------------
+
+class CircuitOpenError(Exception):
+    """Raised without calling Supabase while the breaker for a target is open."""
+
+    def __init__(self, target: str, retry_after: float):
+        super().__init__(f"circuit open for '{target}', retry in {retry_after:.1f}s")
+        self.target = target
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """Closed -> open after ``failure_threshold`` consecutive failures.
+
+    While open every call is rejected for ``reset_timeout`` seconds. After
+    that the breaker goes half-open and lets ``half_open_max_calls`` probes
+    through: one success closes it again, a failure re-opens it.
+    Breakers are checked from executor threads too (when the target is only
+    known once the request goes out, see ``record_target``), so state changes
+    happen under a lock.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, target: str, failure_threshold: int, reset_timeout: float, half_open_max_calls: int = 1):
+        self.target = target
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.half_open_max_calls = half_open_max_calls
+        self.state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probes = 0
+        self.rejected = 0
+        self.opened = 0
+        self._lock = threading.Lock()
+
+    def before_call(self):
+        with self._lock:
+            self._before_call()
+
+    def _before_call(self):
+        if self.state == self.OPEN:
+            elapsed = time.monotonic() - self._opened_at
+            if elapsed < self.reset_timeout:
+                self.rejected += 1
+                raise CircuitOpenError(self.target, self.reset_timeout - elapsed)
+            self.state = self.HALF_OPEN
+            self._probes = 0
+        if self.state == self.HALF_OPEN:
+            if self._probes >= self.half_open_max_calls:
+                self.rejected += 1
+                raise CircuitOpenError(self.target, self.reset_timeout)
+            self._probes += 1
+
+    def on_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self._failures = 0
+            self._probes = 0
+
+    def on_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self.state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                self._trip()
+
+    def on_release(self):
+        """The call ended without a verdict (e.g. permanent error); free its probe slot."""
+        with self._lock:
+            if self.state == self.HALF_OPEN and self._probes > 0:
+                self._probes -= 1
+
+    def _trip(self):
+        if self.state != self.OPEN:
+            self.opened += 1
+        self.state = self.OPEN
+        self._opened_at = time.monotonic()
+        self._probes = 0
+
+    def stats(self) -> dict:
+        return {
+            "state": self.state,
+            "consecutive_failures": self._failures,
+            "opened": self.opened,
+            "rejected": self.rejected,
+        }
+
+
+class BreakerRegistry:
+    """One breaker per Supabase target (table/view, ``rpc/<fn>`` or ``storage``)."""
+
+    def __init__(self, failure_threshold: int, reset_timeout: float, half_open_max_calls: int = 1):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.half_open_max_calls = half_open_max_calls
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+
+    def get(self, target: str) -> CircuitBreaker:
+        breaker = self._breakers.get(target)
+        if breaker is None:
+            with self._lock:
+                breaker = self._breakers.get(target)
+                if breaker is None:
+                    breaker = CircuitBreaker(target, self.failure_threshold, self.reset_timeout, self.half_open_max_calls)
+                    self._breakers[target] = breaker
+        return breaker
+
+    def stats(self) -> dict:
+        with self._lock:
+            breakers = list(self._breakers.items())
+        return {target: b.stats() for target, b in breakers if b.state != CircuitBreaker.CLOSED or b.opened}
+
+
+# ---------------------------------------------------------------------------
+# Call target tracking
+# ---------------------------------------------------------------------------
+
+# Set by safe_supabase_operation for the duration of one call. The target
+# (table/view, ``rpc/<fn>`` or ``storage``) is filled in when the call's first
+# request goes out: the HTTP request hook (see telemetry.instrument_session)
+# reads it off the URL and the direct Postgres path passes it explicitly. When
+# safe_supabase_operation could not tell the target up front it leaves an
+# ``admit`` callback in the dict, which checks that target's breaker right
+# before the request is sent.
+current_call: ContextVar[Optional[dict]] = ContextVar("supabase_current_call", default=None)
+
+_REST_PREFIX = "/rest/v1/"
+_STORAGE_PREFIX = "/storage/v1/"
+
+
+def target_for_path(path: str) -> Optional[str]:
+    """Target of a Supabase request path, e.g. ``/rest/v1/rpc/get_role`` -> ``rpc/get_role``."""
+    if path.startswith(_REST_PREFIX):
+        return path[len(_REST_PREFIX):].strip("/") or None
+    if path.startswith(_STORAGE_PREFIX):
+        return "storage"
+    return None
+
+
+def record_target(target: Optional[str]):
+    """Note the target the running call is about to hit.
+
+    Only the first target of a call counts. Raises ``CircuitOpenError``
+    (before anything is sent) when the call's ``admit`` check rejects it.
+    """
+    call = current_call.get()
+    if call is None or not target or "target" in call:
+        return
+    call["target"] = target
+    admit = call.get("admit")
+    if admit is not None:
+        admit(target)
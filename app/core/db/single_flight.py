@@ -0,0 +1,74 @@
+import asyncio
+import copy
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+
+def query_fingerprint(builder) -> Optional[str]:
+    """Coalescing key for a PostgREST read query, or None if it must not be shared.
+
+    Two builders get the same key when they hit the same table/view with the
+    same filters, projection, ordering, range and response shape (``single()``,
+    ``count=...``). Only GET requests qualify; writes and RPC calls always run
+    on their own.
+    """
+    method = getattr(builder, "http_method", None)
+    path = getattr(builder, "path", None)
+    if method != "GET" or path is None:
+        return None
+    params = "&".join(f"{k}={v}" for k, v in sorted(builder.params.multi_items()))
+    headers = ",".join(f"{k}:{v}" for k, v in sorted(builder.headers.items()))
+    return f"{path}?{params}|{headers}"
+
+
+class _Flight:
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 1
+
+
+class SingleFlight:
+    """Share one in-flight call between concurrent callers asking for the same key.
+
+    The first caller (the leader) starts the call as its own task; callers
+    arriving while it is still running await the same task instead of issuing
+    another round trip. Cancelling one waiter never cancels the shared call.
+    When a call had more than one waiter, each of them gets a deep copy of
+    the response, because services post-process ``result.data`` in place.
+    """
+
+    def __init__(self):
+        self._flights: Dict[str, _Flight] = {}
+        self.leaders = 0
+        self.hits = 0
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        flight = self._flights.get(key)
+        if flight is not None and not flight.task.done():
+            flight.waiters += 1
+            self.hits += 1
+        else:
+            flight = _Flight(asyncio.ensure_future(fn()))
+            self._flights[key] = flight
+            self.leaders += 1
+            flight.task.add_done_callback(lambda _t, key=key, flight=flight: self._forget(key, flight))
+
+        result = await asyncio.shield(flight.task)
+        if flight.waiters > 1:
+            return copy.deepcopy(result)
+        return result
+
+    def _forget(self, key: str, flight: _Flight):
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+        # Mark the outcome as retrieved even if every waiter was cancelled
+        if not flight.task.cancelled():
+            flight.task.exception()
+
+    def stats(self) -> dict:
+        return {
+            "leaders": self.leaders,
+            "hits": self.hits,
+            "in_flight": len(self._flights),
+        }
@@ -1,19 +1,57 @@
 from supabase import create_client, Client
-from app.config.settings import SUPABASE_PROJECT_URL, SUPABASE_API_KEY, SUPABASE_SERVICE_KEY
+from app.config.settings import (
+    SUPABASE_PROJECT_URL, SUPABASE_API_KEY, SUPABASE_SERVICE_KEY,
+    DB_EXECUTOR_MAX_WORKERS, DB_EXECUTOR_MAX_QUEUE, DB_OPERATION_TIMEOUT,
+    DB_SINGLE_FLIGHT_ENABLED,
+    DB_RETRY_MAX_ATTEMPTS, DB_RETRY_BASE_DELAY, DB_RETRY_MAX_DELAY,
+    DB_RETRY_BUDGET_RATIO, DB_RETRY_BUDGET_MIN_PER_SECOND,
+    DB_BREAKER_FAILURE_THRESHOLD, DB_BREAKER_RESET_TIMEOUT, DB_BREAKER_HALF_OPEN_MAX_CALLS,
+    SUPABASE_BACKEND,
+)
 from fastapi import HTTPException
 from app.utils.logger import log_info, log_error, log_debugger
+from app.core.db.async_client import get_async_supabase_client, close_async_supabase_client
+from app.core.db.executor import DbExecutor, DbExecutorSaturated, DbOperationTimeout
+from app.core.db.single_flight import SingleFlight, query_fingerprint
+from app.core.db.resilience import (
+    BreakerRegistry, CircuitOpenError, ErrorKind, RetryBudget,
+    backoff_delay, classify_error, current_call,
+)
+from app.core.db.telemetry import calling_service, instrument_session, observe_call
+from app.core.db import memory_supabase
+from app.core.loop_monitor import guard_sync_session
 from functools import lru_cache
+from typing import Optional
 import asyncio
+import inspect
+import threading
 import time
-from concurrent.futures import ThreadPoolExecutor
 
 
-# Global thread pool for running Supabase operations asynchronously
-thread_pool = ThreadPoolExecutor()
+# Bounded, instrumented pool for running blocking Supabase operations
+db_executor = DbExecutor(
+    max_workers=DB_EXECUTOR_MAX_WORKERS,
+    max_queue=DB_EXECUTOR_MAX_QUEUE,
+    default_timeout=DB_OPERATION_TIMEOUT,
+)
 
-# Initialize Supabase client
-@lru_cache
-def get_supabase_client():
+# Shares identical concurrent read queries (see safe_supabase_operation's coalesce_key)
+single_flight = SingleFlight()
+
+# Shared by every safe_supabase_operation call in this process
+retry_budget = RetryBudget(ratio=DB_RETRY_BUDGET_RATIO, min_per_second=DB_RETRY_BUDGET_MIN_PER_SECOND)
+breakers = BreakerRegistry(
+    failure_threshold=DB_BREAKER_FAILURE_THRESHOLD,
+    reset_timeout=DB_BREAKER_RESET_TIMEOUT,
+    half_open_max_calls=DB_BREAKER_HALF_OPEN_MAX_CALLS,
+)
+_thread_clients = threading.local()
+_clients_lock = threading.Lock()
+_clients_created = 0
+
+
+def _create_supabase_client() -> Client:
+    global _clients_created
     # Prefer service role key on the server for privileged operations (e.g., storage uploads)
     # Fallback to public anon key if service key is not configured
     key_to_use = SUPABASE_SERVICE_KEY or SUPABASE_API_KEY
@@ -21,32 +59,200 @@ def get_supabase_client():
     # Avoid logging the actual secret value
     which_key = "anon" if SUPABASE_API_KEY else "service"
     log_debugger(f"Using Supabase key type: {which_key}")
-    supbase: Client = create_client(SUPABASE_PROJECT_URL, key_to_use)
+    if SUPABASE_BACKEND == "memory":
+        supbase: Client = create_client(memory_supabase.MEMORY_SUPABASE_URL, memory_supabase.MEMORY_SUPABASE_KEY)
+        memory_supabase.attach_memory_backend(supbase)
+    else:
+        supbase: Client = create_client(SUPABASE_PROJECT_URL, key_to_use)
+    instrument_session(supbase.postgrest.session)
+    instrument_session(supbase.storage.session)
+    for session in (supbase.postgrest.session, supbase.storage.session, supbase.auth._http_client):
+        guard_sync_session(session)
+    with _clients_lock:
+        _clients_created += 1
     return supbase
 
-# Helper to run Supabase operations asynchronously
-async def run_supabase_async(func):
-    return await asyncio.get_event_loop().run_in_executor(
-        thread_pool, func
-    )
 
-# Helper for safer Supabase operations with error handling
-async def safe_supabase_operation(operation, error_message="Supabase operation failed", retries: int = 3, backoff_seconds: float = 0.25):
+class _ThreadLocalSupabaseClient:
+    """Proxy that hands every thread its own supabase-py client.
+
+    supabase-py clients wrap a sync httpx client that is not meant to be shared
+    across threads. Services keep calling ``get_supabase_client()`` once and
+    using the result inside ``op()``; attribute access is resolved in the
+    thread that runs the operation, so each executor worker ends up with a
+    dedicated client. The pool therefore never grows beyond the executor size
+    (plus the event-loop thread).
+    """
+
+    def _client(self) -> Client:
+        client = getattr(_thread_clients, "client", None)
+        if client is None:
+            client = _create_supabase_client()
+            _thread_clients.client = client
+        return client
+
+    def __getattr__(self, name):
+        return getattr(self._client(), name)
+
+
+# Initialize Supabase client
+@lru_cache
+def get_supabase_client():
+    return _ThreadLocalSupabaseClient()
+
+
+def get_db_executor_stats() -> dict:
+    """Live executor stats (active / queued calls, wait times, rejections)."""
+    return {
+        **db_executor.stats(),
+        "clients": _clients_created,
+        "single_flight": {"enabled": DB_SINGLE_FLIGHT_ENABLED, **single_flight.stats()},
+        "retry_budget": retry_budget.stats(),
+        "breakers": breakers.stats(),
+    }
+
+
+# Helper to run Supabase operations asynchronously.
+# ``async def`` operations (built on get_async_supabase_client()) are awaited
+# directly on the event loop; plain ``def`` operations using the sync client
+# are still pushed onto the thread pool, so call sites can migrate one by one.
+# Every call is recorded in the supabase_db_* metrics (see telemetry.py).
+async def run_supabase_async(func, timeout: Optional[float] = None, service: Optional[str] = None):
+    service = service or calling_service()
+    call = current_call.get()
+    token = None
+    if call is None:
+        call = {}
+        token = current_call.set(call)
+    started_at = time.perf_counter()
+    try:
+        if inspect.iscoroutinefunction(func):
+            result = await db_executor.run_async(func, timeout)
+        else:
+            result = await db_executor.run(func, timeout)
+    except BaseException as e:
+        observe_call(call, service, started_at, error=e)
+        raise
+    else:
+        observe_call(call, service, started_at, result=result)
+        return result
+    finally:
+        if token is not None:
+            current_call.reset(token)
+
+# Helper for safer Supabase operations with error handling.
+# Failures are classified by exception type (see resilience.classify_error).
+# Transient ones are retried with exponential backoff and full jitter, as long
+# as the process-wide retry budget allows it. Each target (table/view,
+# rpc/<fn>, storage) has its own circuit breaker; while it is open, calls fail
+# fast with 503 instead of reaching Supabase.
+# Pass ``coalesce_key=query_fingerprint(query)`` for read queries that many
+# requests issue at the same moment (dashboards, project lists, RBAC lookups):
+# concurrent callers with the same key share one round trip and its result.
+async def safe_supabase_operation(operation, error_message="Supabase operation failed", retries: Optional[int] = None, backoff_seconds: Optional[float] = None, timeout: Optional[float] = None, coalesce_key: Optional[str] = None, target: Optional[str] = None):
+    service = calling_service()
+    retries = DB_RETRY_MAX_ATTEMPTS if retries is None else retries
+    backoff_seconds = DB_RETRY_BASE_DELAY if backoff_seconds is None else backoff_seconds
+    if coalesce_key and target is None:
+        # Fingerprints start with the PostgREST path, i.e. "/<table>?..."
+        target = coalesce_key.split("?", 1)[0].lstrip("/") or None
+    if coalesce_key and DB_SINGLE_FLIGHT_ENABLED:
+        return await single_flight.do(
+            coalesce_key,
+            lambda: _safe_supabase_operation(operation, error_message, retries, backoff_seconds, timeout, target, service),
+        )
+    return await _safe_supabase_operation(operation, error_message, retries, backoff_seconds, timeout, target, service)
+
+
+async def _safe_supabase_operation(operation, error_message, retries, backoff_seconds, timeout, target, service):
+    retry_budget.deposit()
     attempt = 0
     while True:
+        breaker = breakers.get(target) if target else None
         try:
-            return await run_supabase_async(operation)
+            if breaker is not None:
+                breaker.before_call()
+        except CircuitOpenError as e:
+            raise _circuit_open(error_message, e)
+
+        # Without a target up front, the breaker is checked when the op's first
+        # request goes out and the target is read off its URL (see record_target)
+        call = {"target": target} if target else _admitting_call()
+        token = current_call.set(call)
+        try:
+            result = await run_supabase_async(operation, timeout, service)
+        except asyncio.CancelledError:
+            # Don't let a cancelled half-open probe hold the probe slot forever
+            breaker = breaker or call.get("breaker")
+            if breaker is not None:
+                breaker.on_release()
+            raise
+        except CircuitOpenError as e:
+            raise _circuit_open(error_message, e)
+        except DbExecutorSaturated as e:
+            if breaker is not None:
+                breaker.on_release()
+            log_error(f"{error_message}: {e}")
+            raise HTTPException(status_code=503, detail=f"{error_message}: database is busy, please retry")
+        except HTTPException:
+            # The op turned a database error into a client error itself
+            breaker = breaker or call.get("breaker")
+            if breaker is not None:
+                breaker.on_release()
+            raise
+        except DbOperationTimeout as e:
+            breaker = breaker or call.get("breaker")
+            if breaker is not None:
+                breaker.on_failure()
+            log_error(f"{error_message}: {e}")
+            raise HTTPException(status_code=504, detail=f"{error_message}: {e}")
         except Exception as e:
-            attempt += 1
-            error_text = str(e)
-            is_transient = (
-                "RemoteProtocolError" in error_text or
-                "ConnectionResetError" in error_text or
-                "StreamClosed" in error_text or
-                "ConnectionTerminated" in error_text
-            )
-            if attempt <= retries and is_transient:
-                await asyncio.sleep(backoff_seconds * attempt)
+            breaker = breaker or call.get("breaker")
+            kind = classify_error(e)
+            if breaker is not None:
+                if kind == ErrorKind.PERMANENT:
+                    breaker.on_release()
+                else:
+                    breaker.on_failure()
+            if (
+                kind == ErrorKind.TRANSIENT
+                and attempt < retries
+                and (breaker is None or breaker.state == breaker.CLOSED)
+                and retry_budget.try_withdraw()
+            ):
+                delay = backoff_delay(attempt, backoff_seconds, DB_RETRY_MAX_DELAY)
+                attempt += 1
+                log_info(f"{error_message}: transient {type(e).__name__}, retry {attempt}/{retries} in {delay:.2f}s")
+                await asyncio.sleep(delay)
                 continue
-            raise HTTPException(status_code=500, detail=f"{error_message}: {error_text}")
+            status = 503 if kind == ErrorKind.TRANSIENT else 500
+            raise HTTPException(status_code=status, detail=f"{error_message}: {e}")
+        else:
+            breaker = breaker or call.get("breaker")
+            if breaker is not None:
+                breaker.on_success()
+            return result
+        finally:
+            current_call.reset(token)
+
+
+def _admitting_call() -> dict:
+    """Per-call context whose breaker check runs once the target is known."""
+    call = {}
+
+    def admit(target: str):
+        breaker = breakers.get(target)
+        breaker.before_call()
+        call["breaker"] = breaker
 
+    call["admit"] = admit
+    return call
+
+
+def _circuit_open(error_message: str, e: CircuitOpenError) -> HTTPException:
+    log_error(f"{error_message}: {e}")
+    return HTTPException(
+        status_code=503,
+        detail=f"{error_message}: service temporarily unavailable, please retry",
+        headers={"Retry-After": str(max(1, int(e.retry_after)))},
+    )
@@ -0,0 +1,155 @@
+import os
+import sys
+import time
+from typing import Optional
+
+import httpx
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    REGISTRY,
+    generate_latest,
+)
+from prometheus_client import multiprocess
+
+from app.core.db.resilience import current_call, record_target, target_for_path
+
+
+# With PROMETHEUS_MULTIPROC_DIR set (see Dockerfile) every uvicorn worker
+# writes its samples to mmap files in that directory and /metrics aggregates
+# all of them, so a scrape sees the whole container, not one random worker.
+MULTIPROC_DIR = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+
+_LABELS = ("target", "operation", "service")
+
+DB_CALL_SECONDS = Histogram(
+    "supabase_db_call_seconds",
+    "Latency of Supabase calls by table/view, operation and calling service",
+    _LABELS,
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0),
+)
+DB_ROWS = Counter(
+    "supabase_db_rows_total",
+    "Rows returned or affected by Supabase calls",
+    _LABELS,
+)
+DB_RESPONSE_BYTES = Counter(
+    "supabase_db_response_bytes_total",
+    "Response body bytes received from Supabase",
+    _LABELS,
+)
+DB_ERRORS = Counter(
+    "supabase_db_errors_total",
+    "Failed Supabase calls by error type",
+    _LABELS + ("error",),
+)
+
+_HTTP_OPERATIONS = {
+    "GET": "select",
+    "HEAD": "count",
+    "POST": "insert",
+    "PATCH": "update",
+    "PUT": "upsert",
+    "DELETE": "delete",
+}
+
+
+def calling_service(depth: int = 2) -> str:
+    """Short module name of the code that called into the DB helpers."""
+    name = sys._getframe(depth).f_globals.get("__name__", "unknown")
+    return name.rsplit(".", 1)[-1]
+
+
+def _operation_for(request) -> str:
+    if request.method == "POST":
+        if "/rpc/" in request.url.path:
+            return "rpc"
+        if "resolution=merge-duplicates" in request.headers.get("prefer", ""):
+            return "upsert"
+    return _HTTP_OPERATIONS.get(request.method, request.method.lower())
+
+
+def _on_request(request):
+    # Runs as execute() sends the request, in whatever thread runs the op
+    record_target(target_for_path(request.url.path))
+
+
+async def _on_request_async(request):
+    _on_request(request)
+
+
+def _note_response(response):
+    call = current_call.get()
+    if call is None:
+        return
+    call.setdefault("operation", _operation_for(response.request))
+    call["bytes"] = call.get("bytes", 0) + len(response.content)
+
+
+def _on_response(response):
+    # Reading here is free: PostgREST's execute() reads the whole body anyway
+    response.read()
+    _note_response(response)
+
+
+async def _on_response_async(response):
+    await response.aread()
+    _note_response(response)
+
+
+def instrument_session(session):
+    """Attach the target and byte/operation hooks to an httpx client once."""
+    # postgrest's sync client also defines aclose(), so check the class
+    if isinstance(session, httpx.AsyncClient):
+        wanted = {"request": _on_request_async, "response": _on_response_async}
+    else:
+        wanted = {"request": _on_request, "response": _on_response}
+    event_hooks = dict(session.event_hooks)
+    for event, hook in wanted.items():
+        hooks = event_hooks.get(event, [])
+        if hook not in hooks:
+            event_hooks[event] = [*hooks, hook]
+    session.event_hooks = event_hooks
+    return session
+
+
+def _row_count(result) -> int:
+    data = getattr(result, "data", None)
+    if isinstance(data, list):
+        return len(data)
+    if data:
+        return 1
+    return 0
+
+
+def observe_call(call: dict, service: str, started_at: float, result=None, error: Optional[BaseException] = None):
+    """Record one Supabase call from the per-call context filled in by the HTTP hooks."""
+    target = call.get("target", "unknown")
+    operation = call.get("operation") or ("rpc" if target.startswith("rpc/") else "unknown")
+    labels = (target, operation, service)
+    DB_CALL_SECONDS.labels(*labels).observe(time.perf_counter() - started_at)
+    if call.get("bytes"):
+        DB_RESPONSE_BYTES.labels(*labels).inc(call["bytes"])
+    if error is not None:
+        DB_ERRORS.labels(*labels, type(error).__name__).inc()
+    else:
+        DB_ROWS.labels(*labels).inc(_row_count(result))
+
+
+def render_metrics():
+    """Exposition payload and content type for the /metrics endpoint."""
+    if MULTIPROC_DIR:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
+
+
+def mark_worker_dead():
+    """Clean up this worker's live-gauge files on shutdown (multiprocess mode only)."""
+    if MULTIPROC_DIR:
+        multiprocess.mark_process_dead(os.getpid())
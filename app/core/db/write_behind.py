@@ -0,0 +1,261 @@
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from fastapi import HTTPException
+from prometheus_client import Counter, Gauge, Histogram
+
+from app.utils.logger import log_error, log_info
+
+
+QUEUE_DEPTH = Gauge(
+    "write_behind_queue_depth",
+    "Rows waiting in a write-behind journal",
+    ("journal",),
+    multiprocess_mode="livesum",
+)
+FLUSH_ROWS = Histogram(
+    "write_behind_flush_rows",
+    "Rows written per write-behind flush",
+    ("journal",),
+    buckets=(1, 5, 10, 25, 50, 100, 250, 500, 1000),
+)
+FLUSH_SECONDS = Histogram(
+    "write_behind_flush_seconds",
+    "Latency of write-behind flushes",
+    ("journal",),
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+)
+FLUSH_ERRORS = Counter(
+    "write_behind_flush_errors_total",
+    "Failed write-behind flushes (kept and retried) and rows dropped as rejected",
+    ("journal", "outcome"),
+)
+BACKPRESSURE_SECONDS = Counter(
+    "write_behind_backpressure_seconds_total",
+    "Time callers spent waiting for room in a full write-behind journal",
+    ("journal",),
+)
+
+
+class WriteBehindJournal:
+    """Buffers rows in memory and writes them in bulk off the request path.
+
+    ``enqueue`` returns as soon as the row is queued; a background task
+    writes queued rows with ``write(rows)`` (one bulk upsert) once
+    ``flush_size`` rows are waiting or ``flush_interval`` seconds have
+    passed. Rows are keyed by ``key`` (e.g. ``hash_id``): enqueuing a row
+    whose key is already queued replaces it, and the upsert on that key keeps
+    retries idempotent.
+
+    When ``max_queue`` rows are waiting, ``enqueue`` blocks until a flush
+    makes room, so a slow database slows writers down instead of growing the
+    queue without bound. A flush the database could not take (503/504) is
+    put back and retried with backoff; a batch it rejected (500) is retried
+    row by row and only the rejected rows are dropped (and logged).
+
+    Until ``start`` is called (scripts, tests) or after ``drain``,
+    ``enqueue`` writes the row immediately.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        write: Callable[[List[dict]], Awaitable[object]],
+        key: str,
+        flush_size: int,
+        flush_interval: float,
+        max_queue: int,
+    ):
+        self.name = name
+        self.write = write
+        self.key = key
+        self.flush_size = max(1, flush_size)
+        self.flush_interval = flush_interval
+        self.max_queue = max(self.flush_size, max_queue)
+        self._pending: "OrderedDict[str, dict]" = OrderedDict()
+        self._task: Optional[asyncio.Task] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._space: Optional[asyncio.Event] = None
+        self._writing: Optional[asyncio.Lock] = None
+        self._failures = 0
+        self.flushed = 0
+        self.dropped = 0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def _depth_changed(self):
+        QUEUE_DEPTH.labels(self.name).set(len(self._pending))
+        if self._space is not None and len(self._pending) < self.max_queue:
+            self._space.set()
+
+    # -- lifecycle -------------------------------------------------------------
+
+    def start(self):
+        """Start the flusher on the running loop; call from the lifespan startup."""
+        if self.running:
+            return
+        self._wake = asyncio.Event()
+        self._space = asyncio.Event()
+        self._space.set()
+        self._writing = asyncio.Lock()
+        self._task = asyncio.get_running_loop().create_task(self._run(), name=f"write-behind:{self.name}")
+
+    async def drain(self, timeout: float):
+        """Stop the flusher and write everything still queued (lifespan shutdown)."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        deadline = time.monotonic() + timeout
+        while self._pending and time.monotonic() < deadline:
+            if not await self._flush_batch():
+                await asyncio.sleep(min(0.5, max(0.0, deadline - time.monotonic())))
+        if self._pending:
+            log_error(f"write-behind {self.name}: {len(self._pending)} rows not written at shutdown")
+        else:
+            log_info(f"write-behind {self.name}: drained ({self.flushed} rows written)")
+
+    # -- producers -------------------------------------------------------------
+
+    async def enqueue(self, row: dict):
+        if not self.running:
+            await self.write([row])
+            return
+        row_key = row.get(self.key)
+        if row_key in self._pending:
+            self._pending[row_key] = row
+            return
+        if len(self._pending) >= self.max_queue:
+            started = time.monotonic()
+            while len(self._pending) >= self.max_queue and self.running:
+                self._space.clear()
+                self._wake.set()
+                await self._space.wait()
+            BACKPRESSURE_SECONDS.labels(self.name).inc(time.monotonic() - started)
+            if not self.running:
+                await self.write([row])
+                return
+        self._pending[row_key if row_key is not None else object()] = row
+        self._depth_changed()
+        if len(self._pending) >= self.flush_size:
+            self._wake.set()
+
+    def pending(self, match: Callable[[dict], bool]) -> bool:
+        """Whether any queued row satisfies ``match``."""
+        return any(match(row) for row in self._pending.values())
+
+    def discard(self, match: Callable[[dict], bool]) -> int:
+        """Drop queued rows that satisfy ``match`` (their parent row was deleted); returns how many."""
+        keys = [k for k, row in self._pending.items() if match(row)]
+        for k in keys:
+            del self._pending[k]
+        if keys:
+            self._depth_changed()
+        return len(keys)
+
+    async def flush(self) -> bool:
+        """Write everything queued now (e.g. before reading the rows back); False if some had to stay queued."""
+        while self._pending:
+            if not await self._flush_batch():
+                return False
+        return True
+
+    # -- flusher ---------------------------------------------------------------
+
+    async def _run(self):
+        while True:
+            if self._failures:
+                # Backing off: a full queue must not turn into a retry storm
+                await asyncio.sleep(self._backoff())
+            else:
+                try:
+                    await asyncio.wait_for(self._wake.wait(), timeout=self.flush_interval)
+                except asyncio.TimeoutError:
+                    pass
+            self._wake.clear()
+            try:
+                while self._pending:
+                    if not await self._flush_batch():
+                        break
+                    if len(self._pending) < self.flush_size:
+                        break
+            except Exception as exc:  # keep the flusher alive; the rows stay queued
+                self._failures += 1
+                FLUSH_ERRORS.labels(self.name, "retried").inc()
+                log_error(f"write-behind {self.name}: flush failed: {exc}")
+
+    def _backoff(self) -> float:
+        return min(30.0, max(self.flush_interval, 0.05) * (2 ** self._failures))
+
+    async def _flush_batch(self) -> bool:
+        """Write up to ``flush_size`` queued rows; False if they had to be kept for a retry."""
+        async with self._writing or asyncio.Lock():
+            if not self._pending:
+                return True
+            keys = list(self._pending)[: self.flush_size]
+            rows = [self._pending[k] for k in keys]
+            started = time.monotonic()
+            try:
+                await self.write(rows)
+            except HTTPException as exc:
+                if exc.status_code != 500:
+                    self._failures += 1
+                    FLUSH_ERRORS.labels(self.name, "retried").inc()
+                    log_error(f"write-behind {self.name}: flush of {len(rows)} rows failed ({exc.status_code}), retrying")
+                    return False
+                await self._write_rows_singly(rows)
+            FLUSH_SECONDS.labels(self.name).observe(time.monotonic() - started)
+            FLUSH_ROWS.labels(self.name).observe(len(rows))
+            for k, row in zip(keys, rows):
+                # A newer row with the same key may have replaced this one meanwhile
+                if self._pending.get(k) is row:
+                    del self._pending[k]
+            self._failures = 0
+            self.flushed += len(rows)
+            self._depth_changed()
+            return True
+
+    async def _write_rows_singly(self, rows: List[dict]):
+        for row in rows:
+            try:
+                await self.write([row])
+            except HTTPException as exc:
+                self.dropped += 1
+                FLUSH_ERRORS.labels(self.name, "dropped").inc()
+                log_error(f"write-behind {self.name}: dropped row {row.get(self.key)}: {exc.detail}")
+
+    def stats(self) -> dict:
+        return {
+            "queued": len(self._pending),
+            "flushed": self.flushed,
+            "dropped": self.dropped,
+            "running": self.running,
+        }
+
+
+journals: Dict[str, WriteBehindJournal] = {}
+
+
+def register_journal(journal: WriteBehindJournal) -> WriteBehindJournal:
+    journals[journal.name] = journal
+    return journal
+
+
+def start_journals():
+    for journal in journals.values():
+        journal.start()
+
+
+async def drain_journals(timeout: float):
+    for journal in journals.values():
+        await journal.drain(timeout)
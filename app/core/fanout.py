@@ -0,0 +1,241 @@
+import asyncio
+import time
+from typing import Awaitable, Callable, Dict, Hashable, Iterable, List, Optional, Tuple
+
+from prometheus_client import Counter, Gauge, Histogram
+
+from app.utils.logger import log_error, log_info
+
+
+QUEUE_DEPTH = Gauge(
+    "fanout_queue_depth",
+    "Events waiting in a notification fan-out queue",
+    ("fanout",),
+    multiprocess_mode="livesum",
+)
+EVENTS = Counter(
+    "fanout_events_total",
+    "Events published to a notification fan-out, by outcome (queued, dropped)",
+    ("fanout", "outcome"),
+)
+DELIVERIES = Counter(
+    "fanout_deliveries_total",
+    "Coalesced notifications handed to the deliver callback, by outcome (sent, failed)",
+    ("fanout", "outcome"),
+)
+BATCH_SECONDS = Histogram(
+    "fanout_batch_seconds",
+    "Time to resolve recipients and deliver one batch of events",
+    ("fanout",),
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+)
+
+
+class NotificationFanout:
+    """Delivers change events to the users subscribed to them, off the request path.
+
+    ``publish(topic, actor, event)`` only puts the event on an in-process
+    queue: it never awaits, and when ``max_queue`` events are already
+    waiting the event is dropped (and counted) rather than slowing down the
+    request that published it. Notifications are best effort.
+
+    A background task takes the first waiting event, collects whatever else
+    arrives within ``window`` seconds (at most ``max_batch`` events) and
+    resolves the recipients of every topic in the batch with a single
+    ``resolve(topics)`` call. Each recipient then gets one
+    ``deliver(recipient, events)`` call with all of their events, in publish
+    order, with duplicates (same ``dedup_key``) collapsed and the events they
+    caused themselves left out. Deliveries run concurrently, at most
+    ``concurrency`` at a time; a failed delivery is logged, not retried.
+
+    Until ``start`` is called (scripts, tests) or after ``drain``,
+    ``publish`` drops events.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        resolve: Callable[[List[Hashable]], Awaitable[Dict[Hashable, Iterable[str]]]],
+        deliver: Callable[[str, List[dict]], Awaitable[object]],
+        window: float,
+        concurrency: int,
+        max_queue: int,
+        max_batch: int = 500,
+        dedup_key: Callable[[dict], Hashable] = lambda event: event.get("id"),
+    ):
+        self.name = name
+        self.resolve = resolve
+        self.deliver = deliver
+        self.window = window
+        self.concurrency = max(1, concurrency)
+        self.max_queue = max(1, max_queue)
+        self.max_batch = max(1, max_batch)
+        self.dedup_key = dedup_key
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._inflight: Optional[asyncio.Future] = None
+        self._held: List[Tuple[Hashable, Optional[str], dict]] = []
+        self.published = 0
+        self.dropped = 0
+        self.delivered = 0
+        self.failed = 0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def __len__(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    # -- lifecycle -------------------------------------------------------------
+
+    def start(self):
+        """Start the dispatcher on the running loop; call from the lifespan startup."""
+        if self.running:
+            return
+        self._queue = asyncio.Queue(maxsize=self.max_queue)
+        self._task = asyncio.get_running_loop().create_task(self._run(), name=f"fanout:{self.name}")
+
+    async def drain(self, timeout: float):
+        """Stop taking events and deliver what is queued, for at most ``timeout`` seconds."""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        try:
+            await asyncio.wait_for(self._dispatch_queued(), timeout=timeout)
+        except asyncio.TimeoutError:
+            pass
+        self._inflight = None
+        if len(self):
+            log_error(f"fanout {self.name}: {len(self)} events not delivered at shutdown")
+        else:
+            log_info(f"fanout {self.name}: drained ({self.delivered} notifications sent)")
+
+    # -- producers -------------------------------------------------------------
+
+    def publish(self, topic: Hashable, actor: Optional[str], event: dict):
+        """Queue ``event`` for the subscribers of ``topic``; returns immediately."""
+        if not self.running:
+            return
+        try:
+            self._queue.put_nowait((topic, actor, event))
+        except asyncio.QueueFull:
+            self.dropped += 1
+            EVENTS.labels(self.name, "dropped").inc()
+            return
+        self.published += 1
+        EVENTS.labels(self.name, "queued").inc()
+        QUEUE_DEPTH.labels(self.name).set(self._queue.qsize())
+
+    # -- dispatcher ------------------------------------------------------------
+
+    async def _run(self):
+        while True:
+            # Held on self so drain() can still deliver a batch that was being collected
+            self._held = [await self._queue.get()]
+            deadline = time.monotonic() + self.window
+            while len(self._held) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not await self._collect(remaining):
+                    break
+            batch, self._held = self._held, []
+            # Shielded: cancelling the dispatcher (drain) must not cut deliveries short
+            self._inflight = asyncio.ensure_future(self._dispatch_safely(batch))
+            await asyncio.shield(self._inflight)
+
+    async def _collect(self, timeout: float) -> bool:
+        """Wait up to ``timeout`` for one more event; False when none came.
+
+        Not ``asyncio.wait_for``: before 3.12 it can swallow the cancellation
+        from ``drain`` when the get completes at the same moment.
+        """
+        getter = asyncio.ensure_future(self._queue.get())
+        try:
+            await asyncio.wait((getter,), timeout=timeout)
+        finally:
+            if getter.done() and not getter.cancelled():
+                self._held.append(getter.result())
+            else:
+                getter.cancel()
+        return getter.done() and not getter.cancelled()
+
+    async def _dispatch_queued(self):
+        if self._inflight is not None:
+            await self._inflight
+        batch, self._held = self._held, []
+        while batch or not self._queue.empty():
+            while not self._queue.empty() and len(batch) < self.max_batch:
+                batch.append(self._queue.get_nowait())
+            await self._dispatch_safely(batch)
+            batch = []
+
+    async def _dispatch_safely(self, batch: List[Tuple[Hashable, Optional[str], dict]]):
+        try:
+            await self._dispatch(batch)
+        except Exception as exc:  # keep the dispatcher alive; this batch is lost
+            log_error(f"fanout {self.name}: dropped {len(batch)} events: {exc}")
+
+    async def _dispatch(self, batch: List[Tuple[Hashable, Optional[str], dict]]):
+        QUEUE_DEPTH.labels(self.name).set(self._queue.qsize())
+        started = time.monotonic()
+        topics = list(dict.fromkeys(topic for topic, _, _ in batch))
+        recipients = await self.resolve(topics)
+
+        inbox: Dict[str, Dict[Hashable, dict]] = {}
+        for topic, actor, event in batch:
+            key = self.dedup_key(event)
+            for recipient in recipients.get(topic) or ():
+                if recipient == actor:
+                    continue
+                events = inbox.setdefault(recipient, {})
+                events[key if key is not None else object()] = event
+
+        gate = asyncio.Semaphore(self.concurrency)
+
+        async def send(recipient: str, events: List[dict]):
+            async with gate:
+                try:
+                    await self.deliver(recipient, events)
+                except Exception as exc:
+                    self.failed += 1
+                    DELIVERIES.labels(self.name, "failed").inc()
+                    log_error(f"fanout {self.name}: delivery to {recipient} failed: {exc}")
+                    return
+                self.delivered += 1
+                DELIVERIES.labels(self.name, "sent").inc()
+
+        await asyncio.gather(*(send(recipient, list(events.values())) for recipient, events in inbox.items()))
+        BATCH_SECONDS.labels(self.name).observe(time.monotonic() - started)
+
+    def stats(self) -> dict:
+        return {
+            "queued": len(self),
+            "published": self.published,
+            "dropped": self.dropped,
+            "delivered": self.delivered,
+            "failed": self.failed,
+            "running": self.running,
+        }
+
+
+fanouts: Dict[str, NotificationFanout] = {}
+
+
+def register_fanout(fanout: NotificationFanout) -> NotificationFanout:
+    fanouts[fanout.name] = fanout
+    return fanout
+
+
+def start_fanouts():
+    for fanout in fanouts.values():
+        fanout.start()
+
+
+async def drain_fanouts(timeout: float):
+    for fanout in fanouts.values():
+        await fanout.drain(timeout)
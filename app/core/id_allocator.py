@@ -0,0 +1,216 @@
+"""
+Collision-free, time-ordered record IDs.
+
+Every create path used to pick a random ``T123456``-style ID and SELECT it
+back to check it was free, costing up to ten round trips per insert and
+still racing between the check and the insert. IDs are now minted locally
+with no queries at all:
+
+    <prefix><13 Crockford base32 characters>     e.g. T01JAB3Q7XK2M0
+
+The 65 bits behind the characters are, from most to least significant:
+
+    42 bits  milliseconds since ID_EPOCH      (good for ~139 years)
+    13 bits  node id                          (one per worker process)
+    10 bits  sequence within the millisecond  (1024 IDs/ms per node)
+
+Because the encoding is fixed width and the alphabet is in ASCII order, IDs
+with the same prefix sort lexicographically in creation order, which keeps
+``ORDER BY id`` and keyset pagination meaningful.
+
+That holds among allocator IDs only. Rows created before the allocator keep
+their legacy IDs (``T`` plus 6 random digits), which never had an order, and
+a mixed set compares character by character: for now new IDs start with
+``0`` and sort before almost every legacy ID, whatever their age.
+
+The node id is leased from the database
+(``supabase/migrations/20251026_id_allocator_nodes.sql``): at start-up each
+worker claims a node no live worker holds and renews the lease every third of
+``ID_NODE_LEASE_SECONDS``. Until the first lease comes back, or while the
+database can't be reached, the worker mints with a random node and keeps
+retrying. Collisions are then unlikely rather than impossible, so the insert
+paths also retry with fresh IDs on a duplicate key (``insert_with_fresh_ids``).
+Within a node the clock never runs backwards: if the wall clock does, or a
+millisecond's sequence is used up, the allocator keeps counting from the
+last millisecond it issued.
+"""
+import asyncio
+import os
+import random
+import socket
+import threading
+import time
+import uuid
+
+from postgrest.exceptions import APIError
+
+from app.config.settings import ID_NODE_LEASE_SECONDS
+from app.core.db.supabase_db import get_supabase_client, safe_supabase_operation
+from app.utils.logger import log_error, log_info
+
+ALPHABET = "0123456789ABCDEFGHJKMNPQRSTVWXYZ"  # Crockford base32, ASCII-ordered
+WIDTH = 13
+
+TIME_BITS = 42
+NODE_BITS = 13
+SEQUENCE_BITS = 10
+
+MAX_NODE = (1 << NODE_BITS) - 1
+MAX_SEQUENCE = (1 << SEQUENCE_BITS) - 1
+
+# 2025-01-01T00:00:00Z
+ID_EPOCH_MS = 1735689600000
+
+# Tries per insert when a generated ID turns out to be taken
+ID_INSERT_ATTEMPTS = 3
+
+
+def encode(value: int, width: int = WIDTH) -> str:
+    chars = []
+    for _ in range(width):
+        value, digit = divmod(value, 32)
+        chars.append(ALPHABET[digit])
+    if value:
+        raise ValueError("value does not fit in the ID width")
+    return "".join(reversed(chars))
+
+
+def decode(text: str) -> int:
+    value = 0
+    for char in text:
+        value = value * 32 + ALPHABET.index(char)
+    return value
+
+
+class IdAllocator:
+    """Thread-safe generator of ``prefix + encode(time | node | sequence)`` IDs."""
+
+    def __init__(self, node: int, clock=None):
+        self._clock = clock or (lambda: int(time.time() * 1000))
+        self._lock = threading.Lock()
+        self._last_ms = 0
+        self._sequence = 0
+        self.set_node(node)
+
+    def set_node(self, node: int):
+        if not 0 <= node <= MAX_NODE:
+            raise ValueError(f"node must be between 0 and {MAX_NODE}")
+        with self._lock:
+            self.node = node
+
+    def _next_value(self) -> int:
+        with self._lock:
+            now = max(self._clock() - ID_EPOCH_MS, 0)
+            if now > self._last_ms:
+                self._last_ms = now
+                self._sequence = 0
+            elif self._sequence < MAX_SEQUENCE:
+                self._sequence += 1
+            else:
+                # Sequence exhausted (or clock went backwards): borrow the next millisecond
+                self._last_ms += 1
+                self._sequence = 0
+            return (self._last_ms << (NODE_BITS + SEQUENCE_BITS)) | (self.node << SEQUENCE_BITS) | self._sequence
+
+    def next_id(self, prefix: str) -> str:
+        return f"{prefix}{encode(self._next_value())}"
+
+    def next_ids(self, prefix: str, count: int) -> list:
+        return [self.next_id(prefix) for _ in range(count)]
+
+
+def parse_id(record_id: str, prefix: str) -> dict:
+    """Split an allocator ID back into its creation time, node and sequence."""
+    if not record_id.startswith(prefix) or len(record_id) != len(prefix) + WIDTH:
+        raise ValueError(f"{record_id!r} is not a {prefix} allocator id")
+    value = decode(record_id[len(prefix):])
+    return {
+        "created_ms": (value >> (NODE_BITS + SEQUENCE_BITS)) + ID_EPOCH_MS,
+        "node": (value >> SEQUENCE_BITS) & MAX_NODE,
+        "sequence": value & MAX_SEQUENCE,
+    }
+
+
+id_allocator = IdAllocator(random.randint(0, MAX_NODE))  # provisional until the first lease
+
+
+def new_id(prefix: str) -> str:
+    """Next ID for ``prefix`` (``"T"`` tasks, ``"B"`` bugs, ``"H"`` history, ...)."""
+    return id_allocator.next_id(prefix)
+
+
+def is_duplicate_id(exc: Exception, column: str) -> bool:
+    """Whether ``exc`` is a unique violation (23505) on ``column``."""
+    return isinstance(exc, APIError) and str(exc.code) == "23505" and f"({column})=" in str(exc.details or "")
+
+
+def insert_with_fresh_ids(insert, rows: list, column: str, prefix: str):
+    """Run ``insert()``; when it fails on a taken ``column`` value, give ``rows`` new IDs and try again.
+
+    Meant to be called inside a database op; gives up after ID_INSERT_ATTEMPTS.
+    """
+    for attempt in range(1, ID_INSERT_ATTEMPTS + 1):
+        try:
+            return insert()
+        except APIError as exc:
+            if attempt == ID_INSERT_ATTEMPTS or not is_duplicate_id(exc, column):
+                raise
+            for row in rows:
+                row[column] = new_id(prefix)
+
+
+class NodeLease:
+    """Keeps ``allocator``'s node leased from the database (lease_id_allocator_node)."""
+
+    def __init__(self, allocator: IdAllocator, ttl: int = ID_NODE_LEASE_SECONDS):
+        self.allocator = allocator
+        self.ttl = ttl
+        self.holder = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.leased = False
+        self._task = None
+
+    async def renew(self) -> int:
+        """Renew the lease, or take one; the allocator switches to the node the database returns."""
+        supabase = get_supabase_client()
+        params = {
+            "p_holder": self.holder,
+            "p_node": self.allocator.node if self.leased else None,
+            "p_ttl_seconds": self.ttl,
+        }
+
+        def op():
+            return supabase.rpc("lease_id_allocator_node", params).execute()
+
+        node = (await safe_supabase_operation(op, "Failed to lease an ID allocator node")).data
+        if not self.leased or node != self.allocator.node:
+            log_info(f"ID allocator: leased node {node}")
+        self.allocator.set_node(node)
+        self.leased = True
+        return node
+
+    def start(self):
+        """Take the lease and keep renewing it on the running loop; call from the lifespan startup."""
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run(), name="id-allocator-lease")
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            try:
+                await self.renew()
+                delay = self.ttl / 3
+            except Exception as exc:
+                log_error(f"ID allocator: node lease failed, minting with node {self.allocator.node}: {getattr(exc, 'detail', exc)}")
+                delay = min(30, self.ttl / 3)
+            await asyncio.sleep(delay)
+
+
+node_lease = NodeLease(id_allocator)
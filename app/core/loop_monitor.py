@@ -0,0 +1,297 @@
+import asyncio
+import os
+import sys
+import threading
+import time
+import traceback
+from contextvars import ContextVar
+from typing import Dict, List, Optional
+
+from prometheus_client import Counter, Histogram
+
+from app.config.settings import (
+    LOOP_MONITOR_ENABLED,
+    LOOP_MONITOR_INTERVAL_MS,
+    LOOP_STALL_THRESHOLD_MS,
+    LOOP_MONITOR_STRICT,
+)
+from app.utils.logger import log_error, log_info
+
+
+# Every request runs with its ASGI scope in this context variable, which is
+# how a stall or a blocking call is attributed to a route. Tasks spawned by
+# the request inherit it.
+_request_scope: ContextVar[Optional[dict]] = ContextVar("loop_monitor_request_scope", default=None)
+
+# The same scope per request task, for the watchdog thread: it can see which
+# task is running on the loop but not that task's context (Task.get_context
+# is 3.12+). Written on the loop thread only; plain dict reads are safe.
+_task_scopes: Dict[asyncio.Task, dict] = {}
+
+LOOP_LAG_SECONDS = Histogram(
+    "event_loop_lag_seconds",
+    "Delay between when the loop heartbeat was due and when it ran",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+)
+LOOP_STALL_SECONDS = Histogram(
+    "event_loop_stall_seconds",
+    "Event loop stalls above the threshold, by the route that held the loop",
+    ("route",),
+    buckets=(0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0),
+)
+BLOCKING_CALLS = Counter(
+    "event_loop_blocking_calls_total",
+    "Synchronous Supabase HTTP calls made on the event loop thread",
+    ("route", "site"),
+)
+
+_APP_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_THIS_FILE = os.path.abspath(__file__)
+
+# Stall logs per route are rate limited; the stats keep counting regardless
+_LOG_EVERY_SECONDS = 60.0
+
+
+class BlockingCallOnLoop(RuntimeError):
+    """Raised in strict mode when synchronous Supabase I/O runs on the event loop."""
+
+
+def _route_of(scope: Optional[dict]) -> str:
+    if scope is None:
+        return "background"
+    route = scope.get("route")
+    path = getattr(route, "path", None) or scope.get("path", "?")
+    return f"{scope.get('method', '')} {path}".strip()
+
+
+def _app_frames(stack: traceback.StackSummary) -> List[traceback.FrameSummary]:
+    """Frames from our own code: drop the stdlib, site-packages and this module."""
+    return [
+        f for f in stack
+        if f.filename.startswith(_APP_ROOT) and os.path.abspath(f.filename) != _THIS_FILE
+    ]
+
+
+def _format_site(frame: traceback.FrameSummary) -> str:
+    return f"{os.path.relpath(frame.filename, os.path.dirname(_APP_ROOT))}:{frame.lineno} {frame.name}"
+
+
+class LoopMonitor:
+    """Samples event-loop lag and attributes stalls to the route that caused them.
+
+    A heartbeat scheduled on the loop every ``interval`` seconds measures how
+    late it runs. A watchdog thread notices when the heartbeat is overdue by
+    more than ``threshold`` and snapshots the loop thread's stack (which is
+    the code hogging the loop) together with the running task's route. When
+    the loop comes back the stall's duration is recorded against that route.
+
+    Independently, ``note_blocking_call`` is fed by a request hook on the sync
+    Supabase clients: any sync HTTP call made on the loop thread is counted
+    per call site, and in ``strict`` mode it raises ``BlockingCallOnLoop`` so
+    tests fail on it.
+    """
+
+    def __init__(self, interval: float, threshold: float, strict: bool = False, stack_depth: int = 15):
+        self.interval = interval
+        self.threshold = threshold
+        self.strict = strict
+        self.stack_depth = stack_depth
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread_id: Optional[int] = None
+        self._handle: Optional[asyncio.TimerHandle] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._beats = 0
+        self._due_at = 0.0
+        self._pending: Optional[dict] = None
+        self._last_logged: Dict[str, float] = {}
+        self.max_lag = 0.0
+        self.last_lag = 0.0
+        self.stalls: Dict[str, dict] = {}
+        self.blocking_calls: Dict[tuple, dict] = {}
+
+    # -- lifecycle -------------------------------------------------------------
+
+    def start(self):
+        """Start sampling the running loop; call from the lifespan startup."""
+        if self._loop is not None:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._stop.clear()
+        self._schedule()
+        self._thread = threading.Thread(target=self._watch, name="loop-monitor", daemon=True)
+        self._thread.start()
+        log_info(f"Event loop monitor started (interval={self.interval * 1000:.0f}ms, threshold={self.threshold * 1000:.0f}ms, strict={self.strict})")
+
+    def stop(self):
+        self._stop.set()
+        if self._handle is not None:
+            self._handle.cancel()
+        if self._thread is not None:
+            self._thread.join(timeout=1)
+        self._loop = self._handle = self._thread = None
+
+    def _schedule(self):
+        with self._lock:
+            self._due_at = time.monotonic() + self.interval
+        self._handle = self._loop.call_later(self.interval, self._beat)
+
+    # -- loop side -------------------------------------------------------------
+
+    def _beat(self):
+        now = time.monotonic()
+        with self._lock:
+            lag = max(0.0, now - self._due_at)
+            # Bump the beat and push the deadline together, so the watchdog
+            # never sees this beat against the deadline it just met
+            self._beats += 1
+            self._due_at = now + self.interval
+            pending, self._pending = self._pending, None
+        self.last_lag = lag
+        self.max_lag = max(self.max_lag, lag)
+        LOOP_LAG_SECONDS.observe(lag)
+        if lag >= self.threshold:
+            self._record_stall(lag, pending)
+        if not self._stop.is_set():
+            self._schedule()
+
+    def _record_stall(self, duration: float, capture: Optional[dict]):
+        route = capture["route"] if capture else "unknown"
+        stack = capture["stack"] if capture else []
+        stats = self.stalls.setdefault(route, {"count": 0, "total_ms": 0.0, "max_ms": 0.0, "last_stack": []})
+        stats["count"] += 1
+        stats["total_ms"] = round(stats["total_ms"] + duration * 1000, 1)
+        stats["max_ms"] = round(max(stats["max_ms"], duration * 1000), 1)
+        stats["last_stack"] = stack
+        LOOP_STALL_SECONDS.labels(route).observe(duration)
+        now = time.monotonic()
+        if now - self._last_logged.get(route, 0.0) >= _LOG_EVERY_SECONDS:
+            self._last_logged[route] = now
+            where = "\n".join(f"  {line}" for line in stack) or "  (stack not captured)"
+            log_error(f"Event loop blocked for {duration * 1000:.0f}ms by {route}:\n{where}")
+
+    # -- watchdog thread -------------------------------------------------------
+
+    def _watch(self):
+        poll = max(self.threshold / 2, 0.005)
+        captured_beat = -1
+        while not self._stop.wait(poll):
+            try:
+                with self._lock:
+                    overdue = time.monotonic() - self._due_at
+                    beat = self._beats
+                if overdue < self.threshold or beat == captured_beat:
+                    continue
+                captured_beat = beat
+                capture = self._capture()
+                with self._lock:
+                    if self._beats == beat:  # the loop is still stuck
+                        self._pending = capture
+            except Exception as exc:  # one bad sample must not end the watchdog
+                log_error(f"Event loop monitor: capture failed: {exc}")
+
+    def _capture(self) -> dict:
+        frame = sys._current_frames().get(self._loop_thread_id)
+        stack = _app_frames(traceback.extract_stack(frame)) if frame is not None else []
+        task = asyncio.current_task(self._loop) if self._loop is not None else None
+        scope = _task_scopes.get(task) if task is not None else None
+        return {
+            "route": _route_of(scope),
+            "stack": [_format_site(f) for f in stack[-self.stack_depth:]],
+        }
+
+    # -- sync I/O detection ----------------------------------------------------
+
+    def note_blocking_call(self, description: str):
+        """Record a synchronous network call made from the loop thread."""
+        route = _route_of(_request_scope.get())
+        frames = _app_frames(traceback.extract_stack())
+        callers = [f for f in frames if "/core/db/" not in f.filename]
+        site = _format_site(callers[-1]) if callers else "unknown"
+        entry = self.blocking_calls.setdefault((route, site), {"route": route, "site": site, "count": 0, "request": description})
+        entry["count"] += 1
+        BLOCKING_CALLS.labels(route, site).inc()
+        message = f"Synchronous Supabase call on the event loop: {description} from {site} ({route})"
+        if self.strict:
+            raise BlockingCallOnLoop(message)
+        if entry["count"] == 1:
+            log_error(message)
+
+    def reset(self):
+        self.max_lag = self.last_lag = 0.0
+        self.stalls.clear()
+        self.blocking_calls.clear()
+        self._last_logged.clear()
+
+    def stats(self) -> dict:
+        return {
+            "running": self._loop is not None,
+            "interval_ms": self.interval * 1000,
+            "threshold_ms": self.threshold * 1000,
+            "strict": self.strict,
+            "last_lag_ms": round(self.last_lag * 1000, 1),
+            "max_lag_ms": round(self.max_lag * 1000, 1),
+            "stalls": dict(sorted(self.stalls.items(), key=lambda kv: -kv[1]["total_ms"])),
+            "blocking_calls": sorted(self.blocking_calls.values(), key=lambda e: -e["count"]),
+        }
+
+
+loop_monitor = LoopMonitor(
+    interval=LOOP_MONITOR_INTERVAL_MS / 1000,
+    threshold=LOOP_STALL_THRESHOLD_MS / 1000,
+    strict=LOOP_MONITOR_STRICT,
+)
+
+
+def _on_sync_request(request):
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return  # executor thread: exactly where sync calls belong
+    loop_monitor.note_blocking_call(f"{request.method} {request.url.path}")
+
+
+def guard_sync_session(session):
+    """Flag sync httpx calls that run on the event loop thread."""
+    hooks = session.event_hooks.get("request", [])
+    if _on_sync_request not in hooks:
+        session.event_hooks = {**session.event_hooks, "request": [*hooks, _on_sync_request]}
+    return session
+
+
+def enter_request(scope: dict):
+    """Tag the current task (and its context) with the request scope; returns a token for ``exit_request``."""
+    task = asyncio.current_task()
+    if task is not None:
+        _task_scopes[task] = scope
+    return task, _request_scope.set(scope)
+
+
+def exit_request(token):
+    task, context_token = token
+    if task is not None:
+        _task_scopes.pop(task, None)
+    _request_scope.reset(context_token)
+
+
+class LoopMonitorMiddleware:
+    """Pure ASGI middleware that tags the request's task with its scope."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        token = enter_request(scope)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            exit_request(token)
+
+
+def start_loop_monitor():
+    if LOOP_MONITOR_ENABLED:
+        loop_monitor.start()
@@ -12,6 +12,15 @@ from fastapi import Request
 from contextlib import asynccontextmanager
 from app.services.logging import setup_logging
 from app.utils.logger import log_info
+from app.core.db.supabase_db import close_async_supabase_client, get_db_executor_stats
+from app.core.db.telemetry import render_metrics, mark_worker_dead
+from app.core.db.pg_engine import close_pg_pool
+from app.core.loop_monitor import LoopMonitorMiddleware, loop_monitor, start_loop_monitor
+from app.core.db.write_behind import drain_journals, journals, start_journals
+from app.core.fanout import drain_fanouts, fanouts, start_fanouts
+from app.core.id_allocator import node_lease
+from app.config.settings import HISTORY_DRAIN_TIMEOUT
+from app.services.auth_handler import verify_health_api_key
 import httpx
 import sys
 import os
@@ -30,6 +39,10 @@ async def lifespan(app: FastAPI):
     # # Startup: Connect to database and Redis
     # log_info("Connecting redis session manager...")
     
+    start_loop_monitor()
+    start_journals()
+    start_fanouts()
+    node_lease.start()
     try:
         
         yield
@@ -37,6 +50,15 @@ async def lifespan(app: FastAPI):
         # Cleanup resources in finally block to ensure they run even on errors
         # await session_manager.disconnect()  # Disconnect from Redis
         # log_info("disconnected redis session manager...")
+        loop_monitor.stop()
+        await node_lease.stop()
+        # Send pending watcher notifications while the DB clients are still up
+        await drain_fanouts(HISTORY_DRAIN_TIMEOUT)
+        # Write queued history before the DB clients go away
+        await drain_journals(HISTORY_DRAIN_TIMEOUT)
+        await close_async_supabase_client()
+        await close_pg_pool()
+        mark_worker_dead()
         log_info("Shutting down")
 
 
@@ -73,8 +95,12 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],  # keyset pagination of list endpoints
 )
 
+# Attributes event loop stalls and sync DB calls on the loop to routes
+app.add_middleware(LoopMonitorMiddleware)
+
 # # Set up health monitoring middleware (needs to be after CORS middleware)
 # setup_health_monitoring(app, session_manager)
 
@@ -123,9 +149,31 @@ app.include_router(api_router, prefix="/v1")
 # # Mount v2 routes
 # app.include_router(svg_export_router, prefix="/v2")
 
-# @app.get("/metrics", dependencies=[Depends(authenticate_metrics)])
-# async def default_metrics():
-#     return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+@app.get("/metrics", dependencies=[Depends(verify_health_api_key)])
+async def default_metrics():
+    """Prometheus metrics (supabase_db_* per table/view, operation and service), aggregated across workers."""
+    payload, content_type = render_metrics()
+    return Response(payload, media_type=content_type)
+
+@app.get("/health/db", dependencies=[Depends(verify_health_api_key)])
+async def db_health():
+    """Live DB executor stats: active / queued calls, wait times, rejections."""
+    return get_db_executor_stats()
+
+@app.get("/health/loop", dependencies=[Depends(verify_health_api_key)])
+async def loop_health():
+    """Event loop lag, stalls per route (with the last offending stack) and sync DB calls made on the loop."""
+    return loop_monitor.stats()
+
+@app.get("/health/journals", dependencies=[Depends(verify_health_api_key)])
+async def journals_health():
+    """Write-behind journals: rows queued, written and dropped."""
+    return {name: journal.stats() for name, journal in journals.items()}
+
+@app.get("/health/fanouts", dependencies=[Depends(verify_health_api_key)])
+async def fanouts_health():
+    """Notification fan-outs: events queued, dropped and notifications delivered."""
+    return {name: fanout.stats() for name, fanout in fanouts.items()}
 
 # Root endpoint
 @app.get("/")
@@ -98,4 +98,10 @@ class BugSortBy(str, Enum):
 
 class SortOrder(str, Enum):
     ASC = "asc"
-    DESC = "desc"
\ No newline at end of file
+    DESC = "desc"
+
+class CountStrategyEnum(str, Enum):
+    EXACT = "exact"
+    PLANNED = "planned"
+    ESTIMATED = "estimated"
+    CACHED = "cached"
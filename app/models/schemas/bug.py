@@ -1,7 +1,7 @@
 from datetime import datetime, timedelta
 from typing import Optional, List, Dict, Any
 from pydantic import BaseModel, Field
-from app.models.enums import BugPriorityEnum, BugStatusEnum, BugTypeEnum
+from app.models.enums import BugPriorityEnum, BugStatusEnum, BugTypeEnum, CountStrategyEnum
 from app.models.schemas.bug_attachment import BugAttachmentInDB
 
 # Base models
@@ -196,10 +196,15 @@ class BugSearchParams(BaseModel):
     reporter: Optional[List[str]] = Field(None, description="Filter by reporter username")
     tags: Optional[List[str]] = Field(None, description="Filter by tags")
     search_query: Optional[str] = Field(None, description="Search in title and description")
-    sort_by: str = Field("updated_at", description="Field to sort by")
+    sort_by: Optional[str] = Field(None, description="Field to sort by, or 'relevance'; defaults to relevance when searching, otherwise updated_at")
     sort_order: str = Field("desc", description="Sort order (asc/desc)")
     page: int = Field(1, ge=1, description="Page number")
     page_size: int = Field(20, ge=1, le=100, description="Items per page")
+    count: CountStrategyEnum = Field(
+        CountStrategyEnum.CACHED,
+        description="How total is computed: exact, planned (planner estimate), estimated (exact for small results), "
+                    "or cached (exact once per tracker and filter set, reused until a bug changes)"
+    )
 
     class Config:
         json_encoders = {
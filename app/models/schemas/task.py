@@ -43,4 +43,10 @@ class TaskCardView(TaskBase):
     updated_at: Optional[datetime]
     comments: Optional[int]
     class Config:
-        orm_mode = True
\ No newline at end of file
+        orm_mode = True
+class TaskLinkChange(BaseModel):
+    task_id: str = Field(..., description="Parent task ID")
+    add_subtasks: List[str] = Field([], description="Task IDs to attach as subtasks")
+    remove_subtasks: List[str] = Field([], description="Subtask IDs to detach")
+    add_dependencies: List[str] = Field([], description="Dependency task IDs to add")
+    remove_dependencies: List[str] = Field([], description="Dependency task IDs to remove")
@@ -1,7 +1,17 @@
-from fastapi import HTTPException, Header
-from app.config.settings import SUPABASE_SECRET_KEY, SUPABASE_API_KEY
+from fastapi import HTTPException, Header, Request
+from app.config.settings import (
+    SUPABASE_SECRET_KEY, SUPABASE_API_KEY, HEALTH_API_KEY,
+    AUTH_TOKEN_CACHE_SIZE, AUTH_TOKEN_CACHE_TTL,
+)
 from fastapi import FastAPI
 from app.utils.logger import log_info
+from app.services import rbac
+from collections import OrderedDict
+from prometheus_client import Counter
+from typing import Optional
+import hashlib
+import threading
+import time
 import jwt
 from fastapi import Depends
 from fastapi.security import APIKeyHeader
@@ -9,9 +19,98 @@ from fastapi.security import APIKeyHeader
 app = FastAPI()
 
 ALGORITHM = "HS256"
+TOKEN_CACHE_LOOKUPS = Counter(
+    "auth_token_cache_lookups_total",
+    "verify_token claim cache lookups",
+    ("result",),
+)
 
 
-async def verify_token(authorization: str = Header(None), is_registration: bool = False):
+class TokenClaimCache:
+    """Bounded LRU of verified token claims keyed by a hash of the token.
+
+    A front-end sends the same bearer token with every call, so after the
+    first request the HMAC check and claim parsing are replaced by a dict
+    lookup. Entries live for at most ``ttl`` seconds and never past the
+    token's own ``exp``, so an expired token is rejected exactly as before.
+    Only successfully verified tokens are cached.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(token: str) -> str:
+        return hashlib.sha256(token.encode()).hexdigest()
+
+    def get(self, token: str) -> Optional[dict]:
+        if self.maxsize <= 0:
+            return None
+        key = self.key(token)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] > time.time():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                TOKEN_CACHE_LOOKUPS.labels("hit").inc()
+                return dict(entry[0])
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+        TOKEN_CACHE_LOOKUPS.labels("miss").inc()
+        return None
+
+    def put(self, token: str, user: dict, exp: Optional[float]):
+        if self.maxsize <= 0:
+            return
+        expires_at = time.time() + self.ttl
+        if exp is not None:
+            expires_at = min(expires_at, float(exp))
+        with self._lock:
+            self._entries[self.key(token)] = (dict(user), expires_at)
+            self._entries.move_to_end(self.key(token))
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 3) if lookups else 0.0,
+        }
+
+
+token_cache = TokenClaimCache(maxsize=AUTH_TOKEN_CACHE_SIZE, ttl=AUTH_TOKEN_CACHE_TTL)
+
+
+async def verify_token(authorization: str = Header(None), is_registration: bool = False, request: Request = None):
+    """Dependency returning the authenticated user.
+
+    As a dependency the user is resolved through the request's
+    ``RequestContext``, so every dependency and route handling the request
+    shares one verification. Called directly (no request), it just verifies
+    the header.
+    """
+    if request is not None:
+        return await request_context(request).user()
+    return await authenticate(authorization)
+
+
+async def authenticate(authorization: Optional[str]) -> dict:
+    """Verify a raw ``Authorization`` header and return the user it carries."""
     try:
         # if not authorization or " " not in authorization:
         #     raise HTTPException(status_code=401, detail="Malformed authorization header")
@@ -59,17 +158,13 @@ async def verify_token(authorization: str = Header(None), is_registration: bool
         if not token:
             raise HTTPException(status_code=401, detail="Token must be a non-empty string")
         
+        cached = token_cache.get(token)
+        if cached is not None:
+            return cached
+
         if not isinstance(SUPABASE_SECRET_KEY, str):
             raise HTTPException(status_code=500, detail=f"Server misconfiguration: Invalid secret key - {SUPABASE_SECRET_KEY}")
 
-
-        # Decode token without verifying to log iat/exp (optional)
-        try:
-            unverified_payload = jwt.decode(token, options={"verify_signature": False})
-            # log_info(f"Unverified token iat: {unverified_payload.get('iat')}, exp: {unverified_payload.get('exp')}")
-        except Exception as decode_err:
-            log_info(f"Could not decode unverified token payload: {decode_err}")
-
         # Fully verify token
         try:
             payload = jwt.decode(
@@ -88,15 +183,15 @@ async def verify_token(authorization: str = Header(None), is_registration: bool
         if not user_id or not isinstance(user_id, str):
             raise HTTPException(status_code=401, detail="Invalid token payload: missing user ID")
 
-        log_info(f"Token valid for user ID: {user_id}")
-
         user_data = payload.get("user_metadata") or payload.get("app_metadata") or {}
 
-        return {
+        user = {
             "id": user_id,
             "username": user_data.get("username") or payload.get("username"),
             "email": user_data.get("email") or payload.get("email")
         }
+        token_cache.put(token, user, payload.get("exp"))
+        return user
 
         # Look up user in Supabase
         # supabase = get_supabase_client()
@@ -127,12 +222,89 @@ async def verify_token(authorization: str = Header(None), is_registration: bool
         raise HTTPException(status_code=500, detail="Authentication failed")
 
 
+# ---------------------------------------------------------------------------
+# Request-scoped auth context
+# ---------------------------------------------------------------------------
+
+_UNSET = object()
+_BODY_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+
+
+class RequestContext:
+    """Authorization state for one request, shared by all its dependencies.
+
+    Holds the verified user, the parsed JSON body and every org/project role
+    looked up so far. Each is computed lazily and at most once, so a route
+    that stacks ``verify_token``, ``org_rbac``/``project_rbac`` and its own
+    role checks pays for one token verification, one body parse and one
+    lookup per (org|project) however many times they are asked for.
+    """
+
+    def __init__(self, request: Request):
+        self.request = request
+        self._user: Optional[dict] = None
+        self._body = _UNSET
+        self._org_roles: dict = {}
+        self._project_roles: dict = {}
+
+    async def user(self) -> dict:
+        if self._user is None:
+            self._user = await authenticate(self.request.headers.get("authorization"))
+        return self._user
+
+    async def body(self) -> dict:
+        """The JSON body as a dict ({} for bodiless methods or non-object bodies)."""
+        if self._body is _UNSET:
+            self._body = {}
+            if self.request.method in _BODY_METHODS:
+                try:
+                    parsed = await self.request.json()
+                    if isinstance(parsed, dict):
+                        self._body = parsed
+                except Exception:
+                    pass  # Ignore malformed or missing JSON
+        return self._body
+
+    async def param(self, name: str) -> Optional[str]:
+        """Look ``name`` up in the query string, then the path, then the JSON body."""
+        value = self.request.query_params.get(name) or self.request.path_params.get(name)
+        if not value:
+            value = (await self.body()).get(name)
+        return value
+
+    async def org_role(self, org_id: str) -> Optional[str]:
+        if org_id not in self._org_roles:
+            user = await self.user()
+            self._org_roles[org_id] = await rbac.get_org_role(user["id"], org_id)
+        return self._org_roles[org_id]
+
+    async def project_role(self, project_id: str) -> Optional[str]:
+        if project_id not in self._project_roles:
+            user = await self.user()
+            self._project_roles[project_id] = await rbac.get_project_role(user["id"], project_id)
+        return self._project_roles[project_id]
+
+
+def request_context(request: Request) -> RequestContext:
+    """The request's ``RequestContext``, created on first use."""
+    ctx = getattr(request.state, "auth_context", None)
+    if ctx is None:
+        ctx = RequestContext(request)
+        request.state.auth_context = ctx
+    return ctx
+
+
+async def get_request_context(request: Request) -> RequestContext:
+    """Dependency form of ``request_context``."""
+    return request_context(request)
+
+
 # ---------------------------------------------------------------------------
 # Helper dependency wrappers
 # ---------------------------------------------------------------------------
 
 
-async def get_current_user(authorization: str = Header(None)):
+async def get_current_user(request: Request, authorization: str = Header(None)):
     """FastAPI dependency that returns the current authenticated user.
 
     This is a thin wrapper around ``verify_token`` so that other modules can
@@ -140,18 +312,19 @@ async def get_current_user(authorization: str = Header(None)):
     of truth for token verification logic.
 
     Args:
+        request: The incoming request; its ``RequestContext`` caches the user.
         authorization: Contents of the ``Authorization`` header supplied by
             FastAPI. Injected automatically when used as a dependency.
 
     Returns:
         A dictionary with at minimum an ``id`` key identifying the user.
     """
-    return await verify_token(authorization)
+    return await verify_token(authorization, request=request)
 
 
-async def get_current_user_id(authorization: str = Header(None)) -> str:
+async def get_current_user_id(request: Request, authorization: str = Header(None)) -> str:
     """Convenience dependency that returns only the id of the current user."""
-    user = await get_current_user(authorization)
+    user = await get_current_user(request, authorization)
     return user["id"]
 
 
@@ -160,3 +333,10 @@ async def verify_api_key(api_key: str = Depends(api_key_header)):
     if api_key != SUPABASE_API_KEY:
         raise HTTPException(status_code=403, detail="Invalid API Key")
     return api_key
+
+
+async def verify_health_api_key(api_key: str = Depends(api_key_header)):
+    """Guard for operational endpoints (DB stats, metrics)."""
+    if not HEALTH_API_KEY or api_key != HEALTH_API_KEY:
+        raise HTTPException(status_code=403, detail="Invalid API Key")
+    return api_key
@@ -3,7 +3,9 @@ import uuid
 from datetime import datetime
 from typing import Optional
 
-from app.core.db.supabase_db import get_supabase_client
+from supabase import AuthApiError
+
+from app.core.db.supabase_db import get_supabase_client, safe_supabase_operation
 from app.services.auth_handler import get_current_user_id
 from app.config.settings import AVATARS_BUCKET_TM
 
@@ -92,9 +94,18 @@ async def get_avatar_url(user_id: str) -> Optional[str]:
     """
     supabase = get_supabase_client()
     
-    user = supabase.auth.admin.get_user_by_id(user_id)
+    def op():
+        try:
+            return supabase.auth.admin.get_user_by_id(user_id)
+        except AuthApiError as e:
+            # No such user (or not a valid user id): no avatar, not a server error
+            if e.status == 404 or e.code in ("user_not_found", "validation_failed"):
+                return None
+            raise
+
+    response = await safe_supabase_operation(op, "Failed to fetch user avatar")
     
-    if user.get("error"):
+    if not response or not response.user:
         return None
     
-    return user.get("data", {}).get("user_metadata", {}).get("avatar_url")
+    return (response.user.user_metadata or {}).get("avatar_url")
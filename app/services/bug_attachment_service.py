@@ -7,6 +7,7 @@ from typing import Dict, Any, Optional, List
 from fastapi import HTTPException, UploadFile
 
 from app.core.db.supabase_db import get_supabase_client, safe_supabase_operation
+from app.core.id_allocator import new_id
 from app.config.settings import BUG_ATTACHMENTS_BUCKET_TM
 
 # Config
@@ -20,20 +21,6 @@ ATTACHMENT_UPDATE_WHITELIST = ["title", "is_inline", "filename", "url", "path"]
 # Helpers
 # ────────────────────────────────────────────────────────────
 
-async def _generate_sequential_attachment_id() -> str:
-    """Generate a random attachment ID with prefix 'A' and 4 digits, ensuring uniqueness."""
-    sb = get_supabase_client()
-    digits = 4
-    for _ in range(10):
-        candidate = f"A{__import__('random').randint(0, 10**digits - 1):0{digits}d}"
-        def op():
-            return sb.from_("bug_attachments").select("attachment_id").eq("attachment_id", candidate).limit(1).execute()
-        res = await safe_supabase_operation(op, "Failed to verify attachment id uniqueness")
-        if not res or not getattr(res, "data", None):
-            return candidate
-    ts = int(datetime.datetime.utcnow().timestamp()) % (10**digits)
-    return f"A{ts:0{digits}d}"
-
 def _diff_attachment(old: Dict[str, Any], new: Dict[str, Any]) -> List[Dict[str, Any]]:
     changes = []
     for f in ATTACHMENT_UPDATE_WHITELIST:
@@ -97,20 +84,6 @@ def _guess_content_type(filename: str, fallback: str = "application/octet-stream
     guessed, _ = mimetypes.guess_type(filename)
     return guessed or fallback
 
-async def _next_attachment_id_retry(sb, tries=5):
-    for _ in range(tries):
-        aid = await _generate_sequential_attachment_id()
-        try:
-            # cheap existence check; or just try insert and catch conflict
-            exists = sb.from_("bug_attachments").select("attachment_id").eq("attachment_id", aid).limit(1).execute()
-            if not exists.data:
-                return aid
-        except Exception:
-            return aid
-    # last resort, time-based suffix
-    ts = int(datetime.datetime.utcnow().timestamp()) % 10000
-    return f"A{ts:04d}"
-
 def _safe_storage_path(prefix: str, original: str, existing: set[str]) -> str:
     """Ensure unique filename under given prefix path (e.g. org_id/bug_id)."""
     base, dot, ext = original.rpartition(".")
@@ -168,7 +141,7 @@ async def upload_and_create_bug_attachment(
     now = datetime.datetime.utcnow().replace(microsecond=0).isoformat()
 
     # 1) Generate ID & determine org prefix
-    attachment_id = await _next_attachment_id_retry(sb)
+    attachment_id = new_id("A")
 
     # Fetch org_id via project (bugs table has tracker_id)
     try:
@@ -270,7 +243,7 @@ async def upload_and_create_bug_attachment(
 #     await _enforce_bug_limit(data["bug_id"])
 
 #     # Ensure ID if not provided
-#     data.setdefault("attachment_id", await _generate_sequential_attachment_id())
+#     data.setdefault("attachment_id", new_id("A"))
 
 #     now = datetime.datetime.utcnow().replace(microsecond=0).isoformat()
 #     data.setdefault("created_at", now)
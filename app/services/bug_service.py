@@ -1,67 +1,101 @@
-import random
+import hashlib
+import json
+import time
 import uuid
+from collections import OrderedDict
 from datetime import datetime
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Tuple
 from fastapi import HTTPException, UploadFile
+from app.config.settings import (
+    BUG_COUNT_CACHE_TTL, BUG_COUNT_CACHE_MAX_ENTRIES,
+    BUG_ACTIVITY_FLUSH_SIZE, BUG_ACTIVITY_FLUSH_INTERVAL_MS, BUG_ACTIVITY_QUEUE_MAX, BUG_ACTIVITY_COMPRESS_BYTES,
+    BUG_NOTIFY_WINDOW_MS, BUG_NOTIFY_CONCURRENCY, BUG_NOTIFY_QUEUE_MAX,
+    BUG_WATCHER_CACHE_TTL, BUG_WATCHER_CACHE_MAX_ENTRIES
+)
 from app.core.db.supabase_db import get_supabase_client, safe_supabase_operation
+from app.core.db.write_behind import WriteBehindJournal, register_journal
+from app.core.fanout import NotificationFanout, register_fanout
+from app.core.id_allocator import ID_INSERT_ATTEMPTS, insert_with_fresh_ids, new_id
+from app.services.export_service import iter_chunks
+from app.utils.history_utils import pack_snapshot, unpack_snapshot
+from app.utils.pagination import apply_keyset, decode_cursor
+from app.utils.logger import log_error
+from app.core.db import pg_engine
 # from app.config.settings import BUG_ATTACHMENTS_BUCKET_TM
 from app.models.schemas.bug import (
     BugCreate, BugUpdate, BugCommentCreate, BugCommentUpdate, BugRelationCreate,
     BugSearchParams
 )
 
-from app.models.enums import BugStatusEnum
+from app.models.enums import BugStatusEnum, CountStrategyEnum
 
 # Use dedicated bug attachments bucket
 # BUG_ATTACHMENTS_BUCKET = BUG_ATTACHMENTS_BUCKET_TM or "bug-attachments"
 
 
-async def _generate_sequential_bug_id() -> str:
-    """Generate a random task ID with prefix 'T' and 6 digits, ensuring uniqueness."""
-    supabase = get_supabase_client()
-    digits = 6
-    for _ in range(10):
-        candidate = f"B{random.randint(0, 10**digits - 1):0{digits}d}"
-        def op():
-            return supabase.from_("bugs").select("id").eq("id", candidate).limit(1).execute()
-        res = await safe_supabase_operation(op, "Failed to verify task id uniqueness")
-        if not res or not getattr(res, "data", None):
-            return candidate
-    # Fallback: time-based suffix to reduce collision risk
-    ts = int(datetime.datetime.utcnow().timestamp()) % (10**digits)
-    return f"B{ts:0{digits}d}"
+class BugCountCache:
+    """Totals of bug searches keyed by (tracker_id, hash of the search filters).
 
+    Serves ``count=cached``: the first page of a search pays for an exact
+    count, the following pages reuse it. create_bug / update_bug /
+    delete_bug drop every entry of the tracker they touched (and the
+    tracker-less searches), so totals are exact for writes made through this
+    worker; writes from other workers show up within ``ttl`` seconds.
+    Counts read while an invalidation happened are not stored (see
+    ``generation``), same as the role cache.
+    """
 
-async def _generate_sequential_bug_log_id() -> str:
-    """Generate a random task ID with prefix 'T' and 6 digits, ensuring uniqueness."""
-    supabase = get_supabase_client()
-    digits = 8
-    for _ in range(10):
-        candidate = f"L{random.randint(0, 10**digits - 1):0{digits}d}"
-        def op():
-            return supabase.from_("bugs").select("id").eq("id", candidate).limit(1).execute()
-        res = await safe_supabase_operation(op, "Failed to verify task id uniqueness")
-        if not res or not getattr(res, "data", None):
-            return candidate
-    # Fallback: time-based suffix to reduce collision risk
-    ts = int(datetime.datetime.utcnow().timestamp()) % (10**digits)
-    return f"L{ts:0{digits}d}"
+    _PAGING_FIELDS = {"sort_by", "sort_order", "page", "page_size", "count"}
 
+    def __init__(self, ttl: float, maxsize: int):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.generation = 0
+        self._entries: "OrderedDict[tuple, tuple]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def key(cls, tracker_id: Optional[str], params: BugSearchParams) -> tuple:
+        filters = params.model_dump(mode="json", exclude=cls._PAGING_FIELDS)
+        filters = {k: sorted(v) if isinstance(v, list) else v for k, v in filters.items()}
+        digest = hashlib.sha1(json.dumps(filters, sort_keys=True).encode()).hexdigest()
+        return (tracker_id or None, digest)
+
+    def get(self, key: tuple) -> Optional[int]:
+        entry = self._entries.get(key)
+        if entry is not None and entry[1] > time.monotonic():
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+        if entry is not None:
+            del self._entries[key]
+        self.misses += 1
+        return None
+
+    def put(self, key: tuple, total: Optional[int], generation: int):
+        if self.maxsize <= 0 or total is None or generation != self.generation:
+            return
+        self._entries[key] = (total, time.monotonic() + self.ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def invalidate_tracker(self, tracker_id: Optional[str]):
+        self.generation += 1
+        for key in [k for k in self._entries if k[0] is None or k[0] == tracker_id]:
+            del self._entries[key]
+
+    def clear(self):
+        self.generation += 1
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        return {"size": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+bug_count_cache = BugCountCache(ttl=BUG_COUNT_CACHE_TTL, maxsize=BUG_COUNT_CACHE_MAX_ENTRIES)
 
-async def _generate_sequential_bug_comment_id() -> str:
-    """Generate a random task ID with prefix 'T' and 6 digits, ensuring uniqueness."""
-    supabase = get_supabase_client()
-    digits = 8
-    for _ in range(10):
-        candidate = f"C{random.randint(0, 10**digits - 1):0{digits}d}"
-        def op():
-            return supabase.from_("bug_comments").select("id").eq("id", candidate).limit(1).execute()
-        res = await safe_supabase_operation(op, "Failed to verify task id uniqueness")
-        if not res or not getattr(res, "data", None):
-            return candidate
-    # Fallback: time-based suffix to reduce collision risk
-    ts = int(datetime.datetime.utcnow().timestamp()) % (10**digits)
-    return f"C{ts:0{digits}d}"
 
 # Bug CRUD Operations
 async def create_bug(bug_data: BugCreate, username: str) -> Dict[str, Any]:
@@ -72,7 +106,7 @@ async def create_bug(bug_data: BugCreate, username: str) -> Dict[str, Any]:
     bug_dict = bug_data.dict(exclude_unset=True)
 
     """Create a new task with history tracking."""
-    task_id = await _generate_sequential_bug_id()
+    task_id = new_id("B")
     bug_dict["id"] = task_id
 
     bug_dict.update({
@@ -83,9 +117,10 @@ async def create_bug(bug_data: BugCreate, username: str) -> Dict[str, Any]:
     
     # Insert bug
     def op():
-        return supabase.from_("bugs").insert(bug_dict).execute()
+        return insert_with_fresh_ids(lambda: supabase.from_("bugs").insert(bug_dict).execute(), [bug_dict], "id", "B")
     
     result = await safe_supabase_operation(op, "Failed to create bug")
+    bug_count_cache.invalidate_tracker(bug_dict.get("tracker_id"))
     
     # Log the creation activity
     if result.data:
@@ -93,7 +128,7 @@ async def create_bug(bug_data: BugCreate, username: str) -> Dict[str, Any]:
             bug_id=result.data[0]["id"],
             username=username,
             activity_type="bug_created",
-            new_value=bug_dict
+            new_value=_activity_snapshot(bug_dict)
         )
     
     return result
@@ -139,10 +174,10 @@ async def update_bug(bug_id: str, bug_data: BugUpdate, username: str) -> Dict[st
         elif value is None:
             # Keep None values as is (important for setting closed_at to null when reopening)
             continue
-    # Calculate changes for activity log
+    # Calculate changes for activity log (changed fields only)
     changes = {}
     for key, new_value in update_data.items():
-        if key in current_bug and current_bug[key] != new_value:
+        if key in current_bug and key not in ACTIVITY_SKIP_FIELDS and current_bug[key] != new_value:
             changes[key] = {
                 "old": current_bug.get(key),
                 "new": new_value
@@ -155,6 +190,9 @@ async def update_bug(bug_id: str, bug_data: BugUpdate, username: str) -> Dict[st
         return supabase.from_("bugs").update(update_data).eq("id", bug_id).execute()
     
     result = await safe_supabase_operation(op, "Failed to update bug")
+    bug_count_cache.invalidate_tracker(current_bug.get("tracker_id"))
+    if update_data.get("tracker_id", current_bug.get("tracker_id")) != current_bug.get("tracker_id"):
+        bug_count_cache.invalidate_tracker(update_data["tracker_id"])
     
     # Log the update activity if there were changes
     if changes and result.data:
@@ -162,8 +200,8 @@ async def update_bug(bug_id: str, bug_data: BugUpdate, username: str) -> Dict[st
             bug_id=bug_id,
             username=username,
             activity_type="bug_updated",
-            old_value=changes,
-            new_value=update_data
+            old_value={key: change["old"] for key, change in changes.items()},
+            new_value={key: change["new"] for key, change in changes.items()}
         )
     
     return result
@@ -182,15 +220,12 @@ async def delete_bug(bug_id: str, username: str) -> Dict[str, Any]:
         return supabase.from_("bugs").delete().eq("id", bug_id).execute()
     
     result = await safe_supabase_operation(op, "Failed to delete bug")
+    bug_count_cache.invalidate_tracker(bug_data.get("tracker_id"))
     
-    # Log the deletion
-    if result.data:
-        await _log_bug_activity(
-            bug_id=bug_id,
-            username=username,
-            activity_type="bug_deleted",
-            old_value=bug_data
-        )
+    # No bug_deleted row: bug_activity_logs_bug_id_fkey rejects it once the bug
+    # is gone (and cascades the bug's log away), and queued rows of the bug
+    # would fail the journal's whole batch
+    bug_activity_journal.discard(lambda row: row.get("bug_id") == bug_id)
     
     return result
 
@@ -200,7 +235,7 @@ async def create_bug_comment(bug_id: str, comment_data: BugCommentCreate, userna
     supabase = get_supabase_client()
     
     comment_dict = comment_data.model_dump()
-    id = await _generate_sequential_bug_comment_id()
+    id = new_id("C")
     comment_dict.update({
         "id": id,
         "bug_id": bug_id,
@@ -504,6 +539,7 @@ async def add_bug_watcher(bug_id: str, username: str) -> Dict[str, Any]:
         return supabase.from_("bug_watchers").insert(watcher_data).execute()
     
     result = await safe_supabase_operation(op, "Failed to add watcher")
+    bug_watcher_cache.invalidate(bug_id)
     
     # Log the watcher addition
     if result.data:
@@ -542,6 +578,7 @@ async def add_bug_watcher(bug_id: str, username: str) -> Dict[str, Any]:
         return supabase.from_("bug_watchers").insert(watcher_data).execute()
     
     result = await safe_supabase_operation(op, "Failed to add watcher")
+    bug_watcher_cache.invalidate(bug_id)
     
     # Log the activity
     if result.data:
@@ -568,6 +605,7 @@ async def remove_bug_watcher(bug_id: str, username: str) -> bool:
         )
     
     result = await safe_supabase_operation(op, "Failed to remove watcher")
+    bug_watcher_cache.invalidate(bug_id)
     
     # Log the activity if the watcher was removed
     if result.data and len(result.data) > 0:
@@ -596,7 +634,7 @@ async def get_bug_watcher(bug_id: str, username: str) -> Optional[Dict[str, Any]
         )
     
     result = await safe_supabase_operation(op, "Failed to check watcher status")
-    return result.data if result.data else None
+    return result.data if result and result.data else None
 
 async def list_bug_watchers(bug_id: str) -> List[Dict[str, Any]]:
     """List all watchers for a bug."""
@@ -615,6 +653,182 @@ async def list_bug_watchers(bug_id: str) -> List[Dict[str, Any]]:
     return result.data if result.data else []
 
 
+
+class BugWatcherCache:
+    """Usernames watching a bug, per bug id, for the watcher notifications.
+
+    add_bug_watcher / remove_bug_watcher drop the bug's entry right after
+    the write; watchers changed by other workers show up within ``ttl``
+    seconds. Lists read while an invalidation happened are not stored (see
+    ``generation``), same as the role cache.
+
+    The watchers' email addresses are kept alongside (``get_email``), for
+    the same ``ttl``, so a notification never looks its recipient up.
+    """
+
+    def __init__(self, ttl: float, maxsize: int):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.generation = 0
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._emails: "OrderedDict[str, tuple]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, bug_id: str) -> Optional[List[str]]:
+        entry = self._entries.get(bug_id)
+        if entry is not None and entry[1] > time.monotonic():
+            self._entries.move_to_end(bug_id)
+            self.hits += 1
+            return entry[0]
+        if entry is not None:
+            del self._entries[bug_id]
+        self.misses += 1
+        return None
+
+    def put(self, bug_id: str, watchers: List[str], generation: int):
+        if self.maxsize <= 0 or generation != self.generation:
+            return
+        self._entries[bug_id] = (watchers, time.monotonic() + self.ttl)
+        self._entries.move_to_end(bug_id)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def get_email(self, username: str) -> Tuple[bool, Optional[str]]:
+        """Return ``(found, email)``; ``email`` is None for users without one."""
+        entry = self._emails.get(username)
+        if entry is not None and entry[1] > time.monotonic():
+            self._emails.move_to_end(username)
+            return True, entry[0]
+        if entry is not None:
+            del self._emails[username]
+        return False, None
+
+    def put_email(self, username: str, email: Optional[str]):
+        if self.maxsize <= 0:
+            return
+        self._emails[username] = (email, time.monotonic() + self.ttl)
+        self._emails.move_to_end(username)
+        while len(self._emails) > self.maxsize:
+            self._emails.popitem(last=False)
+
+    def invalidate(self, bug_id: str):
+        self.generation += 1
+        self._entries.pop(bug_id, None)
+
+    def clear(self):
+        self.generation += 1
+        self._entries.clear()
+        self._emails.clear()
+
+    def stats(self) -> dict:
+        return {"size": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+bug_watcher_cache = BugWatcherCache(ttl=BUG_WATCHER_CACHE_TTL, maxsize=BUG_WATCHER_CACHE_MAX_ENTRIES)
+
+
+async def resolve_bug_watchers(bug_ids: List[str]) -> Dict[str, List[str]]:
+    """Watchers of many bugs: cached lists plus one bug_watchers query for the rest.
+
+    The email addresses of every watcher returned are cached on the way
+    (one users query for those not cached yet), for _notify_bug_watcher.
+    """
+    generation = bug_watcher_cache.generation
+    watchers: Dict[str, List[str]] = {}
+    missing = []
+    for bug_id in bug_ids:
+        cached = bug_watcher_cache.get(bug_id)
+        if cached is None:
+            missing.append(bug_id)
+        else:
+            watchers[bug_id] = cached
+
+    supabase = get_supabase_client()
+    if missing:
+        def op():
+            return supabase.from_("bug_watchers").select("bug_id, user_id").in_("bug_id", missing).execute()
+
+        result = await safe_supabase_operation(op, "Failed to list watchers")
+        found: Dict[str, List[str]] = {bug_id: [] for bug_id in missing}
+        for row in result.data or []:
+            found[row["bug_id"]].append(row["user_id"])
+        for bug_id, users in found.items():
+            # Bugs without watchers are cached too: most bugs have none
+            bug_watcher_cache.put(bug_id, users, generation)
+        watchers.update(found)
+
+    unknown = sorted({u for users in watchers.values() for u in users if not bug_watcher_cache.get_email(u)[0]})
+    if unknown:
+        def emails_op():
+            return supabase.from_("users").select("username, email").in_("username", unknown).execute()
+
+        result = await safe_supabase_operation(emails_op, "Failed to fetch watcher emails")
+        emails = {row["username"]: row.get("email") for row in result.data or []}
+        for username in unknown:
+            bug_watcher_cache.put_email(username, emails.get(username))
+    return watchers
+
+
+def summarize_bug_events(events: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Coalesce one watcher's events into one entry per bug.
+
+    Every changed field keeps its first old and last new value (fields changed
+    and changed back are left out), new comments are listed, and bugs left
+    with nothing to report are dropped.
+    """
+    bugs: Dict[str, Dict[str, Any]] = {}
+    for event in events:
+        bug = bugs.setdefault(event["bug_id"], {
+            "bug_id": event["bug_id"], "actors": [], "changes": {}, "comments": [], "activity": {}
+        })
+        if event.get("user_id") and event["user_id"] not in bug["actors"]:
+            bug["actors"].append(event["user_id"])
+        old_value, new_value = event.get("old_value") or {}, event.get("new_value") or {}
+        if event["activity_type"] == "bug_updated":
+            for field, value in new_value.items():
+                change = bug["changes"].setdefault(field, {"old": old_value.get(field)})
+                change["new"] = value
+        elif event["activity_type"] == "comment_added":
+            bug["comments"].append(new_value.get("content"))
+        else:
+            bug["activity"][event["activity_type"]] = bug["activity"].get(event["activity_type"], 0) + 1
+
+    summaries = []
+    for bug in bugs.values():
+        bug["changes"] = {f: c for f, c in bug["changes"].items() if c["old"] != c["new"]}
+        if bug["changes"].get("title"):
+            bug["title"] = bug["changes"]["title"]["new"]
+        if bug["changes"] or bug["comments"] or bug["activity"]:
+            summaries.append(bug)
+    return summaries
+
+
+async def _notify_bug_watcher(username: str, events: List[Dict[str, Any]]):
+    bugs = summarize_bug_events(events)
+    # Cached by resolve_bug_watchers for this batch
+    _, email = bug_watcher_cache.get_email(username)
+    if not bugs or not email:
+        return None
+    # Imported here: the email module pulls in the SendGrid client and other services
+    from app.api.v1.routes.emails.email_routes import send_bug_watcher_email
+    return await send_bug_watcher_email(username, email, bugs)
+
+
+# Activity that is worth a watcher notification (see _log_bug_activity)
+BUG_NOTIFY_ACTIVITY = {"bug_updated", "comment_added", "comment_updated", "comment_removed"}
+
+# Fan-out of bug changes to watchers (started/drained in the app lifespan)
+bug_watcher_notifier = register_fanout(NotificationFanout(
+    "bug_watchers",
+    lambda bug_ids: resolve_bug_watchers(bug_ids),
+    lambda username, events: _notify_bug_watcher(username, events),
+    window=BUG_NOTIFY_WINDOW_MS / 1000,
+    concurrency=BUG_NOTIFY_CONCURRENCY,
+    max_queue=BUG_NOTIFY_QUEUE_MAX,
+))
+
+
 # Bug Relations
 async def create_bug_relation(
     source_bug_id: str, 
@@ -864,6 +1078,66 @@ async def list_bug_relations(
 
 
 
+# Activity log: compact rows, written in bulk behind the request
+ACTIVITY_SKIP_FIELDS = {"id", "created_at", "updated_at"}
+
+
+def _activity_snapshot(bug: Dict[str, Any]) -> Dict[str, Any]:
+    """A bug as recorded on create: set fields only, without id and timestamps."""
+    return {k: v for k, v in bug.items() if k not in ACTIVITY_SKIP_FIELDS and v not in (None, "", [], {})}
+
+
+async def record_bug_activity_bulk(rows: List[Dict[str, Any]]):
+    """Write many activity rows in one statement.
+
+    Rows whose id is already stored are skipped, so a retried flush is
+    idempotent. If the stored row is a different activity, the id was minted
+    twice: the row gets a fresh id and is written again instead of being lost.
+    """
+    if not rows:
+        return None
+    supabase = get_supabase_client()
+
+    def op():
+        pending = rows
+        for attempt in range(1, ID_INSERT_ATTEMPTS + 1):
+            result = supabase.from_("bug_activity_logs").upsert(pending, on_conflict="id", ignore_duplicates=True).execute()
+            written = {row["id"] for row in result.data or []}
+            skipped = {row["id"]: row for row in pending if row["id"] not in written}
+            if not skipped:
+                return result
+            if attempt == ID_INSERT_ATTEMPTS:
+                log_error(f"bug activity: ids still taken after {attempt} attempts, rows not written: {list(skipped)}")
+                return result
+            stored = (
+                supabase.from_("bug_activity_logs")
+                .select("id,bug_id,user_id,activity_type")
+                .in_("id", list(skipped))
+                .execute()
+            ).data or []
+            pending = []
+            for other in stored:
+                row = skipped[other["id"]]
+                if any(other.get(k) != row.get(k) for k in ("bug_id", "user_id", "activity_type")):
+                    row["id"] = new_id("L")
+                    pending.append(row)
+            if not pending:
+                return result
+
+    return await safe_supabase_operation(op, "Failed to log activity")
+
+
+# Write-behind queue for _log_bug_activity (started/drained in the app lifespan)
+bug_activity_journal = register_journal(WriteBehindJournal(
+    "bug_activity_logs",
+    lambda rows: record_bug_activity_bulk(rows),
+    key="id",
+    flush_size=BUG_ACTIVITY_FLUSH_SIZE,
+    flush_interval=BUG_ACTIVITY_FLUSH_INTERVAL_MS / 1000,
+    max_queue=BUG_ACTIVITY_QUEUE_MAX,
+))
+
+
 # Helper function to log bug activities
 async def _log_bug_activity(
     bug_id: str,
@@ -872,64 +1146,92 @@ async def _log_bug_activity(
     old_value: Optional[Dict] = None,
     new_value: Optional[Dict] = None
 ) -> None:
-    """Log an activity related to a bug."""
-
-    """Create a new task with history tracking."""
-    log_id = await _generate_sequential_bug_log_id()
-
-    supabase = get_supabase_client()
-    
+    """Queue an activity row for a bug; values above BUG_ACTIVITY_COMPRESS_BYTES are stored compressed."""
     activity_data = {
-        "id":log_id,
+        "id": new_id("L"),
         "bug_id": bug_id,
         "user_id": username,
         "activity_type": activity_type,
-        "old_value": old_value,
-        "new_value": new_value,
+        "old_value": pack_snapshot(old_value, BUG_ACTIVITY_COMPRESS_BYTES),
+        "new_value": pack_snapshot(new_value, BUG_ACTIVITY_COMPRESS_BYTES),
         "created_at": datetime.utcnow().isoformat()
     }
-    
-    def op():
-        return supabase.from_("bug_activity_logs").insert(activity_data).execute()
-    
-    await safe_supabase_operation(op, "Failed to log activity")
+    await bug_activity_journal.enqueue(activity_data)
+    if activity_type in BUG_NOTIFY_ACTIVITY:
+        bug_watcher_notifier.publish(bug_id, username, {
+            **activity_data, "old_value": old_value, "new_value": new_value
+        })
+
+
+def _unpack_activity(row: Dict[str, Any]) -> Dict[str, Any]:
+    row["old_value"] = unpack_snapshot(row.get("old_value"))
+    row["new_value"] = unpack_snapshot(row.get("new_value"))
+    return row
+
 
-async def get_bug_activity_logs(bug_id: str) -> List[Dict[str, Any]]:
-    """Get activity logs for a bug."""
+async def _flush_queued_activity(bug_id: str):
+    # Read your own writes: activity of this bug may still be queued
+    if bug_activity_journal.pending(lambda row: row.get("bug_id") == bug_id):
+        await bug_activity_journal.flush()
+
+
+async def get_bug_activity_logs(
+    bug_id: str,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None
+) -> List[Dict[str, Any]]:
+    """Activity of a bug, newest first, keyset-paged on (created_at, id)."""
+    await _flush_queued_activity(bug_id)
+    if cursor:
+        decode_cursor(cursor, "created_at", True)  # a bad cursor is a 400, not a failed DB call
     supabase = get_supabase_client()
-    
+
     def op():
-        return supabase.from_("bug_activity_logs").select("*").eq("bug_id", bug_id).execute()
-    
+        query = apply_keyset(supabase.from_("bug_activity_logs").select("*").eq("bug_id", bug_id), "created_at", "id", True, cursor)
+        if limit is not None:
+            query = query.limit(limit)
+        return query.execute()
+
     result = await safe_supabase_operation(op, "Failed to fetch activity logs")
-    return result.data if result.data else []
+    return [_unpack_activity(row) for row in result.data or []]
 
 async def get_activity_detail(bug_id: str, activity_id: str) -> Dict[str, Any]:
     """Get details of a specific activity log entry."""
+    await _flush_queued_activity(bug_id)
     supabase = get_supabase_client()
     
     def op():
         return supabase.from_("bug_activity_logs").select("*").eq("bug_id", bug_id).eq("id", activity_id).execute()
     
     result = await safe_supabase_operation(op, "Failed to fetch activity detail")
-    return result.data[0] if result.data else None
+    return _unpack_activity(result.data[0]) if result.data else None
 
 # Search and filter bugs
-async def search_bugs(
-    tracker_id: str,
-    search_params: BugSearchParams = None
-) -> Dict[str, Any]:
-    """Search and filter bugs with pagination."""
+BUG_EXPORT_COLUMNS = [
+    "id", "tracker_id", "tracker_name", "project_id", "project_name", "title", "description",
+    "status", "priority", "type", "assignee", "reporter", "tags", "due_date", "environment",
+    "steps_to_reproduce", "expected_result", "actual_result", "created_at", "updated_at",
+]
+
+
+def export_bugs(tracker_id: Optional[str], params: BugSearchParams, project_ids: Optional[List[str]] = None):
+    """Chunks of every bug matching the search filters, in id order, for streaming exports.
+
+    ``project_ids`` limits them to those projects (the caller's accessible ones).
+    """
     supabase = get_supabase_client()
-    
-    # Build the query
 
-    query = supabase.from_("bugs").select("*", count="exact")
-    
-    # Get params from the model or use defaults
-    params = search_params or BugSearchParams()
-    
-    # Apply filters
+    def build_query():
+        query = apply_bug_filters(supabase.from_("bugs").select("*"), tracker_id, params)
+        if project_ids is not None:
+            query = query.in_("project_id", project_ids)
+        return query
+
+    return iter_chunks(build_query, "id", "Failed to export bugs")
+
+
+def apply_bug_filters(query, tracker_id: Optional[str], params: BugSearchParams):
+    """The BugSearchParams filters (not sorting/paging) on a PostgREST bugs query."""
     if tracker_id:
         query = query.eq("tracker_id", tracker_id)
     if params.project_id:
@@ -948,9 +1250,39 @@ async def search_bugs(
         query = query.contains("tags", params.tags)
     if params.search_query:
         query = query.or_(f"title.ilike.%{params.search_query}%,description.ilike.%{params.search_query}%")
+    return query
+
+
+async def search_bugs(
+    tracker_id: str,
+    search_params: BugSearchParams = None
+) -> Dict[str, Any]:
+    """Search and filter bugs with pagination.
+
+    With a search_query the bugs are ranked by full-text relevance (see
+    20251020_bug_search.sql) and each row carries ``search_rank`` and
+    ``highlight`` snippets: HTML-escaped text where only the ``<mark>`` tags
+    are markup (20251024_bug_search_escaped_highlights.sql). Without one
+    this is a plain filtered listing.
+    """
+    params = search_params or BugSearchParams()
+    if pg_engine.pg_enabled("search_bugs"):
+        return await _search_bugs_pg(tracker_id, params)
+    if params.search_query:
+        return await _search_bugs_ranked(tracker_id, params)
+
+    supabase = get_supabase_client()
+    counting = _BugCount(tracker_id, params)
+    
+    # Build the query
+
+    query = supabase.from_("bugs").select("*", count=counting.method)
+    
+    # Apply filters
+    query = apply_bug_filters(query, tracker_id, params)
     
     # Apply sorting
-    sort_by = params.sort_by or "updated_at"
+    sort_by = params.sort_by if params.sort_by and params.sort_by != "relevance" else "updated_at"
     sort_order = params.sort_order or "desc"
     
     # Apply sorting
@@ -974,7 +1306,153 @@ async def search_bugs(
     
     return {
         "data": result.data if result.data else [],
-        "total": result.count if hasattr(result, 'count') else 0,
+        "total": counting.total(getattr(result, "count", None)),
+        "page": params.page,
+        "page_size": params.page_size,
+        "count": params.count.value
+    }
+
+
+class _BugCount:
+    """How one search_bugs call gets its total under ``params.count``.
+
+    ``method`` is what to ask the database for: "exact", "planned",
+    "estimated", or None when the cached total is reused.
+    """
+
+    def __init__(self, tracker_id: Optional[str], params: BugSearchParams):
+        self.key = None
+        self.cached = None
+        if params.count == CountStrategyEnum.CACHED:
+            self.key = BugCountCache.key(tracker_id, params)
+            self.generation = bug_count_cache.generation
+            self.cached = bug_count_cache.get(self.key)
+            self.method = None if self.cached is not None else "exact"
+        else:
+            self.method = params.count.value
+
+    def total(self, counted: Optional[int]) -> int:
+        if self.cached is not None:
+            return self.cached
+        if self.key is not None:
+            bug_count_cache.put(self.key, counted, self.generation)
+        return counted or 0
+
+
+def _ranked_search_args(tracker_id: Optional[str], params: BugSearchParams) -> Dict[str, Any]:
+    """Arguments of the search_bugs_ranked database function, in declaration order."""
+    sort_by = params.sort_by or "relevance"
+    if sort_by != "relevance":
+        pg_engine.quote_ident(sort_by)
+    page = params.page or 1
+    page_size = params.page_size or 20
+    return {
+        "p_query": params.search_query,
+        "p_tracker_id": tracker_id or None,
+        "p_project_id": params.project_id,
+        "p_status": [s.value for s in params.status] if params.status else None,
+        "p_priority": [p.value for p in params.priority] if params.priority else None,
+        "p_type": [t.value for t in params.type] if params.type else None,
+        "p_assignee": params.assignee or None,
+        "p_reporter": params.reporter or None,
+        "p_tags": params.tags or None,
+        "p_sort_by": sort_by,
+        "p_sort_desc": (params.sort_order or "desc").lower() != "asc",
+        "p_limit": page_size,
+        "p_offset": (page - 1) * page_size,
+    }
+
+
+def _ranked_page(rows: List[Dict[str, Any]], params: BugSearchParams) -> Dict[str, Any]:
+    data = [
+        {
+            **row["bug"],
+            "search_rank": row["rank"],
+            "highlight": {"title": row["title_highlight"], "description": row["description_snippet"]},
+        }
+        for row in rows
+    ]
+    # ranking already visits every match, so the window count comes for free
+    return {
+        "data": data,
+        "total": rows[0]["total"] if rows else 0,
+        "page": params.page,
+        "page_size": params.page_size,
+        "count": CountStrategyEnum.EXACT.value
+    }
+
+
+async def _search_bugs_ranked(tracker_id: str, params: BugSearchParams) -> Dict[str, Any]:
+    """Full-text search through the search_bugs_ranked database function."""
+    supabase = get_supabase_client()
+    args = _ranked_search_args(tracker_id, params)
+
+    def op():
+        return supabase.rpc("search_bugs_ranked", args).execute()
+
+    result = await safe_supabase_operation(op, "Failed to search bugs")
+    return _ranked_page(result.data or [], params)
+
+
+async def _search_bugs_pg(tracker_id: str, params: BugSearchParams) -> Dict[str, Any]:
+    """Same filters, ordering and paging as search_bugs, straight against Postgres."""
+    if params.search_query:
+        args = list(_ranked_search_args(tracker_id, params).values())
+        placeholders = ", ".join(f"${i}" for i in range(1, len(args) + 1))
+
+        async def ranked_op():
+            return pg_engine.PgResult(await pg_engine.fetch("bugs", f"SELECT * FROM search_bugs_ranked({placeholders})", *args))
+
+        result = await safe_supabase_operation(ranked_op, "Failed to search bugs")
+        return _ranked_page(result.data, params)
+
+    where: List[str] = []
+    args: List[Any] = []
+
+    def add(clause: str, value: Any):
+        args.append(value)
+        where.append(clause.format(f"${len(args)}"))
+
+    if tracker_id:
+        add("tracker_id = {}", tracker_id)
+    if params.project_id:
+        add("project_id = {}", params.project_id)
+    if params.status:
+        add("status::text = ANY({}::text[])", [s.value for s in params.status])
+    if params.priority:
+        add("priority::text = ANY({}::text[])", [p.value for p in params.priority])
+    if params.type:
+        add("type::text = ANY({}::text[])", [t.value for t in params.type])
+    if params.assignee:
+        add("assignee = ANY({}::text[])", params.assignee)
+    if params.reporter:
+        add("reporter = ANY({}::text[])", params.reporter)
+    if params.tags:
+        add("tags @> {}::text[]", params.tags)
+
+    where_sql = f"WHERE {' AND '.join(where)}" if where else ""
+    direction = "ASC" if (params.sort_order or "desc").lower() == "asc" else "DESC"
+    sort_by = params.sort_by if params.sort_by and params.sort_by != "relevance" else "updated_at"
+    page = params.page or 1
+    page_size = params.page_size or 20
+    filter_args = list(args)
+    sql = (
+        f"SELECT * FROM bugs {where_sql} "
+        f"ORDER BY {pg_engine.quote_ident(sort_by)} {direction} "
+        f"LIMIT ${len(args) + 1} OFFSET ${len(args) + 2}"
+    )
+    rows_sql = f"SELECT 1 FROM bugs {where_sql}"
+    counting = _BugCount(tracker_id, params)
+
+    async def op():
+        return await pg_engine.fetch_page("bugs", sql, rows_sql, filter_args + [page_size, (page - 1) * page_size], filter_args,
+                                          count=counting.method)
+
+    result = await safe_supabase_operation(op, "Failed to search bugs")
+    return {
+        "data": result.data,
+        "total": counting.total(result.count),
         "page": params.page,
-        "page_size": params.page_size
+        "page_size": params.page_size,
+        "count": params.count.value
     }
@@ -1,4 +1,4 @@
-from app.core.db.supabase_db import get_supabase_client
+from app.core.db.supabase_db import get_async_supabase_client, safe_supabase_operation, query_fingerprint
 from typing import Dict, Any, Optional, List, cast
 
 async def get_dashboard_data(org_id: str) -> Dict[str, Any]:
@@ -11,10 +11,14 @@ async def get_dashboard_data(org_id: str) -> Dict[str, Any]:
     Returns:
         A dictionary containing the dashboard data
     """
-    supabase = get_supabase_client()
+    supabase = get_async_supabase_client()
     
-    # Query the organization_dashboard_view for the specific organization
-    response = supabase.from_("organization_dashboard_view").select("*").eq("org_id", org_id).execute()
+    # Query the organization_dashboard_view for the specific organization; concurrent requests for the
+    # same organization share one round trip
+    query = supabase.from_("organization_dashboard_view").select("*").eq("org_id", org_id)
+    async def op():
+        return await query.execute()
+    response = await safe_supabase_operation(op, "Failed to fetch organization dashboard", coalesce_key=query_fingerprint(query))
     
     # Process the response directly without the handle_db_response function
     result_data = response.data if hasattr(response, 'data') else []
@@ -314,10 +318,14 @@ async def get_user_dashboard_data(user_id: str) -> Dict[str, Any]:
     Returns:
         A dictionary containing the user dashboard data
     """
-    supabase = get_supabase_client()
-    
-    # Query the user_dashboard_view for the specific user
-    response = supabase.from_("user_dashboard_view").select("*").eq("user_id", user_id).execute()
+    supabase = get_async_supabase_client()
+    
+    # Query the user_dashboard_view for the specific user; concurrent requests for the
+    # same user share one round trip
+    query = supabase.from_("user_dashboard_view").select("*").eq("user_id", user_id)
+    async def op():
+        return await query.execute()
+    response = await safe_supabase_operation(op, "Failed to fetch user dashboard", coalesce_key=query_fingerprint(query))
     
     # Process the response directly without the handle_db_response function
     result_data = response.data if hasattr(response, 'data') else []
@@ -0,0 +1,437 @@
+"""
+Per-project task dependency graphs.
+
+Dependencies are stored as ID lists on each task (``tasks.dependencies``).
+A DependencyGraph holds one project's edges in memory. It is built from a
+single bulk read of the project's tasks, and task_service keeps it current
+as dependencies and statuses change. It serves two things:
+
+- rejecting an edge that would close a cycle before it is written
+  (``find_cycle`` / ``check_dependencies``), for the dependency writes in
+  task_service. This is a fast pre-check with a readable path, good within
+  one worker; the tasks_reject_dependency_cycle trigger
+  (20251025_task_dependency_cycles.sql) is what keeps the table acyclic
+  when two workers change edges at the same time;
+- the /projects/{id}/dependency-graph view (``to_dict``): readiness, direct
+  and transitive blockers, topological order and the critical path without
+  further queries. ``is_ready`` and the per-task count of incomplete
+  prerequisites behind it exist for this view only.
+
+Graphs are cached per process for DEPENDENCY_GRAPH_TTL seconds. Writes from
+other workers are picked up when the entry expires, so the view can lag.
+Nothing that has to be right relies on it: it is a read cache. Whether a
+task may be completed is decided by task_service against the database
+(_incomplete_dependencies), and cycles are finally rejected by the database.
+"""
+import asyncio
+import datetime
+import heapq
+import json
+import time
+import weakref
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+from app.config.settings import DEPENDENCY_GRAPH_MAX_PROJECTS, DEPENDENCY_GRAPH_TTL
+from app.core.db.single_flight import SingleFlight
+from app.core.db.supabase_db import get_supabase_client, safe_supabase_operation
+from app.services.export_service import iter_chunks
+
+GRAPH_COLUMNS = "task_id,project_id,title,status,dependencies,start_date,due_date"
+
+
+def normalize_dependencies(raw: Any) -> List[str]:
+    """Dependency IDs from a task row (the column may come back as a JSON string)."""
+    if isinstance(raw, str):
+        try:
+            raw = json.loads(raw)
+        except ValueError:
+            return []
+    if not isinstance(raw, list):
+        return []
+    return list(dict.fromkeys(str(x).strip() for x in raw if x is not None and str(x).strip()))
+
+
+def is_completed(status: Any) -> bool:
+    if hasattr(status, "value"):
+        status = status.value
+    return str(status or "").lower() == "completed"
+
+
+def _parse_date(value: Any) -> Optional[datetime.date]:
+    if not value:
+        return None
+    try:
+        return datetime.date.fromisoformat(str(value)[:10])
+    except ValueError:
+        return None
+
+
+def _duration_days(row: dict) -> int:
+    """Planned length of a task in days (1 when its dates are missing or inverted)."""
+    start, due = _parse_date(row.get("start_date")), _parse_date(row.get("due_date"))
+    if start and due and due >= start:
+        return (due - start).days + 1
+    return 1
+
+
+class DependencyCycleError(ValueError):
+    def __init__(self, path: List[str]):
+        self.path = path
+        super().__init__("dependency cycle: " + " -> ".join(path))
+
+
+class DependencyGraph:
+    """Edges ``task -> prerequisite`` for one project.
+
+    Prerequisites outside the project are kept as ``external`` nodes so
+    their status counts; IDs that match no task are treated as incomplete,
+    like the completion guard always has.
+    """
+
+    def __init__(self, project_id: str):
+        self.project_id = project_id
+        self.nodes: Dict[str, dict] = {}
+        self.prereqs: Dict[str, Set[str]] = {}
+        self.dependents: Dict[str, Set[str]] = {}
+        self._pending: Dict[str, int] = {}
+
+    def __contains__(self, task_id: str) -> bool:
+        return task_id in self.nodes
+
+    @classmethod
+    def from_rows(cls, project_id: str, rows: Iterable[dict], external: Iterable[dict] = ()) -> "DependencyGraph":
+        graph = cls(project_id)
+        rows = list(rows)
+        for row in list(external) + rows:
+            graph.upsert_node(row)
+        for row in rows:
+            for prereq in normalize_dependencies(row.get("dependencies")):
+                graph._link(str(row["task_id"]), prereq)
+        return graph
+
+    # ── mutation ──────────────────────────────────────────────
+
+    def _done(self, task_id: str) -> bool:
+        node = self.nodes.get(task_id)
+        return node is not None and node["completed"]
+
+    def upsert_node(self, row: dict):
+        """Add or refresh a task's title/status/duration (edges are left alone)."""
+        task_id = str(row["task_id"])
+        was_done = self._done(task_id)
+        node = self.nodes.setdefault(task_id, {"title": None, "completed": False, "duration": 1})
+        node["external"] = row.get("project_id") not in (None, self.project_id)
+        if "title" in row:
+            node["title"] = row.get("title")
+        if "status" in row:
+            node["status"] = row.get("status").value if hasattr(row.get("status"), "value") else row.get("status")
+            node["completed"] = is_completed(row.get("status"))
+        if "start_date" in row or "due_date" in row:
+            node["duration"] = _duration_days(row)
+        self._pending.setdefault(task_id, 0)
+        if was_done != node["completed"]:
+            delta = -1 if node["completed"] else 1
+            for dependent in self.dependents.get(task_id, ()):
+                self._pending[dependent] += delta
+
+    def _link(self, task_id: str, prereq: str):
+        if prereq in self.prereqs.setdefault(task_id, set()):
+            return
+        self.prereqs[task_id].add(prereq)
+        self.dependents.setdefault(prereq, set()).add(task_id)
+        self._pending.setdefault(task_id, 0)
+        if not self._done(prereq):
+            self._pending[task_id] += 1
+
+    def _unlink(self, task_id: str, prereq: str):
+        if prereq not in self.prereqs.get(task_id, ()):
+            return
+        self.prereqs[task_id].discard(prereq)
+        self.dependents[prereq].discard(task_id)
+        if not self._done(prereq):
+            self._pending[task_id] -= 1
+
+    def find_cycle(self, task_id: str, prereq: str) -> Optional[List[str]]:
+        """The cycle ``task -> prereq -> ... -> task`` adding that edge would close, if any."""
+        if task_id == prereq:
+            return [task_id, task_id]
+        parents = {prereq: None}
+        stack = [prereq]
+        while stack:
+            current = stack.pop()
+            for nxt in self.prereqs.get(current, ()):
+                if nxt in parents:
+                    continue
+                parents[nxt] = current
+                if nxt == task_id:
+                    return self._cycle_path(parents, task_id)
+                stack.append(nxt)
+        return None
+
+    @staticmethod
+    def _cycle_path(parents: Dict[str, Optional[str]], task_id: str) -> List[str]:
+        chain = []
+        current = task_id
+        while current is not None:
+            chain.append(current)
+            current = parents[current]
+        # chain runs task_id <- ... <- prereq; the new edge closes it back to task_id
+        return [task_id] + chain[::-1]
+
+    def add_edge(self, task_id: str, prereq: str):
+        cycle = self.find_cycle(task_id, prereq)
+        if cycle:
+            raise DependencyCycleError(cycle)
+        self._link(task_id, prereq)
+
+    def remove_edge(self, task_id: str, prereq: str):
+        self._unlink(task_id, prereq)
+
+    def check_dependencies(self, task_id: str, dependencies: Iterable[str]):
+        """Raise DependencyCycleError if replacing ``task_id``'s prerequisites would close a cycle."""
+        current = set(self.prereqs.get(task_id, ()))
+        for prereq in current:
+            self._unlink(task_id, prereq)
+        try:
+            for prereq in dependencies:
+                cycle = self.find_cycle(task_id, prereq)
+                if cycle:
+                    raise DependencyCycleError(cycle)
+        finally:
+            for prereq in current:
+                self._link(task_id, prereq)
+
+    def set_dependencies(self, task_id: str, dependencies: Iterable[str]):
+        wanted = set(dependencies)
+        self.check_dependencies(task_id, wanted)
+        for prereq in set(self.prereqs.get(task_id, ())) - wanted:
+            self._unlink(task_id, prereq)
+        for prereq in sorted(wanted):
+            self._link(task_id, prereq)
+
+    # ── queries ───────────────────────────────────────────────
+
+    def is_ready(self, task_id: str) -> bool:
+        """True when every prerequisite of ``task_id`` is completed (as of this cached graph)."""
+        return self._pending.get(task_id, 0) == 0
+
+    def incomplete(self, dependencies: Iterable[str]) -> List[str]:
+        return sorted(d for d in dependencies if not self._done(d))
+
+    def blockers(self, task_id: str) -> List[str]:
+        """Incomplete direct prerequisites."""
+        if self.is_ready(task_id):
+            return []
+        return self.incomplete(self.prereqs.get(task_id, ()))
+
+    def transitive_blockers(self, task_id: str) -> List[str]:
+        """Every incomplete task ``task_id`` depends on, directly or not."""
+        seen: Set[str] = set()
+        stack = list(self.prereqs.get(task_id, ()))
+        while stack:
+            current = stack.pop()
+            if current in seen or current == task_id:
+                continue
+            seen.add(current)
+            stack.extend(self.prereqs.get(current, ()))
+        return self.incomplete(seen)
+
+    def topological_order(self) -> List[str]:
+        """Tasks with prerequisites before dependents (ties by task_id).
+
+        Tasks on a cycle (only possible in data written before cycles were
+        rejected) are left out; ``cyclic_tasks`` lists them.
+        """
+        indegree = {task_id: 0 for task_id in self.nodes}
+        for task_id, prereqs in self.prereqs.items():
+            indegree.setdefault(task_id, 0)
+            for prereq in prereqs:
+                indegree.setdefault(prereq, 0)
+                indegree[task_id] += 1
+        heap = [task_id for task_id, degree in indegree.items() if degree == 0]
+        heapq.heapify(heap)
+        order = []
+        while heap:
+            current = heapq.heappop(heap)
+            order.append(current)
+            for dependent in self.dependents.get(current, ()):
+                indegree[dependent] -= 1
+                if indegree[dependent] == 0:
+                    heapq.heappush(heap, dependent)
+        return order
+
+    def cyclic_tasks(self, order: Optional[List[str]] = None) -> List[str]:
+        placed = set(order if order is not None else self.topological_order())
+        everything = set(self.nodes) | set(self.prereqs)
+        return sorted(everything - placed)
+
+    def critical_path(self, order: Optional[List[str]] = None) -> dict:
+        """Longest chain of remaining work, weighting each incomplete task by its planned days."""
+        order = order if order is not None else self.topological_order()
+        best: Dict[str, int] = {}
+        via: Dict[str, Optional[str]] = {}
+        for task_id in order:
+            weight = 0 if self._done(task_id) else self.nodes.get(task_id, {}).get("duration", 1)
+            prior, prior_len = None, 0
+            for prereq in sorted(self.prereqs.get(task_id, ())):
+                if best.get(prereq, 0) > prior_len:
+                    prior, prior_len = prereq, best[prereq]
+            best[task_id] = prior_len + weight
+            via[task_id] = prior
+        if not best or max(best.values()) == 0:
+            return {"tasks": [], "duration_days": 0}
+        end = max(best, key=lambda t: (best[t], t))
+        path = []
+        while end is not None:
+            if not self._done(end):
+                path.append(end)
+            end = via[end]
+        return {"tasks": path[::-1], "duration_days": max(best.values())}
+
+    def to_dict(self, task_id: Optional[str] = None) -> dict:
+        order = self.topological_order()
+        cyclic = self.cyclic_tasks(order)
+        nodes = []
+        for node_id in order + cyclic:
+            node = self.nodes.get(node_id, {})
+            nodes.append({
+                "task_id": node_id,
+                "title": node.get("title"),
+                "status": node.get("status"),
+                "external": node.get("external", node_id not in self.nodes),
+                "dependencies": sorted(self.prereqs.get(node_id, ())),
+                "dependents": sorted(self.dependents.get(node_id, ())),
+                "ready": self.is_ready(node_id),
+            })
+        out = {
+            "project_id": self.project_id,
+            "nodes": nodes,
+            "order": [t for t in order if t in self.nodes and not self.nodes[t]["external"]],
+            "cyclic": cyclic,
+            "critical_path": self.critical_path(order),
+        }
+        if task_id is not None:
+            out["blockers"] = {
+                "task_id": task_id,
+                "direct": self.blockers(task_id),
+                "transitive": self.transitive_blockers(task_id),
+            }
+        return out
+
+
+async def load_dependency_graph(project_id: str) -> DependencyGraph:
+    """Build a project's graph from one chunked read of its tasks (plus any outside prerequisites)."""
+    supabase = get_supabase_client()
+    rows: List[dict] = []
+    async for chunk in iter_chunks(
+        lambda: supabase.from_("tasks").select(GRAPH_COLUMNS).eq("project_id", project_id),
+        "task_id",
+        "Failed to load task dependencies",
+    ):
+        rows.extend(chunk)
+
+    known = {str(row["task_id"]) for row in rows}
+    outside = sorted({d for row in rows for d in normalize_dependencies(row.get("dependencies"))} - known)
+    external: List[dict] = []
+    if outside:
+        def op():
+            return supabase.from_("tasks").select(GRAPH_COLUMNS).in_("task_id", outside).execute()
+        result = await safe_supabase_operation(op, "Failed to load task dependencies")
+        external = result.data or []
+    return DependencyGraph.from_rows(project_id, rows, external)
+
+
+class GraphRegistry:
+    """LRU of project graphs with the same generation guard as rbac.RoleCache.
+
+    ``apply`` / ``invalidate`` bump a project's generation, and a build that
+    started under an older generation is returned to its caller but not
+    cached, so a concurrent write is never lost from the cache.
+    """
+
+    def __init__(self, ttl: float, maxsize: int):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._generations: Dict[str, int] = {}
+        # A lock lives only while someone holds or waits for it
+        self._locks: "weakref.WeakValueDictionary[str, asyncio.Lock]" = weakref.WeakValueDictionary()
+        self._builds = SingleFlight()
+        self.builds = 0
+
+    def peek(self, project_id: str) -> Optional[DependencyGraph]:
+        entry = self._entries.get(project_id)
+        if entry is None:
+            return None
+        if entry[1] <= time.monotonic():
+            del self._entries[project_id]
+            return None
+        self._entries.move_to_end(project_id)
+        return entry[0]
+
+    async def get(self, project_id: str) -> DependencyGraph:
+        graph = self.peek(project_id)
+        if graph is not None:
+            return graph
+        return await self._builds.do(project_id, lambda: self._build(project_id))
+
+    async def _build(self, project_id: str) -> DependencyGraph:
+        generation = self._generations.get(project_id, 0)
+        graph = await load_dependency_graph(project_id)
+        self.builds += 1
+        if self.maxsize > 0 and generation == self._generations.get(project_id, 0):
+            self._entries[project_id] = (graph, time.monotonic() + self.ttl)
+            self._entries.move_to_end(project_id)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return graph
+
+    def lock(self, project_id: str) -> asyncio.Lock:
+        """Serialises check-then-write of one project's dependency edges in this process."""
+        lock = self._locks.get(project_id)
+        if lock is None:
+            lock = self._locks[project_id] = asyncio.Lock()
+        return lock
+
+    def _touch(self, project_id: str):
+        self._generations[project_id] = self._generations.get(project_id, 0) + 1
+
+    def apply(self, row: dict, dependencies: Optional[Iterable[str]] = None):
+        """Fold a written task row into every cached graph that contains it.
+
+        ``dependencies`` replaces the task's prerequisites in its own
+        project's graph when given.
+        """
+        task_id = str(row["task_id"])
+        project_id = row.get("project_id")
+        if project_id:
+            self._touch(project_id)
+        for graph_project, (graph, _) in list(self._entries.items()):
+            if graph_project == project_id:
+                graph.upsert_node(row)
+                if dependencies is not None:
+                    try:
+                        graph.set_dependencies(task_id, normalize_dependencies(list(dependencies)))
+                    except DependencyCycleError:
+                        # Written elsewhere without our check; rebuild from the database
+                        self._entries.pop(project_id, None)
+            elif task_id in graph:
+                graph.upsert_node(row)
+
+    def invalidate(self, project_id: Optional[str]):
+        if not project_id:
+            return
+        self._touch(project_id)
+        self._entries.pop(project_id, None)
+
+    def clear(self):
+        for project_id in list(self._entries):
+            self._touch(project_id)
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        return {"projects": len(self._entries), "builds": self.builds}
+
+
+dependency_graphs = GraphRegistry(ttl=DEPENDENCY_GRAPH_TTL, maxsize=DEPENDENCY_GRAPH_MAX_PROJECTS)
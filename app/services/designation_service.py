@@ -1,4 +1,5 @@
 from app.core.db.supabase_db import get_supabase_client, safe_supabase_operation
+from app.core.id_allocator import new_id
 from typing import Optional, List
 from app.services.organization_service import _organization_exists
 
@@ -11,9 +12,7 @@ async def create_designation(data: dict):
     if not await _organization_exists(org_id):
         raise ValueError("Organization does not exist")
     
-    # Generate designation ID: "D" followed by 4 random digits
-    import random
-    designation_id = f"D{random.randint(1000, 9999)}"
+    designation_id = new_id("D")
     data["designation_id"] = designation_id
     
     supabase = get_supabase_client()
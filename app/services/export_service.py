@@ -0,0 +1,80 @@
+"""
+Streaming NDJSON / CSV exports.
+
+Rows are pulled from PostgREST in keyset-ordered chunks of EXPORT_CHUNK_SIZE
+and written to the response as each chunk arrives, so an export holds at
+most one chunk in memory however many rows it covers. Callers pass a
+zero-argument function that builds the filtered query; this module adds the
+ordering, the seek past the previous chunk and the limit. The query is built
+inside each chunk's ``op()``, on the executor thread that runs it.
+"""
+import csv
+import io
+import json
+from typing import Any, AsyncIterator, Callable, List, Optional
+
+from fastapi import HTTPException
+from fastapi.responses import StreamingResponse
+
+from app.config.settings import EXPORT_CHUNK_SIZE
+from app.core.db.supabase_db import safe_supabase_operation
+from app.utils.pagination import apply_keyset, encode_cursor
+
+EXPORT_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+
+
+async def iter_chunks(build_query: Callable[[], Any], key: str, error_message: str, chunk_size: Optional[int] = None) -> AsyncIterator[List[dict]]:
+    """Yield every row of ``build_query()`` in ``key`` order, a chunk at a time."""
+    chunk_size = chunk_size or EXPORT_CHUNK_SIZE
+    cursor = None
+    while True:
+        def op(cursor=cursor):
+            return apply_keyset(build_query(), key, key, False, cursor).limit(chunk_size).execute()
+        result = await safe_supabase_operation(op, error_message)
+        rows = result.data or []
+        if rows:
+            yield rows
+        if len(rows) < chunk_size:
+            return
+        cursor = encode_cursor(rows[-1], key, key, False)
+
+
+def _cell(value: Any) -> Any:
+    if value is None:
+        return ""
+    if isinstance(value, (list, dict)):
+        return json.dumps(value, default=str)
+    return value
+
+
+async def ndjson_lines(chunks: AsyncIterator[List[dict]]) -> AsyncIterator[str]:
+    async for rows in chunks:
+        yield "".join(json.dumps(row, default=str) + "\n" for row in rows)
+
+
+async def csv_lines(chunks: AsyncIterator[List[dict]], columns: List[str]) -> AsyncIterator[str]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    yield buffer.getvalue()
+    async for rows in chunks:
+        buffer.seek(0)
+        buffer.truncate()
+        for row in rows:
+            writer.writerow([_cell(row.get(column)) for column in columns])
+        yield buffer.getvalue()
+
+
+def export_response(chunks: AsyncIterator[List[dict]], fmt: str, filename: str, columns: List[str]) -> StreamingResponse:
+    """StreamingResponse writing ``chunks`` as NDJSON (all fields) or CSV (``columns``)."""
+    if fmt not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"format must be one of: {', '.join(EXPORT_FORMATS)}")
+    body = csv_lines(chunks, columns) if fmt == "csv" else ndjson_lines(chunks)
+    return StreamingResponse(
+        body,
+        media_type=EXPORT_FORMATS[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{fmt}"'},
+    )
@@ -1,5 +1,7 @@
 from app.core.db.supabase_db import get_supabase_client, safe_supabase_operation
 from app.services.utils import inject_audit_fields
+from app.services.rbac import invalidate_org_role
+from app.utils.pagination import apply_keyset, decode_cursor
 
 from app.utils.logger import get_logger
 
@@ -143,7 +145,9 @@ async def create_organization_member(data: dict):
 
     def op():
         return supabase.from_("organization_members").insert(data).execute()
-    return await safe_supabase_operation(op, "Failed to create organization member")
+    result = await safe_supabase_operation(op, "Failed to create organization member")
+    invalidate_org_role(data.get("user_id"), data.get("org_id"))
+    return result
 
 async def get_organization_member(user_id: str, org_id: str):
     supabase = get_supabase_client()
@@ -163,27 +167,37 @@ async def update_organization_member(user_id: str, org_id: str, data: dict):
     def op():
         # data = inject_audit_fields(data,None,"update")
         return supabase.from_("organization_members").update(data).eq("user_id", user_id).eq("org_id", org_id).execute()
-    return await safe_supabase_operation(op, "Failed to update organization member")
+    result = await safe_supabase_operation(op, "Failed to update organization member")
+    invalidate_org_role(user_id, org_id)
+    return result
 
 async def delete_organization_member(user_id: str, org_id: str, data:dict):
     supabase = get_supabase_client()
     def op():
         # data = inject_audit_fields(data,None,"delete")
         return supabase.from_("organization_members").delete().eq("user_id", user_id).eq("org_id", org_id).execute()
-    return await safe_supabase_operation(op, "Failed to delete organization member")
+    result = await safe_supabase_operation(op, "Failed to delete organization member")
+    invalidate_org_role(user_id, org_id)
+    return result
 
-async def get_members_for_org(org_id, search=None, limit=20, offset=0, sort_by="updated_at", sort_order="asc", role=None, is_active=None):
+async def get_members_for_org(org_id, search=None, limit=20, offset=0, sort_by="updated_at", sort_order="asc", role=None, is_active=None, cursor=None):
     supabase = get_supabase_client()
-    # logger.info("Fetching members for org_id=%s", org_id)
-    query = supabase.from_("organization_members").select("*").eq("org_id", org_id).eq("is_active", True)
-    # if search:
-    #     query = query.ilike("designation", f"%{search}%")
-    if role:
-        query = query.eq("role", role)
-    # if is_active is not None:
-    #     query = query.eq("is_active", is_active)
-    query = query.order(sort_by, desc=(sort_order == "desc"))
-    result = query.range(offset, offset + limit - 1).execute()
+    desc = sort_order == "desc"
+    if cursor:
+        decode_cursor(cursor, sort_by, desc)  # a bad cursor is a 400, not a failed DB call
+    start = 0 if cursor else offset
+    def op():
+        # logger.info("Fetching members for org_id=%s", org_id)
+        query = supabase.from_("organization_members").select("*").eq("org_id", org_id).eq("is_active", True)
+        # if search:
+        #     query = query.ilike("designation", f"%{search}%")
+        if role:
+            query = query.eq("role", role)
+        # if is_active is not None:
+        #     query = query.eq("is_active", is_active)
+        query = apply_keyset(query, sort_by, "user_id", desc, cursor)
+        return query.range(start, start + limit - 1).execute()
+    result = await safe_supabase_operation(op, "Failed to fetch organization members")
     
     # Convert designation slugs back to display names for frontend
     members = result.data or []
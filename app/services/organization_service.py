@@ -1,45 +1,10 @@
 import datetime
 from typing import Optional, Union, List
 from app.core.db.supabase_db import get_supabase_client, safe_supabase_operation
+from app.core.id_allocator import new_id
 from app.models.enums import RoleEnum
 from app.services.utils import inject_audit_fields
 
-async def _generate_sequential_org_id() -> str:
-    """Generate the next sequential organization ID in the format 'O0001'.
-    The numeric portion is strictly increasing even if organizations are
-    deleted, as we always look at the current maximum and increment it.
-    """
-    supabase = get_supabase_client()
-
-    def op():
-        # Because the numeric part is zero-padded, ordering by the full string
-        # gives us the highest numeric value as well.
-        return (
-            supabase
-            .from_("organizations")
-            .select("org_id")
-            .order("org_id", desc=True)
-            .limit(1)
-            .execute()
-        )
-
-    res = await safe_supabase_operation(op, "Failed to fetch last organization id")
-    last_id: Optional[str] = None
-    if res and res.data:
-        last_id = res.data[0]["org_id"]
-
-    last_num = 0
-    if last_id and isinstance(last_id, str) and last_id.startswith("O"):
-        try:
-            last_num = int(last_id[1:])
-        except ValueError:
-            last_num = 0
-
-    next_num = last_num + 1
-    # Pad with at least 4 digits (O0001, O0010, etc.) but grow automatically
-    return f"O{next_num:04d}"
-
-
 def _validate_org_id(org_id: str):
     if not org_id or not isinstance(org_id, str) or not org_id.strip():
         raise ValueError("Invalid 'org_id'. It must be a non-empty string.")
@@ -68,11 +33,13 @@ def _validate_data(data: dict, required_fields: Optional[List[str]] = None):
 
 async def _organization_exists(org_id: str) -> bool:
     supabase = get_supabase_client()
-    result = supabase.from_("organizations")\
-        .select("org_id")\
-        .eq("org_id", org_id)\
-        .eq("is_deleted", False)\
-        .execute()
+    def op():
+        return supabase.from_("organizations")\
+            .select("org_id")\
+            .eq("org_id", org_id)\
+            .eq("is_deleted", False)\
+            .execute()
+    result = await safe_supabase_operation(op, "Failed to check organization")
     return bool(result.data)
 
 
@@ -121,16 +88,9 @@ async def create_organization(data: dict):
     if await _organization_name_exists(name, created_by, created_by_email):
         raise ValueError(f"Organization with name '{name}' already exists.")
     
-    # Generate sequential organization ID e.g. 'O0001', 'O0002', ...
-    org_id = await _generate_sequential_org_id()
-    # In the rare case of a race condition generating a duplicate, retry a few times
-    attempts = 0
-    while await _organization_exists(org_id):
-        attempts += 1
-        if attempts > 5:
-            raise RuntimeError("Unable to generate a unique organization id after multiple attempts")
-        org_id = await _generate_sequential_org_id()
-    
+    # Allocated locally and collision-free, so no existence re-check is needed
+    org_id = new_id("O")
+
     # Set organization ID and email
     data["org_id"] = org_id
     data["email"] = created_by_email  # Set the organization email to the creator's email
@@ -1,4 +1,5 @@
 from app.core.db.supabase_db import get_supabase_client, safe_supabase_operation
+from app.services.rbac import invalidate_project_role
 from fastapi import HTTPException
 from typing import Optional
 import time, re
@@ -129,7 +130,9 @@ async def create_project_member(data: dict):
 
     def op():
         return supabase.from_("project_members").insert(data).execute()
-    return await safe_supabase_operation(op, "Failed to create project member")
+    result = await safe_supabase_operation(op, "Failed to create project member")
+    invalidate_project_role(data.get("user_id"), data.get("project_id"))
+    return result
 
 async def get_project_member(user_id: str, project_id: str):
     supabase = get_supabase_client()
@@ -156,13 +159,17 @@ async def update_project_member(user_id: str, project_id: str, data: dict):
     supabase = get_supabase_client()
     def op():
         return supabase.from_("project_members").update(data).eq("user_id", user_id).eq("project_id", project_id).execute()
-    return await safe_supabase_operation(op, "Failed to update project member")
+    result = await safe_supabase_operation(op, "Failed to update project member")
+    invalidate_project_role(user_id, project_id)
+    return result
 
 async def delete_project_member(user_id: str, project_id: str, metadata: dict | None = None):
     supabase = get_supabase_client()
     def op():
         return supabase.from_("project_members").delete().eq("user_id", user_id).eq("project_id", project_id).execute()
-    return await safe_supabase_operation(op, "Failed to delete project member")
+    result = await safe_supabase_operation(op, "Failed to delete project member")
+    invalidate_project_role(user_id, project_id)
+    return result
 
 async def get_members_for_project(project_id, search=None, limit=20, offset=0, sort_by="updated_at", sort_order="asc", role=None):
     supabase = get_supabase_client()
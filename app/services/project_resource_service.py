@@ -1,5 +1,6 @@
 import unicodedata
 from app.core.db.supabase_db import get_supabase_client, safe_supabase_operation
+from app.core.id_allocator import new_id
 
 import datetime
 
@@ -107,27 +108,6 @@ def _sanitize_name(name: str) -> str:
 	# Max filename length
 	return safe[:255]
 
-async def _generate_sequential_resource_id() -> str:
-    """Generate next sequential id like 'RE0001'"""
-    supabase = get_supabase_client()
-    def op():
-        return (
-            supabase.from_("project_resources")
-            .select("resource_id")
-            .order("resource_id", desc=True)
-            .limit(1)
-            .execute()
-        )
-    res = await safe_supabase_operation(op, "Failed to fetch last resource id")
-    last = res.data[0]["resource_id"] if res and res.data else None
-    last_num = 0
-    if last and isinstance(last, str) and last.startswith("RE"):
-        try:
-            last_num = int(last[2:])
-        except ValueError:
-            last_num = 0
-    return f"RE{last_num+1:04d}"
-
 async def create_project_resource(data: dict):
 
     print(f"Creating project resource: {data}")
@@ -148,7 +128,7 @@ async def create_project_resource(data: dict):
             pass
 
     if "resource_id" not in data:
-        data["resource_id"] = await _generate_sequential_resource_id()
+        data["resource_id"] = new_id("RE")
 
     if "created_at" not in data:
         data["created_at"] = datetime.datetime.utcnow().isoformat()
@@ -1,49 +1,25 @@
 from typing import List
 from app.models.enums import RoleEnum
 import uuid
-from app.core.db.supabase_db import get_supabase_client, safe_supabase_operation
+from app.core.db.supabase_db import get_supabase_client, get_async_supabase_client, safe_supabase_operation, query_fingerprint
+from app.core.id_allocator import new_id
+from app.core.db import pg_engine
+from app.services.rbac import invalidate_project
 from app.models.schemas.project import ProjectCard
 
 import datetime
 from fastapi import HTTPException
-import random  # NEW: needed for random ID generation
-
-
-# ---------------------------------------------------------------------------
-# Project ID generation
-# ---------------------------------------------------------------------------
-
-
-async def _generate_random_project_id() -> str:
-    """Generate a random project ID with prefix 'P' and 6 digits, ensuring uniqueness."""
-
-    supabase = get_supabase_client()
-    digits = 5
-
-    # Try a few times to avoid collisions (extremely unlikely)
-    for _ in range(10):
-        candidate = f"P{random.randint(0, 10**digits - 1):0{digits}d}"
-
-        def op():
-            return (
-                supabase.from_("projects")
-                .select("project_id")
-                .eq("project_id", candidate)
-                .limit(1)
-                .execute()
-            )
-
-        res = await safe_supabase_operation(op, "Failed to verify project id uniqueness")
-        if not res or not getattr(res, "data", None):
-            return candidate
-
-    # Fallback: use timestamp suffix (still reasonably unique)
-    ts = int(datetime.datetime.utcnow().timestamp()) % (10 ** digits)
-    return f"P{ts:0{digits}d}"
 
 
 async def get_project_card(project_id: str):
     """Fetch a single ProjectCard entry from the materialized view for the given project."""
+    if pg_engine.pg_enabled("get_project_card"):
+        async def pg_op():
+            row = await pg_engine.fetchrow("project_card_view", "SELECT * FROM project_card_view WHERE project_id = $1", project_id)
+            return pg_engine.PgResult(row)
+        result = await safe_supabase_operation(pg_op, "Failed to fetch project card")
+        return ProjectCard(**result.data) if result.data else None
+
     supabase = get_supabase_client()
     def op():
         return (
@@ -74,8 +50,8 @@ async def create_project(data: dict):
 
     await check_project_exists(data)
 
-    # Generate a random project_id (P + 6 digits)
-    project_id = await _generate_random_project_id()
+    # Time-ordered project_id (P + 13 chars), no uniqueness probe needed
+    project_id = new_id("P")
     data["project_id"] = project_id
 
     # Ensure we always have correct timestamps if not provided
@@ -94,7 +70,9 @@ async def create_project(data: dict):
     def op():
         return supabase.from_("projects").insert(data).execute()
 
-    return await safe_supabase_operation(op, "Failed to create project")
+    result = await safe_supabase_operation(op, "Failed to create project")
+    invalidate_project(project_id)  # org owners/admins can access it from now on
+    return result
 
 async def get_project(project_id: str):
     supabase = get_supabase_client()
@@ -184,17 +162,18 @@ async def delete_project(project_id: str):
     supabase = get_supabase_client()
     def op():
         return supabase.from_("projects").delete().eq("project_id", project_id).execute()
-    return await safe_supabase_operation(op, "Failed to delete project")
+    result = await safe_supabase_operation(op, "Failed to delete project")
+    invalidate_project(project_id)
+    return result
 
 
 async def get_all_org_projects(org_id: str):
     """Get all projects for an organization regardless of user membership."""
-    supabase = get_supabase_client()
+    query = get_async_supabase_client().from_("project_card_view").select("*").eq("org_id", org_id)
+    async def op():
+        return await query.execute()
     
-    def op():
-        return supabase.from_("project_card_view").select("*").eq("org_id", org_id).execute()
-    
-    stats_result = await safe_supabase_operation(op, "Failed to fetch organization projects")
+    stats_result = await safe_supabase_operation(op, "Failed to fetch organization projects", coalesce_key=query_fingerprint(query))
     
     if not stats_result or not stats_result.data:
         return []
@@ -203,9 +182,11 @@ async def get_all_org_projects(org_id: str):
     for raw in stats_result.data:
         card = ProjectCard(**raw)
         # Fetch members for each project (owner + team list)
+        members_query = get_async_supabase_client().from_("project_members").select("user_id,role").eq("project_id", card.project_id)
+        async def members_op(members_query=members_query):
+            return await members_query.execute()
         mem_res = await safe_supabase_operation(
-            lambda: supabase.from_("project_members").select("user_id,role").eq("project_id", card.project_id).execute(),
-            "Failed to fetch project members",
+            members_op, "Failed to fetch project members", coalesce_key=query_fingerprint(members_query)
         )
         if mem_res and mem_res.data:
             card.team_members = [m["user_id"] for m in mem_res.data]
@@ -219,12 +200,18 @@ async def get_all_org_projects(org_id: str):
 async def get_projects_for_user(user_id, org_id):
     """Get only the projects where the user is a member."""
     supabase = get_supabase_client()
-    result = supabase.from_("project_members").select("project_id").eq("user_id", user_id).execute()
+    result = await safe_supabase_operation(
+        lambda: supabase.from_("project_members").select("project_id").eq("user_id", user_id).execute(),
+        "Failed to fetch user project memberships",
+    )
     project_ids = [row["project_id"] for row in result.data]
     if not project_ids:
         return []   
 
-    stats_result = await safe_supabase_operation(lambda:supabase.from_("project_card_view").select("*").in_("project_id", project_ids).eq("org_id", org_id).execute())
+    query = get_async_supabase_client().from_("project_card_view").select("*").in_("project_id", project_ids).eq("org_id", org_id)
+    async def op():
+        return await query.execute()
+    stats_result = await safe_supabase_operation(op, "Failed to fetch user projects", coalesce_key=query_fingerprint(query))
 
 
     if not stats_result or not stats_result.data:
@@ -1,11 +1,164 @@
-from app.core.db.supabase_db import get_supabase_client, safe_supabase_operation
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+from app.core.db.supabase_db import get_async_supabase_client, safe_supabase_operation, query_fingerprint
+from app.core.db import pg_engine
+from app.config.settings import ROLE_CACHE_TTL, ROLE_CACHE_NEGATIVE_TTL, ROLE_CACHE_MAX_ENTRIES, ROLE_CACHE_SYNC_INTERVAL, RBAC_DB_FUNCTIONS
+from app.utils.logger import log_error
 from app.services.role_service import get_role, get_role_by_name
 
+
+class RoleCache:
+    """LRU of resolved roles keyed by ("org", user, org) / ("project", user, project).
+
+    Misses are cached too (``None`` for "not a member"), for a shorter
+    ``negative_ttl``. The member services invalidate entries right after
+    every membership write, so a revoked role stops working immediately in
+    this process.
+
+    Other workers learn about it through ``sync``: membership writes bump a
+    counter in the database (role_cache_generation), and a worker that sees
+    it move drops its whole cache. The counter is read at most every
+    ``sync_interval`` seconds, which bounds how long a revoked role keeps
+    working elsewhere. A failed read also drops the cache (logged once per
+    outage), so nothing is served from it until the counter can be read
+    again. With ``sync_interval=None`` (ROLE_CACHE_SYNC_INTERVAL negative)
+    only ``ttl`` bounds it.
+
+    Lookups that were in flight while an invalidation happened don't store
+    their (possibly stale) result: every invalidation bumps ``generation``
+    and ``put`` drops values read under an older one.
+    """
+
+    def __init__(self, ttl: float, negative_ttl: float, maxsize: int, sync_interval: Optional[float] = None):
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.maxsize = maxsize
+        self.sync_interval = sync_interval
+        self.generation = 0
+        self.stamp = None
+        self.sync_failing = False
+        self._synced_at = float("-inf")
+        self._entries: "OrderedDict[tuple, tuple]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: tuple):
+        """Return ``(found, value)``."""
+        entry = self._entries.get(key)
+        if entry is not None and entry[1] > time.monotonic():
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return True, entry[0]
+        if entry is not None:
+            del self._entries[key]
+        self.misses += 1
+        return False, None
+
+    def put(self, key: tuple, value, generation: int):
+        if self.maxsize <= 0 or generation != self.generation:
+            return
+        ttl = self.ttl if value is not None else self.negative_ttl
+        self._entries[key] = (value, time.monotonic() + ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, match):
+        """Drop every entry whose key satisfies ``match(key)``."""
+        self.generation += 1
+        for key in [k for k in self._entries if match(k)]:
+            del self._entries[key]
+
+    def clear(self):
+        self.generation += 1
+        self._entries.clear()
+
+    async def sync(self, read_stamp):
+        """Drop the cache if the shared stamp moved since the last check."""
+        if self.sync_interval is None or time.monotonic() - self._synced_at < self.sync_interval:
+            return
+        self._synced_at = time.monotonic()
+        try:
+            stamp = await read_stamp()
+        except Exception as exc:
+            # Can't tell what changed elsewhere: don't serve what we have
+            if not self.sync_failing:
+                log_error(f"Role cache: generation check failed, clearing until it succeeds: {exc}")
+            self.sync_failing = True
+            self.clear()
+            return
+        self.sync_failing = False
+        if stamp != self.stamp:
+            self.stamp = stamp
+            self.clear()
+
+    def stats(self) -> dict:
+        return {"size": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+role_cache = RoleCache(
+    ttl=ROLE_CACHE_TTL,
+    negative_ttl=ROLE_CACHE_NEGATIVE_TTL,
+    maxsize=ROLE_CACHE_MAX_ENTRIES,
+    sync_interval=ROLE_CACHE_SYNC_INTERVAL if ROLE_CACHE_SYNC_INTERVAL >= 0 else None,
+)
+
+
+async def _read_role_stamp():
+    supabase = get_async_supabase_client()
+    query = supabase.from_("role_cache_generation").select("generation").eq("id", 1).limit(1)
+    async def op():
+        return await query.execute()
+    result = await safe_supabase_operation(op, "Failed to read role cache generation", coalesce_key=query_fingerprint(query))
+    return result.data[0].get("generation") if result.data else None
+
+
+def invalidate_org_role(user_id, org_id):
+    """Forget a user's org role and every project role that may have fallen back to it."""
+    user_id = str(user_id)
+    role_cache.invalidate(lambda k: (k[0] == "org" and k[1] == user_id and k[2] == org_id) or (k[0] in ("project", "user_roles") and k[1] == user_id))
+
+
+def invalidate_project_role(user_id, project_id):
+    user_id = str(user_id)
+    role_cache.invalidate(lambda k: k in (("project", user_id, project_id), ("user_roles", user_id)))
+
+
+def invalidate_project(project_id):
+    """Forget everything cached about a project (it was deleted or moved)."""
+    role_cache.invalidate(lambda k: (k[0] == "project" and k[2] == project_id) or k == ("project_org", project_id) or k[0] == "user_roles")
+
+
+async def _cached(key: tuple, fetch):
+    await role_cache.sync(_read_role_stamp)
+    found, value = role_cache.get(key)
+    if found:
+        return value
+    generation = role_cache.generation
+    value = await fetch()
+    role_cache.put(key, value, generation)
+    return value
+
+
 async def get_org_role(user_id: str, org_id: str):
-    supabase = get_supabase_client()
-    def op():
-        return supabase.from_("organization_members").select("role").eq("user_id", user_id).eq("org_id", org_id).limit(1).execute()
-    result = await safe_supabase_operation(op, "Failed to fetch org membership role")
+    return await _cached(("org", str(user_id), org_id), lambda: _fetch_org_role(user_id, org_id))
+
+async def _fetch_org_role(user_id: str, org_id: str):
+    if pg_engine.pg_enabled("get_org_role"):
+        async def pg_op():
+            return await pg_engine.fetchval(
+                "organization_members",
+                "SELECT role::text FROM organization_members WHERE user_id = $1::uuid AND org_id = $2 LIMIT 1",
+                user_id, org_id,
+            )
+        return await safe_supabase_operation(pg_op, "Failed to fetch org membership role")
+
+    supabase = get_async_supabase_client()
+    query = supabase.from_("organization_members").select("role").eq("user_id", user_id).eq("org_id", org_id).limit(1)
+    async def op():
+        return await query.execute()
+    result = await safe_supabase_operation(op, "Failed to fetch org membership role", coalesce_key=query_fingerprint(query))
     if result.data and len(result.data) > 0:
         role_name = result.data[0].get("role")
         # Try resolving to human-readable role name
@@ -17,10 +170,31 @@ async def get_org_role(user_id: str, org_id: str):
     return None
 
 async def get_project_role(user_id: str, project_id: str):
-    supabase = get_supabase_client()
-    def op():
-        return supabase.from_("project_members").select("role").eq("user_id", user_id).eq("project_id", project_id).limit(1).execute()
-    result = await safe_supabase_operation(op, "Failed to fetch project membership role")
+    return await _cached(("project", str(user_id), project_id), lambda: _fetch_project_role(user_id, project_id))
+
+async def _fetch_project_role(user_id: str, project_id: str):
+    if RBAC_DB_FUNCTIONS and pg_engine.pg_enabled("get_project_role"):
+        async def pg_op():
+            return await pg_engine.fetchval(
+                "rpc/get_effective_project_role",
+                "SELECT get_effective_project_role($1, $2)",
+                str(user_id), project_id,
+            )
+        return await safe_supabase_operation(pg_op, "Failed to fetch project membership role")
+
+    if RBAC_DB_FUNCTIONS:
+        # Direct membership or inherited org owner/admin, in one round trip
+        supabase = get_async_supabase_client()
+        async def rpc_op():
+            return await supabase.rpc("get_effective_project_role", {"p_user_id": str(user_id), "p_project_id": project_id}).execute()
+        result = await safe_supabase_operation(rpc_op, "Failed to fetch project membership role")
+        return result.data or None
+
+    supabase = get_async_supabase_client()
+    query = supabase.from_("project_members").select("role").eq("user_id", user_id).eq("project_id", project_id).limit(1)
+    async def op():
+        return await query.execute()
+    result = await safe_supabase_operation(op, "Failed to fetch project membership role", coalesce_key=query_fingerprint(query))
     if result.data and len(result.data) > 0:
         role_name = result.data[0].get("role")
         # Try resolving to human-readable role name
@@ -36,11 +210,223 @@ async def get_project_role(user_id: str, project_id: str):
     return None
 
 async def get_org_by_proj(proj_id: str):
-    supabase = get_supabase_client()
-    def op():
-        return supabase.from_("projects").select("org_id").eq("project_id", proj_id).limit(1).execute()
-    result = await safe_supabase_operation(op, "Failed to fetch project membership role")
+    return await _cached(("project_org", proj_id), lambda: _fetch_org_by_proj(proj_id))
+
+async def _fetch_org_by_proj(proj_id: str):
+    supabase = get_async_supabase_client()
+    query = supabase.from_("projects").select("org_id").eq("project_id", proj_id).limit(1)
+    async def op():
+        return await query.execute()
+    result = await safe_supabase_operation(op, "Failed to fetch project membership role", coalesce_key=query_fingerprint(query))
     if result.data and len(result.data) > 0:
         org_id = result.data[0].get("org_id")
         return org_id
-    return None
\ No newline at end of file
+    return None
+
+
+# ---------------------------------------------------------------------------
+# Bulk resolution
+# ---------------------------------------------------------------------------
+
+async def preload_user_roles(user_id: str) -> int:
+    """Warm the role cache with every org and effective project role of a user.
+
+    One ``get_user_roles`` call (or three table reads when RBAC_DB_FUNCTIONS
+    is off) instead of a lookup per org/project on the user's first page
+    loads. Meant to run right after login; returns the number of roles cached.
+    """
+    user_id = str(user_id)
+    await role_cache.sync(_read_role_stamp)
+    generation = role_cache.generation
+    rows = await _fetch_user_roles(user_id)
+    for row in rows:
+        if row.get("scope") == "org":
+            role_cache.put(("org", user_id, row["scope_id"]), row.get("role"), generation)
+        else:
+            role_cache.put(("project", user_id, row["scope_id"]), row.get("role"), generation)
+            role_cache.put(("project_org", row["scope_id"]), row.get("org_id"), generation)
+    role_cache.put(("user_roles", user_id), rows, generation)
+    return len(rows)
+
+
+async def get_accessible_project_ids(user_id: str, org_id: Optional[str] = None) -> List[str]:
+    """Every project the user has an effective role in (optionally only ``org_id``'s).
+
+    Resolved with the same single bulk lookup as ``preload_user_roles`` and
+    cached like the other roles, so list and export queries can be
+    restricted with ``in_("project_id", ...)`` up front instead of filtering
+    rows after fetching them.
+    """
+    user_id = str(user_id)
+    rows = await _cached(("user_roles", user_id), lambda: _fetch_user_roles(user_id))
+    return sorted(
+        row["scope_id"] for row in rows
+        if row.get("scope") == "project" and row.get("role") and (org_id is None or row.get("org_id") == org_id)
+    )
+
+
+async def _fetch_user_roles(user_id: str) -> List[dict]:
+    if RBAC_DB_FUNCTIONS:
+        supabase = get_async_supabase_client()
+        async def op():
+            return await supabase.rpc("get_user_roles", {"p_user_id": user_id}).execute()
+        result = await safe_supabase_operation(op, "Failed to preload user roles")
+        return result.data or []
+    return await _fetch_user_roles_from_tables(user_id)
+
+
+async def _fetch_user_roles_from_tables(user_id: str) -> List[dict]:
+    """get_user_roles without the database function: three queries.
+
+    Returns the same ``{scope, scope_id, org_id, role}`` rows: the user's org
+    roles, direct project roles, and owner/admin roles inherited by the other
+    projects of their orgs.
+    """
+    supabase = get_async_supabase_client()
+
+    async def orgs_op():
+        return await supabase.from_("organization_members").select("org_id,role").eq("user_id", user_id).execute()
+    result = await safe_supabase_operation(orgs_op, "Failed to preload user roles")
+    org_roles = {row["org_id"]: row.get("role") for row in result.data or []}
+
+    async def members_op():
+        return await supabase.from_("project_members").select("project_id,role").eq("user_id", user_id).execute()
+    result = await safe_supabase_operation(members_op, "Failed to preload user roles")
+    project_roles = {row["project_id"]: row.get("role") for row in result.data or []}
+
+    rows = [{"scope": "org", "scope_id": org_id, "org_id": org_id, "role": role} for org_id, role in org_roles.items()]
+    admin_orgs = sorted(org_id for org_id, role in org_roles.items() if role in ["owner", "admin"])
+    direct = sorted(project_roles)
+    if not admin_orgs and not direct:
+        return rows
+
+    conditions = []
+    if direct:
+        conditions.append(f"project_id.in.({','.join(_quoted(p) for p in direct)})")
+    if admin_orgs:
+        conditions.append(f"org_id.in.({','.join(_quoted(o) for o in admin_orgs)})")
+    async def projects_op():
+        return await supabase.from_("projects").select("project_id,org_id").or_(",".join(conditions)).execute()
+    result = await safe_supabase_operation(projects_op, "Failed to preload user roles")
+    for project in result.data or []:
+        project_id, org_id = project["project_id"], project.get("org_id")
+        role = project_roles.get(project_id)
+        if role is None and org_id in admin_orgs:
+            role = org_roles[org_id]
+        if role is not None:
+            rows.append({"scope": "project", "scope_id": project_id, "org_id": org_id, "role": role})
+    return rows
+
+
+def _quoted(value: str) -> str:
+    return '"' + str(value).replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+
+async def get_project_roles(pairs: Iterable[Tuple[str, str]]) -> Dict[Tuple[str, str], Optional[str]]:
+    """Effective roles for many ``(user_id, project_id)`` pairs at once.
+
+    Cached pairs are answered from the role cache; the rest are resolved with
+    a single ``get_effective_project_roles`` call, or with at most three
+    table reads when RBAC_DB_FUNCTIONS is off, and cached (including "no
+    access"). Returns ``{(user_id, project_id): role or None}``.
+    """
+    await role_cache.sync(_read_role_stamp)
+    roles: Dict[Tuple[str, str], Optional[str]] = {}
+    missing: List[Tuple[str, str]] = []
+    for user_id, project_id in dict.fromkeys((str(u), p) for u, p in pairs if p):
+        found, role = role_cache.get(("project", user_id, project_id))
+        if found:
+            roles[(user_id, project_id)] = role
+        else:
+            missing.append((user_id, project_id))
+    if not missing:
+        return roles
+
+    generation = role_cache.generation
+    if not RBAC_DB_FUNCTIONS:
+        found_roles = await _fetch_project_roles_from_tables(missing, generation)
+        for pair in missing:
+            roles[pair] = found_roles.get(pair)
+            role_cache.put(("project",) + pair, roles[pair], generation)
+        return roles
+
+    supabase = get_async_supabase_client()
+    params = {"p_user_ids": [u for u, _ in missing], "p_project_ids": [p for _, p in missing]}
+    async def op():
+        return await supabase.rpc("get_effective_project_roles", params).execute()
+    result = await safe_supabase_operation(op, "Failed to fetch project membership roles")
+    found_roles = {(row["user_id"], row["project_id"]): row.get("role") for row in (result.data or [])}
+    for pair in missing:
+        roles[pair] = found_roles.get(pair)
+        role_cache.put(("project",) + pair, roles[pair], generation)
+    return roles
+
+
+async def _fetch_project_roles_from_tables(pairs: List[Tuple[str, str]], generation: int) -> Dict[Tuple[str, str], str]:
+    """get_effective_project_roles without the database function: at most three queries.
+
+    Direct memberships first; the remaining pairs fall back to an owner/admin
+    role in the project's org, like ``_fetch_project_role``. The project
+    orgs and org roles read on the way are cached as well.
+    """
+    supabase = get_async_supabase_client()
+    users = sorted({u for u, _ in pairs})
+    projects = sorted({p for _, p in pairs})
+
+    query = supabase.from_("project_members").select("user_id,project_id,role").in_("user_id", users).in_("project_id", projects)
+    async def members_op():
+        return await query.execute()
+    result = await safe_supabase_operation(members_op, "Failed to fetch project membership roles")
+    wanted = set(pairs)
+    roles = {}
+    for row in result.data or []:
+        pair = (str(row["user_id"]), row["project_id"])
+        if pair in wanted:
+            roles[pair] = row.get("role")
+
+    rest = [pair for pair in pairs if pair not in roles]
+    if not rest:
+        return roles
+
+    project_orgs = {}
+    unknown = []
+    for project_id in sorted({p for _, p in rest}):
+        found, org_id = role_cache.get(("project_org", project_id))
+        if found:
+            project_orgs[project_id] = org_id
+        else:
+            unknown.append(project_id)
+    if unknown:
+        query = supabase.from_("projects").select("project_id,org_id").in_("project_id", unknown)
+        async def projects_op():
+            return await query.execute()
+        result = await safe_supabase_operation(projects_op, "Failed to fetch project membership roles")
+        fetched = {row["project_id"]: row.get("org_id") for row in result.data or []}
+        for project_id in unknown:
+            project_orgs[project_id] = fetched.get(project_id)
+            role_cache.put(("project_org", project_id), project_orgs[project_id], generation)
+
+    orgs = sorted({project_orgs[p] for _, p in rest if project_orgs.get(p)})
+    if not orgs:
+        return roles
+    rest_users = sorted({u for u, _ in rest})
+    query = supabase.from_("organization_members").select("user_id,org_id,role").in_("user_id", rest_users).in_("org_id", orgs)
+    async def orgs_op():
+        return await query.execute()
+    result = await safe_supabase_operation(orgs_op, "Failed to fetch org membership roles")
+    org_roles = {(str(row["user_id"]), row["org_id"]): row.get("role") for row in result.data or []}
+    for user_id in rest_users:
+        for org_id in orgs:
+            role_cache.put(("org", user_id, org_id), org_roles.get((user_id, org_id)), generation)
+    for user_id, project_id in rest:
+        org_role = org_roles.get((user_id, project_orgs.get(project_id)))
+        if org_role in ["owner", "admin"]:
+            roles[(user_id, project_id)] = org_role
+    return roles
+
+
+async def filter_by_project_access(user_id: str, rows: List[dict], project_key: str = "project_id") -> List[dict]:
+    """Keep the rows whose project the user can access (rows without a project are kept)."""
+    user_id = str(user_id)
+    roles = await get_project_roles((user_id, row.get(project_key)) for row in rows)
+    return [row for row in rows if not row.get(project_key) or roles.get((user_id, row[project_key]))]
@@ -1,21 +1,9 @@
 import datetime
 from app.core.db.supabase_db import get_supabase_client, safe_supabase_operation
+from app.core.id_allocator import new_id
+from app.utils.pagination import apply_keyset, decode_cursor
 
 
-async def _generate_sequential_comment_id() -> str:
-    """Generate a random comment ID with prefix 'C' and 5 digits, ensuring uniqueness."""
-    supabase = get_supabase_client()
-    digits = 5
-    for _ in range(10):
-        candidate = f"C{__import__('random').randint(0, 10**digits - 1):0{digits}d}"
-        def op():
-            return supabase.from_("task_comments").select("comment_id").eq("comment_id", candidate).limit(1).execute()
-        res = await safe_supabase_operation(op, "Failed to verify comment id uniqueness")
-        if not res or not getattr(res, "data", None):
-            return candidate
-    ts = int(datetime.datetime.utcnow().timestamp()) % (10**digits)
-    return f"C{ts:0{digits}d}"
-
 async def create_task_comment(data: dict):
     """Create a new comment or reply."""
     # Ensure we always have correct timestamps if not provided
@@ -24,7 +12,7 @@ async def create_task_comment(data: dict):
 
     # Generate comment_id if missing
     if not data.get("comment_id"):
-        data["comment_id"] = await _generate_sequential_comment_id()
+        data["comment_id"] = new_id("C")
 
     # Some databases may still expect the legacy 'comment' column
     if data.get("content") and not data.get("comment"):
@@ -74,53 +62,59 @@ async def delete_task_comment(comment_id: str, _audit: dict | None = None):
         return supabase.from_("task_comments").delete().eq("comment_id", comment_id).execute()
     return await safe_supabase_operation(op, "Failed to delete task comment")
 
-async def get_comments_for_task(task_id, search=None, limit=100, offset=0, sort_by="created_at", sort_order="asc"):
-    """Fetch comments for a task, including replies in a nested structure."""
+async def get_comments_for_task(task_id, search=None, limit=100, offset=0, sort_by="created_at", sort_order="asc", cursor=None):
+    """Fetch a page of root comments for a task, each with its replies nested.
+
+    Pages are keyset-ordered on (sort_by, comment_id) over root comments only;
+    ``cursor`` continues after a previous page. Replies of the page's roots,
+    and replies to those replies, are loaded with one query per nesting
+    level and sorted by creation date.
+    """
     supabase = get_supabase_client()
-    
-    # First, fetch all comments for the task
-    query = supabase.from_("task_comments").select("*")\
-        .eq("task_id", task_id)
-        
-    if search:
-        query = query.ilike("content", f"%{search}%")
-    
-    # Sort by creation date by default
-    query = query.order(sort_by, desc=(sort_order == "desc"))
-    
-    # Get all comments (we'll handle pagination after building the tree)
-    result = await safe_supabase_operation(
-        lambda: query.execute(),
-        "Failed to fetch task comments"
-    )
-    
-    if not result or not result.data:
+    desc = sort_order == "desc"
+    if cursor:
+        decode_cursor(cursor, sort_by, desc)  # a bad cursor is a 400, not a failed DB call
+    start = 0 if cursor else offset
+
+    def op():
+        query = supabase.from_("task_comments").select("*")\
+            .eq("task_id", task_id)\
+            .is_("parent_comment_id", "null")
+        if search:
+            query = query.ilike("content", f"%{search}%")
+        query = apply_keyset(query, sort_by, "comment_id", desc, cursor)
+        return query.range(start, start + limit - 1).execute()
+
+    result = await safe_supabase_operation(op, "Failed to fetch task comments")
+    root_comments = result.data if result and result.data else []
+    if not root_comments:
         return []
-    
-    # Build comment tree
+
     comments_map = {}
-    root_comments = []
-    
-    # First pass: map all comments by ID
-    for comment in result.data:
+    for comment in root_comments:
         comment['replies'] = []
         comments_map[comment['comment_id']] = comment
-    
-    # Second pass: build the tree
-    for comment in result.data:
-        parent_id = comment.get('parent_comment_id')
-        if parent_id and parent_id in comments_map:
-            # This is a reply, add it to its parent's replies
-            comments_map[parent_id]['replies'].append(comment)
-        elif not parent_id:
-            # This is a root-level comment
-            root_comments.append(comment)
-    
-    # Sort replies by creation date
-    for comment in comments_map.values():
-        comment['replies'].sort(key=lambda x: x.get('created_at', ''))
-    
-    # Apply pagination to root comments only
-    paginated_comments = root_comments[offset:offset + limit]
-    
-    return paginated_comments
\ No newline at end of file
+
+    # Replies can answer replies: load the subtree one level per query until
+    # a level comes back empty, and nest each reply under its own parent
+    parents = list(comments_map)
+    while parents:
+        def replies_op(parents=parents):
+            replies_query = supabase.from_("task_comments").select("*")\
+                .in_("parent_comment_id", parents)\
+                .order("created_at")
+            if search:
+                replies_query = replies_query.ilike("content", f"%{search}%")
+            return replies_query.execute()
+
+        replies = await safe_supabase_operation(replies_op, "Failed to fetch task comment replies")
+        parents = []
+        for reply in (replies.data or []):
+            if reply['comment_id'] in comments_map:
+                continue  # a parent loop in bad data must not repeat forever
+            reply['replies'] = []
+            comments_map[reply['comment_id']] = reply
+            comments_map[reply['parent_comment_id']]['replies'].append(reply)
+            parents.append(reply['comment_id'])
+
+    return root_comments
\ No newline at end of file
@@ -1,26 +1,15 @@
 import datetime
 import re
-from typing import Optional
+from typing import List, Optional
+from app.config.settings import HISTORY_FLUSH_INTERVAL_MS, HISTORY_FLUSH_SIZE, HISTORY_QUEUE_MAX
 from app.core.db.supabase_db import get_supabase_client, safe_supabase_operation
-from app.models.schemas.task_history import TaskHistoryInDB
-from app.utils.history_utils import history_hash
+from app.core.db.write_behind import WriteBehindJournal, register_journal
+from app.utils.pagination import apply_keyset, decode_cursor
+from app.core.id_allocator import new_id
+from app.utils.history_utils import history_hash, normalize_metadata
 
 
 
-async def _generate_sequential_history_id() -> str:
-    """Generate a random history ID with prefix 'H' and 5 digits, ensuring uniqueness."""
-    supabase = get_supabase_client()
-    digits = 5
-    for _ in range(10):
-        candidate = f"H{__import__('random').randint(0, 10**digits - 1):0{digits}d}"
-        def op():
-            return supabase.from_("tasks_history").select("history_id").eq("history_id", candidate).limit(1).execute()
-        res = await safe_supabase_operation(op, "Failed to verify history id uniqueness")
-        if not res or not getattr(res, "data", None):
-            return candidate
-    ts = int(datetime.datetime.utcnow().timestamp()) % (10**digits)
-    return f"H{ts:0{digits}d}"
-
 SYSTEM_ALIASES = {
     "system": "System",
     "system-bot": "System Bot",
@@ -61,16 +50,15 @@ def make_actor_display(raw: str | None) -> str:
         pretty = pretty[:57].rstrip() + "..."
 
     return pretty
-async def record_history(*, task_id: str, action: str, created_by: str,
-                         title: str | None = None, metadata: list | dict | None = None,
-                         actor_display: str | None = None):
-    supabase = get_supabase_client()
-
-    # Normalize metadata to a list
-    meta_list = metadata if isinstance(metadata, list) else [metadata] if metadata else []
+def build_history_row(*, task_id: str, action: str, created_by: str,
+                      title: str | None = None, metadata: list | dict | None = None,
+                      actor_display: str | None = None) -> dict:
+    """The tasks_history row record_history writes, for callers that batch them."""
+    # Normalized here, once, so reads can return rows as stored
+    meta_list = normalize_metadata(metadata)
 
-    # Generate sequential history id
-    history_id = await _generate_sequential_history_id()
+    # Time-ordered history id
+    history_id = new_id("H")
 
     # Timestamps
     now = datetime.datetime.utcnow().replace(microsecond=0).isoformat()
@@ -87,20 +75,49 @@ async def record_history(*, task_id: str, action: str, created_by: str,
         "created_at": now,
         "updated_at": now,
     }
-    print("History Body", body)
     body["hash_id"] = history_hash(task_id, action, meta_list, created_by)  # idempotency
+    return body
+
+
+async def record_history(*, task_id: str, action: str, created_by: str,
+                         title: str | None = None, metadata: list | dict | None = None,
+                         actor_display: str | None = None):
+    """Queue one history event; history_journal upserts it (hash guard) in the background."""
+    body = build_history_row(task_id=task_id, action=action, created_by=created_by,
+                             title=title, metadata=metadata, actor_display=actor_display)
+    await history_journal.enqueue(body)
+    return body
+
+
+async def record_history_bulk(rows: list[dict]):
+    """Upsert many build_history_row() rows in one statement (same hash guard)."""
+    if not rows:
+        return None
+    supabase = get_supabase_client()
+    def op():
+        return (
+            supabase.from_("tasks_history")
+            .upsert(rows, on_conflict="hash_id")
+            .execute()
+        )
+    return await safe_supabase_operation(op, "Failed to record task history")
 
-    # upsert w/ hash guard
-    return (
-        supabase.from_("tasks_history")
-        .upsert(body, on_conflict="hash_id")
-        .execute()
-    )
+
+# Write-behind queue for record_history (started/drained in the app lifespan)
+history_journal = register_journal(WriteBehindJournal(
+    "tasks_history",
+    lambda rows: record_history_bulk(rows),
+    key="hash_id",
+    flush_size=HISTORY_FLUSH_SIZE,
+    flush_interval=HISTORY_FLUSH_INTERVAL_MS / 1000,
+    max_queue=HISTORY_QUEUE_MAX,
+))
 
 
 async def create_task_history(data: dict):
 
-    data["history_id"] = await _generate_sequential_history_id()
+    data["history_id"] = new_id("H")
+    data["metadata"] = normalize_metadata(data.get("metadata"))
 
     # Ensure we always have correct timestamps if not provided
     if "created_at" not in data:
@@ -120,46 +137,63 @@ async def create_task_history(data: dict):
         return supabase.from_("tasks_history").insert(data).execute()
     return await safe_supabase_operation(op, "Failed to create task history")
 
-async def get_task_history(task_id: str, task_title: Optional[str] = None):
+HISTORY_LATEST_COLUMNS = "history_id,task_id,action,title,metadata,created_by,actor_display,created_at"
+
+def discard_queued_history(task_id: str) -> int:
+    """Drop queued events of a deleted task: tasks_history_task_id_fkey would reject them."""
+    return history_journal.discard(lambda row: row.get("task_id") == task_id)
+
+async def _flush_queued(task_id: str):
+    # Read your own writes: events for this task may still be queued
+    if history_journal.pending(lambda row: row.get("task_id") == task_id):
+        await history_journal.flush()
+
+async def get_task_history(
+    task_id: str,
+    task_title: Optional[str] = None,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+) -> List[dict]:
+    """History rows of a task, newest first, keyset-paged on (created_at, history_id).
+
+    ``metadata`` is normalized when rows are written (normalize_metadata),
+    so rows are returned as stored.
+    """
+    await _flush_queued(task_id)
+
+    if cursor:
+        decode_cursor(cursor, "created_at", True)  # a bad cursor is a 400, not a failed DB call
+
     supabase = get_supabase_client()
     def op():
-        # Return newest first so UI can show latest activity at the top
-        query = (
-            supabase
-            .from_("tasks_history")
-            .select("*")
-            .eq("task_id", task_id)
-        )
+        query = supabase.from_("tasks_history").select("*").eq("task_id", task_id)
         if task_title:
             query = query.eq("title", task_title)
-        return query.order("created_at", desc=True).order("history_id", desc=True).execute()
+        query = apply_keyset(query, "created_at", "history_id", True, cursor)
+        if limit is not None:
+            query = query.limit(limit)
+        return query.execute()
+    result = await safe_supabase_operation(op, "Failed to fetch task history")
+    return result.data or []
+
+async def get_latest_task_history(task_id: str, n: int) -> List[dict]:
+    """The ``n`` newest events of a task: narrow select, no model validation (activity previews)."""
+    await _flush_queued(task_id)
+
+    supabase = get_supabase_client()
+    def op():
+        return (
+            supabase.from_("tasks_history")
+            .select(HISTORY_LATEST_COLUMNS)
+            .eq("task_id", task_id)
+            .order("created_at", desc=True)
+            .order("history_id", desc=True)
+            .limit(n)
+            .execute()
+        )
     result = await safe_supabase_operation(op, "Failed to fetch task history")
+    return result.data or []
 
-    items = result.data or []
-    # print("Items", items)
-
-    # Defensive normalization: sometimes libraries serialize list-of-objects as a JSON string.
-    # Keep the API contract: metadata should always be a list[dict] for the UI.
-    normalized = []
-    for item in items:
-        md = item.get("metadata")
-        if isinstance(md, str):
-            try:
-                import json
-                parsed = json.loads(md)
-                if isinstance(parsed, list):
-                    item["metadata"] = parsed
-                elif isinstance(parsed, dict) or parsed is None:
-                    item["metadata"] = [parsed] if parsed else []
-                else:
-                    item["metadata"] = []
-            except Exception:
-                item["metadata"] = []
-        elif md is None:
-            item["metadata"] = []
-        normalized.append(TaskHistoryInDB(**item))
-
-    return normalized
 # async def update_task_history(history_id: str, data: dict):
 #     supabase = get_supabase_client()
 #     def op():
@@ -1,25 +1,18 @@
+import contextlib
 import datetime
 import json
 from typing import Dict, Any, List, Tuple, Optional
 from app.core.db.supabase_db import get_supabase_client, safe_supabase_operation
+from app.core.id_allocator import insert_with_fresh_ids, new_id
+from app.utils.pagination import apply_keyset, decode_cursor
+from app.services.export_service import iter_chunks
+from app.services.dependency_graph import DependencyCycleError, dependency_graphs, is_completed, normalize_dependencies
+from app.core.db import pg_engine
+from app.config.settings import TASK_TREE_MAX_NODES
 from fastapi import HTTPException
-from app.services.task_history_service import create_task_history, record_history
-import random
-
-async def _generate_sequential_task_id() -> str:
-    """Generate a random task ID with prefix 'T' and 6 digits, ensuring uniqueness."""
-    supabase = get_supabase_client()
-    digits = 6
-    for _ in range(10):
-        candidate = f"T{random.randint(0, 10**digits - 1):0{digits}d}"
-        def op():
-            return supabase.from_("tasks").select("task_id").eq("task_id", candidate).limit(1).execute()
-        res = await safe_supabase_operation(op, "Failed to verify task id uniqueness")
-        if not res or not getattr(res, "data", None):
-            return candidate
-    # Fallback: time-based suffix to reduce collision risk
-    ts = int(datetime.datetime.utcnow().timestamp()) % (10**digits)
-    return f"T{ts:0{digits}d}"
+from postgrest.exceptions import APIError
+from app.services.task_history_service import build_history_row, create_task_history, discard_queued_history, record_history, record_history_bulk
+from app.services.rbac import filter_by_project_access, get_project_roles
 
 # ────────────────────────────────────────────────────────────
 # Diff helpers (whitelist)
@@ -109,10 +102,9 @@ async def _get_changes(old_data: Dict[str, Any], new_data: Dict[str, Any]) -> Di
     return changes
 
 
-async def create_task(data: dict, user_name: Optional[str] = None, actor_display: Optional[str] = None) -> Dict[str, Any]:
-    """Create a new task with history tracking."""
-    task_id = await _generate_sequential_task_id()
-    data["task_id"] = task_id
+def _prepare_task_row(data: dict) -> Tuple[Optional[str], Optional[str]]:
+    """Assign an ID and normalize a new task in place; returns its (bug_id, tracker_id) link."""
+    data["task_id"] = new_id("T")
 
     # Ensure we always have correct timestamps if not provided
     created_at = datetime.datetime.utcnow().isoformat()
@@ -127,19 +119,23 @@ async def create_task(data: dict, user_name: Optional[str] = None, actor_display
     if data.get("due_date") and hasattr(data["due_date"], "isoformat"):
         data["due_date"] = data["due_date"].isoformat()
 
-    bug_id = data["bug_id"]
-    data.pop("bug_id", None)
+    return data.pop("bug_id", None), data.pop("tracker_id", None)
+
+
+async def create_task(data: dict, user_name: Optional[str] = None, actor_display: Optional[str] = None) -> Dict[str, Any]:
+    """Create a new task with history tracking."""
+    bug_id, tracker_id = _prepare_task_row(data)
 
-    tracker_id = data["tracker_id"]
-    data.pop("tracker_id", None)
-    
     # Insert the task
     supabase = get_supabase_client()
     def op():
-        return supabase.from_("tasks").insert(data).execute()
+        return insert_with_fresh_ids(lambda: supabase.from_("tasks").insert(data).execute(), [data], "task_id", "T")
     
     result = await safe_supabase_operation(op, "Failed to create task")
+    task_id = data["task_id"]
     print(f"Task created: {data.get('title')}")
+    for row in result.data or []:
+        dependency_graphs.apply(row, normalize_dependencies(row.get("dependencies")))
     
     # Create initial history entry
     if result.data:
@@ -201,6 +197,68 @@ async def create_tracker_task(data: dict, user_name: Optional[str] = None, actor
     return result
 
 
+async def create_tasks_bulk(items: List[dict], actor_display: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Create many tasks with one insert and one history write.
+
+    Returns one ``{"ok": True, "task": row}`` or ``{"ok": False, "error": msg}``
+    per item, in order. If the bulk insert is rejected (e.g. one row violates
+    a constraint) the rows are retried one by one so only the bad ones fail.
+    Bug/tracker links are inserted in bulk as well.
+    """
+    if not items:
+        return []
+    links: List[Tuple[Optional[str], Optional[str]]] = [_prepare_task_row(data) for data in items]
+    results: List[Dict[str, Any]] = [None] * len(items)
+
+    supabase = get_supabase_client()
+    def op():
+        return insert_with_fresh_ids(lambda: supabase.from_("tasks").insert(items).execute(), items, "task_id", "T")
+    try:
+        inserted = (await safe_supabase_operation(op, "Failed to create tasks")).data or []
+        by_id = {row["task_id"]: row for row in inserted}
+        for index, data in enumerate(items):
+            row = by_id.get(data["task_id"])
+            results[index] = {"ok": True, "task": row} if row else {"ok": False, "error": "Task was not created"}
+    except HTTPException as exc:
+        if exc.status_code != 500:
+            raise  # database unavailable/busy: fail the whole batch
+        for index, data in enumerate(items):
+            def single_op(data=data):
+                return insert_with_fresh_ids(lambda: supabase.from_("tasks").insert(data).execute(), [data], "task_id", "T")
+            try:
+                res = await safe_supabase_operation(single_op, "Failed to create task")
+                results[index] = {"ok": True, "task": res.data[0]}
+            except HTTPException as exc:
+                results[index] = {"ok": False, "error": exc.detail}
+
+    created = [(index, result["task"]) for index, result in enumerate(results) if result["ok"]]
+    for _, task in created:
+        dependency_graphs.apply(task, normalize_dependencies(task.get("dependencies")))
+    history = [
+        build_history_row(task_id=task["task_id"], action="created", created_by=task.get("created_by"),
+                          title=task.get("title"), metadata=[], actor_display=actor_display)
+        for _, task in created
+    ]
+
+    tracker_rows = []
+    for index, task in created:
+        bug_id, tracker_id = links[index]
+        if bug_id or tracker_id:
+            tracker_rows.append({"tracker_id": tracker_id, "bug_id": bug_id, "task_id": task["task_id"], "created_at": task.get("created_at")})
+            history.append(build_history_row(
+                task_id=task["task_id"], action="updated", created_by=task.get("created_by"), title=task.get("title"),
+                metadata=[{"field": "bug_id", "old": None, "new": bug_id}, {"field": "tracker_id", "old": None, "new": tracker_id}],
+                actor_display=actor_display,
+            ))
+    if tracker_rows:
+        def tracker_op():
+            return supabase.from_("test_tracker_tasks").insert(tracker_rows).execute()
+        await safe_supabase_operation(tracker_op, "Failed to create task trackers")
+
+    await record_history_bulk(history)
+    return results
+
+
 async def delete_tracker_task(task_id: str, bug_id: str, user_id: Optional[str] = None, actor_display: Optional[str] = None) -> Dict[str, Any]:
     """Delete a task and log 'deleted' before removal (so audit survives hard delete)."""
     current_task = await get_task(task_id)
@@ -232,11 +290,49 @@ async def delete_tracker_task(task_id: str, bug_id: str, user_id: Optional[str]
     return await safe_supabase_operation(op, "Failed to delete task")
 
 async def get_task(task_id: str):
+    if pg_engine.pg_enabled("get_task"):
+        async def pg_op():
+            row = await pg_engine.fetchrow("task_card_view", "SELECT * FROM task_card_view WHERE task_id = $1", task_id)
+            return pg_engine.PgResult(row)
+        return await safe_supabase_operation(pg_op, "Failed to fetch task")
+
     supabase = get_supabase_client()
     def op():
         return supabase.from_("task_card_view").select("*").eq("task_id", task_id).single().execute()
     return await safe_supabase_operation(op, "Failed to fetch task")
 
+def _cycle_error(path: List[str]) -> HTTPException:
+    return HTTPException(status_code=400, detail=f"Cannot add dependency: it would create a cycle ({' -> '.join(path)})")
+
+# Raised by the tasks_reject_dependency_cycle trigger (20251025_task_dependency_cycles.sql)
+DEPENDENCY_CYCLE_SQLSTATE = "TMC01"
+
+def _raise_if_db_cycle(exc: APIError):
+    """Turn the database's cycle rejection into the same 400 as the in-process check."""
+    if str(exc.code) == DEPENDENCY_CYCLE_SQLSTATE:
+        raise _cycle_error(str(exc.details or "").split(" -> "))
+
+async def _incomplete_dependencies(dependency_ids: List[str]) -> List[str]:
+    """Dependency IDs that are missing or not 'completed', read from the database."""
+    sb = get_supabase_client()
+    def dep_op():
+        return (
+            sb.from_("tasks")
+            .select("task_id,status,project_id")
+            .in_("task_id", dependency_ids)
+            .execute()
+        )
+    dep_res = await safe_supabase_operation(dep_op, "Failed to validate dependencies")
+    rows = dep_res.data or []
+    for row in rows:
+        dependency_graphs.apply(row)
+    found_ids = {str(r.get("task_id")).strip() for r in rows}
+    # Any missing ids are treated as incomplete safeguards
+    missing = [d for d in dependency_ids if d not in found_ids]
+    # Consider ONLY exact 'completed' as satisfied among found
+    not_completed = [str(r.get("task_id")) for r in rows if not is_completed(r.get("status"))]
+    return missing + not_completed
+
 async def update_task(
     task_id: str,
     data: dict,
@@ -276,51 +372,28 @@ async def update_task(
     status_raw = payload.get("status")
     if status_raw is None:
         status_raw = before.get("status")
-        if hasattr(status_raw, "value"):
-            status_raw = status_raw.value
-    print("status_raw", status_raw)
-    try_set_completed = (str(status_raw or "").lower() == "completed")
-    print("try_set_completed", try_set_completed)
-    if try_set_completed:
-        # dependencies after this update (if provided), otherwise current ones (normalize when DB returns JSON as string)
-        deps_after: List[str] | None = payload.get("dependencies")
-        if deps_after is None:
-            raw = before.get("dependencies") or []
-            if isinstance(raw, str):
-                try:
-                    parsed = json.loads(raw)
-                    deps_after = parsed if isinstance(parsed, list) else []
-                except Exception:
-                    deps_after = []
-            elif isinstance(raw, list):
-                deps_after = raw
-            else:
-                deps_after = []
-        # ensure list of strings
-        if not isinstance(deps_after, list):
-            deps_after = []
-        else:
-            deps_after = [str(x) for x in deps_after if x is not None]
-        # Only check when there *are* dependencies
-        if deps_after:
-            # Trim and uniq dependency ids
-            deps_after = sorted({str(x).strip() for x in deps_after if x})
-            sb = get_supabase_client()
-            def dep_op():
-                return (
-                    sb.from_("tasks")
-                    .select("task_id,status")
-                    .in_("task_id", deps_after)
-                    .execute()
-                )
-            dep_res = await safe_supabase_operation(dep_op, "Failed to validate dependencies")
-            rows = dep_res.data or []
-            found_ids = {str(r.get("task_id")).strip() for r in rows}
-            # Any missing ids are treated as incomplete safeguards
-            missing = [d for d in deps_after if d not in found_ids]
-            # Consider ONLY exact 'completed' as satisfied among found
-            not_completed = [str(r.get("task_id")) for r in rows if str(r.get("status") or "").lower() != "completed"]
-            incomplete = missing + not_completed
+    try_set_completed = is_completed(status_raw)
+    deps_changed = "dependencies" in payload
+    deps_after = normalize_dependencies(payload["dependencies"] if deps_changed else before.get("dependencies"))
+    project_id = before.get("project_id")
+
+    # Edge changes are checked for cycles and written under the project's lock so
+    # two concurrent additions in this process can't close a cycle between them.
+    # The lock and the graph are per process; across workers the database's
+    # tasks_reject_dependency_cycle trigger has the final say.
+    async with dependency_graphs.lock(project_id) if deps_changed and project_id else contextlib.nullcontext():
+        if project_id and deps_changed:
+            graph = await dependency_graphs.get(project_id)
+            try:
+                graph.check_dependencies(task_id, deps_after)
+            except DependencyCycleError as exc:
+                raise _cycle_error(exc.path)
+
+        # Only check when there *are* dependencies. Always against the database:
+        # a cached graph may predate an edge added or a prerequisite reopened by
+        # another worker, and must not let a blocked task be completed.
+        if try_set_completed and deps_after:
+            incomplete = await _incomplete_dependencies(deps_after)
             if incomplete:
                 # Show up to first 5 ids for a friendly error
                 preview = ", ".join(incomplete[:5])
@@ -330,18 +403,33 @@ async def update_task(
                     detail=f"Cannot mark task as completed while {len(incomplete)} in complete dependency(ies): {preview}{more}"
                 )
 
+        # 3) Compute diff against *final* state that would be saved
+        after = {**before, **payload}
+        changes = _compute_task_diff(before, after)
 
-    # 3) Compute diff against *final* state that would be saved
-    after = {**before, **payload}
-    changes = _compute_task_diff(before, after)
-
-    # 4) Persist update (even if no changes; supabase will no-op)
-    supabase = get_supabase_client()
+        # 4) Persist update (even if no changes; supabase will no-op)
+        supabase = get_supabase_client()
 
-    def op():
-        return supabase.from_("tasks").update(payload).eq("task_id", task_id).execute()
-
-    result = await safe_supabase_operation(op, "Failed to update task")
+        def op():
+            try:
+                return supabase.from_("tasks").update(payload).eq("task_id", task_id).execute()
+            except APIError as exc:
+                _raise_if_db_cycle(exc)
+                raise
+
+        try:
+            result = await safe_supabase_operation(op, "Failed to update task")
+        except HTTPException:
+            if deps_changed:
+                # e.g. a cycle through an edge another worker added: the cached graph is behind
+                dependency_graphs.invalidate(project_id)
+            raise
+
+        if after.get("project_id") != project_id:
+            dependency_graphs.invalidate(project_id)
+            dependency_graphs.invalidate(after.get("project_id"))
+        else:
+            dependency_graphs.apply(after, deps_after if deps_changed else None)
 
     # 5) Record history (one compact event)
     if changes and user_id and not suppress_history:
@@ -365,21 +453,27 @@ async def delete_task(task_id: str, user_id: Optional[str] = None, actor_display
     before = current_task.data
 
     if user_id:
-        await record_history(
+        # Written now, not queued: once the task is gone the row would violate
+        # tasks_history_task_id_fkey and poison the journal's batch
+        await record_history_bulk([build_history_row(
             task_id=task_id,
             action="deleted",
             created_by=user_id,
             title=before.get("title"),
             metadata=[],  # keep small; you can include a few key fields if desired
             actor_display=actor_display,
-        )
+        )])
 
     supabase = get_supabase_client()
 
     def op():
         return supabase.from_("tasks").delete().eq("task_id", task_id).execute()
 
-    return await safe_supabase_operation(op, "Failed to delete task")
+    result = await safe_supabase_operation(op, "Failed to delete task")
+    # Queued events of the task can't be written any more (and would cascade away)
+    discard_queued_history(task_id)
+    dependency_graphs.invalidate(before.get("project_id"))
+    return result
 
 async def get_all_tasks(
     search: Optional[str] = None,
@@ -389,19 +483,31 @@ async def get_all_tasks(
     sort_order: str = "asc",
     status: Optional[str] = None,
     org_id: Optional[str] = None,
+    cursor: Optional[str] = None,
+    project_ids: Optional[List[str]] = None,
 ) -> List[Dict[str, Any]]:
+    """Top-level tasks ordered by (sort_by, task_id); ``cursor`` (from
+    app.utils.pagination) seeks past a previous page instead of ``offset``.
+    ``project_ids`` limits them to those projects (the caller's accessible ones)."""
     supabase = get_supabase_client()
-    query = supabase.from_("task_card_view").select("*").eq("is_subtask", False)
+    desc = sort_order.lower() == "desc"
+    if cursor:
+        decode_cursor(cursor, sort_by, desc)  # a bad cursor is a 400, not a failed DB call
+    start = 0 if cursor else offset
 
-    if search:
-        query = query.ilike("title", f"%{search}%")
-    if status:
-        query = query.eq("status", status)
-    if org_id:
-        query = query.eq("org_id", org_id)
-
-    query = query.order(sort_by, desc=(sort_order.lower() == "desc"))
-    result = query.range(offset, offset + limit - 1).execute()
+    def op():
+        query = supabase.from_("task_card_view").select("*").eq("is_subtask", False)
+        if search:
+            query = query.ilike("title", f"%{search}%")
+        if status:
+            query = query.eq("status", status)
+        if org_id:
+            query = query.eq("org_id", org_id)
+        if project_ids is not None:
+            query = query.in_("project_id", project_ids)
+        query = apply_keyset(query, sort_by, "task_id", desc, cursor)
+        return query.range(start, start + limit - 1).execute()
+    result = await safe_supabase_operation(op, "Failed to fetch tasks")
     return result.data or []
 
 async def get_tasks_for_project(
@@ -413,21 +519,186 @@ async def get_tasks_for_project(
     sort_order: str = "asc",
     status: Optional[str] = None,
     org_id: Optional[str] = None,
+    cursor: Optional[str] = None,
 ) -> List[Dict[str, Any]]:
+    if pg_engine.pg_enabled("get_tasks_for_project") and not cursor:
+        return await _get_tasks_for_project_pg(project_id, search, limit, offset, sort_by, sort_order, status, org_id)
+
     supabase = get_supabase_client()
-    query = supabase.from_("task_card_view").select("*").eq("project_id", project_id).eq("is_subtask", False)
+    desc = sort_order.lower() == "desc"
+    if cursor:
+        decode_cursor(cursor, sort_by, desc)  # a bad cursor is a 400, not a failed DB call
+    start = 0 if cursor else offset
+
+    def op():
+        query = supabase.from_("task_card_view").select("*").eq("project_id", project_id).eq("is_subtask", False)
+        if search:
+            query = query.ilike("title", f"%{search}%")
+        if status:
+            query = query.eq("status", status)
+        if org_id:
+            query = query.eq("org_id", org_id)
+        query = apply_keyset(query, sort_by, "task_id", desc, cursor)
+        return query.range(start, start + limit - 1).execute()
+    result = await safe_supabase_operation(op, "Failed to fetch project tasks")
+    return result.data or []
+
+TASK_EXPORT_COLUMNS = [
+    "task_id", "project_id", "org_id", "title", "description", "status", "priority", "assignee",
+    "start_date", "due_date", "tags", "is_subtask", "sub_tasks", "dependencies", "comments",
+    "created_by", "updated_by", "created_at", "updated_at",
+]
+
+def export_tasks(
+    project_id: Optional[str] = None,
+    org_id: Optional[str] = None,
+    status: Optional[str] = None,
+    search: Optional[str] = None,
+    project_ids: Optional[List[str]] = None,
+):
+    """Chunks of every matching task (subtasks included) in task_id order, for streaming exports.
 
+    ``project_ids`` limits them to those projects (the caller's accessible ones).
+    """
+    supabase = get_supabase_client()
+
+    def build_query():
+        query = supabase.from_("task_card_view").select("*")
+        if project_id:
+            query = query.eq("project_id", project_id)
+        if project_ids is not None:
+            query = query.in_("project_id", project_ids)
+        if org_id:
+            query = query.eq("org_id", org_id)
+        if status:
+            query = query.eq("status", status)
+        if search:
+            query = query.ilike("title", f"%{search}%")
+        return query
+
+    return iter_chunks(build_query, "task_id", "Failed to export tasks")
+
+async def _get_tasks_for_project_pg(
+    project_id: str,
+    search: Optional[str],
+    limit: int,
+    offset: int,
+    sort_by: str,
+    sort_order: str,
+    status: Optional[str],
+    org_id: Optional[str],
+) -> List[Dict[str, Any]]:
+    """Same query as get_tasks_for_project, straight against Postgres."""
+    where = ["project_id = $1", "is_subtask = false"]
+    args: List[Any] = [project_id]
     if search:
-        query = query.ilike("title", f"%{search}%")
+        args.append(f"%{search}%")
+        where.append(f"title ILIKE ${len(args)}")
     if status:
-        query = query.eq("status", status)
+        args.append(status)
+        where.append(f"status::text = ${len(args)}")
     if org_id:
-        query = query.eq("org_id", org_id)
+        args.append(org_id)
+        where.append(f"org_id = ${len(args)}")
+    direction = "DESC" if sort_order.lower() == "desc" else "ASC"
+    args.extend([limit, offset])
+    sql = (
+        f"SELECT * FROM task_card_view WHERE {' AND '.join(where)} "
+        f"ORDER BY {pg_engine.quote_ident(sort_by)} {direction}, task_id {direction} "
+        f"LIMIT ${len(args) - 1} OFFSET ${len(args)}"
+    )
+
+    async def op():
+        return await pg_engine.fetch("task_card_view", sql, *args)
+    return await safe_supabase_operation(op, "Failed to fetch project tasks")
 
-    query = query.order(sort_by, desc=(sort_order.lower() == "desc"))
-    result = query.range(offset, offset + limit - 1).execute()
+async def _fetch_tasks_by_ids(task_ids: List[str], columns: str = "*") -> List[Dict[str, Any]]:
+    supabase = get_supabase_client()
+    def op():
+        return supabase.from_("task_card_view").select(columns).in_("task_id", task_ids).execute()
+    result = await safe_supabase_operation(op, "Failed to fetch tasks")
     return result.data or []
 
+async def get_task_row(task_id: str) -> Optional[Dict[str, Any]]:
+    """The task_card_view row for ``task_id``, or None if there isn't one."""
+    rows = await _fetch_tasks_by_ids([task_id])
+    return rows[0] if rows else None
+
+async def get_task_tree(
+    task_id: str,
+    depth: int = 3,
+    include_dependencies: bool = True,
+    max_nodes: Optional[int] = None,
+    root: Optional[Dict[str, Any]] = None,
+    user_id: Optional[str] = None,
+) -> Optional[Dict[str, Any]]:
+    """A task with its subtasks nested under ``children``, ``depth`` levels down.
+
+    Fetches one level per query (``in_`` on the previous level's
+    ``sub_tasks``) plus one query for the dependencies of every node,
+    instead of a get_task per subtask. Stops adding nodes at ``max_nodes``
+    (TASK_TREE_MAX_NODES) and reports ``truncated``. ``root`` is the task's
+    row when the caller already has it (e.g. from get_task_row for an
+    access check), saving the first query. With ``user_id``, subtasks and
+    dependency summaries in projects the user can't access are left out
+    (one bulk role lookup; a hidden subtask hides its subtree). Returns None
+    if the task doesn't exist.
+    """
+    max_nodes = max_nodes or TASK_TREE_MAX_NODES
+    nodes: Dict[str, Dict[str, Any]] = {}
+    truncated = False
+    level_ids, first_level = [task_id], 0
+    if root is not None:
+        nodes[task_id] = root
+        level_ids, first_level = normalize_dependencies(root.get("sub_tasks")), 1
+    for level in range(first_level, depth + 1):
+        ids = [i for i in dict.fromkeys(level_ids) if i not in nodes]
+        room = max_nodes - len(nodes)
+        if len(ids) > room:
+            ids, truncated = ids[:room], True
+        if not ids:
+            break
+        for row in await _fetch_tasks_by_ids(ids):
+            nodes[str(row["task_id"])] = row
+        level_ids = [child for i in ids if i in nodes for child in normalize_dependencies(nodes[i].get("sub_tasks"))]
+    if task_id not in nodes:
+        return None
+
+    fetched: List[Dict[str, Any]] = []
+    if include_dependencies:
+        dep_ids = {d for row in nodes.values() for d in normalize_dependencies(row.get("dependencies"))}
+        outside = sorted(dep_ids - set(nodes))
+        fetched = await _fetch_tasks_by_ids(outside, "task_id,title,status,project_id") if outside else []
+    if user_id is not None:
+        visible = await filter_by_project_access(user_id, list(nodes.values()) + fetched)
+        visible_ids = {str(row["task_id"]) for row in visible}
+        nodes = {i: row for i, row in nodes.items() if i in visible_ids or i == task_id}
+        fetched = [row for row in fetched if str(row["task_id"]) in visible_ids]
+
+    summaries: Dict[str, Dict[str, Any]] = {}
+    if include_dependencies:
+        for row in list(nodes.values()) + fetched:
+            summaries[str(row["task_id"])] = {k: row.get(k) for k in ("task_id", "title", "status", "project_id")}
+
+    built = set()
+
+    def build(node_id: str, level: int, path: frozenset) -> Dict[str, Any]:
+        built.add(node_id)
+        node = dict(nodes[node_id])
+        if include_dependencies:
+            node["dependency_tasks"] = [summaries[d] for d in normalize_dependencies(node.get("dependencies")) if d in summaries]
+        children = normalize_dependencies(node.get("sub_tasks")) if level < depth else []
+        # ``path`` guards against sub_tasks lists that loop back to an ancestor
+        node["children"] = [build(c, level + 1, path | {c}) for c in children if c in nodes and c not in path]
+        return node
+
+    tree = build(task_id, 0, frozenset([task_id]))
+    return {
+        "task": tree,
+        "node_count": len(built),
+        "truncated": truncated,
+    }
+
 async def add_subtask(task_id: str, subtask_id: str, user_id: Optional[str] = None, actor_display: Optional[str] = None) -> Dict[str, Any]:
     task_res = await get_task(task_id)
     if not task_res or not task_res.data:
@@ -494,10 +765,17 @@ async def add_dependency(
         raise HTTPException(status_code=404, detail="Parent task not found")
 
     before = task_res.data
-    existing: list[str] = before.get("dependencies") or []
+    existing: list[str] = normalize_dependencies(before.get("dependencies"))
     if dependency_id in existing:
         return task_res  # no-op
 
+    # Reject a cycle before logging; update_task re-checks under the project lock
+    if before.get("project_id"):
+        graph = await dependency_graphs.get(before["project_id"])
+        cycle = graph.find_cycle(task_id, dependency_id)
+        if cycle:
+            raise _cycle_error(cycle)
+
     updated = existing + [dependency_id]
 
     if user_id:
@@ -530,7 +808,7 @@ async def remove_dependency(
         raise HTTPException(status_code=404, detail="Parent task not found")
 
     before = task_res.data
-    existing: list[str] = before.get("dependencies") or []
+    existing: list[str] = normalize_dependencies(before.get("dependencies"))
     if dependency_id not in existing:
         return task_res  # no-op
 
@@ -552,4 +830,133 @@ async def remove_dependency(
         user_id,
         suppress_history=True,
         actor_display=actor_display,
-    )
\ No newline at end of file
+    )
+
+LINK_FIELDS = ("add_subtasks", "remove_subtasks", "add_dependencies", "remove_dependencies")
+
+async def apply_task_links(
+    changes: List[Dict[str, Any]],
+    user_id: str,
+    actor: Optional[str] = None,
+    actor_display: Optional[str] = None,
+) -> List[Dict[str, Any]]:
+    """Attach/detach many subtasks and dependencies in one transaction.
+
+    ``changes`` are TaskLinkChange dicts (several for one parent are merged).
+    Every task involved is read with one query and the whole batch is
+    validated before anything is written: unknown tasks, self links, an ID
+    both added and removed, parents in projects ``user_id`` can't access,
+    linked tasks outside the parent's project that ``user_id`` can't access
+    and dependency cycles reject the batch. The apply_task_links database
+    function then updates the parents, recomputes the children's is_subtask
+    and writes one 'updated' history event per changed parent, all or
+    nothing. Returns the written task rows.
+    """
+    ops: Dict[str, Dict[str, List[str]]] = {}
+    for change in changes:
+        op = ops.setdefault(change["task_id"], {field: [] for field in LINK_FIELDS})
+        for field in LINK_FIELDS:
+            op[field] += [x for x in normalize_dependencies(change.get(field)) if x not in op[field]]
+
+    ids = set(ops) | {x for op in ops.values() for field in LINK_FIELDS for x in op[field]}
+    rows = {
+        str(row["task_id"]): row
+        for row in await _fetch_tasks_by_ids(sorted(ids), "task_id,project_id,title,sub_tasks,dependencies,is_subtask")
+    }
+
+    errors = []
+    for task_id, op in ops.items():
+        added = op["add_subtasks"] + op["add_dependencies"]
+        if task_id not in rows:
+            errors.append({"task_id": task_id, "error": "Task not found"})
+        elif task_id in added:
+            errors.append({"task_id": task_id, "error": "A task cannot be linked to itself"})
+        elif set(op["add_subtasks"]) & set(op["remove_subtasks"]) or set(op["add_dependencies"]) & set(op["remove_dependencies"]):
+            errors.append({"task_id": task_id, "error": "The same task is both added and removed"})
+        elif [x for x in added if x not in rows]:
+            errors.append({"task_id": task_id, "error": f"Unknown task(s): {', '.join(x for x in added if x not in rows)}"})
+    if errors:
+        raise HTTPException(status_code=400, detail={"errors": errors})
+
+    # The linked tasks change too (is_subtask, the tree they show up in), so
+    # they must be in the parent's project or in one the user can access
+    linked = {task_id: [x for field in LINK_FIELDS for x in ops[task_id][field] if x in rows] for task_id in ops}
+    projects = {rows[x].get("project_id") for task_id in ops for x in [task_id, *linked[task_id]]}
+    roles = await get_project_roles((user_id, project_id) for project_id in projects)
+    def allowed(task_id):
+        return roles.get((str(user_id), rows[task_id].get("project_id")))
+    denied = [task_id for task_id in ops if not allowed(task_id)]
+    if denied:
+        raise HTTPException(status_code=403, detail=f"Not a member of the project of: {', '.join(denied)}")
+    denied = sorted({
+        x for task_id in ops for x in linked[task_id]
+        if rows[x].get("project_id") != rows[task_id].get("project_id") and not allowed(x)
+    })
+    if denied:
+        raise HTTPException(status_code=403, detail=f"Not a member of the project of linked task(s): {', '.join(denied)}")
+
+    # Final lists per parent, for the history diff and the cycle check
+    final: Dict[str, Tuple[List[str], List[Dict[str, Any]]]] = {}
+    for task_id, op in ops.items():
+        diff = []
+        deps_after = None
+        for field, add, remove in (("sub_tasks", "add_subtasks", "remove_subtasks"),
+                                   ("dependencies", "add_dependencies", "remove_dependencies")):
+            before = normalize_dependencies(rows[task_id].get(field))
+            after = [x for x in before if x not in op[remove]] + [x for x in op[add] if x not in before]
+            if after != before:
+                diff.append({"field": field, "old": before, "new": after})
+            if field == "dependencies":
+                deps_after = after
+        if diff:
+            final[task_id] = (deps_after, diff)
+    if not final:
+        return []
+
+    projects = sorted({rows[t]["project_id"] for t, (_, diff) in final.items()
+                       if rows[t].get("project_id") and any(d["field"] == "dependencies" for d in diff)})
+    async with contextlib.AsyncExitStack() as stack:
+        for project_id in projects:
+            await stack.enter_async_context(dependency_graphs.lock(project_id))
+        graphs = {project_id: await dependency_graphs.get(project_id) for project_id in projects}
+
+        # Try every parent's new dependencies together (two parents may close a
+        # cycle between them), then put the graphs back until the write succeeds
+        applied = []
+        try:
+            for task_id, (deps_after, _) in final.items():
+                graph = graphs.get(rows[task_id].get("project_id"))
+                if graph is not None:
+                    applied.append((graph, task_id, sorted(graph.prereqs.get(task_id, ()))))
+                    graph.set_dependencies(task_id, deps_after)
+        except DependencyCycleError as exc:
+            raise _cycle_error(exc.path)
+        finally:
+            for graph, task_id, original in reversed(applied):
+                graph.set_dependencies(task_id, original)
+
+        history = [
+            build_history_row(task_id=task_id, action="updated", created_by=actor, title=rows[task_id].get("title"),
+                              metadata=diff, actor_display=actor_display)
+            for task_id, (_, diff) in final.items()
+        ] if actor else []
+        payload = [{"task_id": task_id, **ops[task_id]} for task_id in final]
+
+        supabase = get_supabase_client()
+        def op():
+            try:
+                return supabase.rpc("apply_task_links", {"p_ops": payload, "p_history": history}).execute()
+            except APIError as exc:
+                _raise_if_db_cycle(exc)
+                raise
+        try:
+            result = await safe_supabase_operation(op, "Failed to update task links")
+        except HTTPException:
+            for project_id in projects:
+                dependency_graphs.invalidate(project_id)
+            raise
+
+        written = result.data or []
+        for row in written:
+            dependency_graphs.apply(row, normalize_dependencies(row.get("dependencies")) if row["task_id"] in final else None)
+    return written
@@ -1,27 +1,13 @@
 import datetime
 from typing import Dict, Any, List, Optional
 from app.core.db.supabase_db import get_supabase_client, safe_supabase_operation
+from app.core.id_allocator import new_id
+from app.utils.pagination import apply_keyset, decode_cursor
 from fastapi import HTTPException
-import random
-
-async def _generate_tracker_id() -> str:
-    """Generate a unique tracker ID with prefix 'TR-' and 4 digits."""
-    supabase = get_supabase_client()
-    digits = 4
-    for _ in range(10):
-        candidate = f"TR-{random.randint(0, 10**digits - 1):0{digits}d}"
-        def op():
-            return supabase.from_("test_trackers").select("tracker_id").eq("tracker_id", candidate).limit(1).execute()
-        res = await safe_supabase_operation(op, "Failed to verify tracker id uniqueness")
-        if not res or not getattr(res, "data", None):
-            return candidate
-    # Fallback: time-based suffix to reduce collision risk
-    ts = int(datetime.datetime.utcnow().timestamp()) % (10**digits)
-    return f"TR-{ts:0{digits}d}"
 
 async def create_tracker(data: dict) -> Dict[str, Any]:
     """Create a new test tracker."""
-    tracker_id = await _generate_tracker_id()
+    tracker_id = new_id("TR-")
     data["tracker_id"] = tracker_id
 
     # Ensure we always have correct timestamps if not provided
@@ -98,36 +84,44 @@ async def get_trackers_for_org(
     status: Optional[str] = None,
     project_id: Optional[str] = None,
     creator_id: Optional[str] = None,
-    priority: Optional[str] = None
+    priority: Optional[str] = None,
+    cursor: Optional[str] = None,
+    project_ids: Optional[List[str]] = None
 ):
-    """Get all test trackers for an organization with optional filtering."""
+    """Get all test trackers for an organization with optional filtering.
+
+    Ordered by (sort_by, tracker_id); pass ``cursor`` to continue after a
+    previous page instead of ``offset``. ``project_ids`` limits them to those
+    projects (the caller's accessible ones).
+    """
     supabase = get_supabase_client()
-    
-    query = supabase.from_("test_tracker_card_view").select("*").eq("org_id", org_id).is_("deleted_at", "null")
-    
-    # Apply filters if provided
-    if status:
-        query = query.eq("status", status)
-    if project_id:
-        query = query.eq("project_id", project_id)
-    if creator_id:
-        query = query.eq("creator_id", creator_id)
-    if priority:
-        query = query.eq("priority", priority)
-    if search:
-        query = query.or_(f"name.ilike.%{search}%,description.ilike.%{search}%,tracker_id.ilike.%{search}%")
-    
-    # Apply sorting
-    if sort_order.lower() == "desc":
-        query = query.order(sort_by, desc=True)
-    else:
-        query = query.order(sort_by)
-    
-    # Apply pagination
-    query = query.range(offset, offset + limit - 1)
+    desc = sort_order.lower() == "desc"
+    if cursor:
+        decode_cursor(cursor, sort_by, desc)  # a bad cursor is a 400, not a failed DB call
+    start = 0 if cursor else offset
     
     def op():
-        return query.execute()
+        query = supabase.from_("test_tracker_card_view").select("*").eq("org_id", org_id).is_("deleted_at", "null")
+        
+        # Apply filters if provided
+        if status:
+            query = query.eq("status", status)
+        if project_id:
+            query = query.eq("project_id", project_id)
+        if project_ids is not None:
+            query = query.in_("project_id", project_ids)
+        if creator_id:
+            query = query.eq("creator_id", creator_id)
+        if priority:
+            query = query.eq("priority", priority)
+        if search:
+            query = query.or_(f"name.ilike.%{search}%,description.ilike.%{search}%,tracker_id.ilike.%{search}%")
+        
+        # Apply sorting (tracker_id breaks ties so pages never overlap)
+        query = apply_keyset(query, sort_by, "tracker_id", desc, cursor)
+        
+        # Apply pagination
+        return query.range(start, start + limit - 1).execute()
     
     result = await safe_supabase_operation(op, "Failed to fetch test trackers")
     return result
@@ -0,0 +1,36 @@
+"""
+Shared fixtures for the tests that run against the in-memory Supabase backend
+(app/core/db/memory_supabase.py).
+"""
+import pytest
+from supabase import create_client
+
+import app.core.db.async_client as async_client
+import app.core.db.supabase_db as supabase_db
+from app.core.db.memory_supabase import MEMORY_SUPABASE_KEY, MEMORY_SUPABASE_URL, MemoryDatabase, MemorySupabaseTransport
+from app.core.db.resilience import BreakerRegistry
+from app.services import rbac
+
+
+@pytest.fixture
+def memory_supabase(monkeypatch):
+    """``connect(db, *modules)`` serves ``db`` to the DB layer for one test.
+
+    The async client and the ``get_supabase_client`` of every module passed
+    in talk to ``db`` through one ``db.transport``; circuit breakers and the
+    role cache start empty. Returns ``db``; seed it before or after.
+    """
+    def connect(db: MemoryDatabase, *modules) -> MemoryDatabase:
+        db.transport = MemorySupabaseTransport(db)
+        monkeypatch.setattr(async_client, "SUPABASE_BACKEND", "memory")
+        monkeypatch.setattr(async_client, "_transport", db.transport)
+        monkeypatch.setattr(async_client, "_client", async_client.AsyncSupabaseClient(MEMORY_SUPABASE_URL))
+        sync = create_client(MEMORY_SUPABASE_URL, MEMORY_SUPABASE_KEY)
+        sync.postgrest.session._transport = db.transport
+        for module in modules:
+            monkeypatch.setattr(module, "get_supabase_client", lambda: sync)
+        monkeypatch.setattr(supabase_db, "breakers", BreakerRegistry(failure_threshold=5, reset_timeout=1))
+        monkeypatch.setattr(rbac, "role_cache", rbac.RoleCache(ttl=30, negative_ttl=10, maxsize=100))
+        return db
+
+    return connect
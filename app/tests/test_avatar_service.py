@@ -0,0 +1,38 @@
+"""
+Test cases for reading a user's avatar URL (avatar_service.get_avatar_url).
+"""
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+from supabase import AuthApiError
+
+from app.services import avatar_service
+
+
+def admin_client(get_user_by_id):
+    return SimpleNamespace(auth=SimpleNamespace(admin=SimpleNamespace(get_user_by_id=get_user_by_id)))
+
+
+async def test_avatar_url_is_read_from_user_metadata(monkeypatch):
+    user = SimpleNamespace(user_metadata={"avatar_url": "https://cdn/a.png"})
+    monkeypatch.setattr(avatar_service, "get_supabase_client", lambda: admin_client(lambda uid: SimpleNamespace(user=user)))
+    assert await avatar_service.get_avatar_url("u1") == "https://cdn/a.png"
+
+
+async def test_unknown_user_has_no_avatar(monkeypatch):
+    def get_user_by_id(uid):
+        raise AuthApiError("User not found", 404, "user_not_found")
+
+    monkeypatch.setattr(avatar_service, "get_supabase_client", lambda: admin_client(get_user_by_id))
+    assert await avatar_service.get_avatar_url("nobody") is None
+
+
+async def test_auth_outage_is_still_an_error(monkeypatch):
+    def get_user_by_id(uid):
+        raise AuthApiError("Database error", 500, "unexpected_failure")
+
+    monkeypatch.setattr(avatar_service, "get_supabase_client", lambda: admin_client(get_user_by_id))
+    with pytest.raises(HTTPException) as exc:
+        await avatar_service.get_avatar_url("u1")
+    assert exc.value.status_code == 500
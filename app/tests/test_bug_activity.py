@@ -0,0 +1,131 @@
+"""
+Test cases for the bug activity log: field-level diffs, compressed snapshots,
+write-behind batching and the keyset-paged read path.
+"""
+import pytest
+
+from app.core.db.memory_supabase import MemoryDatabase
+from app.core.db.write_behind import WriteBehindJournal
+from app.models.schemas.bug import BugCreate, BugUpdate
+from app.services import bug_service
+from app.utils.history_utils import pack_snapshot, unpack_snapshot
+from app.utils.pagination import paginate
+
+
+@pytest.fixture
+async def activity(monkeypatch, memory_supabase):
+    db = MemoryDatabase()
+    memory_supabase(db, bug_service)
+    monkeypatch.setattr(bug_service, "bug_count_cache", bug_service.BugCountCache(ttl=60, maxsize=100))
+    j = WriteBehindJournal("bug_activity_logs", bug_service.record_bug_activity_bulk, key="id",
+                           flush_size=100, flush_interval=60, max_queue=1000)
+    monkeypatch.setattr(bug_service, "bug_activity_journal", j)
+    yield db, j
+    await j.drain(timeout=1)
+
+
+def stored(db, activity_type):
+    return [r for r in db.rows_for("bug_activity_logs", []) if r["activity_type"] == activity_type]
+
+
+async def test_updates_store_changed_fields_only(activity):
+    db, _ = activity
+    created = await bug_service.create_bug(BugCreate(title="Crash", project_id="P1", tracker_id="TR1"), "ada")
+    bug_id = created.data[0]["id"]
+    await bug_service.update_bug(bug_id, BugUpdate(title="Crash on login", priority="medium"), "ada")
+
+    (row,) = stored(db, "bug_updated")
+    assert row["old_value"] == {"title": "Crash"}
+    assert row["new_value"] == {"title": "Crash on login"}
+
+    (row,) = stored(db, "bug_created")
+    assert "id" not in row["new_value"] and "created_at" not in row["new_value"]
+    assert "description" not in row["new_value"] and row["new_value"]["title"] == "Crash"
+
+
+async def test_large_snapshots_are_compressed_and_read_back(activity, monkeypatch):
+    db, _ = activity
+    monkeypatch.setattr(bug_service, "BUG_ACTIVITY_COMPRESS_BYTES", 512)
+    description = "Steps: open the page, click login. " * 100
+    created = await bug_service.create_bug(BugCreate(title="Big", description=description, project_id="P1"), "ada")
+    bug_id = created.data[0]["id"]
+
+    (row,) = stored(db, "bug_created")
+    assert row["new_value"]["encoding"] == "zlib+base64"
+    assert len(row["new_value"]["data"]) < len(description) / 4
+
+    (log,) = await bug_service.get_bug_activity_logs(bug_id)
+    assert log["new_value"]["description"] == description
+
+
+def test_pack_snapshot_round_trip():
+    small = {"title": "x"}
+    assert pack_snapshot(small, 100) == small
+    assert pack_snapshot(None, 100) is None
+    big = {"description": "y" * 1000}
+    assert unpack_snapshot(pack_snapshot(big, 100)) == big
+    assert pack_snapshot(big, 0) == big
+    assert unpack_snapshot({"encoding": "zlib+base64", "data": "x", "other": 1})["other"] == 1
+
+
+async def test_activity_is_written_in_bulk_behind_the_request(activity):
+    db, j = activity
+    db.seed("bugs", [{"id": "B1", "project_id": "P1", "title": "One", "status": "open"}])
+    j.start()
+    for i in range(5):
+        await bug_service.update_bug("B1", BugUpdate(title=f"t{i}"), "ada")
+    assert len(j) == 5 and stored(db, "bug_updated") == []
+
+    before = db.transport.requests
+    logs = await bug_service.get_bug_activity_logs("B1")
+    assert [log["new_value"]["title"] for log in logs] == ["t4", "t3", "t2", "t1", "t0"]
+    # one bulk upsert for every queued row, then the read
+    assert db.transport.requests - before == 2
+
+
+async def test_history_pages_newest_first_by_cursor(activity):
+    db, _ = activity
+    db.seed("bugs", [{"id": "B1", "project_id": "P1", "title": "One", "status": "open"}])
+    db.seed("bug_activity_logs", [
+        {"id": f"L{i:02d}", "bug_id": "B1", "user_id": "ada", "activity_type": "comment_added",
+         "created_at": f"2025-09-01T00:00:{i // 2:02d}+00:00"}
+        for i in range(7)
+    ])
+    seen, cursor = [], None
+    while True:
+        rows = await bug_service.get_bug_activity_logs("B1", limit=3 + 1, cursor=cursor)
+        rows, cursor = paginate(rows, 3, "created_at", "id", True)
+        seen += [r["id"] for r in rows]
+        if not cursor:
+            break
+    assert seen == [f"L{i:02d}" for i in reversed(range(7))]
+
+
+async def test_deleting_a_bug_drops_its_queued_activity(activity):
+    db, j = activity
+    db.seed("bugs", [{"id": "B1", "project_id": "P1", "title": "One", "status": "open"}])
+    j.start()
+    await bug_service.update_bug("B1", BugUpdate(title="Two"), "ada")
+    await bug_service.delete_bug("B1", "ada")
+    assert len(j) == 0
+    await j.drain(timeout=1)
+    assert db.rows_for("bug_activity_logs", []) == []
+
+
+
+async def test_activity_id_minted_twice_gets_a_fresh_id_instead_of_overwriting(activity, monkeypatch):
+    db, journal = activity
+    db.seed("bug_activity_logs", [{"id": "LTAKEN", "bug_id": "B0", "user_id": "bob", "activity_type": "bug_created"}])
+    real_new_id = bug_service.new_id
+    minted = iter(["LTAKEN"])
+    monkeypatch.setattr(bug_service, "new_id", lambda prefix: (prefix == "L" and next(minted, None)) or real_new_id(prefix))
+
+    created = await bug_service.create_bug(BugCreate(title="Crash", project_id="P1"), "ada")
+    await journal.flush()
+    (ours,) = [r for r in stored(db, "bug_created") if r["id"] != "LTAKEN"]
+    await bug_service.record_bug_activity_bulk([dict(ours)])  # a retried flush is skipped, not renumbered
+
+    rows = stored(db, "bug_created")
+    assert len(rows) == 2
+    assert ours["bug_id"] == created.data[0]["id"]
+    assert {r["id"]: r["bug_id"] for r in rows}["LTAKEN"] == "B0"
@@ -0,0 +1,85 @@
+"""
+Test cases for the count strategies of search_bugs (BugSearchParams.count).
+"""
+import pytest
+
+from app.core.db.memory_supabase import MemoryDatabase
+from app.models.schemas.bug import BugCreate, BugSearchParams, BugUpdate
+from app.services import bug_service
+from app.services.bug_service import BugCountCache
+
+
+@pytest.fixture
+def db(monkeypatch, memory_supabase):
+    db = MemoryDatabase()
+    db.seed("bugs", [
+        {"id": f"B{i:03d}", "tracker_id": "TR1" if i < 30 else "TR2", "project_id": "P1", "title": f"Bug {i}",
+         "status": "open" if i % 3 else "closed", "priority": "medium"}
+        for i in range(40)
+    ])
+    memory_supabase(db, bug_service)
+    db.prefer = []
+    handle = db.transport.handle_request
+
+    def recording(request):
+        if request.url.path.endswith("/bugs") and request.method == "GET":
+            db.prefer.append(request.headers.get("prefer", ""))
+        return handle(request)
+
+    db.transport.handle_request = recording
+    monkeypatch.setattr(bug_service, "bug_count_cache", BugCountCache(ttl=60, maxsize=100))
+    return db
+
+
+async def test_cached_total_is_counted_once_per_filter_set(db):
+    pages = [await bug_service.search_bugs("TR1", BugSearchParams(page=page, page_size=10)) for page in (1, 2, 3)]
+    assert [p["total"] for p in pages] == [30, 30, 30]
+    assert [len(p["data"]) for p in pages] == [10, 10, 10]
+    assert ["count=exact" in prefer for prefer in db.prefer] == [True, False, False]
+
+    # sorting and paging share the entry, a different filter does not
+    await bug_service.search_bugs("TR1", BugSearchParams(sort_order="asc", page=2, page_size=5))
+    closed = await bug_service.search_bugs("TR1", BugSearchParams(status=["closed"]))
+    assert closed["total"] == 10
+    assert ["count=exact" in prefer for prefer in db.prefer[3:]] == [False, True]
+
+
+async def test_filter_key_ignores_list_order():
+    a = BugCountCache.key("TR1", BugSearchParams(status=["open", "closed"], page=3))
+    b = BugCountCache.key("TR1", BugSearchParams(status=["closed", "open"], sort_by="title"))
+    assert a == b
+    assert a != BugCountCache.key("TR2", BugSearchParams(status=["open", "closed"]))
+
+
+async def test_writes_invalidate_the_tracker(db):
+    await bug_service.search_bugs("TR1", BugSearchParams())
+    await bug_service.search_bugs("TR2", BugSearchParams())
+
+    await bug_service.create_bug(BugCreate(title="New", project_id="P1", tracker_id="TR1"), "ada")
+    assert (await bug_service.search_bugs("TR1", BugSearchParams()))["total"] == 31
+    assert bug_service.bug_count_cache.get(BugCountCache.key("TR2", BugSearchParams())) == 10
+
+    await bug_service.update_bug("B001", BugUpdate(tracker_id="TR2"), "ada")
+    assert (await bug_service.search_bugs("TR1", BugSearchParams()))["total"] == 30
+    assert (await bug_service.search_bugs("TR2", BugSearchParams()))["total"] == 11
+
+    await bug_service.delete_bug("B002", "ada")
+    assert (await bug_service.search_bugs("TR1", BugSearchParams()))["total"] == 29
+
+
+async def test_counts_read_during_a_write_are_not_stored():
+    cache = BugCountCache(ttl=60, maxsize=10)
+    key = BugCountCache.key("TR1", BugSearchParams())
+    generation = cache.generation
+    cache.invalidate_tracker("TR1")
+    cache.put(key, 5, generation)
+    assert cache.get(key) is None
+
+
+@pytest.mark.parametrize("strategy", ["exact", "planned", "estimated"])
+async def test_database_strategies_count_every_page(db, strategy):
+    for page in (1, 2):
+        result = await bug_service.search_bugs("TR1", BugSearchParams(page=page, page_size=10, count=strategy))
+        assert (result["total"], result["count"]) == (30, strategy)
+    assert db.prefer == [f"count={strategy}"] * 2
+    assert bug_service.bug_count_cache.stats()["size"] == 0
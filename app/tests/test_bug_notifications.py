@@ -0,0 +1,221 @@
+"""
+Test cases for the watcher notification fan-out (app/core/fanout.py) and its
+wiring to bug changes in bug_service.
+"""
+import asyncio
+
+import pytest
+
+from app.core.db.memory_supabase import MemoryDatabase
+from app.core.db.write_behind import WriteBehindJournal
+from app.core.fanout import NotificationFanout
+from app.models.schemas.bug import BugUpdate
+from app.services import bug_service
+from app.services.bug_service import BugWatcherCache, summarize_bug_events
+
+
+class Outbox:
+    def __init__(self, watchers, fail=()):
+        self.watchers = watchers
+        self.fail = set(fail)
+        self.resolved = []
+        self.sent = {}
+        self.active = 0
+        self.peak = 0
+
+    async def resolve(self, topics):
+        self.resolved.append(topics)
+        return {topic: self.watchers.get(topic, []) for topic in topics}
+
+    async def deliver(self, recipient, events):
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        await asyncio.sleep(0.01)
+        self.active -= 1
+        if recipient in self.fail:
+            raise RuntimeError("smtp down")
+        self.sent.setdefault(recipient, []).append([e["id"] for e in events])
+
+
+def fanout(outbox, **kwargs):
+    options = {"window": 0.05, "concurrency": 2, "max_queue": 100, **kwargs}
+    return NotificationFanout("test", outbox.resolve, outbox.deliver, **options)
+
+
+async def test_batch_is_resolved_once_and_coalesced_per_recipient():
+    outbox = Outbox({"B1": ["ada", "bob"], "B2": ["bob", "cy"]})
+    f = fanout(outbox)
+    f.start()
+    f.publish("B1", "ada", {"id": "e1"})
+    f.publish("B2", "cy", {"id": "e2"})
+    f.publish("B1", "cy", {"id": "e3"})
+    f.publish("B1", "cy", {"id": "e3"})
+    await asyncio.sleep(0.15)
+
+    assert outbox.resolved == [["B1", "B2"]]
+    # one notification each, duplicates collapsed, nobody told about their own change
+    assert outbox.sent == {"bob": [["e1", "e2", "e3"]], "ada": [["e3"]]}
+    await f.drain(timeout=1)
+
+
+async def test_deliveries_run_concurrently_up_to_the_limit_and_failures_are_isolated():
+    outbox = Outbox({"B1": [f"u{i}" for i in range(6)]}, fail={"u0"})
+    f = fanout(outbox, window=0, concurrency=3)
+    f.start()
+    f.publish("B1", None, {"id": "e1"})
+    await f.drain(timeout=1)
+
+    assert outbox.peak == 3
+    assert sorted(outbox.sent) == ["u1", "u2", "u3", "u4", "u5"]
+    assert (f.delivered, f.failed) == (5, 1)
+
+
+async def test_publish_never_waits_and_drops_when_full():
+    outbox = Outbox({"B1": ["bob"]})
+    f = fanout(outbox, max_queue=2, window=1)
+    f.publish("B1", "ada", {"id": "ignored"})  # not started: dropped silently
+    f.start()
+    for i in range(5):
+        f.publish("B1", "ada", {"id": f"e{i}"})
+    assert f.dropped >= 2
+
+    # drain delivers what was queued or being collected
+    await f.drain(timeout=1)
+    assert outbox.sent["bob"] and not f.running
+    assert len(sum(outbox.sent["bob"], [])) == f.published
+
+
+def test_summaries_merge_changes_per_bug():
+    events = [
+        {"id": "1", "bug_id": "B1", "user_id": "ada", "activity_type": "bug_updated",
+         "old_value": {"status": "open", "title": "A"}, "new_value": {"status": "in_progress", "title": "B"}},
+        {"id": "2", "bug_id": "B1", "user_id": "bob", "activity_type": "bug_updated",
+         "old_value": {"status": "in_progress", "title": "B"}, "new_value": {"status": "closed", "title": "A"}},
+        {"id": "3", "bug_id": "B1", "user_id": "ada", "activity_type": "comment_added", "new_value": {"content": "done"}},
+        {"id": "4", "bug_id": "B2", "user_id": "ada", "activity_type": "bug_updated",
+         "old_value": {"priority": "low"}, "new_value": {"priority": "high"}},
+        {"id": "5", "bug_id": "B2", "user_id": "ada", "activity_type": "bug_updated",
+         "old_value": {"priority": "high"}, "new_value": {"priority": "low"}},
+    ]
+    (bug,) = summarize_bug_events(events)
+    assert bug["bug_id"] == "B1" and bug["actors"] == ["ada", "bob"]
+    assert bug["changes"] == {"status": {"old": "open", "new": "closed"}}
+    assert bug["comments"] == ["done"]
+
+
+# ---------------------------------------------------------------------------
+# Wired to bug_service
+# ---------------------------------------------------------------------------
+
+@pytest.fixture
+async def watched(monkeypatch, memory_supabase):
+    db = MemoryDatabase()
+    db.seed("bugs", [{"id": f"B{i}", "project_id": "P1", "title": f"Bug {i}", "status": "open"} for i in (1, 2)])
+    db.seed("bug_watchers", [
+        {"bug_id": "B1", "user_id": "bob"}, {"bug_id": "B1", "user_id": "cy"}, {"bug_id": "B2", "user_id": "bob"},
+    ])
+    db.seed("users", [{"id": f"u-{name}", "username": name, "email": f"{name}@example.com"} for name in ("bob", "cy", "dee")])
+    memory_supabase(db, bug_service)
+    db.watcher_reads = 0
+    db.user_reads = 0
+    handle = db.transport.handle_request
+
+    def recording(request):
+        if request.url.path.endswith("/bug_watchers") and request.method == "GET":
+            db.watcher_reads += 1
+        if request.url.path.endswith("/users") and request.method == "GET":
+            db.user_reads += 1
+        return handle(request)
+
+    db.transport.handle_request = recording
+    monkeypatch.setattr(bug_service, "bug_count_cache", bug_service.BugCountCache(ttl=60, maxsize=100))
+    monkeypatch.setattr(bug_service, "bug_watcher_cache", BugWatcherCache(ttl=60, maxsize=100))
+    monkeypatch.setattr(bug_service, "bug_activity_journal", WriteBehindJournal(
+        "bug_activity_logs", bug_service.record_bug_activity_bulk, key="id", flush_size=100, flush_interval=60, max_queue=1000))
+
+    sent = {}
+
+    async def deliver(username, events):
+        await asyncio.sleep(0.2)  # a slow mail server must not slow the request down
+        sent.setdefault(username, []).append(summarize_bug_events(events))
+
+    notifier = NotificationFanout("bug_watchers", bug_service.resolve_bug_watchers, deliver,
+                                  window=0.05, concurrency=5, max_queue=100)
+    monkeypatch.setattr(bug_service, "bug_watcher_notifier", notifier)
+    notifier.start()
+    yield db, notifier, sent
+    await notifier.drain(timeout=1)
+
+
+async def test_bug_updates_notify_watchers_off_the_request_path(watched):
+    db, notifier, sent = watched
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    await bug_service.update_bug("B1", BugUpdate(priority="high"), "cy")
+    await bug_service.update_bug("B1", BugUpdate(priority="critical"), "cy")
+    await bug_service.update_bug("B2", BugUpdate(title="Renamed"), "ada")
+    assert loop.time() - started < 0.2 and sent == {}
+
+    await notifier.drain(timeout=1)
+    (bob,) = sent["bob"]
+    assert [b["bug_id"] for b in bob] == ["B1", "B2"]
+    assert bob[0]["changes"]["priority"] == {"old": "medium", "new": "critical"}
+    assert bob[1]["title"] == "Renamed"
+    assert "cy" not in sent
+    assert (db.watcher_reads, db.user_reads) == (1, 1)
+    assert bug_service.bug_watcher_cache.get_email("bob") == (True, "bob@example.com")
+
+
+async def test_watcher_lists_are_cached_until_watchers_change(watched):
+    db, notifier, sent = watched
+    await bug_service.update_bug("B1", BugUpdate(priority="high"), "ada")
+    await asyncio.sleep(0.1)
+    await bug_service.update_bug("B1", BugUpdate(priority="critical"), "ada")
+    await asyncio.sleep(0.1)
+    assert db.watcher_reads == 1
+
+    await bug_service.add_bug_watcher("B1", "dee")
+    await bug_service.update_bug("B1", BugUpdate(priority="low"), "ada")
+    await notifier.drain(timeout=1)
+    assert "dee" in sent
+    assert bug_service.bug_watcher_cache.get("B1") == ["bob", "cy", "dee"]
+
+
+async def test_watcher_email_escapes_and_shortens_bug_text(watched, monkeypatch):
+    from app.api.v1.routes.emails import email_routes
+
+    mails = []
+
+    async def send_mail_to_user(email, subject, html_content):
+        mails.append((email, html_content))
+
+    monkeypatch.setattr(email_routes, "send_mail_to_user", send_mail_to_user)
+    await bug_service.resolve_bug_watchers(["B1"])
+    await bug_service._notify_bug_watcher("bob", [{
+        "id": "e1", "bug_id": "B1", "user_id": "<b>eve</b>", "activity_type": "bug_updated",
+        "old_value": {"title": "Bug 1", "description": "old " * 100, "priority": "low"},
+        "new_value": {"title": '<img src=x onerror="alert(1)">', "description": "new " * 100, "priority": "high"},
+    }])
+
+    ((email, body),) = mails
+    assert email == "bob@example.com"
+    assert "<img" not in body and "&lt;img src=x onerror=&quot;alert(1)&quot;&gt;" in body
+    assert "&lt;b&gt;eve&lt;/b&gt;" in body
+    assert "description" in body and "old old" not in body
+    assert "priority: low &rarr; high" in body
+
+
+async def test_failed_watcher_emails_count_as_failed_deliveries(watched, monkeypatch):
+    from app.api.v1.routes.emails import email_routes
+
+    async def send_mail_to_user(email, subject, html_content):
+        raise RuntimeError("sendgrid down")
+
+    monkeypatch.setattr(email_routes, "send_mail_to_user", send_mail_to_user)
+    notifier = NotificationFanout("bug_watchers", bug_service.resolve_bug_watchers, bug_service._notify_bug_watcher,
+                                  window=0.05, concurrency=5, max_queue=100)
+    monkeypatch.setattr(bug_service, "bug_watcher_notifier", notifier)
+    notifier.start()
+    await bug_service.update_bug("B1", BugUpdate(priority="high"), "ada")
+    await notifier.drain(timeout=1)
+    assert (notifier.delivered, notifier.failed) == (0, 2)
@@ -0,0 +1,196 @@
+"""
+Test cases for ranked bug search (search_bugs / search_bugs_ranked).
+
+The in-memory backend covers the service contract. With PG_TEST_DSN set the
+database function is exercised against a real Postgres, and a benchmark
+compares it with the old ILIKE scan. Run
+``python -m pytest app/tests/test_bug_search.py -s`` to see the timings.
+"""
+import time
+
+import httpx
+import pytest
+from fastapi import FastAPI
+
+from app.core.db import pg_engine
+from app.core.db.memory_supabase import MemoryDatabase
+from app.models.schemas.bug import BugSearchParams
+from app.services import bug_service
+from app.services.auth_handler import verify_token
+from app.tests.pg_test_db import PG_TEST_DSN, create_test_database
+
+
+def bug(bug_id, title, description=None, **extra):
+    return {"id": bug_id, "tracker_id": "TR1", "project_id": "P1", "title": title, "description": description,
+            "status": "open", "priority": "medium", "updated_at": f"2025-09-01T00:00:{bug_id[1:]}+00:00", **extra}
+
+
+@pytest.fixture
+def db(monkeypatch, memory_supabase):
+    db = MemoryDatabase()
+    db.seed("bugs", [
+        bug("B01", "Login page crashes", "Stack trace on submit"),
+        bug("B02", "Dashboard is slow", "The login widget takes seconds to render"),
+        bug("B03", "Logout button misaligned", None, status="closed"),
+        bug("B04", "Typo in footer", "See user_profile_v2 template"),
+        bug("B05", "Login fails on Safari", "Login loops back to the login page", tracker_id="TR2"),
+    ])
+    memory_supabase(db, bug_service)
+    return db
+
+
+async def test_results_are_ranked_and_highlighted(db):
+    result = await bug_service.search_bugs("TR1", BugSearchParams(search_query="logi"))
+    assert [r["id"] for r in result["data"]] == ["B01", "B02"]
+    assert result["total"] == 2
+    top = result["data"][0]
+    assert top["highlight"]["title"] == "<mark>Login</mark> page crashes"
+    assert "<mark>login</mark> widget" in result["data"][1]["highlight"]["description"]
+    assert top["search_rank"] > result["data"][1]["search_rank"]
+
+
+async def test_highlights_escape_the_bug_text(db):
+    db.seed("bugs", [bug("B06", '<img src=x onerror="alert(1)"> crash', "Crash & <b>burn</b>", tracker_id="TR3")])
+    result = await bug_service.search_bugs("TR3", BugSearchParams(search_query="crash"))
+    highlight = result["data"][0]["highlight"]
+    assert highlight["title"] == "&lt;img src=x onerror=&quot;alert(1)&quot;&gt; <mark>crash</mark>"
+    assert highlight["description"] == "<mark>Crash</mark> &amp; &lt;b&gt;burn&lt;/b&gt;"
+
+
+async def test_substring_fallback_and_filters(db):
+    result = await bug_service.search_bugs("TR1", BugSearchParams(search_query="profile_v"))
+    assert [r["id"] for r in result["data"]] == ["B04"]
+
+    closed = await bug_service.search_bugs("TR1", BugSearchParams(search_query="log", status=["closed"]))
+    assert [r["id"] for r in closed["data"]] == ["B03"]
+
+
+async def test_explicit_sort_and_paging(db):
+    params = BugSearchParams(search_query="log", sort_by="updated_at", sort_order="asc", page=2, page_size=2)
+    result = await bug_service.search_bugs("TR1", params)
+    assert [r["id"] for r in result["data"]] == ["B03"]
+    assert result["total"] == 3
+
+    with pytest.raises(ValueError):
+        await bug_service.search_bugs("TR1", BugSearchParams(search_query="log", sort_by="title; drop table bugs"))
+
+
+async def test_listing_without_query_keeps_plain_path(db):
+    result = await bug_service.search_bugs("TR1", BugSearchParams())
+    assert [r["id"] for r in result["data"]] == ["B04", "B03", "B02", "B01"]
+    assert "highlight" not in result["data"][0]
+
+
+async def test_search_endpoint(db):
+    from app.api.v1.routes.bugs.bug_router import router as bug_router
+
+    app = FastAPI()
+    app.include_router(bug_router, prefix="/bugs")
+    app.dependency_overrides[verify_token] = lambda: {"id": "u1", "username": "ada"}
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://t") as client:
+        res = await client.get("/bugs/search/TR2", params={"search_query": "safari login"})
+    assert res.status_code == 200
+    assert [r["id"] for r in res.json()["data"]] == ["B05"]
+
+
+# ---------------------------------------------------------------------------
+# Against a real Postgres
+# ---------------------------------------------------------------------------
+
+requires_pg = pytest.mark.skipif(not PG_TEST_DSN, reason="PG_TEST_DSN not set")
+
+_WORDS = ["login", "logout", "dashboard", "render", "timeout", "payment", "invoice", "export", "upload", "avatar",
+          "profile", "session", "cache", "search", "filter", "report", "button", "modal", "safari", "android"]
+
+_SEED = f"""
+INSERT INTO organizations (org_id, name) VALUES ('O1', 'Org');
+INSERT INTO projects (project_id, name, org_id) VALUES ('P1', 'Project', 'O1');
+INSERT INTO test_trackers (tracker_id, org_id, project_id, name, creator_id, creator_name)
+VALUES ('TR1', 'O1', 'P1', 'Tracker', '11111111-1111-1111-1111-111111111111', 'ada');
+INSERT INTO bugs (id, tracker_id, project_id, title, description, updated_at)
+SELECT 'B' || lpad(i::text, 6, '0'), 'TR1', 'P1',
+       initcap(w[1 + i % 20]) || ' ' || w[1 + (i * 7) % 20] || ' issue ' || i,
+       'When the ' || w[1 + (i * 3) % 20] || ' ' || w[1 + (i * 11) % 20] || ' runs, the ' || w[1 + (i * 13) % 20] || ' fails',
+       now() - make_interval(secs => i)
+  FROM generate_series(1, 20000) AS i, (SELECT ARRAY{_WORDS!r}::text[] AS w) words;
+ANALYZE bugs;
+"""
+
+
+@pytest.fixture
+async def pg_bugs(monkeypatch):
+    import asyncpg
+
+    dsn = await create_test_database()
+    conn = await asyncpg.connect(dsn)
+    await conn.execute(_SEED)
+    await conn.close()
+
+    monkeypatch.setattr(pg_engine, "DATABASE_URL", dsn)
+    monkeypatch.setattr(pg_engine, "PG_DIRECT_FUNCTIONS", {"*"})
+    yield dsn
+    await pg_engine.close_pg_pool()
+
+
+@requires_pg
+async def test_ranked_search_in_postgres(pg_bugs):
+    result = await bug_service.search_bugs("TR1", BugSearchParams(search_query="safar andro", page_size=5))
+    assert result["total"] > 0
+    for row in result["data"]:
+        assert "<mark>" in row["highlight"]["title"] + row["highlight"]["description"]
+    ranks = [row["search_rank"] for row in result["data"]]
+    assert ranks == sorted(ranks, reverse=True)
+
+    ilike = await bug_service.search_bugs("TR1", BugSearchParams(search_query="issue 1999"))
+    assert "B001999" in [row["id"] for row in ilike["data"]]
+
+
+@requires_pg
+async def test_postgres_highlights_are_escaped(pg_bugs):
+    import asyncpg
+
+    conn = await asyncpg.connect(pg_bugs)
+    await conn.execute("""
+        INSERT INTO bugs (id, tracker_id, project_id, title, description)
+        VALUES ('BX1', 'TR1', 'P1', '<img src=x onerror="alert(1)"> zebra [[mark]]', 'zebra & <b>stripes</b>')
+    """)
+    await conn.close()
+    result = await bug_service.search_bugs("TR1", BugSearchParams(search_query="zebra"))
+    highlight = result["data"][0]["highlight"]
+    assert "<img" not in highlight["title"] and "&lt;img" in highlight["title"]
+    assert "<mark>zebra</mark>" in highlight["title"] and "[[mark]]" not in highlight["title"]
+    assert "&amp; &lt;b&gt;stripes&lt;/b&gt;" in highlight["description"]
+
+
+@requires_pg
+async def test_benchmark_ranked_search_vs_ilike(pg_bugs):
+    import asyncpg
+
+    conn = await asyncpg.connect(pg_bugs)
+    # the pre-migration path: ILIKE with an exact count, no index to help it
+    ilike_sql = (
+        "SELECT *, count(*) OVER () FROM bugs WHERE tracker_id = $1 "
+        "AND (title ILIKE $2 OR description ILIKE $2) ORDER BY updated_at DESC LIMIT 20"
+    )
+    ranked_sql = "SELECT * FROM search_bugs_ranked($1, $2)"
+    queries = ["safari", "avatar upl", "invoice", "issue 1234"]
+    n = 20
+
+    async def run(sql, arg):
+        started = time.perf_counter()
+        for _ in range(n):
+            for q in queries:
+                await conn.fetch(sql, *arg(q))
+        return (time.perf_counter() - started) / (n * len(queries)) * 1e3
+
+    try:
+        plan = "\n".join(r[0] for r in await conn.fetch(
+            "EXPLAIN SELECT id FROM bugs WHERE title ILIKE '%avatar upl%' OR description ILIKE '%avatar upl%'"))
+        await conn.execute("SET enable_bitmapscan = off")
+        ilike_ms = await run(ilike_sql, lambda q: ("TR1", f"%{q}%"))
+        await conn.execute("RESET enable_bitmapscan")
+        ranked_ms = await run(ranked_sql, lambda q: (q, "TR1"))
+    finally:
+        await conn.close()
+    print(f"\nsearch_bugs: {ilike_ms:.2f}ms ilike scan, {ranked_ms:.2f}ms ranked full-text")
+    assert "idx_bugs_title_trgm" in plan and "idx_bugs_description_trgm" in plan
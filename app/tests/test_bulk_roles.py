@@ -0,0 +1,86 @@
+"""
+Test cases for bulk effective-role resolution and the login role preload.
+"""
+import pytest
+
+from app.core.db.memory_supabase import MemoryDatabase
+from app.services import rbac
+
+
+@pytest.fixture
+def transport(monkeypatch, memory_supabase):
+    db = MemoryDatabase()
+    db.seed("organizations", [{"org_id": "O1", "name": "Acme"}, {"org_id": "O2", "name": "Globex"}])
+    db.seed("projects", [
+        {"project_id": "P1", "org_id": "O1", "name": "Apollo"},
+        {"project_id": "P2", "org_id": "O1", "name": "Gemini"},
+        {"project_id": "P3", "org_id": "O2", "name": "Mercury"},
+    ])
+    db.seed("organization_members", [
+        {"user_id": "admin-1", "org_id": "O1", "role": "admin"},
+        {"user_id": "user-2", "org_id": "O1", "role": "member"},
+    ])
+    db.seed("project_members", [{"user_id": "user-2", "project_id": "P2", "role": "member"}])
+    transport = memory_supabase(db).transport
+    monkeypatch.setattr(rbac, "RBAC_DB_FUNCTIONS", True)
+    return transport
+
+
+async def test_bulk_check_is_one_round_trip(transport):
+    pairs = [(u, p) for u in ("admin-1", "user-2") for p in ("P1", "P2", "P3")]
+    roles = await rbac.get_project_roles(pairs)
+    assert transport.requests == 1
+    assert roles == {
+        ("admin-1", "P1"): "admin", ("admin-1", "P2"): "admin", ("admin-1", "P3"): None,
+        ("user-2", "P1"): None, ("user-2", "P2"): "member", ("user-2", "P3"): None,
+    }
+
+    assert await rbac.get_project_role("user-2", "P2") == "member"
+    assert await rbac.get_project_roles(pairs) == roles
+    assert transport.requests == 1
+
+
+async def test_preload_warms_every_role(transport):
+    assert await rbac.preload_user_roles("admin-1") == 3
+    calls = transport.requests
+    assert await rbac.get_org_role("admin-1", "O1") == "admin"
+    assert await rbac.get_project_role("admin-1", "P2") == "admin"
+    assert await rbac.get_org_by_proj("P1") == "O1"
+    assert transport.requests == calls
+
+
+async def test_filter_by_project_access(transport):
+    rows = [{"id": 1, "project_id": "P1"}, {"id": 2, "project_id": "P2"}, {"id": 3, "project_id": None}]
+    kept = await rbac.filter_by_project_access("user-2", rows)
+    assert [row["id"] for row in kept] == [2, 3]
+
+
+async def test_without_db_functions_roles_resolve_in_three_reads(transport, monkeypatch):
+    monkeypatch.setattr(rbac, "RBAC_DB_FUNCTIONS", False)
+    pairs = [(u, p) for u in ("admin-1", "user-2") for p in ("P1", "P2", "P3")]
+    roles = await rbac.get_project_roles(pairs)
+    # project_members, projects, organization_members: however many pairs
+    assert transport.requests == 3
+    assert roles == {
+        ("admin-1", "P1"): "admin", ("admin-1", "P2"): "admin", ("admin-1", "P3"): None,
+        ("user-2", "P1"): None, ("user-2", "P2"): "member", ("user-2", "P3"): None,
+    }
+
+    assert await rbac.get_project_roles(pairs) == roles
+    assert await rbac.get_org_role("user-2", "O1") == "member"
+    assert await rbac.get_org_by_proj("P3") == "O2"
+    assert transport.requests == 3
+
+
+async def test_preload_without_db_functions_uses_three_reads(transport, monkeypatch):
+    monkeypatch.setattr(rbac, "RBAC_DB_FUNCTIONS", False)
+    # admin-1: org role in O1 plus inherited admin on P1 and P2
+    assert await rbac.preload_user_roles("admin-1") == 3
+    # user-2: org role in O1 plus the direct membership of P2
+    assert await rbac.preload_user_roles("user-2") == 2
+    assert transport.requests == 6
+    assert await rbac.get_project_role("admin-1", "P1") == "admin"
+    assert await rbac.get_project_role("user-2", "P2") == "member"
+    assert await rbac.get_org_role("user-2", "O1") == "member"
+    assert await rbac.get_org_by_proj("P2") == "O1"
+    assert transport.requests == 6
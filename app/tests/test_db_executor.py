@@ -0,0 +1,90 @@
+"""
+Test cases for the bounded DB executor behind run_supabase_async.
+"""
+import asyncio
+import threading
+import time
+
+import pytest
+
+from app.core.db.executor import DbExecutor, DbExecutorSaturated, DbOperationTimeout
+
+
+async def test_runs_blocking_call_and_reports_stats():
+    """A blocking call runs off the loop and is counted as completed."""
+    executor = DbExecutor(max_workers=2, max_queue=2, default_timeout=5)
+    result = await executor.run(lambda: threading.current_thread().name)
+    assert result.startswith("supabase-db")
+
+    stats = executor.stats()
+    assert stats["completed"] == 1
+    assert stats["active"] == 0
+    assert stats["queued"] == 0
+    executor.shutdown()
+
+
+async def test_rejects_when_queue_is_full():
+    """Calls beyond workers + queue fail fast instead of waiting."""
+    executor = DbExecutor(max_workers=1, max_queue=1, default_timeout=5)
+    release = threading.Event()
+
+    running = asyncio.ensure_future(executor.run(release.wait))
+    queued = asyncio.ensure_future(executor.run(lambda: "queued"))
+    await asyncio.sleep(0.05)
+
+    with pytest.raises(DbExecutorSaturated):
+        await executor.run(lambda: "rejected")
+
+    release.set()
+    assert await running is True
+    assert await queued == "queued"
+    assert executor.stats()["rejected"] == 1
+    executor.shutdown()
+
+
+async def test_queued_call_past_deadline_never_runs():
+    """A call still waiting for a thread when its deadline passes is dropped."""
+    executor = DbExecutor(max_workers=1, max_queue=5, default_timeout=5)
+    release = threading.Event()
+    ran = []
+
+    blocker = asyncio.ensure_future(executor.run(release.wait))
+    await asyncio.sleep(0.05)
+
+    with pytest.raises(DbOperationTimeout):
+        await executor.run(lambda: ran.append(True), timeout=0.05)
+
+    release.set()
+    await blocker
+    await asyncio.sleep(0.05)
+
+    stats = executor.stats()
+    assert ran == []
+    assert stats["timed_out"] == 1
+    assert stats["cancelled"] == 1
+    assert stats["queued"] == 0
+    executor.shutdown()
+
+
+async def test_running_call_past_deadline_is_abandoned():
+    """A call that already holds a thread cannot be interrupted, only abandoned."""
+    executor = DbExecutor(max_workers=1, max_queue=1, default_timeout=5)
+
+    with pytest.raises(DbOperationTimeout):
+        await executor.run(lambda: time.sleep(0.2), timeout=0.05)
+
+    assert executor.stats()["abandoned"] == 1
+    executor.shutdown(wait=True)
+
+
+async def test_async_operation_deadline():
+    """Native async operations get the same per-call deadline."""
+    executor = DbExecutor(max_workers=1, max_queue=1, default_timeout=5)
+
+    async def slow():
+        await asyncio.sleep(1)
+
+    with pytest.raises(DbOperationTimeout):
+        await executor.run_async(slow, timeout=0.05)
+    assert executor.stats()["async_active"] == 0
+    executor.shutdown()
@@ -0,0 +1,78 @@
+"""
+Test cases for the per-table Supabase call metrics.
+"""
+import httpx
+import pytest
+from fastapi import HTTPException
+from postgrest.exceptions import APIError
+from prometheus_client import REGISTRY
+
+import app.core.db.supabase_db as supabase_db
+from app.core.db.resilience import BreakerRegistry, record_target
+from app.core.db.telemetry import instrument_session, render_metrics
+
+
+@pytest.fixture(autouse=True)
+def fresh_breakers(monkeypatch):
+    monkeypatch.setattr(supabase_db, "breakers", BreakerRegistry(failure_threshold=5, reset_timeout=1))
+
+
+def _sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+class _Result:
+    def __init__(self, data):
+        self.data = data
+
+
+async def test_records_latency_rows_and_service():
+    labels = {"target": "telemetry_view", "operation": "unknown", "service": "test_db_telemetry"}
+    before = _sample("supabase_db_rows_total", **labels)
+
+    def op():
+        record_target("telemetry_view")
+        return _Result([{"id": 1}, {"id": 2}, {"id": 3}])
+
+    await supabase_db.safe_supabase_operation(op, "fetch")
+
+    assert _sample("supabase_db_rows_total", **labels) == before + 3
+    assert _sample("supabase_db_call_seconds_count", **labels) >= 1
+
+
+async def test_records_errors_by_type():
+    def op():
+        record_target("telemetry_errors")
+        raise APIError({"code": "23505", "message": "duplicate key"})
+
+    with pytest.raises(HTTPException):
+        await supabase_db.safe_supabase_operation(op, "insert")
+
+    assert _sample(
+        "supabase_db_errors_total",
+        target="telemetry_errors", operation="unknown", service="test_db_telemetry", error="APIError",
+    ) == 1
+
+
+async def test_http_hook_records_operation_and_bytes():
+    body = b'[{"task_id": "T1"}]'
+    transport = httpx.MockTransport(lambda request: httpx.Response(200, content=body))
+    session = instrument_session(httpx.AsyncClient(transport=transport, base_url="http://pg"))
+
+    async def op():
+        record_target("telemetry_tasks")
+        response = await session.get("/telemetry_tasks", params={"select": "*"})
+        return _Result(response.json())
+
+    await supabase_db.run_supabase_async(op)
+    await session.aclose()
+
+    labels = {"target": "telemetry_tasks", "operation": "select", "service": "test_db_telemetry"}
+    assert _sample("supabase_db_response_bytes_total", **labels) == len(body)
+    assert _sample("supabase_db_rows_total", **labels) == 1
+
+
+def test_render_metrics_exposes_db_series():
+    payload, content_type = render_metrics()
+    assert content_type.startswith("text/plain")
+    assert b"supabase_db_call_seconds" in payload
@@ -0,0 +1,187 @@
+"""
+Test cases for the per-project task dependency graph.
+"""
+import asyncio
+
+import httpx
+import pytest
+from fastapi import FastAPI, HTTPException
+
+from app.api.v1.routes.projects import project_router
+from app.api.v1.routes.projects.proj_rbac import project_rbac
+from app.core.db.memory_supabase import MemoryDatabase
+from app.services import dependency_graph, task_history_service, task_service
+from app.services.auth_handler import verify_token
+from app.services.dependency_graph import DependencyCycleError, DependencyGraph, GraphRegistry
+from app.tests.pg_test_db import PG_TEST_DSN, create_test_database
+
+ROWS = [
+    {"task_id": "A", "project_id": "P1", "status": "completed", "dependencies": []},
+    {"task_id": "B", "project_id": "P1", "status": "in_progress", "dependencies": ["A"],
+     "start_date": "2025-01-01", "due_date": "2025-01-05"},
+    {"task_id": "C", "project_id": "P1", "status": "not_started", "dependencies": '["B"]'},
+    {"task_id": "D", "project_id": "P1", "status": "not_started", "dependencies": ["A", "X"]},
+]
+EXTERNAL = [{"task_id": "X", "project_id": "P2", "status": "not_started"}]
+
+
+def test_graph_queries():
+    graph = DependencyGraph.from_rows("P1", ROWS, EXTERNAL)
+    assert [graph.is_ready(t) for t in "ABCD"] == [True, True, False, False]
+    assert graph.blockers("D") == ["X"]
+    assert graph.transitive_blockers("C") == ["B"]
+    assert graph.topological_order() == ["A", "B", "C", "X", "D"]
+    assert graph.critical_path() == {"tasks": ["B", "C"], "duration_days": 6}
+
+    with pytest.raises(DependencyCycleError) as exc:
+        graph.add_edge("A", "C")
+    assert exc.value.path == ["A", "C", "B", "A"]
+
+    graph.upsert_node({"task_id": "X", "project_id": "P2", "status": "completed"})
+    graph.upsert_node({"task_id": "B", "project_id": "P1", "status": "Completed"})
+    assert graph.is_ready("D") and graph.is_ready("C")
+    graph.remove_edge("C", "B")
+    graph.add_edge("C", "D")
+    assert not graph.is_ready("C") and graph.topological_order()[-1] == "C"
+
+
+def test_existing_cycles_are_reported_not_fatal():
+    graph = DependencyGraph.from_rows("P1", [
+        {"task_id": "A", "project_id": "P1", "status": "todo", "dependencies": ["B"]},
+        {"task_id": "B", "project_id": "P1", "status": "todo", "dependencies": ["A"]},
+        {"task_id": "C", "project_id": "P1", "status": "todo", "dependencies": []},
+    ])
+    out = graph.to_dict()
+    assert (out["order"], out["cyclic"]) == (["C"], ["A", "B"])
+
+
+
+async def test_project_locks_are_dropped_once_released():
+    registry = GraphRegistry(ttl=60, maxsize=10)
+    order = []
+
+    async def write(name):
+        async with registry.lock("P1"):
+            order.append(f"{name} in")
+            await asyncio.sleep(0.01)
+            order.append(f"{name} out")
+
+    await asyncio.gather(write("a"), write("b"))
+    assert order == ["a in", "a out", "b in", "b out"]
+    for project_id in map(str, range(100)):
+        async with registry.lock(project_id):
+            pass
+    assert len(registry._locks) == 0
+
+
+@pytest.fixture
+def db(monkeypatch, memory_supabase):
+    db = MemoryDatabase()
+    db.seed("projects", [{"project_id": "P1", "org_id": "O1", "name": "Apollo"}, {"project_id": "P2", "org_id": "O1", "name": "Gemini"}])
+    db.seed("tasks", [{**row, "title": row["task_id"], "is_subtask": False} for row in ROWS + EXTERNAL])
+    memory_supabase(db, task_service, task_history_service, dependency_graph)
+    dependency_graph.dependency_graphs.clear()
+    yield db
+    dependency_graph.dependency_graphs.clear()
+
+
+async def test_cycles_are_rejected_before_anything_is_written(db):
+    with pytest.raises(HTTPException) as exc:
+        await task_service.add_dependency("A", "C", "ada")
+    assert exc.value.status_code == 400 and "A -> C -> B -> A" in exc.value.detail
+    assert db.rows_for("tasks_history", []) == []
+
+    builds = dependency_graph.dependency_graphs.builds
+    await task_service.add_dependency("C", "D", "ada")
+    graph = await dependency_graph.dependency_graphs.get("P1")
+    assert graph.prereqs["C"] == {"B", "D"}
+    assert dependency_graph.dependency_graphs.builds == builds
+
+
+async def test_completion_guard_is_not_fooled_by_a_stale_graph(db):
+    await dependency_graph.dependency_graphs.get("P1")
+    with pytest.raises(HTTPException) as exc:
+        await task_service.update_task("C", {"status": "completed"})
+    assert exc.value.status_code == 400 and "B" in exc.value.detail
+
+    await task_service.update_task("B", {"status": "completed"})
+    # another worker reopens B and gives C a new open prerequisite; this
+    # worker's cached graph still says C is ready
+    with db.lock:
+        next(r for r in db.rows_for("tasks", []) if r["task_id"] == "B")["status"] = "in_progress"
+    assert dependency_graph.dependency_graphs.peek("P1").is_ready("C")
+    with pytest.raises(HTTPException) as exc:
+        await task_service.update_task("C", {"status": "completed"})
+    assert "B" in exc.value.detail
+
+    await task_service.update_task("B", {"status": "completed"})
+    with db.lock:
+        next(r for r in db.rows_for("tasks", []) if r["task_id"] == "C")["dependencies"] = ["B", "D"]
+    with pytest.raises(HTTPException) as exc:
+        await task_service.update_task("C", {"status": "completed"})
+    assert "D" in exc.value.detail and "B" not in exc.value.detail
+
+
+async def test_dependency_graph_endpoint(db):
+    app = FastAPI()
+    app.include_router(project_router.router, prefix="/projects")
+    app.dependency_overrides[verify_token] = lambda: {"id": "u1", "username": "ada"}
+    app.dependency_overrides[project_rbac] = lambda: "member"
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://t") as client:
+        res = await client.get("/projects/P1/dependency-graph", params={"task_id": "D"})
+        missing = await client.get("/projects/P1/dependency-graph", params={"task_id": "nope"})
+    body = res.json()
+    assert body["order"] == ["A", "B", "C", "D"]
+    assert body["critical_path"]["tasks"] == ["B", "C"]
+    assert body["blockers"] == {"task_id": "D", "direct": ["X"], "transitive": ["X"]}
+    assert next(n for n in body["nodes"] if n["task_id"] == "X")["external"] is True
+    assert missing.status_code == 404
+
+
+async def test_database_cycle_rejection_is_a_400(db):
+    # Another worker added D -> C after this worker cached P1's graph, so only
+    # the database's trigger sees that C -> D closes a cycle
+    await dependency_graph.dependency_graphs.get("P1")
+    session = task_service.get_supabase_client().postgrest.session
+    memory = session._transport
+
+    class CycleTrigger(httpx.BaseTransport):
+        def handle_request(self, request):
+            if request.method == "PATCH" and request.url.path.endswith("/tasks"):
+                return httpx.Response(400, json={"code": "TMC01", "message": "dependency cycle", "details": "C -> D -> C", "hint": None})
+            return memory.handle_request(request)
+
+    session._transport = CycleTrigger()
+    with pytest.raises(HTTPException) as exc:
+        await task_service.update_task("C", {"dependencies": ["B", "D"]})
+    assert exc.value.status_code == 400 and "C -> D -> C" in exc.value.detail
+    assert dependency_graph.dependency_graphs.peek("P1") is None
+
+
+@pytest.mark.skipif(not PG_TEST_DSN, reason="PG_TEST_DSN not set")
+async def test_trigger_rejects_cycles_in_postgres():
+    import asyncpg
+
+    conn = await asyncpg.connect(await create_test_database())
+    try:
+        await conn.execute("""
+            INSERT INTO organizations (org_id, name) VALUES ('O1', 'Org');
+            INSERT INTO projects (project_id, name, org_id) VALUES ('P1', 'Project', 'O1');
+            INSERT INTO tasks (task_id, project_id, org_id, title, status, dependencies)
+            VALUES ('A', 'P1', 'O1', 'A', 'not_started', '{}'),
+                   ('B', 'P1', 'O1', 'B', 'not_started', '{A}'),
+                   ('C', 'P1', 'O1', 'C', 'not_started', '{B}');
+        """)
+        with pytest.raises(asyncpg.PostgresError) as exc:
+            await conn.execute("UPDATE tasks SET dependencies = '{C}' WHERE task_id = 'A'")
+        assert exc.value.sqlstate == "TMC01" and exc.value.detail == "A -> C -> B -> A"
+        with pytest.raises(asyncpg.PostgresError):
+            await conn.execute("UPDATE tasks SET dependencies = '{A}' WHERE task_id = 'A'")
+        await conn.execute("UPDATE tasks SET dependencies = '{B}' WHERE task_id = 'C'")
+        # the batch links function goes through the same check
+        with pytest.raises(asyncpg.PostgresError):
+            await conn.execute("""
+                SELECT apply_task_links('[{"task_id": "A", "add_dependencies": ["C"]}]'::jsonb)
+            """)
+    finally:
+        await conn.close()
@@ -0,0 +1,80 @@
+"""
+Test cases for the streaming task and bug exports.
+"""
+import csv
+import io
+import json
+
+import httpx
+import pytest
+from fastapi import FastAPI
+
+from app.api.v1.routes.bugs.bug_router import router as bug_router
+from app.api.v1.routes.tasks import task_router
+from app.core.db.memory_supabase import MemoryDatabase
+from app.services import bug_service, rbac, task_service
+from app.services.auth_handler import verify_token
+
+
+@pytest.fixture
+def db(monkeypatch, memory_supabase):
+    db = MemoryDatabase()
+    db.seed("organizations", [{"org_id": "O1", "name": "Acme"}])
+    db.seed("projects", [
+        {"project_id": "P1", "org_id": "O1", "name": "Apollo"},
+        {"project_id": "P2", "org_id": "O1", "name": "Gemini"},
+    ])
+    db.seed("project_members", [{"user_id": "u1", "project_id": "P1", "role": "member"}])
+    db.seed("tasks", [
+        {"task_id": f"T{i:03d}", "project_id": "P1" if i < 25 else "P2", "org_id": "O1",
+         "title": f"Task, \"{i}\"", "status": "open" if i % 2 else "done", "tags": ["a", "b"]}
+        for i in range(30)
+    ])
+    db.seed("bugs", [
+        {"id": f"B{i:03d}", "tracker_id": "TR1", "project_id": "P1" if i < 25 else "P2", "title": f"Bug {i}", "status": "open"}
+        for i in range(30)
+    ])
+    memory_supabase(db, task_service, bug_service)
+    monkeypatch.setattr(rbac, "RBAC_DB_FUNCTIONS", True)
+    monkeypatch.setattr("app.services.export_service.EXPORT_CHUNK_SIZE", 10)
+    return db
+
+
+def make_client():
+    app = FastAPI()
+    app.include_router(task_router.router, prefix="/tasks")
+    app.include_router(bug_router, prefix="/bugs")
+    app.dependency_overrides[verify_token] = lambda: {"id": "u1", "username": "ada"}
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://t")
+
+
+async def test_ndjson_export_streams_in_chunks_and_reads_only_accessible_rows(db):
+    async with make_client() as client:
+        res = await client.get("/tasks/export")
+    assert res.status_code == 200
+    assert res.headers["content-type"].startswith("application/x-ndjson")
+    rows = [json.loads(line) for line in res.text.splitlines()]
+    assert [row["task_id"] for row in rows] == [f"T{i:03d}" for i in range(25)]
+    # one bulk role lookup, then three chunk reads (10, 10, 5) of the caller's projects only
+    assert db.transport.requests == 4
+
+
+async def test_csv_export_with_filters(db):
+    async with make_client() as client:
+        res = await client.get("/tasks/export", params={"project_id": "P1", "status": "open", "format": "csv"})
+    assert res.status_code == 200
+    assert 'filename="tasks.csv"' in res.headers["content-disposition"]
+    rows = list(csv.reader(io.StringIO(res.text)))
+    assert rows[0] == task_service.TASK_EXPORT_COLUMNS
+    assert len(rows) == 1 + 12
+    first = dict(zip(rows[0], rows[1]))
+    assert (first["task_id"], first["title"], first["tags"]) == ("T001", 'Task, "1"', '["a", "b"]')
+
+
+async def test_bug_export_and_validation(db):
+    async with make_client() as client:
+        bugs = await client.get("/bugs/export", params={"tracker_id": "TR1"})
+        bad_format = await client.get("/bugs/export", params={"format": "xml"})
+        forbidden = await client.get("/tasks/export", params={"project_id": "P2"})
+    assert [json.loads(line)["id"] for line in bugs.text.splitlines()] == [f"B{i:03d}" for i in range(25)]
+    assert (bad_format.status_code, forbidden.status_code) == (400, 403)
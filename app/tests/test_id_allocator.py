@@ -0,0 +1,92 @@
+"""
+Test cases for the local, time-ordered ID allocator and its database-leased node.
+"""
+import asyncio
+import threading
+
+import pytest
+
+from app.core import id_allocator
+from app.core.db.memory_supabase import MemoryDatabase
+from app.core.id_allocator import IdAllocator, MAX_SEQUENCE, WIDTH, NodeLease, parse_id
+from app.models.schemas.bug import BugCreate
+from app.services import bug_service, task_comment_service
+
+
+def test_ids_are_prefixed_fixed_width_and_ordered():
+    allocator = IdAllocator(node=7)
+    ids = allocator.next_ids("T", 5000)
+    assert all(i.startswith("T") and len(i) == 1 + WIDTH for i in ids)
+    assert ids == sorted(ids) and len(set(ids)) == len(ids)
+    assert parse_id(ids[0], "T")["node"] == 7
+
+
+def test_clock_going_backwards_or_sequence_exhaustion_never_repeats():
+    now = [1_800_000_000_000]
+    allocator = IdAllocator(node=1, clock=lambda: now[0])
+    ids = allocator.next_ids("H", MAX_SEQUENCE + 10)  # overflows one millisecond
+    now[0] -= 5_000
+    ids += allocator.next_ids("H", 10)
+    assert ids == sorted(ids) and len(set(ids)) == len(ids)
+    assert parse_id(ids[-1], "H")["created_ms"] == 1_800_000_000_001
+
+
+@pytest.fixture
+def memory_db(memory_supabase):
+    return memory_supabase(MemoryDatabase(), id_allocator, bug_service)
+
+
+async def test_workers_lease_distinct_nodes_and_move_when_one_is_lost(memory_db):
+    leases = [NodeLease(IdAllocator(node=0), ttl=60) for _ in range(3)]
+    nodes = [await lease.renew() for lease in leases]
+    assert len(set(nodes)) == 3
+    assert [lease.allocator.node for lease in leases] == nodes
+    assert await leases[0].renew() == nodes[0]  # renewal keeps the node
+
+    # The lease ran out and another worker took the node: the next renewal moves on
+    row = next(r for r in memory_db.rows_for("id_allocator_nodes", []) if r["node"] == nodes[0])
+    row["holder"] = "someone else"
+    moved = await leases[0].renew()
+    assert moved not in nodes and leases[0].allocator.node == moved
+
+
+async def test_inserts_retry_with_fresh_ids_when_one_is_taken(memory_db, monkeypatch):
+    memory_db.seed("bugs", [{"id": "BTAKEN", "title": "Existing", "project_id": "P1"}])
+    monkeypatch.setattr(bug_service, "new_id", lambda prefix: "BTAKEN" if prefix == "B" else id_allocator.new_id(prefix))
+    monkeypatch.setattr(bug_service, "_log_bug_activity", lambda **kwargs: asyncio.sleep(0))
+
+    created = await bug_service.create_bug(BugCreate(title="Crash", project_id="P1"), "ada")
+    assert created.data[0]["id"] != "BTAKEN"
+    assert sorted(row["title"] for row in memory_db.rows_for("bugs", [])) == ["Crash", "Existing"]
+
+
+def test_concurrent_threads_and_nodes_stress():
+    allocators = [IdAllocator(node=n) for n in (1, 2)]
+    results = []
+    lock = threading.Lock()
+
+    def worker(allocator):
+        ids = allocator.next_ids("B", 2000)
+        with lock:
+            results.extend(ids)
+
+    threads = [threading.Thread(target=worker, args=(allocators[i % 2],)) for i in range(16)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(results) == 16 * 2000
+    assert len(set(results)) == len(results)
+
+
+async def test_concurrent_inserts_issue_no_pre_insert_queries(monkeypatch, memory_supabase):
+    db = memory_supabase(MemoryDatabase(), task_comment_service)
+    monkeypatch.setattr(id_allocator, "id_allocator", IdAllocator(node=3))
+
+    await asyncio.gather(*(
+        task_comment_service.create_task_comment({"task_id": "T1", "content": f"comment {i}"})
+        for i in range(200)
+    ))
+    rows = db.rows_for("task_comments", [])
+    assert len({row["comment_id"] for row in rows}) == 200
+    assert db.transport.requests == 200
@@ -0,0 +1,96 @@
+"""
+Test cases for the event loop stall watchdog and the sync-I/O-on-loop guard.
+"""
+import asyncio
+import time
+from types import SimpleNamespace
+
+import pytest
+from supabase import create_client
+
+from app.core import loop_monitor as lm
+from app.core.db.memory_supabase import (
+    MEMORY_SUPABASE_KEY,
+    MEMORY_SUPABASE_URL,
+    MemoryDatabase,
+    MemorySupabaseTransport,
+)
+
+
+@pytest.fixture
+def monitor(monkeypatch):
+    monitor = lm.LoopMonitor(interval=0.01, threshold=0.05)
+    monkeypatch.setattr(lm, "loop_monitor", monitor)
+    yield monitor
+    monitor.stop()
+
+
+@pytest.fixture
+def sync_client():
+    db = MemoryDatabase()
+    db.seed("tasks", [{"task_id": "T0001", "title": "Write docs"}])
+    client = create_client(MEMORY_SUPABASE_URL, MEMORY_SUPABASE_KEY)
+    client.postgrest.session._transport = MemorySupabaseTransport(db)
+    lm.guard_sync_session(client.postgrest.session)
+    return client
+
+
+def _hog_the_loop(seconds):
+    time.sleep(seconds)
+
+
+async def test_stall_is_attributed_to_route_and_stack(monitor):
+    monitor.start()
+    scope = {"type": "http", "method": "GET", "path": "/v1/tasks/T1", "route": SimpleNamespace(path="/v1/tasks/{task_id}")}
+
+    async def handler():
+        token = lm.enter_request(scope)
+        try:
+            await asyncio.sleep(0.02)
+            _hog_the_loop(0.2)
+        finally:
+            lm.exit_request(token)
+
+    await asyncio.create_task(handler())
+    await asyncio.sleep(0.05)
+
+    stats = monitor.stats()
+    stall = stats["stalls"]["GET /v1/tasks/{task_id}"]
+    assert stall["count"] == 1 and stall["max_ms"] >= 150
+    assert any("_hog_the_loop" in line for line in stall["last_stack"])
+    assert stats["max_lag_ms"] >= 150
+
+
+async def test_watchdog_survives_a_failed_capture(monitor, monkeypatch):
+    calls = []
+
+    def broken():
+        calls.append(1)
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr(monitor, "_capture", broken)
+    monitor.start()
+    for _ in range(2):
+        _hog_the_loop(0.15)
+        await asyncio.sleep(0.03)
+    assert len(calls) == 2 and monitor._thread.is_alive()
+
+
+async def test_sync_call_on_loop_is_counted_by_site(monitor, sync_client):
+    for _ in range(2):
+        sync_client.from_("tasks").select("*").execute()
+
+    [entry] = monitor.stats()["blocking_calls"]
+    assert entry["count"] == 2
+    assert "test_sync_call_on_loop_is_counted_by_site" in entry["site"]
+    assert entry["route"] == "background"
+
+
+async def test_strict_mode_fails_sync_io_on_loop_only(monitor, sync_client):
+    monitor.strict = True
+    with pytest.raises(lm.BlockingCallOnLoop):
+        sync_client.from_("tasks").select("*").execute()
+
+    # the same call from a worker thread is fine
+    result = await asyncio.to_thread(sync_client.from_("tasks").select("*").execute)
+    assert result.data[0]["task_id"] == "T0001"
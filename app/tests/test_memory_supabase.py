@@ -0,0 +1,125 @@
+"""
+Test cases for the in-memory Supabase backend, driven through the real clients.
+"""
+import time
+
+import pytest
+from postgrest.exceptions import APIError
+from supabase import create_client
+
+import app.core.db.async_client as async_client
+import app.core.db.supabase_db as supabase_db
+from app.core.db.memory_supabase import (
+    MEMORY_SUPABASE_KEY,
+    MEMORY_SUPABASE_URL,
+    MemoryDatabase,
+    MemorySupabaseTransport,
+)
+from app.core.db.resilience import BreakerRegistry
+from app.services import rbac
+
+
+@pytest.fixture
+def db():
+    db = MemoryDatabase()
+    db.seed("organizations", [{"org_id": "O0001", "name": "Acme"}])
+    db.seed("projects", [{"project_id": "P0001", "org_id": "O0001", "name": "Apollo"}])
+    db.seed("tasks", [
+        {"task_id": "T0001", "project_id": "P0001", "org_id": "O0001", "title": "Write docs", "status": "completed"},
+        {"task_id": "T0002", "project_id": "P0001", "org_id": "O0001", "title": "Fix login", "status": "in_progress"},
+        {"task_id": "T0003", "project_id": "P0001", "org_id": "O0001", "title": "Fix logout", "status": "not_started", "is_subtask": True},
+    ])
+    return db
+
+
+@pytest.fixture
+def client(db):
+    client = create_client(MEMORY_SUPABASE_URL, MEMORY_SUPABASE_KEY)
+    transport = MemorySupabaseTransport(db)
+    for session in (client.postgrest.session, client.storage.session, client.auth._http_client):
+        session._transport = transport
+    return client
+
+
+@pytest.fixture
+def memory_async_client(db, monkeypatch):
+    monkeypatch.setattr(async_client, "SUPABASE_BACKEND", "memory")
+    monkeypatch.setattr(async_client, "_transport", MemorySupabaseTransport(db))
+    monkeypatch.setattr(async_client, "_client", async_client.AsyncSupabaseClient(MEMORY_SUPABASE_URL))
+    monkeypatch.setattr(supabase_db, "breakers", BreakerRegistry(failure_threshold=5, reset_timeout=1))
+    return async_client._client
+
+
+def test_filters_order_range_and_count(client):
+    result = (
+        client.from_("tasks").select("task_id,title", count="exact")
+        .eq("project_id", "P0001").ilike("title", "fix%")
+        .order("task_id", desc=True).range(0, 0).execute()
+    )
+    assert result.data == [{"task_id": "T0003", "title": "Fix logout"}]
+    assert result.count == 2
+
+    either = client.from_("tasks").select("task_id").or_("status.eq.completed,is_subtask.eq.true").execute()
+    assert sorted(r["task_id"] for r in either.data) == ["T0001", "T0003"]
+    assert len(client.from_("tasks").select("task_id").in_("task_id", ["T0001", "T0002", "T9999"]).execute().data) == 2
+
+
+def test_single_embeds_and_defaults(client):
+    task = client.from_("tasks").select("task_id, project:project_id(name)").eq("task_id", "T0002").single().execute()
+    assert task.data == {"task_id": "T0002", "project": {"name": "Apollo"}}
+
+    project = client.from_("projects").select("*").eq("project_id", "P0001").single().execute().data
+    assert project["is_active"] is True and project["created_at"]
+
+    with pytest.raises(APIError) as exc:
+        client.from_("tasks").select("*").eq("task_id", "T9999").single().execute()
+    assert exc.value.code == "PGRST116"
+    assert client.from_("tasks").select("*").eq("task_id", "T9999").maybe_single().execute() is None
+
+
+def test_writes(client, db):
+    with pytest.raises(APIError) as exc:
+        client.from_("tasks").insert({"task_id": "T0001", "project_id": "P0001"}).execute()
+    assert exc.value.code == "23505"
+
+    updated = client.from_("tasks").update({"status": "completed"}).eq("task_id", "T0002").execute().data
+    assert updated[0]["status"] == "completed"
+    client.from_("tasks").upsert({"task_id": "T0004", "project_id": "P0001", "title": "New"}).execute()
+    client.from_("tasks").upsert({"task_id": "T0004", "title": "Renamed"}).execute()
+    assert db.rows_for("tasks", []) and client.from_("tasks").select("title").eq("task_id", "T0004").execute().data == [{"title": "Renamed"}]
+
+    deleted = client.from_("tasks").delete().eq("task_id", "T0004").execute().data
+    assert [r["task_id"] for r in deleted] == ["T0004"]
+    assert client.from_("tasks").select("task_id").eq("task_id", "T0004").execute().data == []
+
+
+def test_views_are_computed_from_base_tables(client):
+    card = client.from_("project_card_view").select("*").eq("project_id", "P0001").single().execute().data
+    # sub-tasks are not counted
+    assert (card["tasks_total"], card["tasks_completed"], card["progress_percent"]) == (2, 1, 50.0)
+
+
+def test_rpc_storage_and_auth_admin(client, db):
+    user = db.add_auth_user(email="ada@example.com", user_metadata={"username": "ada"})
+    assert client.rpc("get_auth_user", {"p_username": "ada"}).execute().data[0]["id"] == user["id"]
+    assert client.auth.admin.get_user_by_id(user["id"]).user.email == "ada@example.com"
+
+    bucket = client.storage.from_("avatars")
+    bucket.upload("u1/avatar.png", b"png", {"content-type": "image/png"})
+    assert [f["name"] for f in bucket.list("u1")] == ["avatar.png"]
+    assert bucket.get_public_url("u1/avatar.png").startswith(f"{MEMORY_SUPABASE_URL}/storage/v1/object/public/avatars/u1/avatar.png")
+    assert [r["name"] for r in bucket.remove(["u1/avatar.png"])] == ["u1/avatar.png"]
+    assert bucket.list("u1") == []
+
+
+async def test_services_run_on_the_async_client(db, memory_async_client):
+    db.seed("organization_members", [{"user_id": "u1", "org_id": "O0001", "role": "admin"}])
+    assert await rbac.get_org_role("u1", "O0001") == "admin"
+    assert await rbac.get_org_by_proj("P0001") == "O0001"
+
+
+async def test_latency_is_injected(db, memory_async_client):
+    memory_async_client.postgrest.session._transport.latency = 0.05
+    started = time.perf_counter()
+    await memory_async_client.from_("tasks").select("task_id").execute()
+    assert time.perf_counter() - started >= 0.05
@@ -0,0 +1,116 @@
+"""
+Test cases for keyset (cursor) pagination of the list endpoints.
+"""
+import httpx
+import pytest
+from fastapi import FastAPI
+
+import app.core.db.async_client as async_client
+from app.api.v1.routes.organizations.org_rbac import org_rbac
+from app.api.v1.routes.tasks import comment_router, task_router
+from app.api.v1.routes.tester import tracker_router
+from app.core.db.memory_supabase import MemoryDatabase
+from app.services import task_comment_service, task_service, tracker_service
+from app.services.auth_handler import verify_token
+
+
+@pytest.fixture
+def client(monkeypatch, memory_supabase):
+    db = MemoryDatabase()
+    db.seed("organizations", [{"org_id": "O1", "name": "Acme"}])
+    db.seed("projects", [{"project_id": "P1", "org_id": "O1", "name": "Apollo"}])
+    db.seed("project_members", [{"user_id": "u1", "project_id": "P1", "role": "member"}])
+    db.seed("tasks", [
+        {
+            "task_id": f"T{i:03d}", "project_id": "P1", "org_id": "O1", "is_subtask": False,
+            "title": f"Task {i % 7}",  # plenty of ties
+            "due_date": None if i % 3 == 0 else f"2025-01-{i % 28 + 1:02d}",
+        }
+        for i in range(50)
+    ])
+    db.seed("task_comments", [
+        {"comment_id": f"C{i:02d}", "task_id": "T000", "content": f"root {i}", "created_at": f"2025-01-01T00:00:{i:02d}+00:00"}
+        for i in range(5)
+    ] + [
+        {"comment_id": "C99", "task_id": "T000", "content": "reply", "parent_comment_id": "C03", "created_at": "2025-01-02T00:00:00+00:00"},
+        {"comment_id": "C98", "task_id": "T000", "content": "reply to reply", "parent_comment_id": "C99", "created_at": "2025-01-03T00:00:00+00:00"},
+    ])
+    memory_supabase(db, task_service, task_comment_service, tracker_service)
+
+    app = FastAPI()
+    app.include_router(task_router.router, prefix="/tasks")
+    app.include_router(comment_router.router, prefix="/comments")
+    app.include_router(tracker_router.router, prefix="/trackers")
+    app.dependency_overrides[verify_token] = lambda: {"id": "u1", "username": "ada"}
+    app.dependency_overrides[org_rbac] = lambda: "member"
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://t")
+
+
+async def walk(client, url, **params):
+    pages, cursor = [], None
+    while True:
+        res = await client.get(url, params={**params, **({"cursor": cursor} if cursor else {})})
+        assert res.status_code == 200, res.text
+        pages.append(res.json())
+        cursor = res.headers.get("X-Next-Cursor")
+        if not cursor:
+            return pages
+
+
+@pytest.mark.parametrize("sort_by", ["title", "due_date"])
+@pytest.mark.parametrize("sort_order", ["asc", "desc"])
+async def test_pages_cover_every_task_once_in_order(client, sort_by, sort_order):
+    async with client:
+        everything = (await client.get("/tasks", params={"project_id": "P1", "sort_by": sort_by, "sort_order": sort_order})).json()
+        pages = await walk(client, "/tasks", project_id="P1", sort_by=sort_by, sort_order=sort_order, limit=8)
+    assert [len(p) for p in pages] == [8] * 6 + [2]
+    assert [t["task_id"] for page in pages for t in page] == [t["task_id"] for t in everything]
+
+
+async def test_pages_stay_full_when_tasks_are_filtered_by_access(client):
+    db = async_client._transport.db
+    db.seed("projects", [{"project_id": "P2", "org_id": "O1", "name": "Hidden"}])
+    db.seed("tasks", [
+        {"task_id": f"H{i:03d}", "project_id": "P2", "org_id": "O1", "is_subtask": False, "title": f"Task {i % 7}"}
+        for i in range(30)
+    ])
+    transport = async_client._transport
+    async with client:
+        pages = await walk(client, "/tasks", sort_by="title", limit=8)
+    assert [len(p) for p in pages] == [8] * 6 + [2]
+    ids = [t["task_id"] for page in pages for t in page]
+    assert sorted(ids) == [f"T{i:03d}" for i in range(50)]
+    # One query per page plus the (cached) role lookup; hidden rows are never read
+    assert transport.requests <= len(pages) + 3
+
+
+async def test_member_tracker_pages_stay_full(client):
+    db = async_client._transport.db
+    db.seed("projects", [{"project_id": "P2", "org_id": "O1", "name": "Hidden"}])
+    db.seed("test_trackers", [
+        {"tracker_id": f"TR{i:03d}", "org_id": "O1", "project_id": "P1" if i % 3 else "P2", "name": f"Tracker {i}", "project_name": "Apollo",
+         "creator_id": "00000000-0000-0000-0000-000000000001", "creator_name": "ada"}
+        for i in range(30)
+    ])
+    async with client:
+        pages = await walk(client, "/trackers/O1", sort_by="tracker_id", limit=5)
+    assert [len(p) for p in pages] == [5] * 4
+    assert {t["project_id"] for page in pages for t in page} == {"P1"}
+
+
+async def test_limit_is_capped_and_unknown_sorts_rejected(client, monkeypatch):
+    monkeypatch.setattr("app.utils.pagination.LIST_PAGE_SIZE_MAX", 20)
+    async with client:
+        capped = await client.get("/tasks", params={"project_id": "P1", "limit": 100000})
+        bad_sort = await client.get("/tasks", params={"project_id": "P1", "sort_by": "description"})
+        bad_cursor = await client.get("/tasks", params={"project_id": "P1", "cursor": "not-a-cursor"})
+    assert len(capped.json()) == 20 and capped.headers["X-Next-Cursor"]
+    assert (bad_sort.status_code, bad_cursor.status_code) == (400, 400)
+
+
+async def test_comment_pages_nest_replies(client):
+    async with client:
+        pages = await walk(client, "/comments", task_id="T000", limit=2)
+    assert [[c["comment_id"] for c in page] for page in pages] == [["C00", "C01"], ["C02", "C03"], ["C04"]]
+    assert [r["comment_id"] for r in pages[1][1]["replies"]] == ["C99"]
+    assert [r["comment_id"] for r in pages[1][1]["replies"][0]["replies"]] == ["C98"]
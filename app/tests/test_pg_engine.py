@@ -0,0 +1,126 @@
+"""
+Test cases for the direct asyncpg read path.
+
+The integration tests run only when PG_TEST_DSN points at a local Postgres;
+they build a database from supabase/migrations and compare the rows the
+direct path returns with the JSON shapes PostgREST produces.
+"""
+import asyncio
+import datetime
+import decimal
+import uuid
+
+import pytest
+
+from app.core.db import pg_engine
+from app.tests.pg_test_db import PG_TEST_DSN, create_test_database
+
+
+def test_json_shapes_match_postgrest():
+    tz = datetime.timezone.utc
+    assert pg_engine.to_json_value(datetime.datetime(2025, 9, 1, 12, 30, 5, 120000, tzinfo=tz)) == "2025-09-01T12:30:05.120000+00:00"
+    assert pg_engine.to_json_value(datetime.date(2025, 9, 1)) == "2025-09-01"
+    assert pg_engine.to_json_value(uuid.UUID("12345678-1234-5678-1234-567812345678")) == "12345678-1234-5678-1234-567812345678"
+    assert pg_engine.to_json_value(decimal.Decimal("4")) == 4
+    assert pg_engine.to_json_value(decimal.Decimal("4.5")) == 4.5
+    assert pg_engine.to_json_value(datetime.timedelta(hours=2, minutes=30)) == "02:30:00"
+    assert pg_engine.to_json_value(datetime.timedelta(days=1, hours=2)) == "1 day 02:00:00"
+    assert pg_engine.to_json_value(datetime.timedelta(days=3)) == "3 days"
+    assert pg_engine.to_json_value([datetime.date(2025, 1, 2), None]) == ["2025-01-02", None]
+    assert pg_engine.to_json_value({"due": datetime.date(2025, 1, 2)}) == {"due": "2025-01-02"}
+
+
+def test_quote_ident_rejects_injection():
+    assert pg_engine.quote_ident("updated_at") == '"updated_at"'
+    for bad in ['title"; DROP TABLE tasks; --', "Title", "a b", ""]:
+        with pytest.raises(ValueError):
+            pg_engine.quote_ident(bad)
+
+
+def test_selected_per_function(monkeypatch):
+    monkeypatch.setattr(pg_engine, "DATABASE_URL", "postgresql://localhost/db")
+    monkeypatch.setattr(pg_engine, "PG_DIRECT_FUNCTIONS", {"get_task"})
+    assert pg_engine.pg_enabled("get_task")
+    assert not pg_engine.pg_enabled("search_bugs")
+
+    monkeypatch.setattr(pg_engine, "PG_DIRECT_FUNCTIONS", {"*"})
+    assert pg_engine.pg_enabled("search_bugs")
+
+    monkeypatch.setattr(pg_engine, "DATABASE_URL", None)
+    assert not pg_engine.pg_enabled("get_task")
+
+
+async def test_concurrent_first_use_opens_one_pool(monkeypatch):
+    created = []
+
+    class FakeAsyncpg:
+        @staticmethod
+        async def create_pool(*args, **kwargs):
+            await asyncio.sleep(0.01)
+            created.append(object())
+            return created[-1]
+
+    monkeypatch.setattr(pg_engine, "asyncpg", FakeAsyncpg)
+    monkeypatch.setattr(pg_engine, "_pool", None)
+    monkeypatch.setattr(pg_engine, "_pool_lock", asyncio.Lock())
+    pools = await asyncio.gather(*(pg_engine.get_pg_pool() for _ in range(10)))
+    assert len(created) == 1
+    assert all(pool is created[0] for pool in pools)
+
+
+# ---------------------------------------------------------------------------
+# Against a real Postgres
+# ---------------------------------------------------------------------------
+
+requires_pg = pytest.mark.skipif(not PG_TEST_DSN, reason="PG_TEST_DSN not set")
+
+USER_ID = "11111111-1111-1111-1111-111111111111"
+
+_SEED = f"""
+INSERT INTO organizations (org_id, name) VALUES ('O1', 'Org');
+INSERT INTO projects (project_id, name, org_id) VALUES ('P1', 'Project', 'O1');
+INSERT INTO organization_members (user_id, org_id, role) VALUES ('{USER_ID}', 'O1', 'admin');
+INSERT INTO tasks (task_id, project_id, org_id, title, status, due_date, tags)
+VALUES ('T1', 'P1', 'O1', 'Alpha', 'in_progress', '2025-09-01', ARRAY['x']),
+       ('T2', 'P1', 'O1', 'Beta', 'not_started', NULL, '{{}}');
+"""
+
+
+@pytest.fixture
+async def pg_db(monkeypatch):
+    import asyncpg
+
+    dsn = await create_test_database()
+    conn = await asyncpg.connect(dsn)
+    await conn.execute(_SEED)
+    await conn.close()
+
+    monkeypatch.setattr(pg_engine, "DATABASE_URL", dsn)
+    monkeypatch.setattr(pg_engine, "PG_DIRECT_FUNCTIONS", {"*"})
+    yield dsn
+    await pg_engine.close_pg_pool()
+
+
+@requires_pg
+async def test_get_task_and_project_tasks(pg_db):
+    from app.services.task_service import get_task, get_tasks_for_project
+
+    task = (await get_task("T1")).data
+    assert task["task_id"] == "T1"
+    assert task["status"] == "in_progress"
+    assert task["due_date"] == "2025-09-01"
+    assert task["tags"] == ["x"]
+    assert (await get_task("missing")).data is None
+
+    rows = await get_tasks_for_project("P1", sort_by="title", sort_order="desc")
+    assert [r["task_id"] for r in rows] == ["T2", "T1"]
+    rows = await get_tasks_for_project("P1", search="alp", status="in_progress", org_id="O1")
+    assert [r["task_id"] for r in rows] == ["T1"]
+
+
+@requires_pg
+async def test_get_org_role(pg_db):
+    from app.services.rbac import get_org_role
+
+    assert await get_org_role(USER_ID, "O1") == "admin"
+    assert await get_org_role(USER_ID, "O2") is None
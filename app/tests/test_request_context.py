@@ -0,0 +1,63 @@
+"""
+Test cases for the request-scoped auth/RBAC context.
+"""
+import httpx
+import pytest
+from fastapi import Depends, FastAPI
+
+from app.api.v1.routes.organizations.org_rbac import org_rbac
+from app.services import auth_handler, rbac
+from app.services.auth_handler import RequestContext, get_current_user, get_request_context, verify_token
+
+
+@pytest.fixture
+def calls(monkeypatch):
+    calls = {"authenticate": 0, "org_role": 0}
+
+    async def authenticate(authorization):
+        calls["authenticate"] += 1
+        if not authorization:
+            raise auth_handler.HTTPException(status_code=401, detail="Missing authorization header")
+        return {"id": "u1", "username": "ada", "email": None}
+
+    async def get_org_role(user_id, org_id):
+        calls["org_role"] += 1
+        return "admin" if org_id == "O1" else None
+
+    monkeypatch.setattr(auth_handler, "authenticate", authenticate)
+    monkeypatch.setattr(rbac, "get_org_role", get_org_role)
+    return calls
+
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+
+    @app.post("/things")
+    async def create_thing(
+        user=Depends(verify_token),
+        role=Depends(org_rbac),
+        current=Depends(get_current_user),
+        ctx: RequestContext = Depends(get_request_context),
+    ):
+        body = await ctx.body()
+        again = await ctx.org_role(body["org_id"])
+        return {"user": user["id"], "role": role, "again": again, "same_user": current is user}
+
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://t")
+
+
+async def test_auth_work_is_done_once_per_request(client, calls):
+    async with client:
+        res = await client.post("/things", json={"org_id": "O1"}, headers={"Authorization": "Bearer x"})
+    assert res.status_code == 200
+    assert res.json() == {"user": "u1", "role": "admin", "again": "admin", "same_user": True}
+    assert calls["authenticate"] == 1 and calls["org_role"] == 1
+
+
+async def test_rbac_rejections(client, calls):
+    async with client:
+        no_token = await client.post("/things", json={})
+        no_org = await client.post("/things", json={}, headers={"Authorization": "Bearer x"})
+        other_org = await client.post("/things", json={"org_id": "O2"}, headers={"Authorization": "Bearer x"})
+    assert (no_token.status_code, no_org.status_code, other_org.status_code) == (401, 400, 403)
@@ -0,0 +1,166 @@
+"""
+Test cases for error classification, retry budget and circuit breaking in
+safe_supabase_operation.
+"""
+import httpx
+import pytest
+from fastapi import HTTPException
+from postgrest.exceptions import APIError
+
+import app.core.db.supabase_db as supabase_db
+from app.core.db.resilience import (
+    BreakerRegistry, CircuitBreaker, CircuitOpenError, ErrorKind, RetryBudget,
+    backoff_delay, classify_error, record_target, target_for_path,
+)
+from app.core.db.telemetry import instrument_session
+
+
+@pytest.fixture(autouse=True)
+def fresh_state(monkeypatch):
+    monkeypatch.setattr(supabase_db, "breakers", BreakerRegistry(failure_threshold=3, reset_timeout=0.2))
+    monkeypatch.setattr(supabase_db, "retry_budget", RetryBudget(ratio=0.2, min_per_second=0, capacity=10))
+    monkeypatch.setattr(supabase_db, "DB_RETRY_MAX_DELAY", 0.01)
+
+
+def test_classify_error():
+    assert classify_error(httpx.ConnectError("refused")) == ErrorKind.TRANSIENT
+    assert classify_error(httpx.RemoteProtocolError("closed")) == ErrorKind.TRANSIENT
+    assert classify_error(ConnectionResetError()) == ErrorKind.TRANSIENT
+    assert classify_error(APIError({"code": "PGRST001", "message": "no connection"})) == ErrorKind.TRANSIENT
+    assert classify_error(APIError({"code": 503, "message": "JSON could not be generated"})) == ErrorKind.TRANSIENT
+    assert classify_error(APIError({"code": "57014", "message": "statement timeout"})) == ErrorKind.FAILURE
+    assert classify_error(APIError({"code": "23505", "message": "duplicate key"})) == ErrorKind.PERMANENT
+    # A message that merely mentions a transport error is not transient
+    assert classify_error(ValueError("RemoteProtocolError")) == ErrorKind.PERMANENT
+
+
+def test_backoff_has_full_jitter_and_cap():
+    delays = [backoff_delay(4, 0.1, 1.0) for _ in range(200)]
+    assert all(0 <= d <= 1.0 for d in delays)
+    assert len(set(delays)) > 100
+
+
+def test_retry_budget_drains():
+    budget = RetryBudget(ratio=0.5, min_per_second=0, capacity=2)
+    assert budget.try_withdraw() and budget.try_withdraw()
+    assert not budget.try_withdraw()
+    budget.deposit()
+    budget.deposit()
+    assert budget.try_withdraw()
+    assert budget.stats()["denied"] == 1
+
+
+def test_breaker_opens_and_half_opens(monkeypatch):
+    breaker = CircuitBreaker("tasks", failure_threshold=2, reset_timeout=10)
+    for _ in range(2):
+        breaker.before_call()
+        breaker.on_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+    breaker._opened_at -= 10
+    breaker.before_call()  # the single half-open probe
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+    breaker.on_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+async def test_transient_error_is_retried():
+    calls = []
+
+    def op():
+        record_target("tasks")
+        calls.append(1)
+        if len(calls) < 3:
+            raise httpx.ReadError("reset")
+        return "ok"
+
+    assert await supabase_db.safe_supabase_operation(op, "fetch", backoff_seconds=0.001) == "ok"
+    assert len(calls) == 3
+    assert supabase_db.breakers.get("tasks").state == CircuitBreaker.CLOSED
+
+
+async def test_permanent_error_is_not_retried():
+    calls = []
+
+    def op():
+        calls.append(1)
+        raise APIError({"code": "23505", "message": "duplicate key"})
+
+    with pytest.raises(HTTPException) as exc:
+        await supabase_db.safe_supabase_operation(op, "insert")
+    assert exc.value.status_code == 500
+    assert len(calls) == 1
+
+
+async def test_open_breaker_fails_fast_without_calling_supabase():
+    calls = []
+
+    def op():
+        record_target("bugs")
+        calls.append(1)
+        raise httpx.ConnectError("refused")
+
+    with pytest.raises(HTTPException):
+        await supabase_db.safe_supabase_operation(op, "fetch bugs", backoff_seconds=0.001)
+    assert supabase_db.breakers.get("bugs").state == CircuitBreaker.OPEN
+    attempts = len(calls)
+
+    with pytest.raises(HTTPException) as exc:
+        await supabase_db.safe_supabase_operation(op, "fetch bugs")
+    assert exc.value.status_code == 503
+    assert "Retry-After" in exc.value.headers
+    assert len(calls) == attempts
+
+
+async def test_retry_budget_limits_retries():
+    supabase_db.retry_budget = RetryBudget(ratio=0, min_per_second=0, capacity=1)
+    calls = []
+
+    def op():
+        calls.append(1)
+        raise httpx.ReadError("reset")
+
+    with pytest.raises(HTTPException) as exc:
+        await supabase_db.safe_supabase_operation(op, "fetch", retries=5, backoff_seconds=0.001)
+    assert exc.value.status_code == 503
+    assert len(calls) == 2
+
+
+async def test_target_comes_from_the_request_not_the_builder():
+    # The request is built before safe_supabase_operation runs, as with coalesced queries
+    calls = []
+
+    def handler(request):
+        calls.append(request.url.path)
+        return httpx.Response(503, json={"message": "unavailable"})
+
+    session = instrument_session(httpx.Client(transport=httpx.MockTransport(handler), base_url="http://pg/rest/v1"))
+    request = session.build_request("GET", "/late_bound", params={"select": "*"})
+
+    def op():
+        response = session.send(request)
+        raise APIError({"code": response.status_code, "message": "unavailable"})
+
+    with pytest.raises(HTTPException):
+        await supabase_db.safe_supabase_operation(op, "fetch", backoff_seconds=0.001)
+    assert supabase_db.breakers.get("late_bound").state == CircuitBreaker.OPEN
+    attempts = len(calls)
+
+    # Open breaker: rejected in the request hook, before anything is sent
+    with pytest.raises(HTTPException) as exc:
+        await supabase_db.safe_supabase_operation(op, "fetch")
+    assert exc.value.status_code == 503
+    assert "Retry-After" in exc.value.headers
+    assert len(calls) == attempts
+    session.close()
+
+
+def test_target_for_path():
+    assert target_for_path("/rest/v1/tasks") == "tasks"
+    assert target_for_path("/rest/v1/rpc/get_effective_role") == "rpc/get_effective_role"
+    assert target_for_path("/storage/v1/object/avatars/a.png") == "storage"
+    assert target_for_path("/auth/v1/user") is None
@@ -0,0 +1,90 @@
+"""
+Test cases for the membership role cache and its write-through invalidation.
+"""
+import pytest
+
+from app.core.db.memory_supabase import MemoryDatabase
+from app.services import organization_member_service, project_member_service, rbac
+
+
+@pytest.fixture
+def transport(monkeypatch, memory_supabase):
+    db = MemoryDatabase()
+    db.seed("organizations", [{"org_id": "O1", "name": "Acme"}])
+    db.seed("projects", [{"project_id": "P1", "org_id": "O1", "name": "Apollo"}])
+    db.seed("organization_members", [
+        {"user_id": "admin-1", "org_id": "O1", "role": "admin"},
+        {"user_id": "user-2", "org_id": "O1", "role": "member"},
+    ])
+    transport = memory_supabase(db, organization_member_service, project_member_service).transport
+    return transport
+
+
+async def test_roles_and_misses_are_cached(transport):
+    assert await rbac.get_project_role("user-2", "P1") is None
+    assert await rbac.get_org_role("user-2", "O1") == "member"
+    calls = transport.requests
+    assert await rbac.get_project_role("user-2", "P1") is None
+    assert await rbac.get_org_role("user-2", "O1") == "member"
+    assert transport.requests == calls
+
+
+async def test_project_member_writes_invalidate(transport):
+    assert await rbac.get_project_role("user-2", "P1") is None
+
+    await project_member_service.create_project_member({"user_id": "user-2", "project_id": "P1", "role": "member"})
+    assert await rbac.get_project_role("user-2", "P1") == "member"
+
+    await project_member_service.delete_project_member("user-2", "P1")
+    assert await rbac.get_project_role("user-2", "P1") is None
+
+
+async def test_org_role_change_revokes_inherited_project_role(transport):
+    assert await rbac.get_project_role("admin-1", "P1") == "admin"
+
+    await organization_member_service.update_organization_member("admin-1", "O1", {"role": "member"})
+    assert await rbac.get_org_role("admin-1", "O1") == "member"
+    assert await rbac.get_project_role("admin-1", "P1") is None
+
+
+def test_stale_lookup_does_not_overwrite_invalidation(monkeypatch):
+    cache = rbac.RoleCache(ttl=30, negative_ttl=10, maxsize=10)
+    monkeypatch.setattr(rbac, "role_cache", cache)
+    generation = cache.generation
+    rbac.invalidate_project_role("user-2", "P1")  # lands while the lookup is in flight
+    cache.put(("project", "user-2", "P1"), "owner", generation)
+    assert cache.get(("project", "user-2", "P1")) == (False, None)
+
+
+async def test_membership_changes_from_other_workers_clear_the_cache(transport, monkeypatch):
+    db = transport.db
+    db.seed("role_cache_generation", [{"id": 1, "generation": 7}])
+    monkeypatch.setattr(rbac, "role_cache", rbac.RoleCache(ttl=30, negative_ttl=10, maxsize=100, sync_interval=0))
+    assert await rbac.get_org_role("admin-1", "O1") == "admin"
+    assert await rbac.get_project_role("admin-1", "P1") == "admin"
+
+    # another worker demotes the admin: the trigger bumps the generation
+    with db.lock:
+        next(r for r in db.rows_for("organization_members", []) if r["user_id"] == "admin-1")["role"] = "member"
+    assert await rbac.get_project_role("admin-1", "P1") == "admin"  # this worker can't know yet
+    with db.lock:
+        db.rows_for("role_cache_generation", [])[0]["generation"] = 8
+    assert await rbac.get_project_role("admin-1", "P1") is None
+    assert await rbac.get_org_role("admin-1", "O1") == "member"
+
+
+async def test_failed_generation_check_drops_the_cache():
+    cache = rbac.RoleCache(ttl=30, negative_ttl=10, maxsize=10, sync_interval=0)
+
+    async def stamp():
+        return 1
+    await cache.sync(stamp)
+    cache.put(("org", "user-2", "O1"), "admin", cache.generation)
+
+    async def unreachable():
+        raise RuntimeError("table missing")
+    await cache.sync(unreachable)
+    assert cache.get(("org", "user-2", "O1")) == (False, None)
+    assert cache.sync_failing
+    await cache.sync(stamp)
+    assert not cache.sync_failing
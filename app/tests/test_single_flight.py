@@ -0,0 +1,76 @@
+"""
+Test cases for single-flight coalescing of identical concurrent reads.
+"""
+import asyncio
+
+import pytest
+from postgrest import AsyncPostgrestClient
+
+from app.core.db.single_flight import SingleFlight, query_fingerprint
+
+
+def _client():
+    return AsyncPostgrestClient("http://localhost/rest/v1")
+
+
+def test_fingerprint_matches_identical_reads_only():
+    """Same table/filters/projection share a key; anything else does not."""
+    pg = _client()
+    a = pg.from_("tasks").select("*").eq("project_id", "P1").eq("status", "open")
+    b = pg.from_("tasks").select("*").eq("status", "open").eq("project_id", "P1")
+    assert query_fingerprint(a) == query_fingerprint(b)
+
+    assert query_fingerprint(a) != query_fingerprint(pg.from_("tasks").select("title").eq("project_id", "P1").eq("status", "open"))
+    assert query_fingerprint(a) != query_fingerprint(pg.from_("tasks").select("*").eq("project_id", "P2").eq("status", "open"))
+    single = pg.from_("tasks").select("*").eq("project_id", "P1").eq("status", "open").single()
+    assert query_fingerprint(a) != query_fingerprint(single)
+
+
+def test_fingerprint_skips_writes_and_rpc():
+    pg = _client()
+    assert query_fingerprint(pg.from_("tasks").insert({"title": "x"})) is None
+    assert query_fingerprint(pg.from_("tasks").update({"title": "x"}).eq("task_id", "T1")) is None
+    assert query_fingerprint(pg.rpc("fn", {})) is None
+
+
+async def test_concurrent_callers_share_one_call():
+    """Followers wait on the leader's call and each get their own copy."""
+    flight = SingleFlight()
+    calls = 0
+
+    async def fetch():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        return {"data": [{"id": 1}]}
+
+    results = await asyncio.gather(*(flight.do("k", fetch) for _ in range(10)))
+    assert calls == 1
+    assert all(r == {"data": [{"id": 1}]} for r in results)
+    results[0]["data"].append({"id": 2})
+    assert results[1] == {"data": [{"id": 1}]}
+    assert flight.stats() == {"leaders": 1, "hits": 9, "in_flight": 0}
+
+    # Once the flight has landed the next caller starts a fresh one
+    await flight.do("k", fetch)
+    assert calls == 2
+
+
+async def test_errors_fan_out_and_cancelled_waiter_does_not_cancel_call():
+    flight = SingleFlight()
+    started = asyncio.Event()
+
+    async def failing():
+        started.set()
+        await asyncio.sleep(0.05)
+        raise RuntimeError("boom")
+
+    leader = asyncio.ensure_future(flight.do("k", failing))
+    await started.wait()
+    follower = asyncio.ensure_future(flight.do("k", failing))
+    await asyncio.sleep(0)
+    leader.cancel()
+
+    with pytest.raises(RuntimeError):
+        await follower
+    assert flight.stats()["in_flight"] == 0
@@ -0,0 +1,117 @@
+"""
+Test cases for batch task creation (POST /tasks/batch).
+"""
+import httpx
+import pytest
+from fastapi import FastAPI
+
+from app.api.v1.routes.tasks import task_router
+from app.core.db.memory_supabase import MemoryDatabase
+from app.services import rbac, task_history_service, task_service
+from app.services.auth_handler import verify_token
+
+
+@pytest.fixture
+def db(monkeypatch, memory_supabase):
+    db = MemoryDatabase()
+    db.seed("organizations", [{"org_id": "O1", "name": "Acme"}])
+    db.seed("projects", [
+        {"project_id": "P1", "org_id": "O1", "name": "Apollo"},
+        {"project_id": "P2", "org_id": "O1", "name": "Gemini"},
+    ])
+    db.seed("project_members", [{"user_id": "u1", "project_id": "P1", "role": "member"}])
+    memory_supabase(db, task_service, task_history_service)
+    monkeypatch.setattr(rbac, "RBAC_DB_FUNCTIONS", True)
+    return db
+
+
+@pytest.fixture
+def emails(monkeypatch):
+    sent = []
+
+    async def send_task_assignments_email(assignee, tasks, assigned_by):
+        sent.append((assignee, [task["title"] for task in tasks]))
+
+    monkeypatch.setattr(task_router, "send_task_assignments_email", send_task_assignments_email)
+    return sent
+
+
+def make_client():
+    app = FastAPI()
+    app.include_router(task_router.router, prefix="/tasks")
+    app.dependency_overrides[verify_token] = lambda: {"id": "u1", "username": "ada"}
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://t")
+
+
+async def test_batch_creates_in_bulk_and_reports_per_item(db, emails):
+    payload = [
+        {"project_id": "P1", "title": "One", "assignee": "bob"},
+        {"project_id": "P1"},  # missing title
+        {"project_id": "P2", "title": "Not mine"},
+        {"project_id": "P1", "title": "Two", "assignee": "bob"},
+        {"project_id": "P1", "title": "Three"},
+    ]
+    async with make_client() as client:
+        res = await client.post("/tasks/batch", json=payload)
+
+    assert res.status_code == 200
+    body = res.json()
+    assert (body["created"], body["failed"]) == (3, 2)
+    assert [r["ok"] for r in body["results"]] == [True, False, False, True, True]
+    assert body["results"][1]["error"][0]["loc"] == ["title"]
+    assert body["results"][2]["error"] == "Not a member of this project"
+
+    # role check + one tasks insert + one history upsert
+    assert db.transport.requests == 3
+    assert len(db.rows_for("tasks_history", [])) == 3
+    assert emails == [("bob", ["One", "Two"])]
+
+
+async def test_batch_limit(db, emails, monkeypatch):
+    monkeypatch.setattr(task_router, "TASK_BATCH_MAX_ITEMS", 2)
+    async with make_client() as client:
+        res = await client.post("/tasks/batch", json=[{"project_id": "P1", "title": str(i)} for i in range(3)])
+    assert res.status_code == 413
+
+
+async def test_rejected_bulk_insert_falls_back_to_rows(db):
+    items = [
+        {"project_id": "P1", "title": "Good"},
+        {"project_id": "P1", "title": "Bad", "no_such_column": 1},
+    ]
+    results = await task_service.create_tasks_bulk(items)
+    assert [r["ok"] for r in results] == [True, False]
+    assert [row["title"] for row in db.rows_for("tasks", [])] == ["Good"]
+
+
+async def test_assignment_email_escapes_titles_and_links(monkeypatch):
+    from app.api.v1.routes.emails import email_routes
+
+    mails = []
+
+    async def get_user_details_by_username(username):
+        return {"email": f"{username}@example.com"}
+
+    async def send_mail_to_user(email, subject, html_content):
+        mails.append(html_content)
+
+    monkeypatch.setattr(email_routes, "get_user_details_by_username", get_user_details_by_username)
+    monkeypatch.setattr(email_routes, "send_mail_to_user", send_mail_to_user)
+    await email_routes.send_task_assignments_email("bob", [
+        {"task_id": 'T1"><script>', "org_id": "O1&x=1", "title": "<img src=x onerror=alert(1)>"},
+    ], "<b>ada</b>")
+
+    (body,) = mails
+    assert "<img" not in body and "&lt;img src=x onerror=alert(1)&gt;" in body
+    assert "<b>ada</b>" not in body and "&lt;b&gt;ada&lt;/b&gt;" in body
+    assert "/tasks/T1%22%3E%3Cscript%3E?org_id=O1%26x%3D1" in body
+
+
+async def test_batch_with_nothing_to_create_skips_the_insert(db, emails):
+    async with make_client() as client:
+        res = await client.post("/tasks/batch", json=[{"project_id": "P2", "title": "Not mine"}, {"project_id": "P1"}])
+
+    assert res.status_code == 200
+    assert (res.json()["created"], res.json()["failed"]) == (0, 2)
+    assert db.transport.requests == 1  # the role check only
+    assert db.rows_for("tasks", []) == [] and emails == []
@@ -0,0 +1,68 @@
+"""
+Test cases for paged and latest-N task history reads.
+"""
+import datetime
+
+import httpx
+import pytest
+from fastapi import FastAPI
+
+from app.api.v1.routes.tasks import history_router
+from app.core.db.memory_supabase import MemoryDatabase
+from app.services import task_history_service
+from app.services.auth_handler import verify_token
+from app.utils.history_utils import normalize_metadata
+
+
+@pytest.fixture
+def db(monkeypatch, memory_supabase):
+    db = MemoryDatabase()
+    db.seed("tasks_history", [
+        {"history_id": f"H{i:03d}", "task_id": "T1", "action": "updated", "title": "Task", "created_by": "ada",
+         "metadata": [{"field": "title", "old": str(i), "new": str(i + 1)}],
+         # pairs of events share a timestamp, so the history_id tiebreak matters
+         "created_at": f"2025-01-01T00:00:{i // 2:02d}+00:00"}
+        for i in range(25)
+    ])
+    memory_supabase(db, task_history_service)
+    return db
+
+
+def make_client():
+    app = FastAPI()
+    app.include_router(history_router.router, prefix="/task-history")
+    app.dependency_overrides[verify_token] = lambda: {"id": "u1", "username": "ada"}
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://t")
+
+
+async def test_history_pages_newest_first(db):
+    pages, cursor = [], None
+    async with make_client() as client:
+        while True:
+            res = await client.get("/task-history", params={"task_id": "T1", "limit": 10, **({"cursor": cursor} if cursor else {})})
+            assert res.status_code == 200, res.text
+            pages.append([row["history_id"] for row in res.json()])
+            cursor = res.headers.get("X-Next-Cursor")
+            if not cursor:
+                break
+    assert [len(p) for p in pages] == [10, 10, 5]
+    assert [h for p in pages for h in p] == [f"H{i:03d}" for i in reversed(range(25))]
+
+
+async def test_latest_events(db):
+    async with make_client() as client:
+        res = await client.get("/task-history/latest", params={"task_id": "T1", "n": 3})
+    rows = res.json()
+    assert [row["history_id"] for row in rows] == ["H024", "H023", "H022"]
+    assert rows[0]["metadata"] == [{"field": "title", "old": "24", "new": "25"}]
+    assert "hash_id" not in rows[0]
+
+
+def test_metadata_is_normalized_at_write_time():
+    assert normalize_metadata('[{"field": "a"}, "{\\"field\\": \\"b\\"}", 3]') == [{"field": "a"}, {"field": "b"}]
+    row = task_history_service.build_history_row(
+        task_id="T1", action="updated", created_by="ada",
+        metadata={"field": "due_date", "old": None, "new": datetime.date(2025, 1, 2)},
+    )
+    assert row["metadata"] == [{"field": "due_date", "old": None, "new": "2025-01-02"}]
+    assert normalize_metadata(None) == [] and normalize_metadata("not json") == []
@@ -0,0 +1,93 @@
+"""
+Test cases for atomic batch subtask/dependency changes (POST /tasks/links).
+"""
+import httpx
+import pytest
+from fastapi import FastAPI
+
+from app.api.v1.routes.tasks import task_router
+from app.core.db.memory_supabase import MemoryDatabase
+from app.services import dependency_graph, task_service
+from app.services.auth_handler import verify_token
+
+
+def task(task_id, project_id="P1", **extra):
+    return {"task_id": task_id, "project_id": project_id, "org_id": "O1", "title": task_id, "status": "not_started",
+            "sub_tasks": [], "dependencies": [], "is_subtask": False, **extra}
+
+
+@pytest.fixture
+def db(monkeypatch, memory_supabase):
+    db = MemoryDatabase()
+    db.seed("projects", [{"project_id": "P1", "org_id": "O1", "name": "Apollo"}, {"project_id": "P2", "org_id": "O1", "name": "Gemini"}])
+    db.seed("project_members", [{"user_id": "u1", "project_id": "P1", "role": "member"}])
+    db.seed("tasks", [
+        task("R"), task("A"), task("B"), task("D"),
+        task("S", sub_tasks=["C"]), task("C", is_subtask=True),
+        task("Z", project_id="P2"),
+    ])
+    memory_supabase(db, task_service, dependency_graph)
+    dependency_graph.dependency_graphs.clear()
+    yield db
+    dependency_graph.dependency_graphs.clear()
+
+
+def snapshot(db):
+    return {r["task_id"]: (r["sub_tasks"], r["dependencies"], r["is_subtask"]) for r in db.rows_for("tasks", [])}
+
+
+def make_client():
+    app = FastAPI()
+    app.include_router(task_router.router, prefix="/tasks")
+    app.dependency_overrides[verify_token] = lambda: {"id": "u1", "username": "ada"}
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://t")
+
+
+async def test_batch_applies_everything_in_one_write(db):
+    async with make_client() as client:
+        res = await client.post("/tasks/links", json=[
+            {"task_id": "R", "add_subtasks": ["A", "B"], "add_dependencies": ["D"]},
+            {"task_id": "S", "remove_subtasks": ["C"]},
+            {"task_id": "R", "add_subtasks": ["C"]},
+        ])
+    assert res.status_code == 200, res.text
+    tasks = snapshot(db)
+    assert tasks["R"] == (["A", "B", "C"], ["D"], False)
+    assert tasks["S"] == ([], [], False)
+    assert [tasks[t][2] for t in "ABC"] == [True, True, True]
+    history = {h["task_id"]: h["metadata"] for h in db.rows_for("tasks_history", [])}
+    assert history["S"] == [{"field": "sub_tasks", "old": ["C"], "new": []}]
+    assert [m["field"] for m in history["R"]] == ["sub_tasks", "dependencies"]
+    # task read, role check, dependency graph build, one transactional write
+    assert db.transport.requests == 4
+
+
+async def test_rejected_batches_write_nothing(db):
+    before = snapshot(db)
+    async with make_client() as client:
+        cycle = await client.post("/tasks/links", json=[
+            {"task_id": "A", "add_dependencies": ["B"]},
+            {"task_id": "B", "add_dependencies": ["A"]},
+        ])
+        invalid = await client.post("/tasks/links", json=[
+            {"task_id": "R", "add_subtasks": ["A", "nope"]},
+            {"task_id": "D", "add_dependencies": ["D"]},
+        ])
+        forbidden = await client.post("/tasks/links", json=[
+            {"task_id": "R", "add_subtasks": ["A"]},
+            {"task_id": "Z", "add_subtasks": ["B"]},
+        ])
+        # Z is in P2, where u1 is not a member: it can't be pulled into R's tree
+        foreign_child = await client.post("/tasks/links", json=[{"task_id": "R", "add_subtasks": ["Z"]}])
+        foreign_dependency = await client.post("/tasks/links", json=[{"task_id": "R", "add_dependencies": ["Z"]}])
+    assert cycle.status_code == 400 and "B -> A -> B" in cycle.json()["detail"]
+    assert invalid.status_code == 400
+    assert [e["task_id"] for e in invalid.json()["detail"]["errors"]] == ["R", "D"]
+    assert forbidden.status_code == 403
+    assert foreign_child.status_code == 403 and "Z" in foreign_child.json()["detail"]
+    assert foreign_dependency.status_code == 403
+    assert snapshot(db) == before
+    assert db.rows_for("tasks_history", []) == []
+    # the trial edges of the rejected batch were taken back out of the cached graph
+    graph = await dependency_graph.dependency_graphs.get("P1")
+    assert graph.prereqs.get("A", set()) == set() and graph.prereqs.get("B", set()) == set()
@@ -0,0 +1,105 @@
+"""
+Test cases for task tree hydration (GET /tasks/{task_id}/tree).
+"""
+import httpx
+import pytest
+from fastapi import FastAPI
+
+from app.api.v1.routes.tasks import task_router
+from app.core.db.memory_supabase import MemoryDatabase
+from app.services import task_service
+from app.services.auth_handler import verify_token
+
+
+def task(task_id, sub_tasks=(), dependencies=(), project_id="P1"):
+    return {"task_id": task_id, "project_id": project_id, "org_id": "O1", "title": task_id,
+            "status": "not_started", "sub_tasks": list(sub_tasks), "dependencies": list(dependencies),
+            "is_subtask": task_id != "R"}
+
+
+@pytest.fixture
+def db(monkeypatch, memory_supabase):
+    db = MemoryDatabase()
+    db.seed("projects", [{"project_id": "P1", "org_id": "O1", "name": "Apollo"}, {"project_id": "P2", "org_id": "O1", "name": "Gemini"}])
+    db.seed("project_members", [{"user_id": "u1", "project_id": "P1", "role": "member"}])
+    db.seed("tasks", [
+        task("R", sub_tasks=["A", "B"], dependencies=["X"]),
+        task("A", sub_tasks=["A1", "A2"]),
+        task("B", sub_tasks=["B1", "R"]),  # loops back to the root
+        task("A1", sub_tasks=["A1a"], dependencies=["B"]),
+        task("A2"), task("B1"), task("A1a"),
+        task("X", project_id="P2"),
+    ])
+    memory_supabase(db, task_service)
+    return db
+
+
+def ids(node):
+    return {node["task_id"]: [ids(child) for child in node["children"]]} if node["children"] else node["task_id"]
+
+
+async def test_tree_is_fetched_one_query_per_level(db):
+    tree = await task_service.get_task_tree("R", depth=2)
+    assert ids(tree["task"]) == {"R": [{"A": ["A1", "A2"]}, {"B": ["B1"]}]}
+    # levels R, A/B, A1/A2/B1 and one dependency lookup for X
+    assert db.transport.requests == 4
+    assert (tree["node_count"], tree["truncated"]) == (6, False)
+    assert [d["task_id"] for d in tree["task"]["dependency_tasks"]] == ["X"]
+    a1 = tree["task"]["children"][0]["children"][0]
+    assert a1["dependency_tasks"] == [{"task_id": "B", "title": "B", "status": "not_started", "project_id": "P1"}]
+
+
+async def test_node_limit_truncates(db):
+    tree = await task_service.get_task_tree("R", depth=5, include_dependencies=False, max_nodes=4)
+    assert (tree["node_count"], tree["truncated"]) == (4, True)
+    assert ids(tree["task"]) == {"R": [{"A": ["A1"]}, "B"]}
+    assert "dependency_tasks" not in tree["task"]
+
+
+async def test_tree_route(db):
+    app = FastAPI()
+    app.include_router(task_router.router, prefix="/tasks")
+    app.dependency_overrides[verify_token] = lambda: {"id": "u1", "username": "ada"}
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://t") as client:
+        ok = await client.get("/tasks/R/tree", params={"depth": 1})
+        missing = await client.get("/tasks/nope/tree")
+        forbidden = await client.get("/tasks/X/tree")
+    assert ids(ok.json()["task"]) == {"R": ["A", "B"]}
+    assert (missing.status_code, forbidden.status_code) == (404, 403)
+
+
+async def test_tree_route_checks_access_before_loading_the_subtree(db, monkeypatch):
+    db.seed("tasks", [task("S", sub_tasks=["S1", "S2"], project_id="P2"), task("S1", project_id="P2"), task("S2", project_id="P2")])
+    fetched = []
+    fetch = task_service._fetch_tasks_by_ids
+
+    async def recording_fetch(task_ids, *args):
+        fetched.append(list(task_ids))
+        return await fetch(task_ids, *args)
+    monkeypatch.setattr(task_service, "_fetch_tasks_by_ids", recording_fetch)
+    app = FastAPI()
+    app.include_router(task_router.router, prefix="/tasks")
+    app.dependency_overrides[verify_token] = lambda: {"id": "u1", "username": "ada"}
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://t") as client:
+        forbidden = await client.get("/tasks/S/tree", params={"depth": 5})
+    assert forbidden.status_code == 403
+    assert fetched == [["S"]]  # the root row only
+
+
+async def test_tree_leaves_out_tasks_the_user_cannot_access(db):
+    # A (P1) has a subtask in P2, whose own subtask is back in P1; R depends on X (P2)
+    db.seed("tasks", [task("A3", sub_tasks=["A3a"], project_id="P2"), task("A3a")])
+    with db.lock:
+        next(r for r in db.rows_for("tasks", []) if r["task_id"] == "A")["sub_tasks"] = ["A1", "A2", "A3"]
+    tree = await task_service.get_task_tree("R", depth=3, user_id="u1")
+    assert ids(tree["task"]) == {"R": [{"A": [{"A1": ["A1a"]}, "A2"]}, {"B": ["B1"]}]}
+    assert tree["task"]["dependency_tasks"] == []
+    assert tree["node_count"] == 7
+
+
+async def test_preloaded_root_is_not_fetched_again(db):
+    root = await task_service.get_task_row("R")
+    db.transport.requests = 0
+    tree = await task_service.get_task_tree("R", depth=2, root=root)
+    assert ids(tree["task"]) == {"R": [{"A": ["A1", "A2"]}, {"B": ["B1"]}]}
+    assert db.transport.requests == 3
@@ -0,0 +1,89 @@
+"""
+Test cases for the verify_token claim cache, plus a micro-benchmark.
+
+Run ``python -m pytest app/tests/test_token_cache.py -s`` to see the
+per-request timings printed by the benchmark.
+"""
+import time
+
+import jwt
+import pytest
+from fastapi import HTTPException
+
+from app.services import auth_handler
+from app.services.auth_handler import TokenClaimCache, verify_token
+
+SECRET = "test-secret"
+
+
+def _token(sub="user-1", exp_in=3600, **claims):
+    payload = {"sub": sub, "aud": "authenticated", "exp": int(time.time()) + exp_in,
+               "user_metadata": {"username": "ada", "email": "ada@example.com"}, **claims}
+    return jwt.encode(payload, SECRET, algorithm="HS256")
+
+
+@pytest.fixture(autouse=True)
+def fresh_cache(monkeypatch):
+    monkeypatch.setattr(auth_handler, "SUPABASE_SECRET_KEY", SECRET)
+    cache = TokenClaimCache(maxsize=2, ttl=300)
+    monkeypatch.setattr(auth_handler, "token_cache", cache)
+    return cache
+
+
+async def test_second_call_is_served_from_cache(fresh_cache, monkeypatch):
+    token = _token()
+    user = await verify_token(f"Bearer {token}")
+    assert user == {"id": "user-1", "username": "ada", "email": "ada@example.com"}
+
+    def no_decode(*args, **kwargs):
+        raise AssertionError("token decoded again")
+
+    monkeypatch.setattr(auth_handler.jwt, "decode", no_decode)
+    assert await verify_token(f"Bearer {token}") == user
+    assert fresh_cache.stats()["hits"] == 1 and fresh_cache.stats()["misses"] == 1
+
+
+async def test_invalid_tokens_are_not_cached(fresh_cache):
+    bad = jwt.encode({"sub": "x", "aud": "authenticated"}, "other-secret", algorithm="HS256")
+    for _ in range(2):
+        with pytest.raises(HTTPException) as exc:
+            await verify_token(f"Bearer {bad}")
+        assert exc.value.status_code == 401
+    assert fresh_cache.stats()["size"] == 0
+
+
+async def test_entries_expire_with_the_token(fresh_cache):
+    token = _token(exp_in=1)
+    await verify_token(f"Bearer {token}")
+    fresh_cache._entries[TokenClaimCache.key(token)] = (
+        fresh_cache._entries[TokenClaimCache.key(token)][0], time.time() - 1,
+    )
+    assert fresh_cache.get(token) is None
+
+
+def test_lru_eviction_is_bounded():
+    cache = TokenClaimCache(maxsize=2, ttl=300)
+    for name in ("a", "b"):
+        cache.put(name, {"id": name}, None)
+    cache.get("a")
+    cache.put("c", {"id": "c"}, None)
+    assert cache.get("b") is None and cache.get("a") == {"id": "a"} and cache.stats()["size"] == 2
+
+
+async def test_benchmark_per_request_savings(monkeypatch):
+    monkeypatch.setattr(auth_handler, "token_cache", TokenClaimCache(maxsize=1024, ttl=300))
+    header = f"Bearer {_token()}"
+    n = 2000
+
+    async def run(enabled):
+        auth_handler.token_cache.maxsize = 1024 if enabled else 0
+        auth_handler.token_cache.clear()
+        started = time.perf_counter()
+        for _ in range(n):
+            await verify_token(header)
+        return (time.perf_counter() - started) / n * 1e6
+
+    uncached = await run(False)
+    cached = await run(True)
+    print(f"\nverify_token: {uncached:.1f}us uncached, {cached:.1f}us cached ({uncached / cached:.1f}x)")
+    assert cached < uncached
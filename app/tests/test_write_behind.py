@@ -0,0 +1,140 @@
+"""
+Test cases for the write-behind journal behind record_history.
+"""
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from app.core.db.memory_supabase import MemoryDatabase
+from app.core.db.write_behind import WriteBehindJournal
+from app.services import task_history_service
+
+
+class Sink:
+    def __init__(self, fail=()):
+        self.batches = []
+        self.fail = list(fail)
+        self.gate = asyncio.Event()
+        self.gate.set()
+
+    async def write(self, rows):
+        await self.gate.wait()
+        if self.fail:
+            status = self.fail.pop(0)
+            if status:
+                raise HTTPException(status_code=status, detail="boom")
+        if any(row.get("bad") for row in rows):
+            raise HTTPException(status_code=500, detail="rejected")
+        self.batches.append([row["k"] for row in rows])
+
+
+def journal(sink, **kwargs):
+    options = {"flush_size": 3, "flush_interval": 0.05, "max_queue": 10, **kwargs}
+    return WriteBehindJournal("test", sink.write, key="k", **options)
+
+
+async def test_flushes_by_size_then_by_time_and_dedupes():
+    sink = Sink()
+    j = journal(sink)
+    j.start()
+    for k in ["a", "b", "b", "c", "d", "e"]:
+        await j.enqueue({"k": k})
+    await asyncio.sleep(0.01)
+    assert sink.batches == [["a", "b", "c"]]
+    await asyncio.sleep(0.1)
+    assert sink.batches == [["a", "b", "c"], ["d", "e"]]
+    await j.drain(timeout=1)
+
+
+async def test_full_queue_blocks_writers():
+    sink = Sink()
+    sink.gate.clear()
+    j = journal(sink, flush_size=2, max_queue=4)
+    j.start()
+    writers = asyncio.gather(*(j.enqueue({"k": str(i)}) for i in range(10)))
+    await asyncio.sleep(0.1)
+    assert len(j) == 4 and not writers.done()
+    sink.gate.set()
+    await asyncio.wait_for(writers, timeout=2)
+    await j.drain(timeout=1)
+    assert sorted(k for batch in sink.batches for k in batch) == sorted(str(i) for i in range(10))
+
+
+async def test_transient_failures_retry_and_rejected_rows_are_dropped():
+    sink = Sink(fail=[503])
+    j = journal(sink, flush_interval=0.01)
+    j.start()
+    for k in ["a", "b"]:
+        await j.enqueue({"k": k})
+    await j.enqueue({"k": "c", "bad": True})
+    await asyncio.sleep(0.2)
+    await j.drain(timeout=1)
+    assert sink.batches == [["a"], ["b"]]
+    assert (j.stats()["dropped"], len(j)) == (1, 0)
+
+
+async def test_drain_writes_what_is_left_and_unstarted_journal_writes_inline():
+    sink = Sink()
+    j = journal(sink, flush_interval=60)
+    await j.enqueue({"k": "inline"})
+    j.start()
+    await j.enqueue({"k": "queued"})
+    assert sink.batches == [["inline"]]
+    await j.drain(timeout=1)
+    assert sink.batches == [["inline"], ["queued"]]
+
+
+async def test_discard_drops_queued_rows():
+    sink = Sink()
+    j = journal(sink, flush_interval=60)
+    j.start()
+    for k in ["a1", "b1", "a2"]:
+        await j.enqueue({"k": k})
+    assert j.discard(lambda row: row["k"].startswith("a")) == 2
+    await j.drain(timeout=1)
+    assert sink.batches == [["b1"]]
+
+
+@pytest.fixture
+def history(monkeypatch, memory_supabase):
+    db = MemoryDatabase()
+    memory_supabase(db, task_history_service)
+    j = WriteBehindJournal("tasks_history", task_history_service.record_history_bulk, key="hash_id",
+                           flush_size=100, flush_interval=60, max_queue=1000)
+    monkeypatch.setattr(task_history_service, "history_journal", j)
+    return db, j
+
+
+async def test_record_history_is_write_behind_with_read_your_writes(history):
+    db, j = history
+    j.start()
+    for i in range(5):
+        await task_history_service.record_history(task_id="T1", action="updated", created_by="ada",
+                                                  title="Task", metadata=[{"field": "title", "old": str(i), "new": str(i + 1)}])
+    await task_history_service.record_history(task_id="T2", action="created", created_by="ada", title="Other")
+    assert db.transport.requests == 0 and len(j) == 6
+
+    items = await task_history_service.get_task_history("T1")
+    assert len(items) == 5
+    # one bulk upsert for all queued rows, then the read
+    assert db.transport.requests == 2
+    await j.drain(timeout=1)
+    assert len(db.rows_for("tasks_history", [])) == 6
+
+
+async def test_deleting_a_task_writes_its_history_inline_and_drops_the_queue(history, monkeypatch):
+    from app.services import task_service
+
+    db, j = history
+    db.seed("tasks", [{"task_id": "T1", "title": "Task", "is_subtask": False}])
+    monkeypatch.setattr(task_service, "get_supabase_client", task_history_service.get_supabase_client)
+    j.start()
+    await task_history_service.record_history(task_id="T1", action="updated", created_by="ada", title="Task",
+                                              metadata=[{"field": "title", "old": "a", "new": "b"}])
+    await task_service.delete_task("T1", user_id="ada")
+
+    assert len(j) == 0
+    assert [r["action"] for r in db.rows_for("tasks_history", [])] == ["deleted"]
+    await j.drain(timeout=1)
+
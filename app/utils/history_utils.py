@@ -1,4 +1,7 @@
 # app/services/history_utils.py
+import base64
+import json
+import zlib
 from hashlib import sha1
 from datetime import datetime
 from typing import Any, Dict, List
@@ -28,3 +31,50 @@ def compute_task_diff(before: Dict, after: Dict) -> List[Dict]:
 def history_hash(task_id: str, action: str, metadata: Any, created_by: str) -> str:
     payload = f"{task_id}|{action}|{str(metadata)}|{created_by}"
     return sha1(payload.encode()).hexdigest()
+
+def normalize_metadata(metadata: Any) -> List[Dict]:
+    """History metadata as the list of JSON-safe dicts the UI expects.
+
+    Done once when the row is written so reads can return rows as stored:
+    accepts a dict, a list, or either one serialized as a JSON string, and
+    turns dates/enums into strings.
+    """
+    if isinstance(metadata, str):
+        try:
+            metadata = json.loads(metadata)
+        except ValueError:
+            return []
+    if metadata is None:
+        return []
+    items = metadata if isinstance(metadata, list) else [metadata]
+    normalized = []
+    for item in items:
+        if isinstance(item, str):
+            try:
+                item = json.loads(item)
+            except ValueError:
+                continue
+        if isinstance(item, dict):
+            normalized.append(json.loads(json.dumps(item, default=str)))
+    return normalized
+
+PACKED_ENCODING = "zlib+base64"
+
+def pack_snapshot(value: Any, threshold: int) -> Any:
+    """A JSON-safe dict as stored in an activity row, zlib-compressed when large.
+
+    Dicts whose JSON is longer than ``threshold`` bytes are stored as
+    ``{"encoding": "zlib+base64", "data": ...}``; ``unpack_snapshot``
+    restores them. ``threshold <= 0`` disables compression.
+    """
+    if value is None:
+        return None
+    raw = json.dumps(value, default=str, separators=(",", ":"))
+    if threshold <= 0 or len(raw) <= threshold:
+        return json.loads(raw)
+    return {"encoding": PACKED_ENCODING, "data": base64.b64encode(zlib.compress(raw.encode(), 6)).decode()}
+
+def unpack_snapshot(value: Any) -> Any:
+    if isinstance(value, dict) and value.get("encoding") == PACKED_ENCODING and set(value) == {"encoding", "data"}:
+        return json.loads(zlib.decompress(base64.b64decode(value["data"])))
+    return value
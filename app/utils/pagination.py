@@ -0,0 +1,105 @@
+"""
+Keyset (cursor) pagination for list endpoints.
+
+Offset paging makes Postgres walk and discard every skipped row, so deep
+pages get slower and clients ended up fetching whole tables in one call
+(``limit=100000``). List endpoints page on ``(sort column, unique key)``
+instead. The route asks the service for one row more than the page size,
+and that extra row tells it whether there is a next page:
+
+    rows = await get_things(..., limit=limit + 1, cursor=cursor)
+    rows, next_cursor = paginate(rows, limit, sort_by, "thing_id", desc)
+    set_next_cursor(response, next_cursor)
+
+Cursors are opaque to clients: urlsafe base64 JSON holding the last row's
+sort value and key. A cursor is only valid with the sort it was issued for.
+Endpoints accept only sort columns that have a matching
+``(column, key)`` index (supabase/migrations/20251017_keyset_pagination.sql).
+
+Postgres sorts NULLs last ascending and first descending, and the seek
+conditions below follow that, so rows with a NULL sort value are neither
+skipped nor repeated.
+"""
+import base64
+import json
+from typing import Any, Iterable, List, Optional, Tuple
+
+from fastapi import HTTPException, Response
+
+from app.config.settings import LIST_PAGE_SIZE_MAX
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def clamp_limit(limit: int) -> int:
+    """Page size capped at LIST_PAGE_SIZE_MAX."""
+    return max(1, min(limit, LIST_PAGE_SIZE_MAX))
+
+
+def check_sort(sort_by: str, allowed: Iterable[str]) -> str:
+    allowed = tuple(allowed)
+    if sort_by not in allowed:
+        raise HTTPException(status_code=400, detail=f"sort_by must be one of: {', '.join(allowed)}")
+    return sort_by
+
+
+def encode_cursor(row: dict, sort_by: str, key: str, desc: bool) -> str:
+    payload = {"s": sort_by, "d": desc, "v": row.get(sort_by), "k": row.get(key)}
+    raw = json.dumps(payload, separators=(",", ":"), default=str).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort_by: str, desc: bool) -> Tuple[Any, Any]:
+    """Return the ``(sort value, key)`` a cursor points after."""
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        value, key = payload["v"], payload["k"]
+        issued_for = (payload["s"], payload["d"])
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if issued_for != (sort_by, desc) or key is None:
+        raise HTTPException(status_code=400, detail="Cursor does not match the requested sort order")
+    return value, key
+
+
+def _literal(value: Any) -> str:
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, (int, float)):
+        return str(value)
+    text = str(value).replace("\\", "\\\\").replace('"', '\\"')
+    return f'"{text}"'
+
+
+def apply_keyset(query, sort_by: str, key: str, desc: bool, cursor: Optional[str]):
+    """Order a PostgREST query by ``(sort_by, key)`` and seek past ``cursor``."""
+    query = query.order(sort_by, desc=desc)
+    if key != sort_by:
+        query = query.order(key, desc=desc)
+    if not cursor:
+        return query
+
+    value, last_key = decode_cursor(cursor, sort_by, desc)
+    op = "lt" if desc else "gt"
+    if key == sort_by:
+        return query.filter(key, op, last_key)
+    k = f"{key}.{op}.{_literal(last_key)}"
+    if value is None:
+        nulls = f"and({sort_by}.is.null,{k})"
+        return query.or_(f"{sort_by}.not.is.null,{nulls}" if desc else nulls)
+    v = _literal(value)
+    seek = f"{sort_by}.{op}.{v},and({sort_by}.eq.{v},{k})"
+    return query.or_(seek if desc else f"{seek},{sort_by}.is.null")
+
+
+def paginate(rows: List[dict], limit: int, sort_by: str, key: str, desc: bool) -> Tuple[List[dict], Optional[str]]:
+    """Trim a ``limit + 1`` fetch to the page and compute its next cursor."""
+    if len(rows) <= limit:
+        return rows, None
+    page = rows[:limit]
+    return page, encode_cursor(page[-1], sort_by, key, desc)
+
+
+def set_next_cursor(response: Response, next_cursor: Optional[str]):
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
@@ -0,0 +1,79 @@
+-- Effective role resolution in one round trip (used by app/services/rbac.py).
+--
+-- A user's role in a project is their project_members role, or, when they are
+-- not a member, their organization role if it is owner/admin on the
+-- project's organization. The API used to resolve this with up to three
+-- queries per check (project_members -> projects -> organization_members).
+
+CREATE INDEX IF NOT EXISTS idx_project_members_user ON public.project_members USING btree (user_id);
+
+
+-- Effective role of one user in one project (NULL = no access)
+CREATE OR REPLACE FUNCTION public.get_effective_project_role(p_user_id text, p_project_id text)
+ RETURNS text
+ LANGUAGE sql
+ STABLE
+ SET search_path = public
+AS $function$
+    select coalesce(
+        (select pm.role::text
+           from project_members pm
+          where pm.user_id::text = p_user_id
+            and pm.project_id = p_project_id
+          limit 1),
+        (select om.role::text
+           from projects p
+           join organization_members om on om.org_id = p.org_id
+          where p.project_id = p_project_id
+            and om.user_id::text = p_user_id
+            and om.role::text in ('owner', 'admin')
+          limit 1)
+    );
+$function$
+;
+
+
+-- Effective roles for many (user, project) pairs, passed as two parallel arrays.
+-- Pairs without access are omitted.
+CREATE OR REPLACE FUNCTION public.get_effective_project_roles(p_user_ids text[], p_project_ids text[])
+ RETURNS TABLE(user_id text, project_id text, role text)
+ LANGUAGE sql
+ STABLE
+ SET search_path = public
+AS $function$
+    select q.user_id, q.project_id, r.role
+      from unnest(p_user_ids, p_project_ids) as q(user_id, project_id)
+      cross join lateral (select public.get_effective_project_role(q.user_id, q.project_id) as role) r
+     where r.role is not null;
+$function$
+;
+
+
+-- Every org role and effective project role of a user, loaded once at login.
+-- scope is 'org' or 'project'; org_id is the organization either belongs to.
+CREATE OR REPLACE FUNCTION public.get_user_roles(p_user_id text)
+ RETURNS TABLE(scope text, scope_id text, org_id text, role text)
+ LANGUAGE sql
+ STABLE
+ SET search_path = public
+AS $function$
+    select 'org'::text, om.org_id, om.org_id, om.role::text
+      from organization_members om
+     where om.user_id::text = p_user_id
+    union all
+    select 'project'::text, pm.project_id, p.org_id, pm.role::text
+      from project_members pm
+      join projects p on p.project_id = pm.project_id
+     where pm.user_id::text = p_user_id
+    union all
+    select 'project'::text, p.project_id, p.org_id, om.role::text
+      from organization_members om
+      join projects p on p.org_id = om.org_id
+     where om.user_id::text = p_user_id
+       and om.role::text in ('owner', 'admin')
+       and not exists (
+           select 1 from project_members pm
+            where pm.project_id = p.project_id and pm.user_id::text = p_user_id
+       );
+$function$
+;
@@ -0,0 +1,33 @@
+-- Indexes behind keyset (cursor) pagination (app/utils/pagination.py).
+--
+-- Every list endpoint orders by (sort column, unique key) and seeks past the
+-- last row of the previous page, so each allowed sort column needs a
+-- composite index ending in the key. Sort columns without one are rejected.
+
+-- tasks / task_card_view: sort_by in (title, created_at, updated_at, due_date, status, priority, task_id)
+CREATE INDEX IF NOT EXISTS idx_tasks_title_key ON public.tasks USING btree (title, task_id);
+CREATE INDEX IF NOT EXISTS idx_tasks_created_key ON public.tasks USING btree (created_at, task_id);
+CREATE INDEX IF NOT EXISTS idx_tasks_updated_key ON public.tasks USING btree (updated_at, task_id);
+CREATE INDEX IF NOT EXISTS idx_tasks_due_key ON public.tasks USING btree (due_date, task_id);
+CREATE INDEX IF NOT EXISTS idx_tasks_status_key ON public.tasks USING btree (status, task_id);
+CREATE INDEX IF NOT EXISTS idx_tasks_priority_key ON public.tasks USING btree (priority, task_id);
+CREATE INDEX IF NOT EXISTS idx_tasks_project_title_key ON public.tasks USING btree (project_id, title, task_id);
+CREATE INDEX IF NOT EXISTS idx_tasks_project_created_key ON public.tasks USING btree (project_id, created_at, task_id);
+
+-- test_trackers / test_tracker_card_view: sort_by in (created_at, name, status, priority, tracker_id)
+CREATE INDEX IF NOT EXISTS idx_test_trackers_org_created_key ON public.test_trackers USING btree (org_id, created_at, tracker_id);
+CREATE INDEX IF NOT EXISTS idx_test_trackers_org_name_key ON public.test_trackers USING btree (org_id, name, tracker_id);
+CREATE INDEX IF NOT EXISTS idx_test_trackers_org_status_key ON public.test_trackers USING btree (org_id, status, tracker_id);
+CREATE INDEX IF NOT EXISTS idx_test_trackers_org_priority_key ON public.test_trackers USING btree (org_id, priority, tracker_id);
+
+-- organization_members: sort_by in (updated_at, invited_at, email, username, role, user_id)
+CREATE INDEX IF NOT EXISTS idx_org_members_org_updated_key ON public.organization_members USING btree (org_id, updated_at, user_id);
+CREATE INDEX IF NOT EXISTS idx_org_members_org_invited_key ON public.organization_members USING btree (org_id, invited_at, user_id);
+CREATE INDEX IF NOT EXISTS idx_org_members_org_email_key ON public.organization_members USING btree (org_id, email, user_id);
+CREATE INDEX IF NOT EXISTS idx_org_members_org_username_key ON public.organization_members USING btree (org_id, username, user_id);
+CREATE INDEX IF NOT EXISTS idx_org_members_org_role_key ON public.organization_members USING btree (org_id, role, user_id);
+
+-- task_comments (root comments of a task): sort_by in (created_at, updated_at, comment_id)
+CREATE INDEX IF NOT EXISTS idx_task_comments_task_created_key ON public.task_comments USING btree (task_id, created_at, comment_id);
+CREATE INDEX IF NOT EXISTS idx_task_comments_task_updated_key ON public.task_comments USING btree (task_id, updated_at, comment_id);
+CREATE INDEX IF NOT EXISTS idx_task_comments_parent ON public.task_comments USING btree (parent_comment_id);
@@ -0,0 +1,79 @@
+-- Batch subtask / dependency mutation in one transaction (POST /tasks/links,
+-- app/services/task_service.py: apply_task_links).
+--
+-- Attaching a subtask used to take ~8 round trips (reads, a child update, a
+-- parent update and a history insert), one item at a time, and a failure
+-- half way left the parent's sub_tasks and the child's is_subtask out of
+-- sync. This applies every change of a batch, recomputes the touched
+-- children's is_subtask and writes the history rows in one transaction:
+-- either all of it lands or none of it does.
+--
+-- p_ops:     [{"task_id", "add_subtasks", "remove_subtasks", "add_dependencies", "remove_dependencies"}]
+-- p_history: tasks_history rows (build_history_row), inserted with the hash_id guard
+-- Returns the updated parents and touched children.
+
+CREATE OR REPLACE FUNCTION public.apply_task_links(p_ops jsonb, p_history jsonb DEFAULT '[]'::jsonb)
+ RETURNS SETOF public.tasks
+ LANGUAGE plpgsql
+ SET search_path = public
+AS $function$
+declare
+    v_parents text[];
+    v_children text[];
+begin
+    select coalesce(array_agg(o->>'task_id' order by o->>'task_id'), '{}')
+      into v_parents
+      from jsonb_array_elements(p_ops) o;
+
+    select coalesce(array_agg(distinct c), '{}')
+      into v_children
+      from jsonb_array_elements(p_ops) o
+     cross join lateral (
+        select jsonb_array_elements_text(coalesce(o->'add_subtasks', '[]'::jsonb))
+        union all
+        select jsonb_array_elements_text(coalesce(o->'remove_subtasks', '[]'::jsonb))
+     ) as x(c);
+
+    -- Lock parents in a fixed order so concurrent batches can't deadlock
+    perform 1 from tasks where task_id = any(v_parents) order by task_id for update;
+
+    -- Set arithmetic on the current arrays (not on what the API read), keeping order
+    update tasks t
+       set sub_tasks = coalesce((
+               select array_agg(x order by n)
+                 from unnest(coalesce(t.sub_tasks, '{}')) with ordinality u(x, n)
+                where x <> all(array(select jsonb_array_elements_text(coalesce(o->'remove_subtasks', '[]'::jsonb))))
+           ), '{}') || coalesce((
+               select array_agg(x order by n)
+                 from jsonb_array_elements_text(coalesce(o->'add_subtasks', '[]'::jsonb)) with ordinality a(x, n)
+                where x <> all(coalesce(t.sub_tasks, '{}'))
+           ), '{}'),
+           dependencies = coalesce((
+               select array_agg(x order by n)
+                 from unnest(coalesce(t.dependencies, '{}')) with ordinality u(x, n)
+                where x <> all(array(select jsonb_array_elements_text(coalesce(o->'remove_dependencies', '[]'::jsonb))))
+           ), '{}') || coalesce((
+               select array_agg(x order by n)
+                 from jsonb_array_elements_text(coalesce(o->'add_dependencies', '[]'::jsonb)) with ordinality a(x, n)
+                where x <> all(coalesce(t.dependencies, '{}'))
+           ), '{}'),
+           updated_at = now()
+      from jsonb_array_elements(p_ops) o
+     where t.task_id = o->>'task_id';
+
+    -- A child is a subtask while any task still lists it
+    update tasks c
+       set is_subtask = exists (select 1 from tasks p where c.task_id = any(p.sub_tasks))
+     where c.task_id = any(v_children);
+
+    insert into tasks_history (history_id, task_id, action, title, metadata, created_by, actor_display, created_at, updated_at, hash_id)
+    select h->>'history_id', h->>'task_id', (h->>'action')::history_action_enum, h->>'title',
+           array(select jsonb_array_elements(coalesce(h->'metadata', '[]'::jsonb))),
+           h->>'created_by', h->>'actor_display', (h->>'created_at')::timestamptz, (h->>'updated_at')::timestamptz, h->>'hash_id'
+      from jsonb_array_elements(p_history) h
+        on conflict (hash_id) do nothing;
+
+    return query select * from tasks where task_id = any(v_parents || v_children);
+end;
+$function$
+;
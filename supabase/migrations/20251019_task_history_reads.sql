@@ -0,0 +1,33 @@
+-- Task history reads (app/services/task_history_service.py).
+--
+-- GET /task-history pages newest first on (created_at, history_id) and
+-- /task-history/latest reads the newest N events, both per task.
+CREATE INDEX IF NOT EXISTS idx_tasks_history_task_created_key
+    ON public.tasks_history USING btree (task_id, created_at DESC, history_id DESC);
+
+-- metadata is normalized when rows are written (normalize_metadata), and the
+-- read path no longer fixes it up per row. Bring old rows in line: NULL
+-- becomes an empty array and elements stored as JSON strings are parsed.
+CREATE OR REPLACE FUNCTION pg_temp.parse_history_element(e jsonb)
+ RETURNS jsonb
+ LANGUAGE plpgsql
+AS $function$
+begin
+    if jsonb_typeof(e) = 'string' then
+        return (e #>> '{}')::jsonb;
+    end if;
+    return e;
+exception when others then
+    return null;
+end;
+$function$;
+
+UPDATE public.tasks_history h
+   SET metadata = coalesce(array(
+           select p
+             from unnest(h.metadata) as e
+            cross join lateral pg_temp.parse_history_element(e) as p
+            where jsonb_typeof(p) = 'object'
+       ), '{}'::jsonb[])
+ WHERE h.metadata IS NULL
+    OR EXISTS (select 1 from unnest(h.metadata) e where jsonb_typeof(e) <> 'object');
@@ -0,0 +1,126 @@
+-- Ranked bug search (app/services/bug_service.py: search_bugs).
+--
+-- The tracker search box used to filter with title/description ILIKE '%q%',
+-- a sequential scan of bugs on every keystroke. Search now goes through
+-- search_bugs_ranked: a weighted tsvector over title (A) and description (B)
+-- with prefix matching on every word, plus trigram indexes so the substring
+-- fallback (partial words, identifiers, typos in the middle of a word) is
+-- index-backed as well. Results are ordered by relevance and carry
+-- highlighted snippets.
+--
+-- The tsvector is generated by an IMMUTABLE function and indexed as an
+-- expression rather than stored as a generated column, so select('*') on
+-- bugs (exports, get_bug, the API payloads) does not start carrying it.
+
+CREATE SCHEMA IF NOT EXISTS extensions;
+CREATE EXTENSION IF NOT EXISTS pg_trgm WITH SCHEMA extensions;
+
+
+CREATE OR REPLACE FUNCTION public.bug_search_vector(p_title text, p_description text)
+ RETURNS tsvector
+ LANGUAGE sql
+ IMMUTABLE PARALLEL SAFE
+AS $function$
+    select setweight(to_tsvector('english'::regconfig, coalesce(p_title, '')), 'A')
+        || setweight(to_tsvector('english'::regconfig, coalesce(p_description, '')), 'B');
+$function$
+;
+
+-- Every word of the search box as a prefix ('logi fail' -> 'logi':* & 'fail':*),
+-- so results follow the user while they type. NULL when nothing is left.
+CREATE OR REPLACE FUNCTION public.bug_search_query(p_query text)
+ RETURNS tsquery
+ LANGUAGE sql
+ IMMUTABLE PARALLEL SAFE
+AS $function$
+    select nullif(to_tsquery('english'::regconfig, coalesce(string_agg(quote_literal(w) || ':*', ' & '), '')), ''::tsquery)
+      from regexp_split_to_table(lower(coalesce(p_query, '')), '[^[:alnum:]]+') as w
+     where w <> '';
+$function$
+;
+
+CREATE INDEX IF NOT EXISTS idx_bugs_search_vector
+    ON public.bugs USING gin (public.bug_search_vector(title, description));
+CREATE INDEX IF NOT EXISTS idx_bugs_title_trgm
+    ON public.bugs USING gin (title extensions.gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_bugs_description_trgm
+    ON public.bugs USING gin (description extensions.gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_bugs_tracker_updated
+    ON public.bugs USING btree (tracker_id, updated_at DESC);
+
+
+-- One page of bugs matching p_query plus the BugSearchParams filters.
+-- A bug matches when the prefix tsquery matches its search vector or when the
+-- raw text occurs in title/description (the old ILIKE semantics, now served
+-- by the trigram indexes). p_sort_by = 'relevance' (or NULL) orders by rank;
+-- any other bugs column orders by that column. total is the number of
+-- matches before paging.
+CREATE OR REPLACE FUNCTION public.search_bugs_ranked(
+    p_query text,
+    p_tracker_id text DEFAULT NULL,
+    p_project_id text DEFAULT NULL,
+    p_status text[] DEFAULT NULL,
+    p_priority text[] DEFAULT NULL,
+    p_type text[] DEFAULT NULL,
+    p_assignee text[] DEFAULT NULL,
+    p_reporter text[] DEFAULT NULL,
+    p_tags text[] DEFAULT NULL,
+    p_sort_by text DEFAULT 'relevance',
+    p_sort_desc boolean DEFAULT true,
+    p_limit integer DEFAULT 20,
+    p_offset integer DEFAULT 0
+)
+ RETURNS TABLE(bug jsonb, rank real, title_highlight text, description_snippet text, total bigint)
+ LANGUAGE plpgsql
+ STABLE
+ SET search_path = public, extensions
+AS $function$
+declare
+    v_tsq tsquery := public.bug_search_query(p_query);
+    v_like text := '%' || replace(replace(replace(p_query, '\', '\\'), '%', '\%'), '_', '\_') || '%';
+    v_order text;
+begin
+    if p_sort_by is null or p_sort_by = 'relevance' then
+        v_order := 'rank DESC, updated_at DESC NULLS LAST, id';
+    else
+        v_order := format('%I %s, id', p_sort_by, case when p_sort_desc then 'DESC NULLS LAST' else 'ASC NULLS FIRST' end);
+    end if;
+
+    return query execute format($q$
+        select to_jsonb(p) - 'rank' - 'total',
+               p.rank,
+               ts_headline('english', p.title, coalesce($1, ''::tsquery),
+                           'HighlightAll=true, StartSel=<mark>, StopSel=</mark>'),
+               ts_headline('english', coalesce(p.description, ''), coalesce($1, ''::tsquery),
+                           'MaxFragments=2, MaxWords=24, MinWords=8, StartSel=<mark>, StopSel=</mark>'),
+               p.total
+          from (
+                select m.*
+                  from (
+                        select b.*,
+                               (coalesce(ts_rank_cd(public.bug_search_vector(b.title, b.description), $1, 32), 0)
+                                + similarity(b.title, $2))::real as rank,
+                               count(*) over () as total
+                          from bugs b
+                         where (public.bug_search_vector(b.title, b.description) @@ $1
+                                or b.title ilike $3
+                                or b.description ilike $3)
+                           and ($4::text is null or b.tracker_id = $4)
+                           and ($5::text is null or b.project_id = $5)
+                           and ($6::text[] is null or b.status::text = any($6))
+                           and ($7::text[] is null or b.priority::text = any($7))
+                           and ($8::text[] is null or b.type::text = any($8))
+                           and ($9::text[] is null or b.assignee = any($9))
+                           and ($10::text[] is null or b.reporter = any($10))
+                           and ($11::text[] is null or b.tags @> $11)
+                       ) m
+                 order by %s
+                 limit $12 offset $13
+               ) p
+         order by %s
+    $q$, v_order, v_order)
+    using v_tsq, p_query, v_like, p_tracker_id, p_project_id, p_status, p_priority, p_type,
+          p_assignee, p_reporter, p_tags, p_limit, p_offset;
+end;
+$function$
+;
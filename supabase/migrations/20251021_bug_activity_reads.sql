@@ -0,0 +1,5 @@
+-- Bug activity reads (app/services/bug_service.py: get_bug_activity_logs).
+--
+-- GET /bugs/{bug_id}/history pages newest first on (created_at, id) per bug.
+CREATE INDEX IF NOT EXISTS idx_bug_activity_logs_bug_created_key
+    ON public.bug_activity_logs USING btree (bug_id, created_at DESC, id DESC);
@@ -0,0 +1,80 @@
+-- Index-friendly user matching for the effective role functions
+-- (20251016_effective_roles.sql, used by app/services/rbac.py).
+--
+-- The first version compared user_id::text = p_user_id. Casting the uuid
+-- column keeps Postgres from using idx_project_members_user and the
+-- membership primary keys, so the login role preload and every
+-- get_effective_project_role were sequential scans of the membership
+-- tables. The parameter is cast instead; signatures are unchanged.
+-- p_user_id must be a user uuid (a malformed id is an error, not NULL).
+
+
+-- Effective role of one user in one project (NULL = no access)
+CREATE OR REPLACE FUNCTION public.get_effective_project_role(p_user_id text, p_project_id text)
+ RETURNS text
+ LANGUAGE sql
+ STABLE
+ SET search_path = public
+AS $function$
+    select coalesce(
+        (select pm.role::text
+           from project_members pm
+          where pm.user_id = p_user_id::uuid
+            and pm.project_id = p_project_id
+          limit 1),
+        (select om.role::text
+           from projects p
+           join organization_members om on om.org_id = p.org_id
+          where p.project_id = p_project_id
+            and om.user_id = p_user_id::uuid
+            and om.role::text in ('owner', 'admin')
+          limit 1)
+    );
+$function$
+;
+
+
+-- Effective roles for many (user, project) pairs, passed as two parallel arrays.
+-- Pairs without access are omitted.
+CREATE OR REPLACE FUNCTION public.get_effective_project_roles(p_user_ids text[], p_project_ids text[])
+ RETURNS TABLE(user_id text, project_id text, role text)
+ LANGUAGE sql
+ STABLE
+ SET search_path = public
+AS $function$
+    select q.user_id, q.project_id, r.role
+      from unnest(p_user_ids, p_project_ids) as q(user_id, project_id)
+      cross join lateral (select public.get_effective_project_role(q.user_id, q.project_id) as role) r
+     where r.role is not null;
+$function$
+;
+
+
+-- Every org role and effective project role of a user, loaded once at login.
+-- scope is 'org' or 'project'; org_id is the organization either belongs to.
+CREATE OR REPLACE FUNCTION public.get_user_roles(p_user_id text)
+ RETURNS TABLE(scope text, scope_id text, org_id text, role text)
+ LANGUAGE sql
+ STABLE
+ SET search_path = public
+AS $function$
+    select 'org'::text, om.org_id, om.org_id, om.role::text
+      from organization_members om
+     where om.user_id = p_user_id::uuid
+    union all
+    select 'project'::text, pm.project_id, p.org_id, pm.role::text
+      from project_members pm
+      join projects p on p.project_id = pm.project_id
+     where pm.user_id = p_user_id::uuid
+    union all
+    select 'project'::text, p.project_id, p.org_id, om.role::text
+      from organization_members om
+      join projects p on p.org_id = om.org_id
+     where om.user_id = p_user_id::uuid
+       and om.role::text in ('owner', 'admin')
+       and not exists (
+           select 1 from project_members pm
+            where pm.project_id = p.project_id and pm.user_id = p_user_id::uuid
+       );
+$function$
+;
@@ -0,0 +1,58 @@
+-- Cross-worker invalidation for the membership role cache (app/services/rbac.py).
+--
+-- Each API worker caches resolved roles in memory and only hears about the
+-- membership writes it made itself. Every write to organization_members,
+-- project_members or a project's org bumps this single counter; the workers
+-- re-read it (at most every ROLE_CACHE_SYNC_INTERVAL seconds) and drop their
+-- whole role cache when it moved, so a revoked membership stops working on
+-- every worker within that interval instead of ROLE_CACHE_TTL. The check is
+-- on by default; until this migration is applied every read fails and
+-- clears the worker's role cache.
+
+CREATE TABLE IF NOT EXISTS public.role_cache_generation (
+    id smallint PRIMARY KEY DEFAULT 1 CHECK (id = 1),
+    generation bigint NOT NULL DEFAULT 0,
+    updated_at timestamptz NOT NULL DEFAULT now()
+);
+
+INSERT INTO public.role_cache_generation (id) VALUES (1) ON CONFLICT (id) DO NOTHING;
+
+-- Read-only for API clients; only the triggers below write it
+ALTER TABLE public.role_cache_generation ENABLE ROW LEVEL SECURITY;
+
+DROP POLICY IF EXISTS role_cache_generation_read ON public.role_cache_generation;
+CREATE POLICY role_cache_generation_read ON public.role_cache_generation
+    FOR SELECT USING (true);
+
+
+CREATE OR REPLACE FUNCTION public.bump_role_cache_generation()
+ RETURNS trigger
+ LANGUAGE plpgsql
+ SECURITY DEFINER
+ SET search_path = public
+AS $function$
+begin
+    update public.role_cache_generation
+       set generation = generation + 1, updated_at = now()
+     where id = 1;
+    return null;
+end;
+$function$;
+
+
+-- Statement-level: a bulk membership write bumps the counter once
+DROP TRIGGER IF EXISTS trg_organization_members_role_cache ON public.organization_members;
+CREATE TRIGGER trg_organization_members_role_cache
+    AFTER INSERT OR UPDATE OR DELETE ON public.organization_members
+    FOR EACH STATEMENT EXECUTE FUNCTION public.bump_role_cache_generation();
+
+DROP TRIGGER IF EXISTS trg_project_members_role_cache ON public.project_members;
+CREATE TRIGGER trg_project_members_role_cache
+    AFTER INSERT OR UPDATE OR DELETE ON public.project_members
+    FOR EACH STATEMENT EXECUTE FUNCTION public.bump_role_cache_generation();
+
+-- Inherited owner/admin roles follow the project's org
+DROP TRIGGER IF EXISTS trg_projects_role_cache ON public.projects;
+CREATE TRIGGER trg_projects_role_cache
+    AFTER UPDATE OF org_id OR DELETE ON public.projects
+    FOR EACH STATEMENT EXECUTE FUNCTION public.bump_role_cache_generation();
@@ -0,0 +1,105 @@
+-- Escaped search highlights (app/services/bug_service.py: search_bugs).
+--
+-- search_bugs_ranked (20251020_bug_search.sql) returned ts_headline output:
+-- the raw title and description with <mark> tags inserted. Clients render
+-- it as HTML to show the marks, so a bug titled <img onerror=...> ran in
+-- the browser of everyone whose search matched it. The highlights are now
+-- HTML-escaped text in which only the <mark>...</mark> pairs are markup.
+--
+-- ts_headline marks matches with plain-text sentinels, the result is
+-- escaped, and the sentinels are swapped for the tags afterwards. Sentinels
+-- already present in the bug text are dropped first, so they cannot be
+-- used to smuggle in anything but a <mark>.
+
+
+CREATE OR REPLACE FUNCTION public.bug_search_headline(p_text text, p_query tsquery, p_options text)
+ RETURNS text
+ LANGUAGE sql
+ STABLE PARALLEL SAFE
+AS $function$
+    select replace(replace(
+               replace(replace(replace(replace(replace(
+                   ts_headline('english'::regconfig,
+                               replace(replace(coalesce(p_text, ''), '[[mark]]', ''), '[[/mark]]', ''),
+                               coalesce(p_query, ''::tsquery),
+                               p_options || ', StartSel=[[mark]], StopSel=[[/mark]]'),
+                   '&', '&amp;'), '<', '&lt;'), '>', '&gt;'), '"', '&quot;'), '''', '&#x27;'),
+               '[[mark]]', '<mark>'), '[[/mark]]', '</mark>');
+$function$
+;
+
+
+-- One page of bugs matching p_query plus the BugSearchParams filters.
+-- A bug matches when the prefix tsquery matches its search vector or when the
+-- raw text occurs in title/description (the old ILIKE semantics, now served
+-- by the trigram indexes). p_sort_by = 'relevance' (or NULL) orders by rank;
+-- any other bugs column orders by that column. total is the number of
+-- matches before paging. Only the two highlight columns differ from
+-- 20251020_bug_search.sql.
+CREATE OR REPLACE FUNCTION public.search_bugs_ranked(
+    p_query text,
+    p_tracker_id text DEFAULT NULL,
+    p_project_id text DEFAULT NULL,
+    p_status text[] DEFAULT NULL,
+    p_priority text[] DEFAULT NULL,
+    p_type text[] DEFAULT NULL,
+    p_assignee text[] DEFAULT NULL,
+    p_reporter text[] DEFAULT NULL,
+    p_tags text[] DEFAULT NULL,
+    p_sort_by text DEFAULT 'relevance',
+    p_sort_desc boolean DEFAULT true,
+    p_limit integer DEFAULT 20,
+    p_offset integer DEFAULT 0
+)
+ RETURNS TABLE(bug jsonb, rank real, title_highlight text, description_snippet text, total bigint)
+ LANGUAGE plpgsql
+ STABLE
+ SET search_path = public, extensions
+AS $function$
+declare
+    v_tsq tsquery := public.bug_search_query(p_query);
+    v_like text := '%' || replace(replace(replace(p_query, '\', '\\'), '%', '\%'), '_', '\_') || '%';
+    v_order text;
+begin
+    if p_sort_by is null or p_sort_by = 'relevance' then
+        v_order := 'rank DESC, updated_at DESC NULLS LAST, id';
+    else
+        v_order := format('%I %s, id', p_sort_by, case when p_sort_desc then 'DESC NULLS LAST' else 'ASC NULLS FIRST' end);
+    end if;
+
+    return query execute format($q$
+        select to_jsonb(p) - 'rank' - 'total',
+               p.rank,
+               public.bug_search_headline(p.title, $1, 'HighlightAll=true'),
+               public.bug_search_headline(p.description, $1, 'MaxFragments=2, MaxWords=24, MinWords=8'),
+               p.total
+          from (
+                select m.*
+                  from (
+                        select b.*,
+                               (coalesce(ts_rank_cd(public.bug_search_vector(b.title, b.description), $1, 32), 0)
+                                + similarity(b.title, $2))::real as rank,
+                               count(*) over () as total
+                          from bugs b
+                         where (public.bug_search_vector(b.title, b.description) @@ $1
+                                or b.title ilike $3
+                                or b.description ilike $3)
+                           and ($4::text is null or b.tracker_id = $4)
+                           and ($5::text is null or b.project_id = $5)
+                           and ($6::text[] is null or b.status::text = any($6))
+                           and ($7::text[] is null or b.priority::text = any($7))
+                           and ($8::text[] is null or b.type::text = any($8))
+                           and ($9::text[] is null or b.assignee = any($9))
+                           and ($10::text[] is null or b.reporter = any($10))
+                           and ($11::text[] is null or b.tags @> $11)
+                       ) m
+                 order by %s
+                 limit $12 offset $13
+               ) p
+         order by %s
+    $q$, v_order, v_order)
+    using v_tsq, p_query, v_like, p_tracker_id, p_project_id, p_status, p_priority, p_type,
+          p_assignee, p_reporter, p_tags, p_limit, p_offset;
+end;
+$function$
+;
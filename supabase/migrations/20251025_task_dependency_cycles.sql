@@ -0,0 +1,64 @@
+-- Dependency cycles rejected by the database (app/services/task_service.py:
+-- update_task, apply_task_links).
+--
+-- The API checks new dependency edges against its in-memory project graph
+-- (app/services/dependency_graph.py) under a per-project lock, but both are
+-- per worker process: two workers could each accept half of a cycle. This
+-- trigger is the check every worker shares. Dependency writes take one
+-- transaction-scoped advisory lock, so they are checked one at a time against
+-- committed data, and a write that would close a cycle fails with SQLSTATE
+-- TMC01 and the cycle (e.g. "A -> C -> B -> A") as the error detail, which
+-- the API turns into its usual 400. The lock is global rather than per
+-- project because dependencies may point into other projects; dependency
+-- edits are rare enough for that not to matter.
+
+
+CREATE OR REPLACE FUNCTION public.tasks_reject_dependency_cycle()
+ RETURNS trigger
+ LANGUAGE plpgsql
+ SET search_path = public
+AS $function$
+declare
+    v_path text[];
+begin
+    if cardinality(coalesce(new.dependencies, '{}')) = 0 then
+        return new;
+    end if;
+    if tg_op = 'UPDATE' and new.dependencies is not distinct from old.dependencies then
+        return new;
+    end if;
+
+    perform pg_advisory_xact_lock(hashtext('tasks_dependency_cycle'));
+
+    -- Walk prerequisites from the new edges; reaching the task again is a cycle.
+    -- The task's own stored row is skipped: its edges are the new ones.
+    with recursive walk(task_id, path) as (
+        select d, array[new.task_id, d]
+          from unnest(new.dependencies) as d
+        union all
+        select dep, w.path || dep
+          from walk w
+          join tasks t on t.task_id = w.task_id
+         cross join lateral unnest(coalesce(t.dependencies, '{}')) as dep
+         where w.task_id <> new.task_id
+           and (dep = new.task_id or dep <> all(w.path))
+    )
+    select path into v_path
+      from walk
+     where task_id = new.task_id
+     order by cardinality(path)
+     limit 1;
+
+    if v_path is not null then
+        raise exception 'dependency cycle'
+            using errcode = 'TMC01', detail = array_to_string(v_path, ' -> ');
+    end if;
+    return new;
+end;
+$function$
+;
+
+DROP TRIGGER IF EXISTS trg_tasks_reject_dependency_cycle ON public.tasks;
+CREATE TRIGGER trg_tasks_reject_dependency_cycle
+    BEFORE INSERT OR UPDATE OF dependencies ON public.tasks
+    FOR EACH ROW EXECUTE FUNCTION public.tasks_reject_dependency_cycle();
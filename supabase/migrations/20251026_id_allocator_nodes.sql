@@ -0,0 +1,69 @@
+-- Node ids for the record ID allocator (app/core/id_allocator.py), leased
+-- from the database.
+--
+-- Generated IDs embed a 13-bit node id, and two processes minting with the
+-- same node can produce the same ID. Each API worker now leases a node here
+-- at start-up instead of deriving it from configuration: the claim is an
+-- INSERT ... ON CONFLICT on the node's row that only succeeds when the row is
+-- free or its lease has expired, so two live workers never hold the same
+-- node. Workers renew their lease well before it runs out; a worker that
+-- finds its node taken (after losing the database for longer than the lease)
+-- claims a new one. Crashed workers' nodes free up when their lease expires.
+-- Leases are not released on shutdown, so a node is not reused while IDs it
+-- minted could still be ahead of the next holder's clock.
+
+CREATE TABLE IF NOT EXISTS public.id_allocator_nodes (
+    node integer PRIMARY KEY CHECK (node BETWEEN 0 AND 8191),
+    holder text NOT NULL,
+    leased_until timestamptz NOT NULL
+);
+
+-- Only the functions below (as the service role) touch it
+ALTER TABLE public.id_allocator_nodes ENABLE ROW LEVEL SECURITY;
+
+-- Where the next claim starts looking, so workers don't all probe node 0 first
+CREATE SEQUENCE IF NOT EXISTS public.id_allocator_node_seq;
+
+
+-- Renews p_node if p_holder still holds it, otherwise claims the first free
+-- or expired node; returns the node. Raises when all 8192 are leased.
+CREATE OR REPLACE FUNCTION public.lease_id_allocator_node(
+    p_holder text,
+    p_node integer DEFAULT NULL,
+    p_ttl_seconds integer DEFAULT 600
+)
+ RETURNS integer
+ LANGUAGE plpgsql
+ SECURITY DEFINER
+ SET search_path = public
+AS $function$
+declare
+    v_until timestamptz := now() + make_interval(secs => p_ttl_seconds);
+    v_node integer;
+begin
+    if p_node is not null then
+        update id_allocator_nodes
+           set leased_until = v_until
+         where node = p_node and holder = p_holder
+        returning node into v_node;
+        if v_node is not null then
+            return v_node;
+        end if;
+    end if;
+
+    for i in 1..8192 loop
+        insert into id_allocator_nodes as n (node, holder, leased_until)
+        values ((nextval('id_allocator_node_seq') % 8192)::integer, p_holder, v_until)
+        on conflict (node) do update
+            set holder = excluded.holder, leased_until = excluded.leased_until
+            where n.leased_until < now()
+        returning n.node into v_node;
+        if v_node is not null then
+            return v_node;
+        end if;
+    end loop;
+
+    raise exception 'all id allocator nodes are leased';
+end;
+$function$
+;